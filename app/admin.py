@@ -1,5 +1,10 @@
-from django.contrib import admin
-from .models import Restaurant, Table, Category, MenuItem, Staff, UserProfile, Cart, CartItem, Order, OrderItem, Review, LoyaltyTransaction, InventoryTransaction, AdminDashboard, Image
+from django import forms
+from django.contrib import admin, messages
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+from .models import Restaurant, Table, Category, MenuItem, Staff, UserProfile, Cart, CartItem, Order, OrderItem, Review, LoyaltyTransaction, InventoryTransaction, InventoryLedger, AdminDashboard, StaleOrderError, Image, BackgroundJob, OrderStatusTransition, PrepTimeModel, RestockSuggestion, InventorySnapshot, InventoryDailySummary, ArchivedOrder, ArchiveRollup, OrderEvent, OutboxOffset, DailyReport, MenuItemNeighbors, MenuItemRating, Reservation
+from .admin_tools import LargeTableAdmin, id_input_filter
+
+RestaurantIdFilter = id_input_filter('restaurant', "Restoran ID")
 
 # Image modelini ro'yxatdan o'tkazish
 @admin.register(Image)
@@ -16,80 +21,223 @@ class RestaurantAdmin(admin.ModelAdmin):
     search_fields = ['name', 'address']
     prepopulated_fields = {'slug': ('name',)}
     list_editable = ['is_active']
+    list_select_related = ['owner']
+    autocomplete_fields = ['owner']
     filter_horizontal = ['images']  # images maydoni uchun qulay interfeys
 
 # Qolgan admin sinflari o'zgarishsiz qoladi
 @admin.register(Table)
 class TableAdmin(admin.ModelAdmin):
     list_display = ['restaurant', 'table_number', 'qr_code', 'capacity']
-    list_filter = ['restaurant']
+    list_filter = [RestaurantIdFilter]
+    list_select_related = ['restaurant']
+    autocomplete_fields = ['restaurant']
     search_fields = ['table_number', 'qr_code']
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'restaurant', 'order']
-    list_filter = ['restaurant']
+    list_filter = [RestaurantIdFilter]
+    list_select_related = ['restaurant']
+    autocomplete_fields = ['restaurant']
     search_fields = ['name']
     list_editable = ['order']
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ['name', 'restaurant', 'category', 'price', 'discount_price', 'is_available', 'stock_quantity']
-    list_filter = ['restaurant', 'category', 'is_available']
+    list_display = ['name', 'restaurant', 'category', 'price', 'discount_price', 'current_price', 'is_available', 'stock_quantity']
+    list_filter = [RestaurantIdFilter, id_input_filter('category', "Kategoriya ID"), 'is_available']
     search_fields = ['name', 'description']
     list_editable = ['is_available', 'stock_quantity']
+    list_select_related = ['restaurant', 'category__restaurant']
+    autocomplete_fields = ['restaurant', 'category']
+
+    def save_model(self, request, obj, form, change):
+        # Mavjud element zaxirasi faqat InventoryLedger orqali: farq jurnalga 'adjustment' bo'lib yoziladi
+        if not change or 'stock_quantity' not in form.changed_data:
+            return super().save_model(request, obj, form, change)
+        fields = [
+            field.name for field in obj._meta.concrete_fields
+            if field.name in form.changed_data and field.name != 'stock_quantity'
+        ]
+        with InventoryLedger() as ledger:
+            if fields:
+                obj.save(update_fields=[*fields, 'updated_at'])
+            if not ledger.set_quantity(obj, form.cleaned_data['stock_quantity'], 'adjustment', f"Admin: {request.user.username}"):
+                self.message_user(request, f"{obj.name}: zaxira o'zgartirilmadi", messages.ERROR)
 
 @admin.register(Staff)
 class StaffAdmin(admin.ModelAdmin):
     list_display = ['user', 'restaurant', 'role']
-    list_filter = ['restaurant', 'role']
+    list_filter = [RestaurantIdFilter, 'role']
     search_fields = ['user__username']
+    list_select_related = ['user', 'restaurant']
+    autocomplete_fields = ['user', 'restaurant']
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(LargeTableAdmin):
     list_display = ['user', 'phone_number', 'loyalty_points', 'preferred_language']
     search_fields = ['user__username', 'phone_number']
+    list_select_related = ['user']
+    autocomplete_fields = ['user']
 
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
-    list_display = ['user_profile', 'restaurant', 'table', 'total_price']
-    list_filter = ['restaurant']
+class CartAdmin(LargeTableAdmin):
+    list_display = ['user_profile', 'restaurant', 'table', 'items_total', 'updated_at']
+    list_filter = [RestaurantIdFilter]
     search_fields = ['user_profile__user__username']
+    list_select_related = ['user_profile__user', 'restaurant', 'table__restaurant']
+    autocomplete_fields = ['user_profile', 'restaurant', 'table']
+
+    def get_queryset(self, request):
+        # Cart.total_price har bir qator uchun so'rov yuboradi; jami bitta subquery bilan hisoblanadi
+        totals = CartItem.objects.filter(cart=OuterRef('pk')).values('cart').annotate(
+            total=Sum(ExpressionWrapper(
+                F('quantity') * F('menu_item__current_price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ))
+        ).values('total')
+        return super().get_queryset(request).annotate(items_total=Subquery(totals))
+
+    @admin.display(description="Umumiy narx", ordering='items_total')
+    def items_total(self, obj):
+        return obj.items_total or 0
 
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(LargeTableAdmin):
     list_display = ['cart', 'menu_item', 'quantity']
-    list_filter = ['cart__restaurant']
+    list_filter = [id_input_filter('cart__restaurant', "Restoran ID")]
+    list_select_related = ['cart__user_profile__user', 'cart__restaurant', 'cart__table', 'menu_item__restaurant']
+    autocomplete_fields = ['cart', 'menu_item']
+
+class OrderAdminForm(forms.ModelForm):
+    # Forma ochilgandagi versiya: shu orada holat o'zgargan bo'lsa saqlash rad etiladi (409 kabi)
+    expected_version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['expected_version'].initial = self.instance.version
+
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        order = self.instance
+        if order.pk and status != order.status and not order.can_transition_to(status):
+            raise forms.ValidationError(f"{order.status} -> {status} o'tishi ruxsat etilmagan")
+        return status
+
+    def clean(self):
+        cleaned_data = super().clean()
+        expected_version = cleaned_data.get('expected_version')
+        if self.instance.pk and expected_version is not None and expected_version != self.instance.version:
+            raise forms.ValidationError(
+                f"Buyurtma shu orada o'zgartirildi (versiya {self.instance.version}, "
+                f"forma ochilganda {expected_version}). Sahifani yangilab qayta urinib ko'ring."
+            )
+        return cleaned_data
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(LargeTableAdmin):
+    form = OrderAdminForm
     list_display = ['id', 'restaurant', 'user_profile', 'table', 'status', 'total_price', 'created_at']
-    list_filter = ['restaurant', 'status', 'created_at']
+    list_filter = [RestaurantIdFilter, 'status', 'created_at']
     search_fields = ['id', 'user_profile__user__username']
-    list_editable = ['status']
+    readonly_fields = ['version', 'status_changed_at']
+    list_select_related = ['restaurant', 'user_profile__user', 'table__restaurant']
+    autocomplete_fields = ['restaurant', 'user_profile', 'table', 'assigned_waiter']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # To'liq save() status va versiyani forma ochilgandagi qiymat bilan qayta yozardi:
+        # holat Order.update_status orqali (jurnal, outbox, versiya), qolganlari update_fields bilan
+        if 'status' in form.changed_data:
+            new_status = obj.status
+            obj.status = form.initial['status']
+            try:
+                obj.update_status(new_status, expected_version=form.cleaned_data['expected_version'])
+            except StaleOrderError as exc:
+                self.message_user(request, f"O'zgarishlar saqlanmadi: {exc}", messages.ERROR)
+                return
+        concrete = {field.name for field in obj._meta.concrete_fields}
+        fields = [name for name in form.changed_data if name in concrete and name not in ('status', 'version')]
+        if fields:
+            obj.save(update_fields=[*fields, 'updated_at'])
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdmin):
     list_display = ['order', 'menu_item', 'quantity', 'price']
-    list_filter = ['order__restaurant']
+    list_filter = [id_input_filter('order__restaurant', "Restoran ID")]
+    list_select_related = ['order__restaurant', 'order__table', 'menu_item__restaurant']
+    autocomplete_fields = ['order', 'menu_item']
+
+@admin.register(OrderStatusTransition)
+class OrderStatusTransitionAdmin(LargeTableAdmin):
+    list_display = ['order', 'from_status', 'to_status', 'changed_by', 'duration', 'created_at']
+    list_filter = ['to_status', 'created_at']
+    search_fields = ['order__id']
+    list_select_related = ['order__restaurant', 'order__table', 'changed_by__user', 'changed_by__restaurant']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(OrderEvent)
+class OrderEventAdmin(LargeTableAdmin):
+    list_display = ['id', 'event_type', 'order_id', 'restaurant_id', 'created_at']
+    list_filter = ['event_type', id_input_filter('restaurant_id', "Restoran ID")]
+    search_fields = ['order_id']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(OutboxOffset)
+class OutboxOffsetAdmin(admin.ModelAdmin):
+    list_display = ['handler', 'last_event_id', 'processed', 'last_batch_size', 'last_batch_seconds', 'gap_since', 'updated_at']
+    readonly_fields = ['lease_token', 'locked_until', 'last_error', 'gap_since']
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ['order', 'user_profile', 'rating', 'created_at']
     list_filter = ['rating', 'created_at']
     search_fields = ['order__id', 'user_profile__user__username']
+    list_select_related = ['order__restaurant', 'order__table', 'user_profile__user']
+    autocomplete_fields = ['order', 'user_profile']
 
 @admin.register(LoyaltyTransaction)
-class LoyaltyTransactionAdmin(admin.ModelAdmin):
+class LoyaltyTransactionAdmin(LargeTableAdmin):
     list_display = ['user_profile', 'order', 'points', 'transaction_type', 'created_at']
     list_filter = ['transaction_type', 'created_at']
     search_fields = ['user_profile__user__username']
+    list_select_related = ['user_profile__user', 'order__restaurant', 'order__table']
+    autocomplete_fields = ['user_profile', 'order']
 
 @admin.register(InventoryTransaction)
-class InventoryTransactionAdmin(admin.ModelAdmin):
-    list_display = ['menu_item', 'quantity', 'description', 'created_at']
-    list_filter = ['created_at']
+class InventoryTransactionAdmin(LargeTableAdmin):
+    list_display = ['menu_item', 'quantity', 'kind', 'description', 'created_at']
+    list_filter = ['kind', 'created_at']
     search_fields = ['menu_item__name', 'description']
+    list_select_related = ['menu_item__restaurant']
+    autocomplete_fields = ['menu_item']
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(LargeTableAdmin):
+    list_display = ['menu_item', 'balance', 'taken_at']
+    list_filter = ['taken_at']
+    search_fields = ['menu_item__name']
+    list_select_related = ['menu_item__restaurant']
+    autocomplete_fields = ['menu_item']
+
+@admin.register(InventoryDailySummary)
+class InventoryDailySummaryAdmin(LargeTableAdmin):
+    list_display = ['menu_item', 'day', 'kind', 'quantity', 'transaction_count']
+    list_filter = ['kind', 'day']
+    search_fields = ['menu_item__name']
+    list_select_related = ['menu_item__restaurant']
+    autocomplete_fields = ['menu_item']
 
 @admin.register(AdminDashboard)
 class AdminDashboardAdmin(admin.ModelAdmin):
@@ -97,4 +245,71 @@ class AdminDashboardAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
     def has_delete_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(LargeTableAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'run_at', 'locked_until']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['lease_token', 'locked_until', 'last_error']
+
+@admin.register(PrepTimeModel)
+class PrepTimeModelAdmin(admin.ModelAdmin):
+    list_display = ['restaurant', 'base_minutes', 'load_minutes', 'sample_size', 'updated_at']
+    readonly_fields = ['base_minutes', 'load_minutes', 'item_minutes', 'sample_size']
+    list_select_related = ['restaurant']
+    autocomplete_fields = ['restaurant']
+
+@admin.register(RestockSuggestion)
+class RestockSuggestionAdmin(admin.ModelAdmin):
+    list_display = ['menu_item', 'restaurant', 'daily_demand', 'projected_stockout_at', 'suggested_quantity']
+    list_filter = [RestaurantIdFilter]
+    search_fields = ['menu_item__name']
+    list_select_related = ['menu_item__restaurant', 'restaurant']
+    autocomplete_fields = ['restaurant', 'menu_item']
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    list_display = ['id', 'restaurant', 'user_profile', 'status', 'total_price', 'created_at', 'archived_at']
+    list_filter = [RestaurantIdFilter, 'status']
+    search_fields = ['id', 'user_profile__user__username']
+    list_select_related = ['restaurant', 'user_profile__user']
+    autocomplete_fields = ['restaurant', 'user_profile', 'table', 'assigned_waiter']
+
+@admin.register(ArchiveRollup)
+class ArchiveRollupAdmin(admin.ModelAdmin):
+    list_display = ['restaurant', 'order_count', 'served_revenue', 'rating_count', 'updated_at']
+    list_select_related = ['restaurant']
+
+@admin.register(DailyReport)
+class DailyReportAdmin(admin.ModelAdmin):
+    list_display = ['restaurant', 'day', 'csv_file', 'html_file', 'updated_at']
+    list_filter = ['day']
+    list_select_related = ['restaurant']
+    autocomplete_fields = ['restaurant']
+    readonly_fields = ['data']
+
+@admin.register(MenuItemNeighbors)
+class MenuItemNeighborsAdmin(admin.ModelAdmin):
+    list_display = ['menu_item', 'restaurant', 'support', 'updated_at']
+    list_filter = [RestaurantIdFilter]
+    list_select_related = ['menu_item__restaurant', 'restaurant']
+    autocomplete_fields = ['menu_item', 'restaurant']
+    readonly_fields = ['neighbors', 'support', 'updated_at']
+
+@admin.register(MenuItemRating)
+class MenuItemRatingAdmin(LargeTableAdmin):
+    list_display = ['menu_item', 'restaurant', 'average', 'rating_count', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5']
+    list_filter = [RestaurantIdFilter]
+    list_select_related = ['menu_item__restaurant', 'restaurant']
+    autocomplete_fields = ['menu_item', 'restaurant']
+    readonly_fields = [*MenuItemRating.HISTOGRAM_FIELDS, 'updated_at']
+
+@admin.register(Reservation)
+class ReservationAdmin(LargeTableAdmin):
+    list_display = ['id', 'restaurant', 'table', 'party_size', 'starts_at', 'ends_at', 'status', 'guest_name']
+    list_filter = [RestaurantIdFilter, 'status']
+    search_fields = ['guest_name', 'phone_number', 'user_profile__user__username']
+    list_select_related = ['restaurant', 'table__restaurant']
+    autocomplete_fields = ['restaurant', 'table', 'user_profile']
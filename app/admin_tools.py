@@ -0,0 +1,171 @@
+"""
+Katta jadvallar uchun admin ro‘yxatlari yordamchilari.
+
+- EstimatedCountPaginator: filtrsiz ro‘yxatda aniq COUNT(*) o‘rniga
+  ma’lumotlar bazasi statistikasidan taxminiy son, filtrlanganda esa
+  COUNT_LIMIT bilan cheklangan sanoq.
+- CursorChangeList: birlamchi kalit bo‘yicha kamayish tartibida OFFSET
+  o‘rniga `?cursor=<pk>` bilan keyset sahifalash.
+- id_input_filter: bog‘langan jadvalning barcha qatorlarini yuklaydigan
+  ro‘yxat filtri o‘rniga ID kiritish maydoni.
+"""
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+COUNT_LIMIT = 10000
+
+
+def estimated_row_count(model, using='default'):
+    """Jadvaldagi qatorlarning taxminiy soni (statistika bo‘lmasa None)."""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]
+    elif connection.vendor == 'mysql':
+        sql = "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s"
+        params = [table]
+    elif connection.vendor == 'sqlite':
+        # sqlite_stat1 faqat ANALYZE dan keyin mavjud; stat ustunining birinchi soni — qatorlar soni
+        sql, params = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    value = int(str(row[0]).split()[0])
+    # PostgreSQL hali tahlil qilinmagan jadval uchun -1 qaytaradi
+    return value if value >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Katta jadvallarda aniq COUNT(*) qilmaydigan paginator."""
+
+    count_limit = COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        self.is_estimate = False
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                self.is_estimate = True
+                return estimate
+        # Filtrlangan ro‘yxat: ko‘pi bilan count_limit + 1 qator sanaladi
+        count = queryset[:self.count_limit + 1].count()
+        if count > self.count_limit:
+            self.is_estimate = True
+            return self.count_limit
+        return count
+
+    @property
+    def count_label(self):
+        count = self.count
+        if not self.is_estimate:
+            return str(count)
+        return f"{count}+" if count == self.count_limit else f"~{count}"
+
+
+class CursorChangeList(ChangeList):
+    """Birlamchi kalit bo‘yicha kamayish tartibida keyset sahifalashni qo‘llaydigan ChangeList."""
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Filtr, saralash va qidiruv havolalari har doim birinchi sahifadan boshlanadi
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def uses_keyset(self):
+        pk = self.lookup_opts.pk
+        ordering = set(self.queryset.query.order_by)
+        return bool(ordering) and ordering <= {'-pk', f'-{pk.name}', f'-{pk.attname}'}
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.keyset = self.uses_keyset() and not self.show_all
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_cursor = None
+        if not self.keyset:
+            return
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                queryset = queryset.filter(pk__lt=self.lookup_opts.pk.to_python(self.cursor))
+            except ValidationError:
+                raise IncorrectLookupParameters
+        # Faqat indeksdagi kalitlar o‘qiladi; list_editable formseti uchun natija QuerySet bo‘lib qoladi
+        pks = list(queryset.values_list('pk', flat=True)[:self.list_per_page + 1])
+        if len(pks) > self.list_per_page:
+            pks = pks[:self.list_per_page]
+            self.next_cursor = pks[-1]
+        self.result_list = queryset.filter(pk__in=pks)
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.next_page_url = self.next_cursor and self.get_query_string({CURSOR_VAR: self.next_cursor})
+        self.first_page_url = self.get_query_string()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Millionlab qatorli jadvallar uchun asosiy ModelAdmin."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ['-pk']
+    change_list_template = 'admin/cursor_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
+class IdInputFilter(admin.SimpleListFilter):
+    """Bog‘langan obyektni ID bo‘yicha filtrlash; tanlovlar ro‘yxati yuklanmaydi."""
+
+    template = 'admin/id_input_filter.html'
+    field_path = None
+
+    def lookups(self, request, model_admin):
+        # has_output() uchun bitta soxta tanlov
+        return [('', '')]
+
+    def choices(self, changelist):
+        yield {
+            'parameter_name': self.parameter_name,
+            'value': self.value() or '',
+            'clear_url': changelist.get_query_string(remove=[self.parameter_name]),
+            'hidden_params': [
+                (key, value) for key, value in changelist.params.items()
+                if key not in (self.parameter_name, CURSOR_VAR)
+            ],
+        }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if not value.isdigit():
+            raise IncorrectLookupParameters(f"{self.title}: butun son kutilgan")
+        return queryset.filter(**{self.field_path: int(value)})
+
+
+def id_input_filter(field_path, title):
+    """`field_path` (masalan 'order__restaurant') uchun IdInputFilter sinfini yaratadi."""
+    return type(f'{field_path.title().replace("__", "")}IdFilter', (IdInputFilter,), {
+        'field_path': field_path,
+        'parameter_name': f'{field_path}_id',
+        'title': title,
+    })
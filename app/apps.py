@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        # Fon vazifalarini app.jobs reyestriga ro'yxatdan o'tkazish
+        from . import tasks  # noqa: F401
+        # Kontent versiyalarini yangilovchi signallar
+        from . import versions  # noqa: F401
+        # Ikki darajali kesh: sharhlar o‘zgarganda baholarni bekor qiluvchi signal
+        from . import caching  # noqa: F401
+        # Xodim/profil o‘zgarganda foydalanuvchi identifikatsiyasini yangilovchi signallar
+        from . import identity  # noqa: F401
+        # Sharh yozilganda menyu elementlari baholari gistogrammasini yangilovchi signallar
+        from . import item_ratings  # noqa: F401
+        # Band qilishlar va stollar o‘zgarganda kunlik bandlik indeksini bekor qiluvchi signallar
+        from . import reservations  # noqa: F401
@@ -0,0 +1,106 @@
+"""
+Yakunlangan eski buyurtmalarni arxiv jadvallariga ko‘chirish.
+
+'served' va 'cancelled' holatidagi, belgilangan yoshdan katta buyurtmalar
+elementlari va sharhlari bilan birga Archived* jadvallariga bo‘laklab
+ko‘chiriladi. Restoran statistikasi ArchiveRollup orqali to‘g‘ri qoladi;
+buyurtma tarixi `order_history` orqali ikkala jadvaldan o‘qiladi.
+Arxivlangan buyurtmalarning holat o‘tishlari jurnali ular bilan birga
+o‘chiriladi (tahlil ishlari faqat yaqin oylardagi o‘tishlardan foydalanadi).
+"""
+from collections import defaultdict
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, ArchivedReview, ArchiveRollup, Order, OrderItem, Review,
+)
+
+ARCHIVABLE_STATUSES = ('served', 'cancelled')
+ORDER_FIELDS = [
+    'id', 'restaurant_id', 'user_profile_id', 'table_id', 'status', 'total_price', 'discount_amount',
+    'payment_method', 'notes', 'assigned_waiter_id', 'created_at', 'updated_at',
+]
+ITEM_FIELDS = ['id', 'order_id', 'menu_item_id', 'quantity', 'price', 'created_at']
+REVIEW_FIELDS = ['id', 'order_id', 'user_profile_id', 'rating', 'comment', 'created_at']
+
+
+def archivable_orders(older_than_days):
+    cutoff = timezone.now() - timezone.timedelta(days=older_than_days)
+    return Order.objects.filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+
+
+def archive_chunk(order_ids):
+    """Berilgan buyurtmalarni bitta tranzaksiyada arxivga ko‘chiradi. Natija: ko‘chirilganlar soni."""
+    with transaction.atomic():
+        orders = list(Order.objects.filter(id__in=order_ids, status__in=ARCHIVABLE_STATUSES).values(*ORDER_FIELDS))
+        if not orders:
+            return 0
+        ids = [order['id'] for order in orders]
+        items = list(OrderItem.objects.filter(order_id__in=ids).values(*ITEM_FIELDS))
+        reviews = list(Review.objects.filter(order_id__in=ids).values(*REVIEW_FIELDS))
+
+        ArchivedOrder.objects.bulk_create([ArchivedOrder(**order) for order in orders])
+        ArchivedOrderItem.objects.bulk_create([ArchivedOrderItem(**item) for item in items])
+        ArchivedReview.objects.bulk_create([ArchivedReview(**review) for review in reviews])
+
+        rollups = defaultdict(lambda: {'order_count': 0, 'served_revenue': 0, 'rating_sum': 0, 'rating_count': 0})
+        restaurant_of = {}
+        for order in orders:
+            rollup = rollups[order['restaurant_id']]
+            rollup['order_count'] += 1
+            if order['status'] == 'served':
+                rollup['served_revenue'] += order['total_price']
+            restaurant_of[order['id']] = order['restaurant_id']
+        for review in reviews:
+            rollup = rollups[restaurant_of[review['order_id']]]
+            rollup['rating_sum'] += review['rating']
+            rollup['rating_count'] += 1
+        _apply_rollups(rollups)
+
+        Order.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def _apply_rollups(rollups):
+    existing = set(
+        ArchiveRollup.objects.filter(restaurant_id__in=list(rollups)).values_list('restaurant_id', flat=True)
+    )
+    ArchiveRollup.objects.bulk_create([
+        ArchiveRollup(restaurant_id=restaurant_id) for restaurant_id in rollups if restaurant_id not in existing
+    ])
+    now = timezone.now()
+    for restaurant_id, totals in rollups.items():
+        ArchiveRollup.objects.filter(restaurant_id=restaurant_id).update(
+            updated_at=now,
+            **{field: F(field) + value for field, value in totals.items()}
+        )
+
+
+def archive_orders(older_than_days=180, chunk_size=1000, limit=None):
+    """Arxivlanadigan buyurtmalarni `chunk_size` bo‘laklarda ko‘chiradi. Natija: jami ko‘chirilganlar."""
+    moved = 0
+    queryset = archivable_orders(older_than_days).order_by('id').values_list('id', flat=True)
+    last_id = 0
+    while limit is None or moved < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - moved)
+        ids = list(queryset.filter(id__gt=last_id)[:size])
+        if not ids:
+            break
+        moved += archive_chunk(ids)
+        last_id = ids[-1]
+    return moved
+
+
+def order_history(user_profile):
+    """Foydalanuvchining faol va arxivlangan buyurtmalari, yangilaridan boshlab."""
+    hot = user_profile.orders.select_related(
+        'restaurant', 'table', 'assigned_waiter'
+    ).prefetch_related('items__menu_item').order_by('-created_at')
+    archived = user_profile.archived_orders.select_related(
+        'restaurant', 'table', 'assigned_waiter'
+    ).prefetch_related('items__menu_item').order_by('-created_at')
+    return sorted(chain(hot, archived), key=lambda order: order.created_at, reverse=True)
@@ -0,0 +1,237 @@
+"""
+Mijozning asosiy yo‘li uchun asinxron ko‘rinishlar (ASGI).
+
+O‘qishlar async ORM (aget, afirst, async for, aaggregate) orqali
+bajariladi, kanal qatlamiga xabar esa async_to_sync siz to‘g‘ridan-to‘g‘ri
+kutiladi. Async ORM da tranzaksiya yo‘q, shablon esa savat va rasmlarni
+dangasa o‘qiydi: har bir ko‘rinishning yozuvlari va sahifani chizish
+bittadan sync_to_async o‘tishida bajariladi.
+
+Taqqoslash uchun sinxron asos `manage.py bench_async_views` buyrug‘ida
+turadi va shu moduldagi yozuv yordamchilaridan foydalanadi.
+"""
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from . import identity, menu_api, recommendations, versions
+from .jobs import enqueue
+from .models import Cart, CartItem, MenuItem, Order, OrderItem, Table
+from .views import MENU_PREFETCH, _table_menu_versions
+
+
+async def _aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"{queryset.model._meta.object_name} topilmadi")
+
+
+async def _aprofile_id_or_404(request, user):
+    """Kirgan foydalanuvchi profili ID si (app.identity orqali); mehmon uchun None."""
+    if not user.is_authenticated:
+        return None
+    profile_id = (await identity.aget(request)).profile_id
+    if profile_id is None:
+        raise Http404("UserProfile topilmadi")
+    return profile_id
+
+
+async def asend_notification(group_name, message):
+    """send_notification ning async varianti."""
+    channel_layer = get_channel_layer()
+    await channel_layer.group_send(
+        group_name,
+        {
+            'type': 'send_notification',
+            'message': message
+        }
+    )
+
+
+@versions.conditional_page(_table_menu_versions)
+async def table_menu(request, qr_code):
+    """Customer menu for a table; ORM reads are async, the template renders in one thread hop."""
+    table = await _aget_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    restaurant = table.restaurant
+    categories = [category async for category in restaurant.categories.prefetch_related(*MENU_PREFETCH)]
+
+    cart = None
+    # conditional_page foydalanuvchini oqimda yuklagan: request.user so'rovsiz o'qiladi
+    profile_id = (await identity.aget(request)).profile_id
+    if profile_id:
+        cart, _ = await Cart.objects.aget_or_create(
+            user_profile_id=profile_id,
+            restaurant=restaurant,
+            table=table
+        )
+    return await sync_to_async(_render_menu)(request, {
+        'restaurant': restaurant,
+        'table': table,
+        'categories': categories,
+        'cart': cart,
+        'qr_code': qr_code,
+    })
+
+
+def _render_menu(request, context):
+    # Tavsiyalar (kesh) va shablon bitta oqim o'tishida
+    context['recommendations'] = recommendations.for_cart(context['cart']) if context['cart'] else []
+    return render(request, 'restaurant/customer_menu.html', context)
+
+
+def _add_item(user, user_profile_id, table, menu_item, quantity):
+    """Savatga qo'shishning yozuv qismi va yangi tavsiyalar (sinxron ko'rinishdagi tartibda); zaxira yetmasa None."""
+    # Zaxira bandi va savat qatori bitta tranzaksiyada: CartItem yozuvi yiqilsa zaxira ham qaytadi
+    with transaction.atomic():
+        cart, created = Cart.objects.get_or_create(
+            user_profile_id=user_profile_id,
+            restaurant=table.restaurant,
+            table=table
+        )
+        # Savat faolligi updated_at orqali kuzatiladi (tashlab ketilgan savatlarni tozalash uchun)
+        now = timezone.now()
+        Cart.objects.filter(pk=cart.pk).update(updated_at=now)
+        if user.is_authenticated:
+            versions.bump_carts([(user.pk, table.id)])
+
+        # Avval zaxira band qilinadi: savatdagi miqdor doim band qilingan zaxiraga teng bo'ladi
+        if not menu_item.reduce_stock(quantity):
+            return None
+
+        cart_item, created = CartItem.objects.get_or_create(
+            cart=cart,
+            menu_item=menu_item,
+            defaults={'quantity': quantity}
+        )
+        if not created:
+            # Parallel qo'shishlar miqdorni yo'qotmasligi uchun bazada qo'shiladi
+            CartItem.objects.filter(pk=cart_item.pk).update(quantity=F('quantity') + quantity, updated_at=now)
+            cart_item.refresh_from_db(fields=['quantity', 'updated_at'])
+    return cart, cart_item, recommendations.payload(cart)
+
+
+@require_POST
+@csrf_exempt
+async def add_to_cart(request, qr_code):
+    """Add items to the cart."""
+    table = await _aget_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    restaurant = table.restaurant
+    menu_item_id = request.POST.get('menu_item_id')
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+        if quantity < 1:
+            return HttpResponseBadRequest("Miqdor 1 dan kam bo'lmasligi kerak")
+        menu_item = await _aget_object_or_404(
+            MenuItem.objects, id=menu_item_id, restaurant=restaurant, is_available=True
+        )
+
+        user = await request.auser()
+        user_profile_id = await _aprofile_id_or_404(request, user)
+
+        # Zaxira InventoryLedger tranzaksiyasida band qilinadi: yozuvlar bitta oqim o'tishida
+        added = await sync_to_async(_add_item)(user, user_profile_id, table, menu_item, quantity)
+        if added is None:
+            return HttpResponseBadRequest("Zaxira yetarli emas")
+        cart, cart_item, suggestions = added
+
+        await asend_notification(
+            f'restaurant_{restaurant.id}_waiters',
+            {'message': f"Yangi savat elementi: {menu_item.name} ({quantity} dona)"}
+        )
+        cart_total = await menu_api.acart_total(cart.id)
+        return JsonResponse({
+            'status': 'success',
+            'cart_total': cart_total,
+            'item_name': menu_item.name,
+            'quantity': cart_item.quantity,
+            # Mijoz sahifani qayta yuklamasdan yangilashi uchun faqat o'zgargan qismlar
+            'delta': {
+                'fields': menu_api.CART_FIELDS,
+                'items': await menu_api.acart_lines(cart.id, [menu_item.id]),
+                'total': cart_total,
+                'stock': {menu_item.id: menu_item.stock_quantity},
+                'recommendations': suggestions,
+            },
+        })
+    except ValueError:
+        return HttpResponseBadRequest("Noto'g'ri miqdor kiritildi")
+
+
+def _create_order(user, user_profile_id, table, cart):
+    """
+    Buyurtma, uning qatorlari va outbox hodisasi bitta tranzaksiyada; savat bo'shatiladi.
+
+    Savat qatori qulflanadi va elementlar tranzaksiya ichida o'qiladi: parallel
+    add_to_cart qo'shgan element buyurtmaga kirmay o'chib ketmaydi. Savat bo'sh bo'lsa None.
+    """
+    restaurant = table.restaurant
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            Cart.objects.select_for_update().filter(pk=cart.pk).first()
+        else:
+            # SQLite da FOR UPDATE yo'q: avval yozuv bilan baza qulflanadi, aks holda
+            # o'qishdan keyingi yozuv "database is locked" bilan tushadi
+            Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+        items = list(cart.items.select_related('menu_item'))
+        if not items:
+            return None
+        order = Order.objects.create(
+            restaurant=restaurant,
+            user_profile_id=user_profile_id,
+            table=table,
+            # Jami narx savat bilan bir xil agregat (current_price) orqali bazada hisoblanadi
+            total_price=cart.total_price,
+            status='pending'
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                menu_item=item.menu_item,
+                quantity=item.quantity,
+                price=item.menu_item.current_price
+            )
+            for item in items
+        ])
+        # Faqat buyurtmaga kirgan elementlar o'chiriladi
+        CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+        if user_profile_id:
+            versions.bump_carts([(user.pk, table.id)])
+
+        # Bildirishnomalar va sadoqat ballari outbox releyida (manage.py run_outbox_relay),
+        # yetkazish vaqti hisobi fon ishchisida (manage.py run_workers)
+        order.record_event(
+            'placed',
+            created_at=order.created_at,
+            user_profile_id=user_profile_id,
+            total_price=str(order.total_price),
+        )
+        enqueue('calculate_estimated_delivery', order_id=order.id)
+    return order
+
+
+@require_POST
+@csrf_exempt
+async def place_order(request, qr_code):
+    """Place an order from the cart."""
+    table = await _aget_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    user = await request.auser()
+    user_profile_id = await _aprofile_id_or_404(request, user)
+    cart = await _aget_object_or_404(
+        Cart.objects, restaurant=table.restaurant, table=table, user_profile_id=user_profile_id
+    )
+
+    order = await sync_to_async(_create_order)(user, user_profile_id, table, cart)
+    if order is None:
+        return HttpResponseBadRequest("Savat bo'sh")
+    return JsonResponse({
+        'status': 'success',
+        'order_id': order.id,
+        'delta': {'fields': menu_api.CART_FIELDS, 'items': [], 'cleared': True, 'total': 0},
+    })
@@ -0,0 +1,309 @@
+"""
+Ikki darajali kesh: jarayon ichidagi LRU (L1) + umumiy backend (L2).
+
+L2 — settings.CACHES dagi `default` kesh (barcha ASGI jarayonlari uchun
+umumiy). L1 — har bir jarayonda qisqa muddatli, hajmi cheklangan LRU.
+
+Kalitlar nomlar fazosi (ratings, menus, prep_times, ...) va doira (odatda
+restoran ID si) bo‘yicha versiyalanadi: `{nomlar fazosi}_{doira}_{avlod}_{kalit}`.
+Doirani bekor qilish L2 dagi avlod raqamini yangilaydi, shuning uchun
+eski kalitlarni bittalab o‘chirish shart emas. Boshqa jarayonlar L1
+yozuvlarini kanal qatlami orqali yuborilgan xabar bilan darhol tashlaydi;
+xabar yetib bormasa ham L1 muddati (LOCAL_TIMEOUT) eskirishni cheklaydi.
+
+Xabar boshqa jarayonlarga faqat jarayonlararo kanal qatlami (CHANNEL_SOCKET
+yoki CHANNEL_REDIS_HOST) bilan yetadi. Standart InMemoryChannelLayer da
+xabar jarayondan chiqmaydi, shuning uchun L1 muddati
+LOCAL_TIMEOUT_WITHOUT_BROADCAST gacha (standart 1 soniya) qisqartiriladi va
+tinglovchi ishga tushganda ogohlantirish yoziladi.
+
+Har bir nomlar fazosi uchun L1/L2 tushishlari va o‘tkazib yuborishlar
+sanaladi va vaqti-vaqti bilan L2 ga qo‘shiladi (`manage.py cache_stats`).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+OPTIONS = getattr(settings, 'TWO_TIER_CACHE', {})
+LOCAL_MAX_ENTRIES = OPTIONS.get('LOCAL_MAX_ENTRIES', 2048)
+LOCAL_TIMEOUT = OPTIONS.get('LOCAL_TIMEOUT', 30)
+LOCAL_TIMEOUT_WITHOUT_BROADCAST = OPTIONS.get('LOCAL_TIMEOUT_WITHOUT_BROADCAST', 1)
+STATS_FLUSH_EVERY = OPTIONS.get('STATS_FLUSH_EVERY', 100)
+INVALIDATION_GROUP = 'cache_invalidation'
+# channels_redis guruh a’zoligini group_expiry dan keyin unutadi
+REJOIN_SECONDS = 3600
+STAT_KINDS = ('local', 'shared', 'miss')
+# Guruh xabarlarini faqat o‘z jarayoni ichida yetkazadigan kanal qatlamlari
+PROCESS_LOCAL_LAYERS = ('channels.layers.InMemoryChannelLayer',)
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Ip-xavfsiz LRU; har bir yozuv LOCAL_TIMEOUT dan ko‘p yashamaydi."""
+
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES, timeout=LOCAL_TIMEOUT):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def broadcast_is_process_local():
+    """Bekor qilish xabari boshqa ASGI jarayonlariga yetmaydimi (kanal qatlami yo‘q yoki InMemory)."""
+    backend = getattr(settings, 'CHANNEL_LAYERS', {}).get('default', {}).get('BACKEND')
+    return backend is None or backend in PROCESS_LOCAL_LAYERS
+
+
+def local_timeout():
+    if broadcast_is_process_local():
+        return min(LOCAL_TIMEOUT, LOCAL_TIMEOUT_WITHOUT_BROADCAST)
+    return LOCAL_TIMEOUT
+
+
+local_cache = LocalCache(timeout=local_timeout())
+
+
+class Namespace:
+    """Doiralar (restoranlar) bo‘yicha versiyalangan kalitlar to‘plami."""
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def generation_key(self, scope):
+        return f'cache_generation_{self.name}_{scope}'
+
+    def generation(self, scope):
+        local_key = ('generation', self.name, scope)
+        generation = local_cache.get(local_key)
+        if generation is _MISSING:
+            key = self.generation_key(scope)
+            generation = cache.get(key)
+            if generation is None:
+                generation = time.time_ns()
+                # add: parallel jarayonlar bir xil avlodni oladi
+                if not cache.add(key, generation, timeout=None):
+                    generation = cache.get(key, generation)
+            local_cache.set(local_key, generation)
+        return generation
+
+    def key(self, scope, key):
+        return f'{self.name}_{scope}_{self.generation(scope)}_{key}'
+
+    def get_or_set(self, scope, key, default_func, timeout=None):
+        """Qiymatni L1, so‘ng L2 dan oladi; ikkalasida ham bo‘lmasa `default_func()` natijasini yozadi."""
+        timeout = self.timeout if timeout is None else timeout
+        full_key = self.key(scope, key)
+        value = local_cache.get(full_key)
+        if value is not _MISSING:
+            self._record('local')
+            return value
+        value = cache.get(full_key, _MISSING)
+        if value is _MISSING:
+            self._record('miss')
+            value = default_func()
+            cache.set(full_key, value, timeout=timeout)
+        else:
+            self._record('shared')
+        local_cache.set(full_key, value, timeout)
+        return value
+
+    def invalidate(self, scopes):
+        """Doiralarni tranzaksiya commit qilingandan keyin barcha jarayonlarda bekor qiladi."""
+        scopes = sorted(set(scopes))
+        if scopes:
+            transaction.on_commit(lambda: self.invalidate_now(scopes))
+
+    def invalidate_now(self, scopes):
+        generation = time.time_ns()
+        cache.set_many({self.generation_key(scope): generation for scope in scopes}, timeout=None)
+        self.drop_local(scopes)
+        _broadcast({'type': 'cache.invalidate', 'namespace': self.name, 'scopes': list(scopes)})
+
+    def drop_local(self, scopes):
+        for scope in scopes:
+            local_cache.delete(('generation', self.name, scope))
+
+    def _record(self, kind):
+        with self._lock:
+            self._counts[kind] += 1
+            if sum(self._counts.values()) < STATS_FLUSH_EVERY:
+                return
+            counts, self._counts = self._counts, Counter()
+        _add_stats(self.name, counts)
+
+    def flush_stats(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        _add_stats(self.name, counts)
+
+
+def _stats_key(namespace, kind):
+    return f'cache_stats_{namespace}_{kind}'
+
+
+def _add_stats(namespace, counts):
+    for kind, count in counts.items():
+        key = _stats_key(namespace, kind)
+        # Fayl keshida incr atomar emas: statistika taxminiy
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, timeout=None)
+
+
+def hit_ratios(reset=False):
+    """{nomlar fazosi: {'local', 'shared', 'miss', 'hit_ratio'}} barcha jarayonlar bo‘yicha."""
+    report = {}
+    for namespace in NAMESPACES.values():
+        namespace.flush_stats()
+        keys = {kind: _stats_key(namespace.name, kind) for kind in STAT_KINDS}
+        stored = cache.get_many(keys.values())
+        counts = {kind: stored.get(key, 0) for kind, key in keys.items()}
+        total = sum(counts.values())
+        counts['hit_ratio'] = (counts['local'] + counts['shared']) / total if total else None
+        report[namespace.name] = counts
+        if reset:
+            cache.delete_many(keys.values())
+    return report
+
+
+ratings = Namespace('ratings', timeout=3600)
+menus = Namespace('menus', timeout=24 * 3600)
+prep_times = Namespace('prep_times', timeout=86400)
+recommendations = Namespace('recommendations', timeout=86400)
+reservations = Namespace('reservations', timeout=3600)
+NAMESPACES = {
+    namespace.name: namespace for namespace in (ratings, menus, prep_times, recommendations, reservations)
+}
+
+
+def _channel_layer():
+    from channels.layers import get_channel_layer
+    return get_channel_layer()
+
+
+def _broadcast(message):
+    channel_layer = _channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(INVALIDATION_GROUP, message)
+    except Exception:
+        # Boshqa jarayonlarda L1 yozuvlari LOCAL_TIMEOUT dan keyin baribir eskiradi
+        logger.warning("Kesh bekor qilish xabari yuborilmadi", exc_info=True)
+
+
+def handle_message(message):
+    namespace = NAMESPACES.get(message.get('namespace'))
+    if message.get('type') == 'cache.invalidate' and namespace is not None:
+        namespace.drop_local(message.get('scopes', []))
+
+
+async def listen():
+    """Jarayonning bekor qilish tinglovchisi: kanal qatlamidan xabarlarni o‘qib L1 ni tozalaydi."""
+    if broadcast_is_process_local():
+        logger.warning(
+            "Kanal qatlami jarayonlararo emas: kesh bekor qilish boshqa jarayonlarga yetmaydi, "
+            "L1 muddati %s soniyaga qisqartirildi. Bir nechta jarayon uchun CHANNEL_SOCKET yoki "
+            "CHANNEL_REDIS_HOST ni bering", local_cache.timeout,
+        )
+        return
+    channel_layer = _channel_layer()
+    while True:
+        try:
+            channel = await channel_layer.new_channel()
+            while True:
+                await channel_layer.group_add(INVALIDATION_GROUP, channel)
+                try:
+                    message = await asyncio.wait_for(channel_layer.receive(channel), timeout=REJOIN_SECONDS)
+                except asyncio.TimeoutError:
+                    continue
+                handle_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Kanal qatlami vaqtincha mavjud emas: L1 muddati eskirishni cheklab turadi
+            logger.warning("Kesh bekor qilish tinglovchisi qayta ulanmoqda", exc_info=True)
+            local_cache.clear()
+            await asyncio.sleep(local_cache.timeout)
+
+
+class InvalidationListener:
+    """
+    ASGI o‘rami: jarayonda birinchi so‘rovda (yoki lifespan startup da)
+    bekor qilish tinglovchisini ishga tushiradi.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.task = None
+
+    async def __call__(self, scope, receive, send):
+        self.start()
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        return await self.application(scope, receive, send)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(listen())
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.task.cancel()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+# post_delete yo‘q: u arxivlashdagi kaskad o‘chirishni qatorma-qator qilib qo‘yardi
+@receiver(post_save, sender='app.Review')
+def review_saved(sender, instance, **kwargs):
+    ratings.invalidate([instance.order.restaurant_id])
@@ -0,0 +1,64 @@
+"""
+Tashlab ketilgan savatlarni tozalash.
+
+`add_to_cart` savatga qo‘shilgan miqdorni darhol zaxiradan band qiladi.
+Mijoz buyurtma bermasdan ketsa, savat `updated_at` bo‘yicha TTL dan
+eskirgach zaxira menyu elementlari bo‘yicha guruhlanib qaytariladi va
+savat o‘chiriladi. Ish cheklangan bo‘laklarda, har biri alohida
+tranzaksiyada bajariladi.
+"""
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import versions
+from .models import Cart, CartItem, InventoryLedger
+
+DEFAULT_TTL = timezone.timedelta(hours=2)
+
+
+def sweep_chunk(cutoff, batch_size):
+    """
+    Bitta bo‘lakni tozalaydi. Natija: (o‘chirilgan savatlar, o‘chirilgan elementlar, {menu_item_id: qaytarilgan miqdor}).
+    """
+    with InventoryLedger() as ledger:
+        # Qulflangan savatga parallel add_to_cart updated_at ni yangilay olmaydi
+        cart_ids = list(
+            Cart.objects.select_for_update(skip_locked=True)
+            .filter(updated_at__lt=cutoff)
+            .order_by('updated_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not cart_ids:
+            return 0, 0, {}
+        items = CartItem.objects.filter(cart_id__in=cart_ids)
+        released = dict(items.values_list('menu_item_id').annotate(total=Sum('quantity')).order_by())
+        ledger.change_many(released, 'release', "Tashlab ketilgan savatdan qaytarildi")
+        item_count = items.delete()[0]
+        versions.bump_carts(
+            Cart.objects.filter(id__in=cart_ids, table__isnull=False)
+            .values_list('user_profile__user_id', 'table_id')
+        )
+        Cart.objects.filter(id__in=cart_ids).delete()
+    return len(cart_ids), item_count, released
+
+
+def sweep_abandoned_carts(ttl=DEFAULT_TTL, batch_size=500, limit=None, now=None):
+    """
+    `ttl` dan beri o‘zgarmagan savatlarni tozalaydi.
+
+    Natija: {'carts', 'cart_items', 'menu_items', 'released_units'} ko‘rsatkichlari.
+    """
+    cutoff = (now or timezone.now()) - ttl
+    metrics = {'carts': 0, 'cart_items': 0, 'menu_items': 0, 'released_units': 0}
+    released_items = set()
+    while limit is None or metrics['carts'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - metrics['carts'])
+        carts, cart_items, released = sweep_chunk(cutoff, size)
+        if not carts:
+            break
+        metrics['carts'] += carts
+        metrics['cart_items'] += cart_items
+        metrics['released_units'] += sum(released.values())
+        released_items.update(released)
+    metrics['menu_items'] = len(released_items)
+    return metrics
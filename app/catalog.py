@@ -0,0 +1,526 @@
+"""Restoran katalogini (restoran, kategoriya, menyu, stol) ommaviy import qilish va menyuni jadval bilan yangilash."""
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import versions
+from .models import Restaurant, Table, Category, MenuItem
+
+
+# Yozish tartibi: ota yozuvlar bolalaridan oldin saqlanishi kerak
+KINDS = ('restaurant', 'category', 'menu_item', 'table')
+
+TRUE_VALUES = {'1', 'true', 'yes', 'ha', 'on'}
+
+
+class CatalogImportError(Exception):
+    """Import faylidagi qatorni qayta ishlab bo‘lmaganda ko‘tariladi."""
+
+
+def read_rows(path):
+    """Fayl kengaytmasiga qarab CSV, JSON Lines yoki JSON qatorlarini oqim tarzida qaytaradi."""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as fh:
+            yield from csv.DictReader(fh)
+    elif path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.json'):
+        with open(path, encoding='utf-8') as fh:
+            yield from json.load(fh)
+    else:
+        raise CatalogImportError(f"Qo‘llab-quvvatlanmaydigan fayl turi: {path}")
+
+
+def parse_rows(text, fmt):
+    """Yuklangan CSV yoki JSON (ro‘yxat yoki {"items": [...]}) matnidan qatorlar ro‘yxati."""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(text)))
+    if fmt == 'json':
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            raise CatalogImportError(f"JSON o‘qilmadi: {exc}")
+        if isinstance(data, dict):
+            data = data.get('items')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise CatalogImportError("JSON qatorlar ro‘yxati (yoki {'items': [...]}) bo‘lishi kerak")
+        return data
+    raise CatalogImportError(f"Qo‘llab-quvvatlanmaydigan format: {fmt}")
+
+
+def _text(row, key, default=''):
+    value = row.get(key)
+    return default if value in (None, '') else str(value).strip()
+
+
+def _bool(row, key, default):
+    value = row.get(key)
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _int(row, key, default):
+    value = row.get(key)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise CatalogImportError(f"'{key}' butun son bo‘lishi kerak: {value!r}")
+
+
+def _decimal(row, key, default=None):
+    value = row.get(key)
+    if value in (None, ''):
+        return default
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise CatalogImportError(f"'{key}' son bo‘lishi kerak: {value!r}")
+
+
+class CatalogImporter:
+    """
+    Katalog qatorlarini bo‘laklab `bulk_create` orqali yozadi.
+
+    Sluglar va QR kodlar import boshida bir marta olingan band qiymatlar
+    to‘plamiga qarab xotirada ajratiladi, shuning uchun har bir yozuv uchun
+    `exists()` so‘rovi bajarilmaydi.
+    """
+
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+        self.buffers = {kind: [] for kind in KINDS}
+        # Buferdagi yozuvlarning fayldagi qator raqamlari (xato xabari uchun)
+        self.lines = {kind: [] for kind in KINDS}
+        self.created = {kind: 0 for kind in KINDS}
+        self.errors = []
+        self.taken_slugs = set(Restaurant.objects.values_list('slug', flat=True))
+        self.taken_qr_codes = set(Table.objects.values_list('qr_code', flat=True))
+        # Import kaliti (yoki mavjud slug) -> Restaurant
+        self.restaurants = {}
+        # id(restaurant) -> {kategoriya nomi: Category}
+        self.categories = {}
+        # id(restaurant) -> band stol raqamlari
+        self.table_numbers = {}
+        self.owners = {}
+        self.elapsed = 0.0
+
+    def run(self, rows):
+        """Barcha qatorlarni import qiladi va yaratilgan yozuvlar sonini qaytaradi."""
+        started = time.perf_counter()
+        for line_no, row in enumerate(rows, start=1):
+            kind = _text(row, 'kind')
+            if kind not in KINDS:
+                self.errors.append((line_no, f"Noma’lum 'kind': {kind!r}"))
+                continue
+            try:
+                obj = getattr(self, f'_build_{kind}')(row)
+            except (CatalogImportError, ValidationError) as exc:
+                self.errors.append((line_no, str(exc)))
+                continue
+            self.buffers[kind].append(obj)
+            self.lines[kind].append(line_no)
+            if len(self.buffers[kind]) >= self.chunk_size:
+                self.flush(kind)
+        self.flush(KINDS[-1])
+        self.elapsed = time.perf_counter() - started
+        return self.created
+
+    def flush(self, kind):
+        """Berilgan tur va undan oldingi turlarning buferlarini bazaga yozadi."""
+        for parent in KINDS[:KINDS.index(kind) + 1]:
+            buffer = self.buffers[parent]
+            if not buffer:
+                continue
+            try:
+                with transaction.atomic():
+                    self._resolve_parents(parent, buffer)
+                    model = buffer[0].__class__
+                    model.objects.bulk_create(buffer, batch_size=self.chunk_size)
+                    # bulk_create signal yubormaydi: menyu sahifalari versiyasi qo'lda yangilanadi
+                    restaurant_ids = [obj.pk if parent == 'restaurant' else obj.restaurant_id for obj in buffer]
+                    versions.bump(restaurant_ids, restaurant_list=parent in ('restaurant', 'table'))
+            except IntegrityError as exc:
+                # Masalan, import davomida boshqa jarayon shu slug yoki QR kodni band qilgan
+                lines = self.lines[parent]
+                span = f"{lines[0]}-qatordagi" if len(lines) == 1 else f"{lines[0]}–{lines[-1]}-qatorlardagi"
+                raise CatalogImportError(
+                    f"{parent}: {span} {len(buffer)} ta yozuv saqlanmadi "
+                    f"(oldingi bo‘laklar saqlangan): {exc}"
+                ) from exc
+            self.created[parent] += len(buffer)
+            self.buffers[parent] = []
+            self.lines[parent] = []
+
+    @property
+    def total_created(self):
+        return sum(self.created.values())
+
+    @property
+    def rows_per_second(self):
+        return self.total_created / self.elapsed if self.elapsed else 0.0
+
+    def _resolve_parents(self, kind, buffer):
+        # Ota yozuvlar oldingi flush'da saqlangan, endi ularning pk'si mavjud
+        for obj in buffer:
+            if kind in ('category', 'menu_item', 'table'):
+                obj.restaurant_id = obj.restaurant.pk
+            if kind == 'menu_item' and obj.category is not None:
+                obj.category_id = obj.category.pk
+            if kind == 'table' and not obj.qr_code:
+                obj.qr_code = Table.allocate_qr_code(obj.restaurant_id, obj.table_number, self.taken_qr_codes)
+
+    def _restaurant(self, row):
+        key = _text(row, 'restaurant')
+        if not key:
+            raise CatalogImportError("'restaurant' maydoni majburiy")
+        restaurant = self.restaurants.get(key)
+        if restaurant is None:
+            restaurant = Restaurant.objects.filter(slug=key).first()
+            if restaurant is None:
+                raise CatalogImportError(f"Restoran topilmadi: {key!r}")
+            self.restaurants[key] = restaurant
+        return restaurant
+
+    @staticmethod
+    def _validate(obj):
+        # Faqat maydon validatorlari: bog‘lanishlar va noyoblik xotirada tekshiriladi
+        obj.clean_fields(exclude=['restaurant', 'category', 'owner', 'qr_code'])
+        return obj
+
+    def _existing_categories(self, restaurant):
+        # Restoran obyekti import davomida bitta, shuning uchun id() barqaror kalit
+        key = id(restaurant)
+        if key not in self.categories:
+            self.categories[key] = (
+                {c.name: c for c in restaurant.categories.all()} if restaurant.pk else {}
+            )
+        return self.categories[key]
+
+    def _existing_table_numbers(self, restaurant):
+        key = id(restaurant)
+        if key not in self.table_numbers:
+            self.table_numbers[key] = (
+                set(restaurant.tables.values_list('table_number', flat=True)) if restaurant.pk else set()
+            )
+        return self.table_numbers[key]
+
+    def _owner(self, username):
+        if not username:
+            return None
+        if username not in self.owners:
+            self.owners[username] = User.objects.filter(username=username).first()
+            if self.owners[username] is None:
+                raise CatalogImportError(f"Foydalanuvchi topilmadi: {username!r}")
+        return self.owners[username]
+
+    def _build_restaurant(self, row):
+        name = _text(row, 'name')
+        if not name:
+            raise CatalogImportError("'name' maydoni majburiy")
+        key = _text(row, 'key', name)
+        if key in self.restaurants:
+            raise CatalogImportError(f"Takroriy restoran kaliti: {key!r}")
+        slug = _text(row, 'slug')
+        if slug:
+            if slug in self.taken_slugs:
+                raise CatalogImportError(f"Slug band: {slug!r}")
+            self.taken_slugs.add(slug)
+        else:
+            slug = Restaurant.allocate_slug(name, self.taken_slugs)
+        restaurant = self._validate(Restaurant(
+            name=name,
+            slug=slug,
+            address=_text(row, 'address'),
+            phone_number=_text(row, 'phone_number'),
+            opening_hours=_text(row, 'opening_hours'),
+            is_active=_bool(row, 'is_active', True),
+            owner=self._owner(_text(row, 'owner')),
+        ))
+        self.restaurants[key] = restaurant
+        return restaurant
+
+    def _build_category(self, row):
+        restaurant = self._restaurant(row)
+        name = _text(row, 'name')
+        categories = self._existing_categories(restaurant)
+        if name in categories:
+            raise CatalogImportError(f"Kategoriya allaqachon mavjud: {name!r}")
+        category = self._validate(Category(
+            restaurant=restaurant,
+            name=name,
+            description=_text(row, 'description'),
+            order=_int(row, 'order', 0),
+        ))
+        categories[name] = category
+        return category
+
+    def _build_menu_item(self, row):
+        restaurant = self._restaurant(row)
+        category = None
+        category_name = _text(row, 'category')
+        if category_name:
+            category = self._existing_categories(restaurant).get(category_name)
+            if category is None:
+                raise CatalogImportError(f"Kategoriya topilmadi: {category_name!r}")
+        stock_quantity = _int(row, 'stock_quantity', 0)
+        return self._validate(MenuItem(
+            restaurant=restaurant,
+            category=category,
+            name=_text(row, 'name'),
+            description=_text(row, 'description'),
+            price=_decimal(row, 'price'),
+            discount_price=_decimal(row, 'discount_price'),
+            dietary_info=_text(row, 'dietary_info'),
+            preparation_time=_int(row, 'preparation_time', 15),
+            stock_quantity=stock_quantity,
+            is_available=_bool(row, 'is_available', stock_quantity > 0),
+        ))
+
+    def _build_table(self, row):
+        restaurant = self._restaurant(row)
+        table_number = _text(row, 'table_number')
+        numbers = self._existing_table_numbers(restaurant)
+        if table_number in numbers:
+            raise CatalogImportError(f"Stol raqami allaqachon mavjud: {table_number!r}")
+        qr_code = _text(row, 'qr_code')
+        if qr_code in self.taken_qr_codes:
+            raise CatalogImportError(f"QR kod band: {qr_code!r}")
+        # Bo‘sh QR kod restoran pk'si ma’lum bo‘lgach flush paytida ajratiladi
+        table = self._validate(Table(
+            restaurant=restaurant,
+            table_number=table_number,
+            qr_code=qr_code,
+            capacity=_int(row, 'capacity', 4),
+        ))
+        numbers.add(table_number)
+        if qr_code:
+            self.taken_qr_codes.add(qr_code)
+        return table
+
+
+# Ommaviy menyu tahririda qatorlardan o‘qiladigan maydonlar (ustun yo‘q bo‘lsa joriy qiymat qoladi)
+MENU_FIELDS = (
+    'name', 'category', 'description', 'price', 'discount_price',
+    'is_available', 'dietary_info', 'preparation_time',
+)
+# Zaxira mavjud elementlar uchun InventoryLedger orqali o‘zgaradi: faqat yangi elementga yoziladi
+MENU_CREATE_ONLY_FIELDS = ('stock_quantity',)
+MENU_EXPORT_FIELDS = ('id', *MENU_FIELDS, 'stock_quantity')
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Category):
+        return value.name
+    return value
+
+
+class MenuSync:
+    """
+    Restoranning butun menyusini jadval (CSV/JSON qatorlari) bilan solishtirib yangilaydi.
+
+    Joriy elementlar va kategoriyalar bir marta o‘qiladi, farq xotirada
+    hisoblanadi: qator `id` bo‘yicha, u bo‘lmasa nom bo‘yicha mos
+    keltiriladi. Yangi elementlar bulk_create, o‘zgarganlar bitta bulk_update,
+    jadvalda yo‘qlari (faqat aniq so‘ralsa — delete_missing) bo‘laklab
+    o‘chiriladi — barchasi bitta tranzaksiyada. Xato bo‘lsa hech narsa
+    yozilmaydi.
+    """
+
+    def __init__(self, restaurant, delete_missing=False, chunk_size=500):
+        self.restaurant = restaurant
+        self.delete_missing = delete_missing
+        self.chunk_size = chunk_size
+        self.items = list(restaurant.menu_items.select_related('category'))
+        self.categories = {category.name: category for category in restaurant.categories.all()}
+        self.new_categories = []
+        self.to_create = []
+        # [(element, {maydon: (eski, yangi)})]
+        self.to_update = []
+        self.to_delete = []
+        self.unchanged = 0
+        self.errors = []
+
+    def diff(self, rows):
+        """Qatorlarni joriy menyu bilan solishtiradi; natija `summary()` da."""
+        by_id = {item.pk: item for item in self.items}
+        by_name = {}
+        for item in self.items:
+            by_name.setdefault(item.name, []).append(item)
+        seen = set()
+        for line_no, row in enumerate(rows, start=1):
+            try:
+                values = self._values(row)
+                item = self._match(row, values, by_id, by_name)
+                if item is not None and item.pk in seen:
+                    raise CatalogImportError(f"Element jadvalda ikki marta uchradi: {item.name!r}")
+                if item is None:
+                    self.to_create.append(self._new_item(row, values))
+                    continue
+                seen.add(item.pk)
+                changes = self._apply_values(item, values)
+                if changes:
+                    self.to_update.append((item, changes))
+                else:
+                    self.unchanged += 1
+            except (CatalogImportError, ValidationError) as exc:
+                message = '; '.join(exc.messages) if isinstance(exc, ValidationError) else str(exc)
+                self.errors.append((line_no, message))
+        if self.delete_missing:
+            if not seen and not self.to_create:
+                # Bo‘sh jadval butun menyuni o‘chirib yubormasin
+                self.errors.append((0, "Jadval bo‘sh: o‘chirish rad etildi"))
+                return self
+            self.to_delete = [item for item in self.items if item.pk not in seen]
+        return self
+
+    def _values(self, row):
+        values = {}
+        for field in MENU_FIELDS:
+            if field not in row:
+                continue
+            if field == 'category':
+                values[field] = self._category(_text(row, field))
+            elif field in ('price', 'discount_price'):
+                values[field] = _decimal(row, field)
+            elif field == 'is_available':
+                values[field] = _bool(row, field, True)
+            elif field == 'preparation_time':
+                values[field] = _int(row, field, 15)
+            else:
+                values[field] = _text(row, field)
+        return values
+
+    def _category(self, name):
+        if not name:
+            return None
+        category = self.categories.get(name)
+        if category is None:
+            # Noma’lum kategoriya yaratiladi; pk apply() da bulk_create dan keyin ma’lum bo‘ladi
+            category = self._validate(Category(restaurant=self.restaurant, name=name))
+            self.categories[name] = category
+            self.new_categories.append(category)
+        return category
+
+    def _match(self, row, values, by_id, by_name):
+        item_id = _int(row, 'id', None)
+        if item_id is not None:
+            item = by_id.get(item_id)
+            if item is None:
+                raise CatalogImportError(f"Bu restoranda #{item_id} element topilmadi")
+            return item
+        name = values.get('name')
+        if not name:
+            raise CatalogImportError("'id' yoki 'name' maydoni majburiy")
+        matches = by_name.get(name, [])
+        if len(matches) > 1:
+            raise CatalogImportError(f"{name!r} nomli elementlar bir nechta: 'id' ustunini ko‘rsating")
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _validate(obj):
+        obj.clean_fields(exclude=['restaurant', 'category'])
+        return obj
+
+    def _new_item(self, row, values):
+        if values.get('price') is None:
+            raise CatalogImportError(f"Yangi element uchun 'price' majburiy: {values.get('name')!r}")
+        stock_quantity = _int(row, 'stock_quantity', 0)
+        return self._validate(MenuItem(
+            restaurant=self.restaurant,
+            stock_quantity=stock_quantity,
+            **{'is_available': stock_quantity > 0, **values},
+        ))
+
+    def _apply_values(self, item, values):
+        changes = {}
+        for field, value in values.items():
+            old = item.category if field == 'category' else getattr(item, field)
+            if field == 'category' and old is not None and value is not None and old.pk == value.pk:
+                continue
+            if old != value:
+                changes[field] = (old, value)
+                setattr(item, field, value)
+        if changes:
+            self._validate(item)
+        return changes
+
+    def summary(self):
+        """JSON ga tayyor farq: yaratiladigan, o‘zgaradigan va o‘chiriladigan elementlar."""
+        return {
+            'create': [
+                {field: _plain(getattr(item, field)) for field in ('id', *MENU_FIELDS, *MENU_CREATE_ONLY_FIELDS)}
+                for item in self.to_create
+            ],
+            'update': [
+                {
+                    'id': item.pk,
+                    'name': item.name,
+                    'changes': {field: [_plain(old), _plain(new)] for field, (old, new) in changes.items()},
+                }
+                for item, changes in self.to_update
+            ],
+            'delete': [{'id': item.pk, 'name': item.name} for item in self.to_delete],
+            'new_categories': [category.name for category in self.new_categories],
+            'unchanged': self.unchanged,
+            'errors': [{'line': line_no, 'error': message} for line_no, message in self.errors],
+        }
+
+    @property
+    def has_changes(self):
+        return bool(self.to_create or self.to_update or self.to_delete)
+
+    def apply(self):
+        """Farqni bitta tranzaksiyada yozadi. Xatolar bo‘lsa CatalogImportError."""
+        if self.errors:
+            raise CatalogImportError(f"Jadvalda {len(self.errors)} ta xato bor")
+        if not self.has_changes:
+            return self.summary()
+        now = timezone.now()
+        with transaction.atomic():
+            Category.objects.bulk_create(self.new_categories)
+            # Qayta tayinlash yangi kategoriyalar pk sini category_id ga yozadi, keshdagi obyekt qoladi
+            for item in self.to_create:
+                item.category = item.category
+            MenuItem.objects.bulk_create(self.to_create, batch_size=self.chunk_size)
+            fields = {'updated_at'}
+            for item, changes in self.to_update:
+                fields.update(changes)
+                item.category = item.category
+                item.updated_at = now
+            if self.to_update:
+                MenuItem.objects.bulk_update(
+                    [item for item, _changes in self.to_update], sorted(fields), batch_size=self.chunk_size
+                )
+            ids = [item.pk for item in self.to_delete]
+            for start in range(0, len(ids), self.chunk_size):
+                MenuItem.objects.filter(pk__in=ids[start:start + self.chunk_size]).delete()
+            # bulk_create/bulk_update signal yubormaydi: menyu versiyasi bir marta yangilanadi
+            versions.bump([self.restaurant.id])
+        return self.summary()
+
+
+def export_menu(restaurant):
+    """Joriy menyu MenuSync qabul qiladigan ustunlar bilan (jadvalda tahrirlash uchun)."""
+    rows = restaurant.menu_items.select_related('category').order_by('category__order', 'name')
+    for item in rows:
+        yield {
+            field: _plain(item.category if field == 'category' else getattr(item, field))
+            for field in MENU_EXPORT_FIELDS
+        }
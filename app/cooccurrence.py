@@ -0,0 +1,153 @@
+"""
+"Ko‘pincha birga buyurtma qilinadi" tavsiyalari uchun birga kelish matritsasi.
+
+Fon ishi har bir restoran uchun OrderItem tarixidan element x element birga
+kelish matritsasini siyrak (COO) ko‘rinishda quradi: buyurtma ichidagi
+juftliklar NumPy bilan vektorlashtirilgan holda hosil qilinadi va np.unique
+bilan sanaladi. Ball — kosinus o‘xshashligi c_ij / sqrt(n_i * n_j), shunda
+hamma buyurtmada uchraydigan mashhur elementlar har bir savatga tavsiya
+qilinavermaydi. Har bir element uchun top-k qo‘shnilar MenuItemNeighbors ga
+yoziladi; ularni app.recommendations beradi.
+"""
+import time
+from itertools import chain
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import MenuItemNeighbors, OrderItem, Restaurant
+
+TOP_K = 10
+MIN_COUNT = 2
+# Katta buyurtmalar (ziyofatlar) juftliklar sonini kvadratik oshiradi va signal bermaydi
+MAX_BASKET = 50
+PAIRS_PER_CHUNK = 5_000_000
+
+
+def basket_lines(restaurant_id, since):
+    """(order_id, menu_item_id) juftliklari, order_id bo‘yicha saralangan; shakli [n, 2]."""
+    rows = (
+        OrderItem.objects.filter(
+            order__restaurant_id=restaurant_id,
+            order__created_at__gte=since,
+            menu_item__isnull=False,
+        )
+        .exclude(order__status='cancelled')
+        .values_list('order_id', 'menu_item_id')
+        .distinct()
+        .order_by('order_id')
+    )
+    return np.fromiter(chain.from_iterable(rows.iterator(chunk_size=10000)), dtype=np.int64).reshape(-1, 2)
+
+
+def _pair_codes(items, starts, sizes, width):
+    """Har bir buyurtma ichidagi barcha tartiblangan (i, j), i != j juftliklari: i * width + j."""
+    line_count = sizes.sum()
+    # Har bir qator indeksi va uning buyurtmasi boshlanishi/hajmi
+    order_starts = np.repeat(starts, sizes)
+    order_sizes = np.repeat(sizes, sizes)
+    lines = order_starts + np.arange(line_count) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    # Har bir qator o‘z buyurtmasidagi har bir qator bilan juftlanadi
+    left = np.repeat(lines, order_sizes)
+    right = np.repeat(order_starts, order_sizes) + (
+        np.arange(order_sizes.sum()) - np.repeat(np.cumsum(order_sizes) - order_sizes, order_sizes)
+    )
+    distinct = left != right
+    return items[left[distinct]] * width + items[right[distinct]]
+
+
+def cooccurrence(lines, max_basket=MAX_BASKET):
+    """
+    Siyrak birga kelish matritsasi.
+
+    Natija: (item_ids, rows, cols, counts, support) — rows/cols item_ids dagi
+    indekslar (faqat i != j, simmetrik), support[i] — element qatnashgan
+    buyurtmalar soni.
+    """
+    item_ids, items = np.unique(lines[:, 1], return_inverse=True)
+    support = np.bincount(items, minlength=len(item_ids))
+    width = len(item_ids)
+    starts = np.flatnonzero(np.r_[True, lines[1:, 0] != lines[:-1, 0]]) if len(lines) else np.zeros(0, np.int64)
+    sizes = np.diff(np.r_[starts, len(lines)])
+    keep = (sizes > 1) & (sizes <= max_basket)
+    starts, sizes = starts[keep], sizes[keep]
+
+    # Xotira chegaralangan bo‘lishi uchun buyurtmalar juftliklar soni bo‘yicha bo‘laklanadi
+    chunk_of = np.cumsum(sizes * (sizes - 1)) // PAIRS_PER_CHUNK
+    codes, counts = [], []
+    for chunk in np.unique(chunk_of):
+        selected = chunk_of == chunk
+        chunk_codes, chunk_counts = np.unique(
+            _pair_codes(items, starts[selected], sizes[selected], width), return_counts=True
+        )
+        codes.append(chunk_codes)
+        counts.append(chunk_counts)
+    if not codes:
+        empty = np.zeros(0, np.int64)
+        return item_ids, empty, empty, empty, support
+    codes, inverse = np.unique(np.concatenate(codes), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+    return item_ids, codes // width, codes % width, counts, support
+
+
+def top_neighbors(item_ids, rows, cols, counts, support, k=TOP_K, min_count=MIN_COUNT):
+    """{menu_item_id: [[qo‘shni_id, ball], ...]} — har bir element uchun eng yaxshi k ta."""
+    frequent = counts >= min_count
+    rows, cols, counts = rows[frequent], cols[frequent], counts[frequent]
+    scores = counts / np.sqrt(support[rows].astype(np.float64) * support[cols])
+    order = np.lexsort((-scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    best = rank < k
+    rows, cols, scores = rows[best], cols[best], scores[best]
+
+    neighbors = {}
+    bounds = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else []
+    for start, end in zip(bounds, chain(bounds[1:], [len(rows)])):
+        neighbors[int(item_ids[rows[start]])] = [
+            [int(item_id), round(float(score), 4)]
+            for item_id, score in zip(item_ids[cols[start:end]], scores[start:end])
+        ]
+    return neighbors
+
+
+def rebuild(restaurant_ids=None, weeks=12, k=TOP_K, now=None):
+    """
+    Restoranlar qo‘shnilar jadvalini qayta quradi.
+
+    Natija: [{'restaurant', 'lines', 'items', 'pairs', 'seconds'}, ...].
+    """
+    now = now or timezone.now()
+    since = now - timezone.timedelta(weeks=weeks)
+    if restaurant_ids is None:
+        restaurant_ids = list(Restaurant.objects.filter(is_active=True).values_list('id', flat=True))
+    results = []
+    for restaurant_id in restaurant_ids:
+        started = time.perf_counter()
+        lines = basket_lines(restaurant_id, since)
+        item_ids, rows, cols, counts, support = cooccurrence(lines)
+        neighbors = top_neighbors(item_ids, rows, cols, counts, support, k=k)
+        item_support = dict(zip(item_ids.tolist(), support.tolist()))
+        with transaction.atomic():
+            MenuItemNeighbors.objects.filter(restaurant_id=restaurant_id).delete()
+            MenuItemNeighbors.objects.bulk_create([
+                MenuItemNeighbors(
+                    menu_item_id=item_id,
+                    restaurant_id=restaurant_id,
+                    neighbors=item_neighbors,
+                    support=item_support[item_id],
+                    updated_at=now,
+                )
+                for item_id, item_neighbors in neighbors.items()
+            ], batch_size=1000)
+            caching.recommendations.invalidate([restaurant_id])
+        results.append({
+            'restaurant': restaurant_id,
+            'lines': len(lines),
+            'items': len(neighbors),
+            'pairs': len(counts),
+            'seconds': time.perf_counter() - started,
+        })
+    return results
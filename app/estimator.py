@@ -0,0 +1,231 @@
+"""
+Buyurtma tayyorlash vaqtini tarixiy holat o‘tishlaridan o‘rganish.
+
+Har bir buyurtma uchun oshxona vaqti ('accepted' -> 'ready') va qabul
+qilingan paytdagi navbat uzunligi olinadi; bekor qilingan buyurtma
+navbatda faqat bekor qilinguncha turadi. Har bir restoran uchun
+`vaqt = asos + koeffitsiyent * navbat` chiziqli modeli, har bir menyu
+elementi uchun esa navbat ta’siridan tozalangan o‘rtacha vaqt hisoblanadi.
+Barcha hisob-kitoblar NumPy massivlarida, restoranlar bo‘yicha sikl
+qilinmasdan bajariladi.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import OrderItem, OrderStatusTransition, PrepTimeModel
+
+# Elementning o‘rganilgan vaqti restoran asosiga shu qadar "soxta" kuzatuv bilan tortiladi
+ITEM_PRIOR_WEIGHT = 3
+MIN_SAMPLES = 10
+# Buyurtmani oshxonadan chiqaradigan holatlar
+END_STATUSES = ('ready', 'cancelled', 'served')
+# Shundan eski, yakunlanmagan buyurtma navbatda hisoblanmaydi
+OPEN_ORDER_CUTOFF = timezone.timedelta(hours=6)
+
+
+def load_samples(since=None):
+    """
+    Yakunlangan buyurtmalar uchun NumPy massivlarini qaytaradi.
+
+    Buyurtma oshxonadan 'ready', 'cancelled' yoki 'served' ning birinchisida
+    chiqadi; namuna faqat 'ready' bilan tugaganlardan olinadi. Hech biri
+    bo‘lmagan va OPEN_ORDER_CUTOFF dan eski buyurtmalar navbatdan tashlanadi.
+
+    Natija: order_ids, restaurant_ids, kitchen_minutes, queue_depth,
+    accepted_at (unix soniyalar), item_order_idx, item_ids, item_static_minutes.
+    """
+    transitions = OrderStatusTransition.objects.filter(to_status__in=['accepted', *END_STATUSES])
+    if since is not None:
+        transitions = transitions.filter(created_at__gte=since)
+    rows = list(transitions.values_list('order_id', 'restaurant_id', 'to_status', 'created_at'))
+    accepted = {}
+    ended = {}
+    for order_id, restaurant_id, status, created_at in rows:
+        moment = created_at.timestamp()
+        if status == 'accepted':
+            accepted[order_id] = (restaurant_id, moment)
+        elif order_id not in ended or moment < ended[order_id][1]:
+            # Oshxonadan birinchi chiqish (tayyor, bekor qilingan yoki yetkazilgan)
+            ended[order_id] = (status, moment)
+    # Oxiri yo‘q eski buyurtmalar (yo‘qolgan o‘tish) navbatni abadiy band qilmasin
+    stale_before = timezone.now().timestamp() - OPEN_ORDER_CUTOFF.total_seconds()
+    accepted = {
+        order_id: value for order_id, value in accepted.items()
+        if order_id in ended or value[1] >= stale_before
+    }
+    if not accepted:
+        return None
+
+    # Navbat chuqurligi uchun tugallanmagan buyurtmalar ham hisobga olinadi
+    all_ids = np.array(sorted(accepted), dtype=np.int64)
+    all_restaurants = np.array([accepted[i][0] for i in all_ids.tolist()], dtype=np.int64)
+    all_starts = np.array([accepted[i][1] for i in all_ids.tolist()], dtype=np.float64)
+    all_ends = np.array([ended[i][1] if i in ended else np.inf for i in all_ids.tolist()], dtype=np.float64)
+    depth = _queue_depth(all_restaurants, all_starts, all_ends)
+
+    done = np.array([ended.get(i, ('',))[0] == 'ready' for i in all_ids.tolist()], dtype=bool)
+    if not done.any():
+        return None
+    order_ids = all_ids[done]
+    samples = {
+        'order_ids': order_ids,
+        'restaurant_ids': all_restaurants[done],
+        'kitchen_minutes': (all_ends[done] - all_starts[done]) / 60.0,
+        'queue_depth': depth[done],
+        'accepted_at': all_starts[done],
+    }
+
+    items = list(
+        OrderItem.objects.filter(order_id__in=order_ids.tolist(), menu_item__isnull=False)
+        .values_list('order_id', 'menu_item_id', 'menu_item__preparation_time')
+    )
+    item_orders = np.array([i[0] for i in items], dtype=np.int64)
+    samples['item_order_idx'] = np.searchsorted(order_ids, item_orders)
+    samples['item_ids'] = np.array([i[1] for i in items], dtype=np.int64)
+    samples['item_static_minutes'] = np.array([i[2] for i in items], dtype=np.float64)
+    return samples
+
+
+def _queue_depth(restaurant_ids, starts, ends):
+    """Har bir buyurtma qabul qilingan paytda o‘sha restoranda oshxonada bo‘lgan buyurtmalar soni."""
+    # Restoranlarni vaqt o‘qida bir-biridan uzoqlashtirib, bitta searchsorted bilan hisoblaymiz
+    _codes, restaurant_idx = np.unique(restaurant_ids, return_inverse=True)
+    finite_max = np.nanmax(np.where(np.isfinite(ends), ends, starts))
+    span = finite_max - starts.min() + 1.0
+    offset = restaurant_idx * span * 2
+    shifted_starts = starts - starts.min() + offset
+    shifted_ends = np.where(np.isfinite(ends), ends - starts.min(), span) + offset
+    sorted_starts = np.sort(shifted_starts)
+    sorted_ends = np.sort(shifted_ends)
+    started_before = np.searchsorted(sorted_starts, shifted_starts, side='left')
+    ended_before = np.searchsorted(sorted_ends, shifted_starts, side='right')
+    return (started_before - ended_before).astype(np.float64)
+
+
+def fit(samples, mask=None):
+    """
+    Koeffitsiyentlarni o‘rganadi.
+
+    Natija: {restaurant_id: (base_minutes, load_minutes, {item_id: minutes}, sample_size)}.
+    """
+    if mask is None:
+        mask = np.ones(len(samples['order_ids']), dtype=bool)
+    restaurants = samples['restaurant_ids'][mask]
+    y = samples['kitchen_minutes'][mask]
+    d = samples['queue_depth'][mask]
+    codes, r_idx = np.unique(restaurants, return_inverse=True)
+    n = np.bincount(r_idx, minlength=len(codes)).astype(np.float64)
+
+    # Har bir restoran uchun y = asos + koeffitsiyent * d, guruhlangan eng kichik kvadratlar
+    mean_d = np.bincount(r_idx, d, len(codes)) / n
+    mean_y = np.bincount(r_idx, y, len(codes)) / n
+    cov = np.bincount(r_idx, (d - mean_d[r_idx]) * (y - mean_y[r_idx]), len(codes))
+    var = np.bincount(r_idx, (d - mean_d[r_idx]) ** 2, len(codes))
+    slope = np.where(var > 0, cov / np.where(var > 0, var, 1.0), 0.0)
+    slope = np.clip(slope, 0.0, None)
+    base = mean_y - slope * mean_d
+
+    # Navbat ta’siridan tozalangan vaqt har bir element bo‘yicha o‘rtachalanadi
+    order_pos = np.flatnonzero(mask)
+    item_mask = np.isin(samples['item_order_idx'], order_pos)
+    item_orders = samples['item_order_idx'][item_mask]
+    local = np.searchsorted(order_pos, item_orders)
+    adjusted = (y - slope[r_idx] * d)[local]
+    item_r = r_idx[local]
+    pairs = np.stack([item_r, samples['item_ids'][item_mask]], axis=1)
+    keys, pair_idx = np.unique(pairs, axis=0, return_inverse=True)
+    pair_idx = pair_idx.reshape(-1)
+    counts = np.bincount(pair_idx, minlength=len(keys))
+    sums = np.bincount(pair_idx, adjusted, len(keys))
+    item_minutes = (sums + ITEM_PRIOR_WEIGHT * base[keys[:, 0]]) / (counts + ITEM_PRIOR_WEIGHT)
+
+    result = {
+        int(code): (float(base[i]), float(slope[i]), {}, int(n[i]))
+        for i, code in enumerate(codes.tolist())
+    }
+    for (r, item_id), minutes in zip(keys.tolist(), item_minutes.tolist()):
+        result[int(codes[r])][2][int(item_id)] = round(minutes, 2)
+    return result
+
+
+def predict(samples, coefficients, mask):
+    """Berilgan buyurtmalar uchun bashorat va statik (eski) bashoratni vektorlashgan holda qaytaradi."""
+    order_pos = np.flatnonzero(mask)
+    restaurants = samples['restaurant_ids'][order_pos]
+    depth = samples['queue_depth'][order_pos]
+    base = np.array([coefficients.get(int(r), (15.0, 0.0))[0] for r in restaurants.tolist()])
+    load = np.array([coefficients.get(int(r), (15.0, 0.0))[1] for r in restaurants.tolist()])
+
+    item_mask = np.isin(samples['item_order_idx'], order_pos)
+    local = np.searchsorted(order_pos, samples['item_order_idx'][item_mask])
+    learned_items = np.array([
+        coefficients.get(int(restaurants[o]), (15.0, 0.0, {}))[2].get(int(item), np.nan)
+        for o, item in zip(local.tolist(), samples['item_ids'][item_mask].tolist())
+    ])
+    learned_items = np.where(np.isnan(learned_items), base[local], learned_items)
+
+    # Buyurtma vaqti eng uzun element bilan belgilanadi (PrepTimeModel.estimate kabi)
+    has_items = np.zeros(len(order_pos), dtype=bool)
+    has_items[local] = True
+    learned = np.full(len(order_pos), -np.inf)
+    np.maximum.at(learned, local, learned_items)
+    learned = np.where(has_items, learned, base)
+    static = np.zeros(len(order_pos))
+    np.maximum.at(static, local, samples['item_static_minutes'][item_mask])
+    static = np.where(has_items, static, 15.0)
+    return np.maximum(1.0, learned + load * depth), static
+
+
+def evaluate(samples, holdout=0.2):
+    """
+    Eng so‘nggi `holdout` ulush buyurtmalarda oflayn aniqlikni o‘lchaydi.
+
+    Model oldingi buyurtmalarda o‘qitiladi; MAE va p90 mutlaq xato statik
+    `preparation_time` asosidagi eski hisob bilan solishtiriladi.
+    """
+    cutoff = np.quantile(samples['accepted_at'], 1 - holdout)
+    train = samples['accepted_at'] < cutoff
+    test = ~train
+    if not test.any() or not train.any():
+        return None
+    coefficients = fit(samples, train)
+    predicted, static = predict(samples, coefficients, test)
+    actual = samples['kitchen_minutes'][test]
+    learned_error = np.abs(predicted - actual)
+    static_error = np.abs(static - actual)
+    return {
+        'test_orders': int(test.sum()),
+        'learned_mae': float(learned_error.mean()),
+        'learned_p90': float(np.quantile(learned_error, 0.9)),
+        'static_mae': float(static_error.mean()),
+        'static_p90': float(np.quantile(static_error, 0.9)),
+    }
+
+
+def refit(since=None):
+    """Barcha restoranlar uchun koeffitsiyentlarni qayta o‘rganadi va saqlaydi."""
+    samples = load_samples(since)
+    if samples is None:
+        return 0
+    coefficients = fit(samples)
+    with transaction.atomic():
+        existing = {m.restaurant_id: m for m in PrepTimeModel.objects.filter(restaurant_id__in=list(coefficients))}
+        to_create, to_update = [], []
+        for restaurant_id, (base, load, items, sample_size) in coefficients.items():
+            if sample_size < MIN_SAMPLES:
+                continue
+            model = existing.get(restaurant_id) or PrepTimeModel(restaurant_id=restaurant_id)
+            model.base_minutes = round(base, 2)
+            model.load_minutes = round(load, 3)
+            model.item_minutes = {str(k): v for k, v in items.items()}
+            model.sample_size = sample_size
+            model.updated_at = timezone.now()
+            (to_update if model.pk else to_create).append(model)
+        PrepTimeModel.objects.bulk_create(to_create)
+        PrepTimeModel.objects.bulk_update(
+            to_update, ['base_minutes', 'load_minutes', 'item_minutes', 'sample_size', 'updated_at']
+        )
+    caching.prep_times.invalidate(m.restaurant_id for m in to_create + to_update)
+    return len(to_create) + len(to_update)
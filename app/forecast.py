@@ -0,0 +1,109 @@
+"""
+Menyu elementlari talabini prognoz qilish va zaxira to‘ldirish tavsiyalari.
+
+OrderItem tarixi bitta guruhlangan so‘rov bilan (element, hafta kuni, soat)
+bo‘yicha yig‘iladi va [elementlar x 7 x 24] NumPy matritsasiga joylanadi.
+Keyingi soatlar uchun talab shu matritsadan olinadi, joriy zaxira bilan
+solishtirilib tugash vaqti va to‘ldirish miqdori hisoblanadi. Barcha
+restoranlar bitta ishda qayta ishlanadi.
+"""
+import math
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from .models import MenuItem, OrderItem, RestockSuggestion
+
+HOURS_PER_WEEK = 7 * 24
+
+
+def demand_matrix(item_ids, weeks, now=None):
+    """
+    Har bir element uchun hafta kuni va soat bo‘yicha o‘rtacha talabni qaytaradi.
+
+    `item_ids` — o‘sish tartibida saralangan NumPy massivi.
+    Natija shakli: [len(item_ids), 7, 24]; hafta kuni 0 = dushanba.
+    """
+    now = now or timezone.now()
+    rows = (
+        OrderItem.objects.filter(
+            menu_item__isnull=False,
+            order__created_at__gte=now - timezone.timedelta(weeks=weeks),
+        )
+        .exclude(order__status='cancelled')
+        .annotate(weekday=ExtractIsoWeekDay('order__created_at'), hour=ExtractHour('order__created_at'))
+        .values_list('menu_item_id', 'weekday', 'hour')
+        .annotate(quantity=Sum('quantity'))
+        .order_by()
+    )
+    matrix = np.zeros((len(item_ids), 7, 24))
+    if not len(item_ids):
+        return matrix
+    data = np.array(list(rows), dtype=np.int64).reshape(-1, 4)
+    index = np.clip(np.searchsorted(item_ids, data[:, 0]), 0, len(item_ids) - 1)
+    # Ro‘yxat olingandan keyin qo‘shilgan elementlar tashlab yuboriladi
+    known = item_ids[index] == data[:, 0]
+    np.add.at(matrix, (index[known], data[known, 1] - 1, data[known, 2]), data[known, 3])
+    return matrix / weeks
+
+
+def project(matrix, stock, now, horizon_hours, cover_hours, safety_factor):
+    """
+    Kelgusi soatlar uchun talabni matritsadan yig‘ib, tugash vaqti va tavsiyani hisoblaydi.
+
+    Natija: (kunlik talab, tugashgacha soatlar yoki NaN, tavsiya etilgan miqdor).
+    """
+    weekly = matrix.reshape(len(matrix), HOURS_PER_WEEK)
+    local_now = timezone.localtime(now)
+    start = local_now.weekday() * 24 + local_now.hour
+    hours = (start + np.arange(max(horizon_hours, cover_hours))) % HOURS_PER_WEEK
+    upcoming = weekly[:, hours]
+
+    cumulative = np.cumsum(upcoming[:, :horizon_hours], axis=1)
+    runs_out = cumulative >= stock[:, None]
+    # Zaxira tugaydigan birinchi soat; gorizontda tugamasa NaN
+    stockout_hours = np.where(runs_out.any(axis=1), runs_out.argmax(axis=1) + 1, np.nan)
+    stockout_hours = np.where(stock <= 0, 0, stockout_hours)
+
+    cover_demand = upcoming[:, :cover_hours].sum(axis=1) * safety_factor
+    suggested = np.ceil(np.clip(cover_demand - stock, 0, None))
+    daily_demand = weekly.sum(axis=1) / 7
+    return daily_demand, stockout_hours, suggested
+
+
+def refresh(weeks=8, horizon_days=7, cover_days=3, safety_factor=1.2, now=None):
+    """Barcha restoranlar uchun tavsiyalarni qayta hisoblaydi va RestockSuggestion jadvalini almashtiradi."""
+    now = now or timezone.now()
+    items = np.array(
+        list(MenuItem.objects.order_by('id').values_list('id', 'restaurant_id', 'stock_quantity')),
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    item_ids = items[:, 0]
+    matrix = demand_matrix(item_ids, weeks, now)
+    daily_demand, stockout_hours, suggested = project(
+        matrix, items[:, 2].astype(np.float64), now, horizon_days * 24, cover_days * 24, safety_factor
+    )
+    has_demand = daily_demand > 0
+    suggestions = [
+        RestockSuggestion(
+            restaurant_id=restaurant_id,
+            menu_item_id=item_id,
+            daily_demand=round(demand, 2),
+            projected_stockout_at=None if math.isnan(hours) else now + timezone.timedelta(hours=hours),
+            suggested_quantity=int(quantity),
+        )
+        for item_id, restaurant_id, demand, hours, quantity in zip(
+            item_ids[has_demand].tolist(),
+            items[has_demand, 1].tolist(),
+            daily_demand[has_demand].tolist(),
+            stockout_hours[has_demand].tolist(),
+            suggested[has_demand].tolist(),
+        )
+    ]
+    with transaction.atomic():
+        RestockSuggestion.objects.all().delete()
+        RestockSuggestion.objects.bulk_create(suggestions, batch_size=1000)
+    return len(suggestions)
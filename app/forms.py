@@ -1,8 +1,11 @@
+import datetime
+
 from django import forms
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import MenuItem, Table, Staff, Order, Category, UserProfile
+from .models import MenuItem, Table, Staff, Order, Category, UserProfile, InventoryLedger
 
 class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
@@ -35,9 +38,21 @@ class MenuItemForm(forms.ModelForm):
             'stock_quantity': _("Zaxira miqdori"),
         }
 
+    def __init__(self, *args, restaurant=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if restaurant is not None:
+            self.fields['category'].queryset = restaurant.categories.all()
+
     def save(self, commit=True):
         instance = super().save(commit=False)
-        if commit:
+        if commit and instance.pk and 'stock_quantity' in self.changed_data:
+            # Mavjud element zaxirasi InventoryLedger orqali o'zgaradi ('adjustment')
+            with InventoryLedger() as ledger:
+                instance.save(update_fields=[
+                    name for name in self._meta.fields if name != 'stock_quantity'
+                ] + ['updated_at'])
+                ledger.set_quantity(instance, self.cleaned_data['stock_quantity'], 'adjustment', "Menyu tahriri")
+        elif commit:
             instance.save()
 
         # Save new images
@@ -103,6 +118,59 @@ class RegistrationForm(UserCreationForm):
             raise forms.ValidationError(_("Bu telefon raqami allaqachon ro'yxatdan o'tgan."))
         return phone_number
 
+class ReservationForm(forms.Form):
+    """Form to request a table reservation; the table itself is chosen by app.reservations."""
+    party_size = forms.IntegerField(
+        min_value=1,
+        label=_("Mehmonlar soni"),
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1})
+    )
+    starts_at = forms.DateTimeField(
+        label=_("Boshlanish vaqti"),
+        widget=forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'})
+    )
+    duration = forms.IntegerField(
+        min_value=15,
+        required=False,
+        label=_("Davomiyligi (daqiqa)"),
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 15})
+    )
+    guest_name = forms.CharField(
+        max_length=100,
+        required=False,
+        label=_("Mehmon ismi"),
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    phone_number = forms.CharField(
+        max_length=20,
+        required=False,
+        label=_("Telefon raqami"),
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '+998901234567'})
+    )
+    notes = forms.CharField(
+        required=False,
+        label=_("Izohlar"),
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2})
+    )
+
+    def clean(self):
+        """Tugash vaqtini hisoblash va o'tgan vaqtni rad etish."""
+        from . import reservations
+        cleaned_data = super().clean()
+        starts_at = cleaned_data.get('starts_at')
+        if starts_at is None:
+            return cleaned_data
+        if starts_at < timezone.now():
+            raise forms.ValidationError(_("O'tgan vaqtni band qilib bo'lmaydi."))
+        duration = cleaned_data.get('duration')
+        ends_at = starts_at + (datetime.timedelta(minutes=duration) if duration else reservations.DEFAULT_DURATION)
+        try:
+            reservations.validate_window(starts_at, ends_at)
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+        cleaned_data['ends_at'] = ends_at
+        return cleaned_data
+
 # class MenuItemForm(forms.ModelForm):
 #     """Form to create or update menu items."""
 #     images = forms.FileField(
@@ -0,0 +1,185 @@
+"""
+So‘rov doirasidagi foydalanuvchi identifikatsiyasi.
+
+Foydalanuvchi profili, egalik qilgan restoranlari va xodim rollari bitta
+UNION so‘rovi bilan olinadi va sessiyada saqlanadi. Yozuv foydalanuvchining
+identifikatsiya versiyasi (app.versions) bilan belgilanadi: Staff,
+UserProfile yoki Restaurant o‘zgarganda signallar versiyani yangilaydi va
+keyingi so‘rovda ma’lumot qayta olinadi. So‘rov ichida natija `request`
+da yodlanadi.
+
+IdentityMiddleware `request.identity` ni dangasa obyekt sifatida
+o‘rnatadi; async ko‘rinishlar `await aget(request)` dan foydalanadi.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db.models import CharField, F, IntegerField, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from . import versions
+
+SESSION_KEY = '_identity'
+
+
+class Identity:
+    """Foydalanuvchi profili va restoranlardagi huquqlari."""
+
+    def __init__(self, user_id=None, profile_id=None, restaurants=None):
+        self.user_id = user_id
+        self.profile_id = profile_id
+        # {slug: [restaurant_id, egasimi, staff_id, rol]}
+        self.restaurants = restaurants or {}
+
+    def owned(self, slug):
+        """Foydalanuvchi egalik qilsa restoran ID si, aks holda None."""
+        entry = self.restaurants.get(slug)
+        return entry[0] if entry and entry[1] else None
+
+    def staff(self, slug, role):
+        """Foydalanuvchi restoranda `role` bo‘lsa (restaurant_id, staff_id), aks holda None."""
+        entry = self.restaurants.get(slug)
+        return (entry[0], entry[2]) if entry and entry[3] == role else None
+
+    def as_dict(self):
+        return {'user_id': self.user_id, 'profile_id': self.profile_id, 'restaurants': self.restaurants}
+
+
+ANONYMOUS = Identity()
+
+
+def query(user_id):
+    """Profil, egalik qilingan restoranlar va xodim yozuvlari — bitta so‘rovda."""
+    from .models import Restaurant, Staff, UserProfile
+
+    def columns(queryset, **values):
+        # Nomlar model maydonlari bilan to‘qnashmasligi uchun `ref_` bilan
+        return queryset.annotate(**values).values_list(
+            'ref_kind', 'ref_id', 'ref_slug', 'ref_staff_id', 'ref_role'
+        ).order_by()
+
+    profiles = columns(
+        UserProfile.objects.filter(user_id=user_id),
+        ref_kind=Value('profile'), ref_id=F('id'), ref_slug=Value('', output_field=CharField()),
+        ref_staff_id=Value(None, output_field=IntegerField()), ref_role=Value('', output_field=CharField()),
+    )
+    owned = columns(
+        Restaurant.objects.filter(owner_id=user_id),
+        ref_kind=Value('owner'), ref_id=F('id'), ref_slug=F('slug'),
+        ref_staff_id=Value(None, output_field=IntegerField()), ref_role=Value('', output_field=CharField()),
+    )
+    staff = columns(
+        Staff.objects.filter(user_id=user_id),
+        ref_kind=Value('staff'), ref_id=F('restaurant_id'), ref_slug=F('restaurant__slug'),
+        ref_staff_id=F('id'), ref_role=F('role'),
+    )
+
+    identity = Identity(user_id=user_id)
+    for kind, ref, slug, staff_id, role in profiles.union(owned, staff, all=True):
+        if kind == 'profile':
+            # Bir nechta profil bo‘lsa, avvalgi .first() kabi eng kichigi
+            identity.profile_id = min(ref, identity.profile_id or ref)
+            continue
+        entry = identity.restaurants.setdefault(slug, [ref, False, None, ''])
+        if kind == 'owner':
+            entry[1] = True
+        else:
+            entry[2], entry[3] = staff_id, role
+    return identity
+
+
+def load(request):
+    """So‘rov foydalanuvchisining identifikatsiyasi: sessiyadan yoki (versiya eskirgan bo‘lsa) bazadan."""
+    user = request.user
+    if not user.is_authenticated:
+        return ANONYMOUS
+    version = versions.identity_version(user.pk)
+    stored = request.session.get(SESSION_KEY)
+    if stored and stored['version'] == version and stored['user_id'] == user.pk:
+        return Identity(user.pk, stored['profile_id'], stored['restaurants'])
+    identity = query(user.pk)
+    request.session[SESSION_KEY] = dict(identity.as_dict(), version=version)
+    return identity
+
+
+def get(request):
+    """So‘rov ichida yodlangan identifikatsiya."""
+    if not hasattr(request, '_identity'):
+        request._identity = load(request)
+    return request._identity
+
+
+async def aget(request):
+    if not hasattr(request, '_identity'):
+        request._identity = await sync_to_async(load)(request)
+    return request._identity
+
+
+def owned_restaurant(request, slug, queryset=None):
+    """Foydalanuvchi egalik qiladigan restoran; aks holda 404."""
+    from .models import Restaurant
+    restaurant_id = get(request).owned(slug)
+    if restaurant_id is None:
+        raise Http404("Restoran topilmadi")
+    # owner qayta tekshiriladi: egasi almashganda eski egasining versiyasi yangilanmaydi
+    queryset = Restaurant.objects.all() if queryset is None else queryset
+    try:
+        return queryset.get(pk=restaurant_id, owner_id=request.user.pk)
+    except Restaurant.DoesNotExist:
+        raise Http404("Restoran topilmadi")
+
+
+def staff_member(request, slug, role):
+    """
+    (restoran, xodim) juftligi. Xodim qatori restoran bilan birga bitta so‘rovda
+    o‘qiladi, shuning uchun o‘chirilgan yoki rolini yo‘qotgan xodim eskirgan
+    sessiya bilan kira olmaydi. Rol mos kelmasa 404.
+    """
+    from .models import Staff
+    found = get(request).staff(slug, role)
+    if found is None:
+        raise Http404("Xodim topilmadi")
+    restaurant_id, staff_id = found
+    try:
+        staff = Staff.objects.select_related('restaurant').get(
+            pk=staff_id, user_id=request.user.pk, restaurant_id=restaurant_id, role=role,
+        )
+    except Staff.DoesNotExist:
+        raise Http404("Xodim topilmadi")
+    staff.user = request.user
+    return staff.restaurant, staff
+
+
+class IdentityMiddleware:
+    """`request.identity` ni dangasa o‘rnatadi; AuthenticationMiddleware dan keyin turishi kerak."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        # Baza faqat birinchi murojaatda o‘qiladi; async ko‘rinishlar aget() ni ishlatadi.
+        # Async zanjirda get_response korutina qaytaradi, u shu holicha uzatiladi
+        request.identity = SimpleLazyObject(lambda: get(request))
+        return self.get_response(request)
+
+
+@receiver([post_save, post_delete], sender='app.Staff')
+@receiver([post_save, post_delete], sender='app.UserProfile')
+def user_rows_changed(sender, instance, **kwargs):
+    versions.bump_identities([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender='app.Restaurant')
+def restaurant_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'slug', 'owner'} & set(update_fields):
+        return
+    from .models import Staff
+    versions.bump_identities([instance.owner_id, *Staff.objects.filter(
+        restaurant_id=instance.pk
+    ).values_list('user_id', flat=True)])
@@ -0,0 +1,152 @@
+"""
+Inventar jurnali uchun davriy qoldiqlar, solishtirish va siqish.
+
+Element zaxirasi istalgan vaqtda eng so‘nggi qoldiq (InventorySnapshot)
+va undan keyingi kichik operatsiyalar "dumi" orqali hisoblanadi. Eski
+operatsiyalar kunlik yig‘indilarga (InventoryDailySummary) aylantiriladi.
+"""
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import InventoryDailySummary, InventorySnapshot, InventoryTransaction, MenuItem
+
+# Kechikib commit qilingan operatsiyalar qoldiqdan tushib qolmasligi uchun
+SNAPSHOT_LAG = timezone.timedelta(minutes=1)
+
+
+def _tail_sums(after, until):
+    """(after, until] oralig‘idagi operatsiyalar yig‘indisi, element bo‘yicha guruhlangan."""
+    transactions = InventoryTransaction.objects.filter(created_at__gt=after)
+    if until is not None:
+        transactions = transactions.filter(created_at__lte=until)
+    return dict(transactions.values_list('menu_item_id').annotate(total=Sum('quantity')).order_by())
+
+
+def balances_at(as_of):
+    """
+    Barcha elementlarning `as_of` vaqtidagi qoldig‘ini qaytaradi.
+
+    Har bir element uchun `as_of` dan oldingi eng so‘nggi qoldiqqa dum
+    qo‘shiladi. Qoldig‘i yo‘q elementlar joriy zaxiradan keyingi
+    operatsiyalarni ayirish orqali hisoblanadi.
+    """
+    latest = dict(
+        InventorySnapshot.objects.filter(taken_at__lte=as_of)
+        .values_list('menu_item_id').annotate(last=Max('taken_at')).order_by()
+    )
+    snapshot_balances = {
+        (menu_item_id, taken_at): balance
+        for menu_item_id, taken_at, balance in InventorySnapshot.objects.filter(
+            taken_at__in=set(latest.values())
+        ).values_list('menu_item_id', 'taken_at', 'balance')
+    }
+    balances = {}
+    # Qoldiqlar bir ishda olingani uchun farqli vaqtlar soni kam: har biriga bitta so‘rov
+    for taken_at in set(latest.values()):
+        tail = _tail_sums(taken_at, as_of)
+        for menu_item_id, last in latest.items():
+            if last == taken_at:
+                balances[menu_item_id] = snapshot_balances[(menu_item_id, taken_at)] + (tail.get(menu_item_id) or 0)
+    later = _tail_sums(as_of, None)
+    for menu_item_id, stock in MenuItem.objects.values_list('id', 'stock_quantity'):
+        if menu_item_id not in balances:
+            balances[menu_item_id] = stock - (later.get(menu_item_id) or 0)
+    return balances
+
+
+def take_snapshots(now=None):
+    """
+    Barcha elementlar uchun yangi qoldiq yozadi va joriy zaxira bilan solishtiradi.
+
+    Natija: (yozilgan qoldiqlar soni, {menu_item_id: (jurnal bo‘yicha, stock_quantity)} nomuvofiqliklar).
+    """
+    now = now or timezone.now()
+    as_of = now - SNAPSHOT_LAG
+    balances = balances_at(as_of)
+    InventorySnapshot.objects.bulk_create(
+        [InventorySnapshot(menu_item_id=pk, balance=balance, taken_at=as_of) for pk, balance in balances.items()],
+        batch_size=1000,
+    )
+    later = _tail_sums(as_of, None)
+    drift = {}
+    for menu_item_id, stock in MenuItem.objects.values_list('id', 'stock_quantity'):
+        expected = balances.get(menu_item_id, stock) + (later.get(menu_item_id) or 0)
+        if expected != stock:
+            drift[menu_item_id] = (expected, stock)
+    return len(balances), drift
+
+
+def stock_at(menu_item_id, when):
+    """Bitta elementning `when` vaqtidagi zaxirasi (siqilgan davrda — kun aniqligida)."""
+    snapshot = InventorySnapshot.objects.filter(menu_item_id=menu_item_id, taken_at__lte=when).first()
+    transactions = InventoryTransaction.objects.filter(menu_item_id=menu_item_id)
+    if snapshot:
+        tail = transactions.filter(created_at__gt=snapshot.taken_at, created_at__lte=when)
+        return snapshot.balance + (tail.aggregate(total=Sum('quantity'))['total'] or 0)
+    # Eng birinchi qoldiqdan orqaga: keyingi operatsiyalar va kunlik yig‘indilar ayiriladi
+    snapshot = InventorySnapshot.objects.filter(menu_item_id=menu_item_id).order_by('taken_at').first()
+    if snapshot:
+        balance, until = snapshot.balance, snapshot.taken_at
+    else:
+        balance, until = MenuItem.objects.values_list('stock_quantity', flat=True).get(pk=menu_item_id), None
+    later = transactions.filter(created_at__gt=when)
+    if until is not None:
+        later = later.filter(created_at__lte=until)
+    balance -= later.aggregate(total=Sum('quantity'))['total'] or 0
+    summaries = InventoryDailySummary.objects.filter(menu_item_id=menu_item_id, day__gte=timezone.localdate(when))
+    return balance - (summaries.aggregate(total=Sum('quantity'))['total'] or 0)
+
+
+def compact(days=30, now=None):
+    """
+    `days` kundan eski operatsiyalarni kunlik yig‘indilarga aylantiradi.
+
+    Avval chegara (kun boshi) uchun qoldiq yoziladi. So‘ng har bir eski kun
+    alohida tranzaksiyada yig‘indiga aylantirilib, xom operatsiyalari
+    o‘chiriladi — jarayon to‘xtab qolsa ham yig‘indilar ikki marta
+    hisoblanmaydi. Natija: o‘chirilgan operatsiyalar soni.
+    """
+    now = now or timezone.now()
+    cutoff = timezone.localtime(now - timezone.timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    old = InventoryTransaction.objects.filter(created_at__lt=cutoff)
+    if not old.exists():
+        return 0
+
+    with transaction.atomic():
+        boundary = balances_at(cutoff)
+        InventorySnapshot.objects.filter(taken_at=cutoff).delete()
+        InventorySnapshot.objects.bulk_create(
+            [InventorySnapshot(menu_item_id=pk, balance=balance, taken_at=cutoff) for pk, balance in boundary.items()],
+            batch_size=1000,
+        )
+
+    deleted = 0
+    days_to_compact = old.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct().order_by('day')
+    for day in list(days_to_compact):
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = min(start + timezone.timedelta(days=1), cutoff)
+        day_rows = InventoryTransaction.objects.filter(created_at__gte=start, created_at__lt=end)
+        with transaction.atomic():
+            totals = day_rows.values_list('menu_item_id', 'kind').annotate(total=Sum('quantity'), count=Count('id')).order_by()
+            existing = {(s.menu_item_id, s.kind): s for s in InventoryDailySummary.objects.filter(day=day)}
+            to_create, to_update = [], []
+            for menu_item_id, kind, total, count in totals:
+                summary = existing.get((menu_item_id, kind))
+                if summary:
+                    summary.quantity += total
+                    summary.transaction_count += count
+                    to_update.append(summary)
+                else:
+                    to_create.append(InventoryDailySummary(
+                        menu_item_id=menu_item_id, day=day, kind=kind, quantity=total, transaction_count=count
+                    ))
+            InventoryDailySummary.objects.bulk_create(to_create, batch_size=1000)
+            InventoryDailySummary.objects.bulk_update(to_update, ['quantity', 'transaction_count'], batch_size=1000)
+            deleted += day_rows.delete()[0]
+
+    InventorySnapshot.objects.filter(taken_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,280 @@
+"""
+Bitta server uchun kanal qatlami: Unix soket orqali kichik broker jarayoni.
+
+Broker (`manage.py run_channel_broker`) ichida oddiy InMemoryChannelLayer
+ishlaydi, shuning uchun guruhlar, xabarlar muddati (expiry, group_expiry)
+va sig‘im (capacity, channel_capacity) semantikasi aynan o‘sha. Har bir
+ASGI/ishchi jarayoni IPCChannelLayer orqali brokerga ulanadi: har bir
+hodisalar tsikli uchun bitta ulanish, so‘rovlar `id` bo‘yicha
+multiplekslanadi.
+
+Kadr: 4 baytli uzunlik + JSON (bytes qiymatlar base64 bilan).
+"""
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import os
+import random
+import string
+import struct
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer, InMemoryChannelLayer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = '/tmp/restarant-channels.sock'
+HEADER = struct.Struct('!I')
+MAX_FRAME = 16 * 1024 * 1024
+
+
+def _default(value):
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"{type(value).__name__} kanal xabarida bo‘lishi mumkin emas")
+
+
+def _object_hook(obj):
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def encode_frame(payload):
+    body = json.dumps(payload, default=_default, separators=(',', ':')).encode()
+    return HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    """Bitta kadrni o‘qiydi; ulanish yopilgan bo‘lsa None."""
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (length,) = HEADER.unpack(header)
+        if length > MAX_FRAME:
+            raise ValueError(f"Kadr juda katta: {length} bayt")
+        return json.loads(await reader.readexactly(length), object_hook=_object_hook)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+class Broker:
+    """Unix soketdagi so‘rovlarni ichki InMemoryChannelLayer ga uzatadi."""
+
+    def __init__(self, path=DEFAULT_PATH, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None):
+        self.path = path
+        self.layer = InMemoryChannelLayer(expiry=expiry, group_expiry=group_expiry, capacity=capacity)
+        # InMemoryChannelLayer naqshlarni o‘zi kompilyatsiya qilmaydi
+        self.layer.channel_capacity = self.layer.compile_capacities(channel_capacity or {})
+        self.operations = {
+            'send': self.send,
+            'receive': self.layer.receive,
+            'group_add': self.layer.group_add,
+            'group_discard': self.layer.group_discard,
+            'group_send': self.layer.group_send,
+            'flush': self.layer.flush,
+        }
+
+    async def send(self, channel, message):
+        try:
+            await self.layer.send(channel, message)
+        except ChannelFull:
+            # InMemoryChannelLayer muddati o‘tgan xabarlarni faqat receive/group_send da tozalaydi:
+            # to‘lgan kanal tozalanib, xabar bir marta qayta yuboriladi
+            self.layer._clean_expired()
+            await self.layer.send(channel, message)
+
+    async def serve(self, ready=None):
+        if os.path.exists(self.path):
+            # Oldingi jarayondan qolgan soket fayli
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self.handle, path=self.path)
+        os.chmod(self.path, 0o600)
+        if ready is not None:
+            ready()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def handle(self, reader, writer):
+        tasks = {}
+
+        async def run(request):
+            try:
+                result = await self.operations[request['op']](*request.get('args', []))
+                response = {'id': request['id'], 'result': result}
+            except ChannelFull:
+                response = {'id': request['id'], 'error': 'full'}
+            except (KeyError, TypeError, AssertionError) as exc:
+                response = {'id': request['id'], 'error': 'invalid', 'detail': str(exc)}
+            finally:
+                tasks.pop(request['id'], None)
+            writer.write(encode_frame(response))
+            await writer.drain()
+
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:
+                    break
+                if request['op'] == 'cancel':
+                    task = tasks.get(request['args'][0])
+                    if task is not None:
+                        task.cancel()
+                    continue
+                tasks[request['id']] = asyncio.create_task(run(request))
+        except (ConnectionError, ValueError):
+            logger.warning("Kanal brokeri: mijoz ulanishi uzildi", exc_info=True)
+        finally:
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+
+
+class _Connection:
+    """Bitta hodisalar tsiklidagi brokerga ulanish; javoblar `id` bo‘yicha taqsimlanadi."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        # Bekor qilingan receive lar: kech kelgan xabar shu kanalga qaytariladi
+        self.cancelled = {}
+        self.ids = itertools.count(1)
+        self.reader_task = asyncio.ensure_future(self._read())
+
+    @property
+    def closed(self):
+        return self.reader_task.done() or self.writer.is_closing()
+
+    async def call(self, op, *args):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(encode_frame({'id': request_id, 'op': op, 'args': list(args)}))
+        try:
+            await self.writer.drain()
+            return await future
+        except asyncio.CancelledError:
+            if self.pending.pop(request_id, None) is not None and not self.writer.is_closing():
+                if op == 'receive':
+                    self.cancelled[request_id] = args[0]
+                self.writer.write(encode_frame({'id': 0, 'op': 'cancel', 'args': [request_id]}))
+            raise
+
+    async def _read(self):
+        try:
+            while True:
+                reply = await read_frame(self.reader)
+                if reply is None:
+                    break
+                future = self.pending.pop(reply['id'], None)
+                if future is None:
+                    channel = self.cancelled.pop(reply['id'], None)
+                    if channel is not None and 'result' in reply:
+                        self.writer.write(encode_frame({'id': 0, 'op': 'send', 'args': [channel, reply['result']]}))
+                    continue
+                if future.done():
+                    continue
+                if reply.get('error') == 'full':
+                    future.set_exception(ChannelFull())
+                elif 'error' in reply:
+                    future.set_exception(TypeError(reply.get('detail', reply['error'])))
+                else:
+                    future.set_result(reply.get('result'))
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Kanal brokeri bilan ulanish uzildi"))
+            self.pending.clear()
+            # Tsikl yopilishidan oldin (asyncio.run vazifalarni bekor qiladi) soket shu tsiklda yopiladi
+            self.writer.close()
+
+    async def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+class IPCChannelLayer(BaseChannelLayer):
+    """
+    Brokerga Unix soket orqali ulanadigan kanal qatlami.
+
+    CONFIG: path, expiry, group_expiry, capacity, channel_capacity — oxirgi
+    to‘rttasi brokerda qo‘llanadi (run_channel_broker ularni shu yerdan oladi).
+    """
+
+    extensions = ['groups', 'flush']
+
+    def __init__(self, path=DEFAULT_PATH, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None, **kwargs):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.path = path
+        self.group_expiry = group_expiry
+        self.client_prefix = ''.join(random.choices(string.ascii_letters, k=8))
+        self._connections = {}
+
+    def broker_config(self):
+        return {
+            'path': self.path,
+            'expiry': self.expiry,
+            'group_expiry': self.group_expiry,
+            'capacity': self.capacity,
+            'channel_capacity': self.channel_capacity,
+        }
+
+    async def _connection(self):
+        loop = asyncio.get_running_loop()
+        connection = self._connections.get(loop)
+        if connection is None or connection.closed:
+            # async_to_sync har chaqiruvda yangi tsikl ochishi mumkin; ularning soketlari
+            # _Connection._read da yopilgan, bu yerda faqat yopilgan tsikllar yozuvlari olib tashlanadi
+            for stale in [other for other in self._connections if other.is_closed()]:
+                del self._connections[stale]
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            connection = self._connections[loop] = _Connection(reader, writer)
+        return connection
+
+    async def _call(self, op, *args):
+        return await (await self._connection()).call(op, *args)
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        await self._call('send', channel, message)
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        return await self._call('receive', channel)
+
+    async def new_channel(self, prefix='specific.'):
+        return f"{prefix}.{self.client_prefix}!{''.join(random.choices(string.ascii_letters, k=12))}"
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._call('group_add', group, channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._call('group_discard', group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        await self._call('group_send', group, message)
+
+    async def flush(self):
+        await self._call('flush')
+
+    async def close(self):
+        connection = self._connections.pop(asyncio.get_running_loop(), None)
+        if connection is not None:
+            await connection.close()
@@ -0,0 +1,144 @@
+"""
+Menyu elementlari bo‘yicha baholar gistogrammasi (MenuItemRating).
+
+Sharh faqat buyurtmaga bog‘langan, shuning uchun uning bahosi buyurtmadagi
+har bir (takrorlanmas) elementga yoziladi. Sharh saqlanganda gistogramma
+F() ifodalari bilan bitta UPDATE da oshiriladi; baho tahrirlansa eski
+yulduzdan ayirilib yangisiga qo‘shiladi, o‘chirilsa ayiriladi.
+Arxivlangan sharhlar (ArchivedReview ga ko‘chirilgani) gistogrammada
+qoladi. Buyurtma bilan kaskad o‘chirilganda elementlari sharhdan oldin
+o‘chadi, shuning uchun ular pre_delete da eslab qolinadi. Eski ma’lumotlar
+`manage.py rebuild_item_ratings` (bo‘laklab qayta hisoblash) bilan
+tuzatiladi; u faol va arxivlangan sharhlarni birga hisoblaydi.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import versions
+from .models import ArchivedOrderItem, ArchivedReview, MenuItem, MenuItemRating, OrderItem, Review
+
+STARS = range(1, 6)
+
+
+def star_field(star):
+    return f'stars_{star}'
+
+
+def order_items(order_id):
+    """{menu_item_id: restaurant_id} buyurtmadagi takrorlanmas elementlar uchun."""
+    return dict(
+        OrderItem.objects.filter(order_id=order_id, menu_item__isnull=False)
+        .values_list('menu_item_id', 'menu_item__restaurant_id')
+        .distinct()
+    )
+
+
+def change(order_id, added=None, removed=None, items=None):
+    """Buyurtma elementlari gistogrammasiga `added` bahoni qo‘shadi va `removed` ni ayiradi."""
+    if added == removed:
+        return
+    if items is None:
+        items = order_items(order_id)
+    if not items:
+        return
+    deltas = Counter()
+    for star, sign in ((added, 1), (removed, -1)):
+        if star:
+            deltas[star_field(star)] += sign
+            deltas['rating_count'] += sign
+            deltas['rating_sum'] += sign * star
+    updates = {
+        # Qayta qurishdan oldingi sharh tahrirlansa hisob manfiyga tushmasin
+        field: F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items() if delta
+    }
+    with transaction.atomic():
+        MenuItemRating.objects.bulk_create([
+            MenuItemRating(menu_item_id=item_id, restaurant_id=restaurant_id)
+            for item_id, restaurant_id in items.items()
+        ], ignore_conflicts=True)
+        MenuItemRating.objects.filter(menu_item_id__in=list(items)).update(updated_at=timezone.now(), **updates)
+        # Menyu sahifalari va JSON hujjati baholarni ko‘rsatadi
+        versions.bump(items.values())
+
+
+def _counts(item_ids):
+    """{menu_item_id: Counter({yulduz: sharhlar soni})} faol va arxivlangan buyurtmalar bo‘yicha."""
+    counts = defaultdict(Counter)
+    for model in (OrderItem, ArchivedOrderItem):
+        rows = (
+            model.objects.filter(menu_item_id__in=item_ids, order__reviews__isnull=False)
+            .values('menu_item_id', 'order__reviews__rating')
+            # Element buyurtmada ikki qatorda bo‘lsa ham sharh bir marta sanaladi
+            .annotate(reviews=Count('order__reviews', distinct=True))
+            .order_by()
+        )
+        for row in rows:
+            counts[row['menu_item_id']][row['order__reviews__rating']] += row['reviews']
+    return counts
+
+
+def rebuild(restaurant_ids=None, chunk_size=500):
+    """Gistogrammalarni menyu elementlari bo‘yicha `chunk_size` bo‘laklarda qayta hisoblaydi. Natija: elementlar soni."""
+    items = MenuItem.objects.order_by('id').values_list('id', 'restaurant_id')
+    if restaurant_ids is not None:
+        items = items.filter(restaurant_id__in=restaurant_ids)
+    rebuilt = 0
+    last_id = 0
+    while True:
+        chunk = dict(items.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        with transaction.atomic():
+            counts = _counts(list(chunk))
+            now = timezone.now()
+            MenuItemRating.objects.filter(menu_item_id__in=list(chunk)).delete()
+            MenuItemRating.objects.bulk_create([
+                MenuItemRating(
+                    menu_item_id=item_id,
+                    restaurant_id=chunk[item_id],
+                    rating_count=sum(stars.values()),
+                    rating_sum=sum(star * count for star, count in stars.items()),
+                    updated_at=now,
+                    **{star_field(star): stars[star] for star in STARS},
+                )
+                for item_id, stars in counts.items()
+            ])
+            versions.bump(set(chunk.values()))
+        rebuilt += len(chunk)
+        last_id = max(chunk)
+    return rebuilt
+
+
+@receiver(pre_save, sender=Review)
+def remember_rating(sender, instance, **kwargs):
+    # Tahrirda eski baho kerak: faqat mavjud sharh uchun bitta so‘rov
+    if instance.pk is not None:
+        instance._previous_rating = Review.objects.filter(pk=instance.pk).values_list('rating', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    change(instance.order_id, added=instance.rating, removed=None if created else instance._previous_rating)
+
+
+@receiver(pre_delete, sender=Review)
+def remember_items(sender, instance, **kwargs):
+    # Arxivga ko‘chirilgan sharh gistogrammada qoladi
+    if ArchivedReview.objects.filter(pk=instance.pk).exists():
+        instance._rated_items = None
+    else:
+        instance._rated_items = order_items(instance.order_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    items = getattr(instance, '_rated_items', None)
+    if items:
+        change(instance.order_id, removed=instance.rating, items=items)
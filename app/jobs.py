@@ -0,0 +1,142 @@
+"""Tashqi brokersiz, bazaga asoslangan fon vazifalari navbati."""
+import logging
+import threading
+import traceback
+import uuid
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 60
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 3600
+
+_registry = {}
+
+
+def register(name):
+    """Funksiyani berilgan nom bilan fon vazifasi sifatida ro‘yxatdan o‘tkazadi."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, delay=None, max_attempts=5, unique=False, **payload):
+    """
+    Bitta vazifani navbatga qo‘yadi va yaratilgan BackgroundJob ni qaytaradi.
+
+    `unique=True` bo‘lsa, xuddi shunday navbatda turgan vazifa qayta qo‘shilmaydi.
+    """
+    if unique:
+        existing = BackgroundJob.objects.filter(name=name, payload=payload, status='queued').first()
+        if existing:
+            return existing
+    return enqueue_many([(name, payload)], delay=delay, max_attempts=max_attempts)[0]
+
+
+def enqueue_many(jobs, delay=None, max_attempts=5):
+    """(nom, parametrlar) juftliklarini bitta INSERT bilan navbatga qo‘yadi."""
+    run_at = timezone.now() + (delay or timezone.timedelta())
+    for name, _payload in jobs:
+        if name not in _registry:
+            raise KeyError(f"Ro‘yxatdan o‘tmagan vazifa: {name}")
+    return BackgroundJob.objects.bulk_create([
+        BackgroundJob(name=name, payload=payload, run_at=run_at, max_attempts=max_attempts)
+        for name, payload in jobs
+    ])
+
+
+def _ready_jobs(now):
+    # Navbatdagi yoki ijarasi tugagan (ishchi qulagan) vazifalar
+    return BackgroundJob.objects.filter(
+        Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+    ).order_by('run_at', 'id')
+
+
+def dequeue(batch_size=10, lease_seconds=LEASE_SECONDS):
+    """
+    Bir nechta tayyor vazifani ijaraga oladi.
+
+    PostgreSQL kabi bazalarda `SELECT ... FOR UPDATE SKIP LOCKED` ishlatiladi.
+    SQLite'da esa shartli `UPDATE ... WHERE status=...` bilan noyob ijara
+    tokeni yoziladi, shuning uchun bir vazifani faqat bitta ishchi oladi.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    lease = {
+        'status': 'running',
+        'updated_at': now,
+        'lease_token': token,
+        'locked_until': now + timezone.timedelta(seconds=lease_seconds),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                _ready_jobs(now).select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+            )
+            BackgroundJob.objects.filter(id__in=ids).update(**lease)
+    else:
+        ids = list(_ready_jobs(now).values_list('id', flat=True)[:batch_size])
+        # Boshqa ishchi ulgurib olgan qatorlar shartga mos kelmaydi va yangilanmaydi
+        _ready_jobs(now).filter(id__in=ids).update(**lease)
+    return list(BackgroundJob.objects.filter(lease_token=token, status='running'))
+
+
+def _backoff(attempts):
+    return timezone.timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def run_batch(jobs):
+    """Olingan vazifalarni bajaradi; muvaffaqiyatlilarini bitta so‘rov bilan o‘chiradi."""
+    done_ids = []
+    for job in jobs:
+        try:
+            _registry[job.name](**job.payload)
+        except Exception:
+            attempts = job.attempts + 1
+            changes = {
+                'attempts': attempts,
+                'last_error': traceback.format_exc(),
+                'lease_token': '',
+                'locked_until': None,
+                'updated_at': timezone.now(),
+            }
+            if attempts >= job.max_attempts:
+                changes['status'] = 'failed'
+            else:
+                changes['status'] = 'queued'
+                changes['run_at'] = timezone.now() + _backoff(attempts)
+            # Ijarasi tugab, boshqa ishchiga o‘tgan vazifa qayta yozilmaydi
+            BackgroundJob.objects.filter(id=job.id, lease_token=job.lease_token).update(**changes)
+            logger.warning("Vazifa %s #%s muvaffaqiyatsiz (%s-urinish)", job.name, job.id, attempts)
+        else:
+            done_ids.append(job.id)
+    if done_ids:
+        BackgroundJob.objects.filter(id__in=done_ids, lease_token=jobs[0].lease_token).delete()
+    return len(done_ids), len(jobs) - len(done_ids)
+
+
+def work(stop_event=None, batch_size=10, poll_interval=1.0, once=False):
+    """Navbat bo‘shaguncha yoki to‘xtatilguncha vazifalarni olib bajaradi."""
+    stop_event = stop_event or threading.Event()
+    processed = failed = 0
+    try:
+        while not stop_event.is_set():
+            jobs = dequeue(batch_size=batch_size)
+            if jobs:
+                ok, bad = run_batch(jobs)
+                processed += ok
+                failed += bad
+                continue
+            if once:
+                break
+            stop_event.wait(poll_interval)
+    finally:
+        connection.close()
+    return processed, failed
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Yakunlangan ('served'/'cancelled') eski buyurtmalarni elementlari va sharhlari "
+        "bilan arxiv jadvallariga bo‘laklab ko‘chiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=180,
+            help="Shu kundan eski buyurtmalar arxivlanadi (standart: 180)",
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help="Bitta tranzaksiyadagi buyurtmalar soni (standart: 1000)",
+        )
+        parser.add_argument('--limit', type=int, help="Ko‘pi bilan shuncha buyurtma arxivlanadi")
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError("--older-than-days manfiy, --chunk-size esa 1 dan kichik bo‘lmasligi kerak")
+        started = time.perf_counter()
+        moved = archive.archive_orders(
+            older_than_days=options['older_than_days'],
+            chunk_size=options['chunk_size'],
+            limit=options['limit'],
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} ta buyurtma {elapsed:.2f} s ichida arxivlandi"
+            f" ({moved / elapsed if elapsed else 0:.0f} buyurtma/s)"
+        ))
@@ -0,0 +1,84 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app import archive, caching
+from app.models import Order, Restaurant
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Buyurtmalarni arxivlashdan oldin va keyin panel so‘rovlarining kechikishini o‘lchaydi. "
+        "Sintetik ma’lumotlar bitta tranzaksiyada yaratiladi va oxirida bekor qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000, help="Sintetik buyurtmalar soni (standart: 1000000)")
+        parser.add_argument('--active', type=int, default=50, help="Faol buyurtmalar soni (standart: 50)")
+        parser.add_argument('--repeat', type=int, default=20, help="Har bir so‘rov necha marta o‘lchanadi (standart: 20)")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Arxivlash bo‘lagi (standart: 5000)")
+
+    def handle(self, *args, **options):
+        if options['orders'] < 1 or options['repeat'] < 1:
+            raise CommandError("--orders va --repeat musbat bo‘lishi kerak")
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write("Sintetik ma’lumotlar bekor qilindi")
+
+    def _run(self, options):
+        restaurant = Restaurant.objects.create(name="bench-archive", address="benchmark")
+        self.stdout.write(f"{options['orders']} ta buyurtma yaratilmoqda...")
+        batch = []
+        for i in range(options['orders']):
+            batch.append(Order(restaurant=restaurant, status='served', total_price=Decimal('25.00')))
+            if len(batch) == 10000:
+                Order.objects.bulk_create(batch)
+                batch = []
+        Order.objects.bulk_create(batch)
+        Order.objects.filter(restaurant=restaurant).update(created_at=timezone.now() - timezone.timedelta(days=365))
+        Order.objects.bulk_create([
+            Order(restaurant=restaurant, status='pending', total_price=Decimal('25.00'))
+            for _ in range(options['active'])
+        ])
+
+        before = self._measure(restaurant, options['repeat'])
+        started = time.perf_counter()
+        moved = archive.archive_orders(older_than_days=180, chunk_size=options['chunk_size'])
+        archive_seconds = time.perf_counter() - started
+        after = self._measure(restaurant, options['repeat'])
+
+        self.stdout.write(f"Arxivlandi: {moved} ta buyurtma, {archive_seconds:.1f} s")
+        self.stdout.write(f"{'So‘rov':<28}{'oldin (ms)':>12}{'keyin (ms)':>12}")
+        for name in before:
+            self.stdout.write(f"{name:<28}{before[name]:>12.2f}{after[name]:>12.2f}")
+
+    def _measure(self, restaurant, repeat):
+        queries = {
+            'waiter faol buyurtmalar': lambda: list(restaurant.orders.filter(
+                status__in=['pending', 'accepted', 'preparing']
+            ).select_related('table', 'user_profile', 'assigned_waiter')),
+            'get_statistics': lambda: (
+                caching.ratings.invalidate_now([restaurant.id]), restaurant.get_statistics()
+            ),
+            'admin ro‘yxati (COUNT)': lambda: Order.objects.count(),
+        }
+        results = {}
+        for name, query in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        return results
@@ -0,0 +1,300 @@
+import asyncio
+import statistics
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+from asgiref.sync import AsyncToSync, SyncToAsync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.test import Client
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from app import async_views, menu_api, versions
+from app.models import BackgroundJob, Cart, Category, MenuItem, Order, OrderEvent, Restaurant, Table, UserProfile
+from app.views import MENU_PREFETCH, _table_menu_versions, send_notification
+
+HOT_VIEWS = ('table_menu', 'add_to_cart', 'place_order')
+
+
+def _profile_id_or_404(request):
+    if not request.user.is_authenticated:
+        return None
+    if request.identity.profile_id is None:
+        raise Http404("UserProfile topilmadi")
+    return request.identity.profile_id
+
+
+@versions.conditional_page(_table_menu_versions)
+def _sync_table_menu(request, qr_code):
+    table = get_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    cart = None
+    if request.identity.profile_id:
+        cart, _ = Cart.objects.get_or_create(
+            user_profile_id=request.identity.profile_id, restaurant=table.restaurant, table=table,
+        )
+    return async_views._render_menu(request, {
+        'restaurant': table.restaurant,
+        'table': table,
+        'categories': table.restaurant.categories.prefetch_related(*MENU_PREFETCH),
+        'cart': cart,
+        'qr_code': qr_code,
+    })
+
+
+@require_POST
+@csrf_exempt
+def _sync_add_to_cart(request, qr_code):
+    table = get_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    try:
+        quantity = int(request.POST.get('quantity', 1))
+    except ValueError:
+        return HttpResponseBadRequest("Noto'g'ri miqdor kiritildi")
+    if quantity < 1:
+        return HttpResponseBadRequest("Miqdor 1 dan kam bo'lmasligi kerak")
+    menu_item = get_object_or_404(
+        MenuItem, id=request.POST.get('menu_item_id'), restaurant=table.restaurant, is_available=True,
+    )
+    added = async_views._add_item(request.user, _profile_id_or_404(request), table, menu_item, quantity)
+    if added is None:
+        return HttpResponseBadRequest("Zaxira yetarli emas")
+    cart, cart_item, suggestions = added
+    send_notification(
+        f'restaurant_{table.restaurant_id}_waiters',
+        {'message': f"Yangi savat elementi: {menu_item.name} ({quantity} dona)"}
+    )
+    cart_total = menu_api.cart_total(cart.id)
+    return JsonResponse({
+        'status': 'success',
+        'cart_total': cart_total,
+        'item_name': menu_item.name,
+        'quantity': cart_item.quantity,
+        'delta': {
+            'fields': menu_api.CART_FIELDS,
+            'items': menu_api.cart_lines(cart.id, [menu_item.id]),
+            'total': cart_total,
+            'stock': {menu_item.id: menu_item.stock_quantity},
+            'recommendations': suggestions,
+        },
+    })
+
+
+@require_POST
+@csrf_exempt
+def _sync_place_order(request, qr_code):
+    table = get_object_or_404(Table.objects.select_related('restaurant'), qr_code=qr_code)
+    user_profile_id = _profile_id_or_404(request)
+    cart = get_object_or_404(Cart, restaurant=table.restaurant, table=table, user_profile_id=user_profile_id)
+    order = async_views._create_order(request.user, user_profile_id, table, cart)
+    if order is None:
+        return HttpResponseBadRequest("Savat bo'sh")
+    return JsonResponse({
+        'status': 'success',
+        'order_id': order.id,
+        'delta': {'fields': menu_api.CART_FIELDS, 'items': [], 'cleared': True, 'total': 0},
+    })
+
+
+# Sinxron asos: async_views bilan bir xil yozuv yordamchilari, lekin sinxron ORM va
+# async_to_sync orqali kanal qatlami — farq faqat ko‘rinish qatlamining rejimida
+sync_views = SimpleNamespace(
+    table_menu=_sync_table_menu,
+    add_to_cart=_sync_add_to_cart,
+    place_order=_sync_place_order,
+)
+
+
+class HopCounter:
+    """sync_to_async va async_to_sync chaqiruvlarini (oqim o‘tishlarini) sanaydi."""
+
+    def __init__(self):
+        self.sync_to_async = 0
+        self.async_to_sync = 0
+
+    @contextmanager
+    def installed(self):
+        originals = SyncToAsync.__call__, AsyncToSync.__call__
+        counter = self
+
+        async def sync_to_async_call(self, *args, **kwargs):
+            counter.sync_to_async += 1
+            return await originals[0](self, *args, **kwargs)
+
+        def async_to_sync_call(self, *args, **kwargs):
+            counter.async_to_sync += 1
+            return originals[1](self, *args, **kwargs)
+
+        SyncToAsync.__call__, AsyncToSync.__call__ = sync_to_async_call, async_to_sync_call
+        try:
+            yield self
+        finally:
+            SyncToAsync.__call__, AsyncToSync.__call__ = originals
+
+
+def _hot_patterns(patterns, namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _hot_patterns(pattern.url_patterns, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and namespace == 'restaurant' and pattern.name in HOT_VIEWS:
+            yield pattern
+
+
+@contextmanager
+def routed_to(module):
+    """Asosiy yo‘l marshrutlarini vaqtincha `module` dagi ko‘rinishlarga yo‘naltiradi."""
+    patterns = list(_hot_patterns(get_resolver().url_patterns))
+    originals = [pattern.callback for pattern in patterns]
+    for pattern in patterns:
+        pattern.callback = getattr(module, pattern.name)
+    try:
+        yield
+    finally:
+        for pattern, callback in zip(patterns, originals):
+            pattern.callback = callback
+
+
+class Command(BaseCommand):
+    help = (
+        "Mijozning asosiy yo‘li (table_menu, add_to_cart, place_order) uchun sinxron va async "
+        "ko‘rinishlarni bir xil ASGI ilovada parallel so‘rovlar bilan taqqoslaydi: so‘rov/s, "
+        "kechikish va har bir so‘rovdagi oqim o‘tishlari. Vaqtinchalik restoran yaratib, oxirida o‘chiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Har bir holat uchun so‘rovlar (standart: 200)")
+        parser.add_argument('--concurrency', type=int, default=20, help="Bir vaqtdagi so‘rovlar (standart: 20)")
+        parser.add_argument('--items', type=int, default=30, help="Vaqtinchalik menyudagi elementlar (standart: 30)")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1 or options['items'] < 1:
+            raise CommandError("--requests, --concurrency va --items musbat bo‘lishi kerak")
+        owner, customer, table, item_ids = self._fixture(options['items'])
+        try:
+            # Savat faqat tizimga kirgan mijoz uchun yaratiladi
+            client = Client()
+            client.force_login(customer)
+            cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+            application = get_asgi_application()
+            rows = []
+            for scenario in HOT_VIEWS:
+                for label, module in (('sync', sync_views), ('async', async_views)):
+                    with routed_to(module):
+                        rows.append((scenario, label, *asyncio.run(self._run(
+                            application, scenario, table.qr_code, item_ids, cookie,
+                            options['requests'], options['concurrency'],
+                        ))))
+        finally:
+            restaurant_id = table.restaurant_id
+            order_ids = list(Order.objects.filter(restaurant=restaurant_id).values_list('id', flat=True))
+            BackgroundJob.objects.filter(
+                Q(payload__order_id__in=order_ids) | Q(payload__group_name__startswith=f'restaurant_{restaurant_id}_')
+            ).delete()
+            OrderEvent.objects.filter(restaurant_id=restaurant_id).delete()
+            # Stollar, menyu, savat va buyurtmalar kaskad bilan o‘chadi
+            Restaurant.objects.filter(pk=restaurant_id).delete()
+            User.objects.filter(pk__in=[owner.pk, customer.pk]).delete()
+
+        self.stdout.write(
+            f"{'Yo‘l':<14}{'rejim':<7}{'so‘rov/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'s→a':>7}{'a→s':>7}{'xato':>6}"
+        )
+        for scenario, label, rps, p50, p99, sync_hops, async_hops, errors in rows:
+            self.stdout.write(
+                f"{scenario:<14}{label:<7}{rps:>10.1f}{p50:>9.1f}{p99:>9.1f}"
+                f"{sync_hops:>7.1f}{async_hops:>7.1f}{errors:>6}"
+            )
+        self.stdout.write("s→a / a→s: bitta so‘rovga to‘g‘ri keluvchi sync_to_async / async_to_sync chaqiruvlari")
+
+    def _fixture(self, item_count):
+        owner = User.objects.create_user(f'bench-async-{time.time_ns()}')
+        restaurant = Restaurant.objects.create(name=f"Bench {owner.username}", owner=owner, address='-', phone_number='-')
+        category = Category.objects.create(restaurant=restaurant, name="Bench")
+        items = MenuItem.objects.bulk_create([
+            MenuItem(restaurant=restaurant, category=category, name=f"Taom {n}", price=10000, stock_quantity=10 ** 6)
+            for n in range(item_count)
+        ])
+        table = Table.objects.create(restaurant=restaurant, table_number=1)
+        customer = User.objects.create_user(f'{owner.username}-customer')
+        UserProfile.objects.create(user=customer, phone_number='+998900000000')
+        return owner, customer, table, [item.id for item in items]
+
+    async def _run(self, application, scenario, qr_code, item_ids, cookie, total, concurrency):
+        path = reverse(f'restaurant:{scenario}', args=[qr_code])
+        add_path = reverse('restaurant:add_to_cart', args=[qr_code])
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one(n):
+            nonlocal errors
+            async with semaphore:
+                if scenario == 'place_order':
+                    # Buyurtma berishdan oldin savat to‘ldiriladi (vaqti hisobga olinmaydi)
+                    await self._request(application, cookie, 'POST', add_path, {'menu_item_id': item_ids[n % len(item_ids)]})
+                started = time.perf_counter()
+                if scenario == 'table_menu':
+                    status = await self._request(application, cookie, 'GET', path)
+                else:
+                    status = await self._request(application, cookie, 'POST', path, {'menu_item_id': item_ids[n % len(item_ids)]})
+                latencies.append((time.perf_counter() - started) * 1000)
+                # Umumiy savat parallel buyurtmada bo‘sh bo‘lishi mumkin (400)
+                if status >= 500 or (status >= 400 and scenario != 'place_order'):
+                    errors += 1
+
+        # Isitish: birinchi so‘rovlar (import, shablon keshi) o‘lchovga kirmaydi
+        await asyncio.gather(*(one(n) for n in range(min(concurrency, total))))
+        latencies.clear()
+        errors = 0
+        hops = HopCounter()
+        with hops.installed():
+            started = time.perf_counter()
+            await asyncio.gather(*(one(n) for n in range(total)))
+            seconds = time.perf_counter() - started
+        # place_order da savatni to‘ldirish so‘rovlari ham sanaladi: o‘tishlar ikkala rejimda bir xil qo‘shiladi
+        latencies.sort()
+        return (
+            total / seconds,
+            statistics.median(latencies),
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            hops.sync_to_async / total,
+            hops.async_to_sync / total,
+            errors,
+        )
+
+    @staticmethod
+    async def _request(application, cookie, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        headers = [(b'host', b'localhost'), (b'cookie', cookie.encode())]
+        if method == 'POST':
+            headers += [
+                (b'content-type', b'application/x-www-form-urlencoded'),
+                (b'content-length', str(len(body)).encode()),
+            ]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': b'', 'headers': headers, 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = None
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Javob tugaguncha uzilish xabari kutiladi
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        await application(scope, receive, send)
+        return status
@@ -0,0 +1,141 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from channels.layers import InMemoryChannelLayer
+
+from app.ipc_layer import Broker, IPCChannelLayer
+
+
+def _broker_main(path, capacity, ready):
+    asyncio.run(Broker(path=path, capacity=capacity).serve(ready.set))
+
+
+class Command(BaseCommand):
+    help = (
+        "Kanal qatlamlarini (InMemory, IPC broker, Redis) taqqoslaydi: bitta kanal orqali "
+        "xabar/s, ping-pong kechikishi (p50/p99) va guruhga tarqatish tezligi. IPC broker "
+        "alohida jarayonda ishga tushiriladi; Redis channels_redis o‘rnatilgan va server "
+        "javob bergan taqdirdagina o‘lchanadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000, help="Oqim testidagi xabarlar (standart: 5000)")
+        parser.add_argument('--pings', type=int, default=1000, help="Kechikish testidagi ping-pong lar (standart: 1000)")
+        parser.add_argument('--group-size', type=int, default=20, help="Guruhdagi kanallar (standart: 20)")
+        parser.add_argument('--group-sends', type=int, default=200, help="Guruhga yuborishlar (standart: 200)")
+        parser.add_argument('--payload', type=int, default=200, help="Xabar matni hajmi, baytda (standart: 200)")
+        parser.add_argument('--redis-host', default='127.0.0.1', help="Redis manzili (standart: 127.0.0.1)")
+        parser.add_argument('--redis-port', type=int, default=6379, help="Redis porti (standart: 6379)")
+
+    def handle(self, *args, **options):
+        if min(options['messages'], options['pings'], options['group_size'], options['group_sends']) < 1:
+            raise CommandError("--messages, --pings, --group-size va --group-sends musbat bo‘lishi kerak")
+        # Sig‘im o‘lchovga xalaqit bermasligi uchun: oqim testida kanal to‘lib qolmasin
+        capacity = max(options['messages'], options['group_sends']) + 1
+        rows = [('inmemory', *asyncio.run(self._measure(InMemoryChannelLayer(capacity=capacity), options)))]
+
+        path = os.path.join(tempfile.mkdtemp(prefix='bench-channels-'), 'broker.sock')
+        ready = multiprocessing.Event()
+        broker = multiprocessing.Process(target=_broker_main, args=(path, capacity, ready), daemon=True)
+        broker.start()
+        try:
+            if not ready.wait(10):
+                raise CommandError("IPC broker ishga tushmadi")
+            rows.append(('ipc', *asyncio.run(self._measure(IPCChannelLayer(path=path, capacity=capacity), options))))
+        finally:
+            broker.terminate()
+            broker.join()
+
+        redis_layer = self._redis_layer(options, capacity)
+        if redis_layer is not None:
+            try:
+                rows.append(('redis', *asyncio.run(self._measure(redis_layer, options))))
+            except OSError as exc:
+                self.stdout.write(self.style.WARNING(f"Redis o‘tkazib yuborildi: {exc}"))
+
+        self.stdout.write(
+            f"{'Qatlam':<10}{'xabar/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'guruh yetkazish/s':>19}"
+        )
+        for name, rate, p50, p99, fanout in rows:
+            self.stdout.write(f"{name:<10}{rate:>10.0f}{p50:>9.3f}{p99:>9.3f}{fanout:>19.0f}")
+        self.stdout.write(self.style.SUCCESS("Kechikish: ping-pong ning yarmi (bir tomonga)"))
+
+    def _redis_layer(self, options, capacity):
+        try:
+            from channels_redis.core import RedisChannelLayer
+        except ImportError:
+            self.stdout.write(self.style.WARNING("Redis o‘tkazib yuborildi: channels_redis o‘rnatilmagan"))
+            return None
+        return RedisChannelLayer(hosts=[(options['redis_host'], options['redis_port'])], capacity=capacity)
+
+    async def _measure(self, layer, options):
+        text = 'x' * options['payload']
+        try:
+            await layer.flush()
+            rate = await self._throughput(layer, options['messages'], text)
+            p50, p99 = await self._latency(layer, options['pings'], text)
+            fanout = await self._fanout(layer, options['group_size'], options['group_sends'], text)
+            return rate, p50, p99, fanout
+        finally:
+            await layer.flush()
+            if hasattr(layer, 'close'):
+                await layer.close()
+            elif hasattr(layer, 'close_pools'):
+                await layer.close_pools()
+
+    async def _throughput(self, layer, count, text):
+        channel = await layer.new_channel()
+
+        async def drain():
+            for _ in range(count):
+                await layer.receive(channel)
+
+        started = time.perf_counter()
+        receiver = asyncio.ensure_future(drain())
+        for n in range(count):
+            await layer.send(channel, {'type': 'bench', 'n': n, 'text': text})
+        await receiver
+        return count / (time.perf_counter() - started)
+
+    async def _latency(self, layer, count, text):
+        ping, pong = await layer.new_channel(), await layer.new_channel()
+
+        async def responder():
+            for _ in range(count):
+                await layer.send(pong, await layer.receive(ping))
+
+        task = asyncio.ensure_future(responder())
+        samples = []
+        for n in range(count):
+            started = time.perf_counter()
+            await layer.send(ping, {'type': 'bench', 'n': n, 'text': text})
+            await layer.receive(pong)
+            samples.append((time.perf_counter() - started) * 500)
+        await task
+        samples.sort()
+        return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+    async def _fanout(self, layer, size, sends, text):
+        channels = [await layer.new_channel() for _ in range(size)]
+        for channel in channels:
+            await layer.group_add('bench', channel)
+
+        async def drain(channel):
+            for _ in range(sends):
+                await layer.receive(channel)
+
+        started = time.perf_counter()
+        receivers = [asyncio.ensure_future(drain(channel)) for channel in channels]
+        for n in range(sends):
+            await layer.group_send('bench', {'type': 'bench', 'n': n, 'text': text})
+        await asyncio.gather(*receivers)
+        seconds = time.perf_counter() - started
+        for channel in channels:
+            await layer.group_discard('bench', channel)
+        return size * sends / seconds
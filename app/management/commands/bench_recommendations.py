@@ -0,0 +1,88 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from app import cooccurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "Birga kelish matritsasini sintetik tarixda o‘lchaydi: Zipf bo‘yicha mashhurlik, 1–6 "
+        "elementli savatlar va oldindan ekilgan \"juft\" elementlar. Matritsa va top-k qurish "
+        "vaqti, ekilgan juftlarning top-k dagi ulushi (recall) hamda savat uchun tavsiya "
+        "yig‘ish kechikishi (p50/p99) chiqariladi. Bazaga murojaat qilinmaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500, help="Menyu elementlari (standart: 500)")
+        parser.add_argument('--lines', type=int, default=1_000_000, help="Buyurtma qatorlari (standart: 1000000)")
+        parser.add_argument('--top-k', type=int, default=cooccurrence.TOP_K, help="Qo‘shnilar soni")
+        parser.add_argument('--carts', type=int, default=10000, help="Kechikish testidagi savatlar (standart: 10000)")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options['items'], options['lines'], options['top_k'], options['carts']) < 2:
+            raise CommandError("--items, --lines, --top-k va --carts kamida 2 bo‘lishi kerak")
+        rng = np.random.default_rng(options['seed'])
+        lines, partners = self._history(rng, options['items'], options['lines'])
+        self.stdout.write(f"{len(lines)} qator, {lines[-1, 0] + 1} buyurtma, {options['items']} element")
+
+        started = time.perf_counter()
+        item_ids, rows, cols, counts, support = cooccurrence.cooccurrence(lines)
+        matrix_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        neighbors = cooccurrence.top_neighbors(item_ids, rows, cols, counts, support, k=options['top_k'])
+        top_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"  matritsa: {matrix_seconds * 1000:.0f} ms ({len(counts)} nol bo‘lmagan), "
+            f"top-k: {top_seconds * 1000:.0f} ms"
+        )
+
+        found = sum(
+            1 for item_id, partner in partners.items()
+            if partner in {neighbor_id for neighbor_id, _ in neighbors.get(item_id, ())}
+        )
+        self.stdout.write(f"  ekilgan juftlar top-{options['top_k']} da: {found}/{len(partners)}")
+
+        # recommendations.for_items bilan bir xil yig‘ish, kesh o‘rniga tayyor xarita bilan
+        from app import recommendations
+        original = recommendations.neighbor_map
+        recommendations.neighbor_map = lambda restaurant_id: neighbors
+        try:
+            timings = []
+            for _ in range(options['carts']):
+                cart = rng.integers(0, options['items'], size=rng.integers(1, 7)).tolist()
+                started = time.perf_counter()
+                recommendations.for_items(0, cart)
+                timings.append((time.perf_counter() - started) * 1e6)
+        finally:
+            recommendations.neighbor_map = original
+        timings.sort()
+        self.stdout.write(
+            f"  savat tavsiyasi: p50 {statistics.median(timings):.1f} µs, "
+            f"p99 {timings[int(len(timings) * 0.99) - 1]:.1f} µs"
+        )
+        self.stdout.write(self.style.SUCCESS("Tayyor"))
+
+    def _history(self, rng, item_count, line_count):
+        """(order_id, item_id) qatorlari va {element: ekilgan juft} xaritasi."""
+        popularity = 1.0 / np.arange(1, item_count + 1) ** 1.1
+        popularity /= popularity.sum()
+        # Har bir uchinchi element o‘z jufti bilan 60% ehtimol bilan birga buyurtma qilinadi
+        anchors = np.arange(0, item_count - 1, 3)
+        partners = dict(zip(anchors.tolist(), (anchors + 1).tolist()))
+        partner_of = np.full(item_count, -1)
+        partner_of[anchors] = anchors + 1
+
+        sizes = rng.integers(1, 7, size=line_count // 3 + 1)
+        sizes = sizes[:np.searchsorted(np.cumsum(sizes), line_count) + 1]
+        order_ids = np.repeat(np.arange(len(sizes)), sizes)
+        items = rng.choice(item_count, size=len(order_ids), p=popularity)
+        paired = (partner_of[items] >= 0) & (rng.random(len(items)) < 0.6)
+        order_ids = np.concatenate([order_ids, order_ids[paired]])
+        items = np.concatenate([items, partner_of[items[paired]]])
+
+        lines = np.unique(np.stack([order_ids, items], axis=1), axis=0)
+        return lines, partners
@@ -0,0 +1,142 @@
+import datetime
+import random
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from app import reservations
+from app.models import Reservation, Restaurant, Table
+
+
+class Command(BaseCommand):
+    help = (
+        "Bandlik indeksini sintetik ma’lumotda o‘lchaydi: minglab stollar (2–12 o‘rindiq) va "
+        "ularga tasodifiy band qilishlar. Eng mos stolni indeks (bisect) va chiziqli ko‘rib "
+        "chiqish bilan topish kechikishi (p50/p99) va javoblar mosligi chiqariladi. "
+        "--concurrency berilsa, vaqtinchalik restoranda bir vaqtga parallel band qilishlar "
+        "bazada sinab ko‘riladi va kesishgan bandlar sanaladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=5000, help="Stollar soni (standart: 5000)")
+        parser.add_argument('--bookings', type=int, default=50000, help="Band qilishlar soni (standart: 50000)")
+        parser.add_argument('--queries', type=int, default=2000, help="Qidiruvlar soni (standart: 2000)")
+        parser.add_argument('--concurrency', type=int, default=0, help="Parallel band qilish oqimlari (0 — o‘tkazib yuborish)")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options['tables'], options['bookings'], options['queries']) < 1:
+            raise CommandError("--tables, --bookings va --queries kamida 1 bo‘lishi kerak")
+        rng = random.Random(options['seed'])
+        day_start, _day_end = reservations.day_bounds(timezone.localdate())
+        index, raw = self._index(rng, options['tables'], options['bookings'], day_start)
+        busy_count = sum(len(starts) for starts, _ends in index['busy'].values())
+        self.stdout.write(f"{options['tables']} stol, {busy_count} band oraliq")
+
+        fast, slow, mismatches = [], [], 0
+        for _ in range(options['queries']):
+            party = rng.randint(1, 10)
+            starts_at = day_start + datetime.timedelta(minutes=rng.randrange(10 * 60, 22 * 60, 15))
+            ends_at = starts_at + datetime.timedelta(minutes=rng.choice((60, 90, 120, 180)))
+            started = time.perf_counter()
+            found = next(reservations.candidates(index, party, starts_at, ends_at), None)
+            fast.append((time.perf_counter() - started) * 1e6)
+            started = time.perf_counter()
+            expected = self._linear(index['tables'], raw, party, starts_at, ends_at)
+            slow.append((time.perf_counter() - started) * 1e6)
+            mismatches += found != expected
+        for label, timings in (("indeks", fast), ("chiziqli", slow)):
+            timings.sort()
+            self.stdout.write(
+                f"  {label}: p50 {statistics.median(timings):.1f} µs, "
+                f"p99 {timings[int(len(timings) * 0.99) - 1]:.1f} µs"
+            )
+        self.stdout.write(f"  mos kelmagan javoblar: {mismatches}")
+
+        if options['concurrency']:
+            self._concurrency(options['concurrency'])
+        self.stdout.write(self.style.SUCCESS("Tayyor"))
+
+    def _index(self, rng, table_count, booking_count, day_start):
+        """reservations.build_index bilan bir xil tuzilma va stollar bo‘yicha xom oraliqlar."""
+        tables = sorted(
+            ((table_id, str(table_id), rng.randint(2, 12)) for table_id in range(1, table_count + 1)),
+            key=lambda table: (table[2], table[0]),
+        )
+        raw = {}
+        origin = int(day_start.timestamp())
+        for _ in range(booking_count):
+            table_id = rng.randint(1, table_count)
+            start = origin + rng.randrange(10 * 3600, 23 * 3600, 15 * 60)
+            end = start + rng.choice((60, 90, 120, 180)) * 60
+            spans = raw.setdefault(table_id, [])
+            # book() dagi shartli INSERT kabi: kesishadigan band qo‘shilmaydi
+            if all(end <= other_start or start >= other_end for other_start, other_end in spans):
+                spans.append((start, end))
+        index = {
+            'capacities': [capacity for _id, _number, capacity in tables],
+            'tables': tables,
+            'busy': {table_id: reservations._merge(spans) for table_id, spans in raw.items()},
+        }
+        return index, raw
+
+    def _linear(self, tables, raw, party, starts_at, ends_at):
+        start, end = int(starts_at.timestamp()), int(ends_at.timestamp())
+        fitting = [
+            table for table in tables
+            if party <= table[2] <= party + reservations.MAX_EXTRA_SEATS
+            and all(end <= other_start or start >= other_end for other_start, other_end in raw.get(table[0], ()))
+        ]
+        return min(fitting, key=lambda table: (table[2], table[0]), default=None)
+
+    def _concurrency(self, threads):
+        """Vaqtinchalik restoranda `threads` ta oqim bir vaqtga band qiladi; kesishuvlar 0 bo‘lishi kerak."""
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'bench-reservations-{suffix}')
+        restaurant = Restaurant.objects.create(name=f"Bench {suffix}", slug=f'bench-reservations-{suffix}', owner=owner)
+        try:
+            for number in range(1, 4):
+                Table.objects.create(restaurant=restaurant, table_number=str(number), capacity=4)
+            starts_at = timezone.now().replace(second=0, microsecond=0) + datetime.timedelta(days=1)
+            ends_at = starts_at + datetime.timedelta(hours=2)
+            outcomes = []
+            barrier = threading.Barrier(threads)
+
+            def attempt():
+                try:
+                    barrier.wait()
+                    reservations.book(restaurant.id, 2, starts_at, ends_at, guest_name="bench")
+                    outcomes.append('booked')
+                except reservations.TableUnavailable:
+                    outcomes.append('unavailable')
+                except Exception as exc:
+                    outcomes.append(type(exc).__name__)
+                finally:
+                    connection.close()
+
+            workers = [threading.Thread(target=attempt) for _ in range(threads)]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+            booked = list(Reservation.objects.filter(restaurant=restaurant).values_list('table_id', 'starts_at', 'ends_at'))
+            overlaps = sum(
+                1 for i, (table, start, end) in enumerate(booked)
+                for other_table, other_start, other_end in booked[i + 1:]
+                if table == other_table and start < other_end and other_start < end
+            )
+            summary = ', '.join(f"{kind}: {outcomes.count(kind)}" for kind in sorted(set(outcomes)))
+            self.stdout.write(
+                f"  parallel: {threads} oqim, 3 stol, {elapsed * 1000:.0f} ms — {summary}; kesishuvlar: {overlaps}"
+            )
+        finally:
+            restaurant.delete()
+            owner.delete()
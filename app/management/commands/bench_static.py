@@ -0,0 +1,97 @@
+import re
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from app.models import Table
+from app.staticfiles import PrecompressedStaticFiles
+
+ASSET_RE = re.compile(r'(?:src|href)="([^"]+)"')
+
+
+async def _not_found(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 404, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class Command(BaseCommand):
+    help = (
+        "Menyu sahifasi bir marta va qayta yuklanganda statik fayllar uchun so‘rovlar va "
+        "baytlarni solishtiradi: oddiy saqlash va xeshlangan, oldindan siqilgan fayllar. "
+        "Avval `collectstatic` bajarilgan bo‘lishi kerak."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--qr-code', help="Stol QR kodi (standart: birinchi stol)")
+        parser.add_argument('--accept-encoding', default='gzip, deflate, br', help="Brauzer Accept-Encoding sarlavhasi")
+
+    def handle(self, *args, **options):
+        table = Table.objects.filter(qr_code=options['qr_code']) if options['qr_code'] else Table.objects.all()
+        table = table.order_by('id').first()
+        if table is None:
+            raise CommandError("Stol topilmadi")
+        response = Client().get(f'/table/{table.qr_code}/')
+        if response.status_code != 200:
+            raise CommandError(f"Menyu sahifasi {response.status_code} qaytardi")
+        static_url = settings.STATIC_URL
+        names = sorted({
+            url[len(static_url):].split('?')[0]
+            for url in ASSET_RE.findall(response.content.decode())
+            if url.startswith(static_url)
+        })
+        if not names:
+            raise CommandError("Sahifada statik fayllar topilmadi")
+
+        handler = PrecompressedStaticFiles(_not_found)
+        plain_bytes, new_bytes, missing = 0, 0, []
+        for name in names:
+            source = finders.find(name) or staticfiles_storage.path(name)
+            try:
+                with open(source, 'rb') as handle:
+                    plain_bytes += len(handle.read())
+            except OSError:
+                missing.append(name)
+                continue
+            hashed = staticfiles_storage.stored_name(name)
+            status, body, headers = self._fetch(handler, static_url + hashed, options['accept_encoding'])
+            if status != 200:
+                missing.append(name)
+                continue
+            new_bytes += len(body)
+            self.stdout.write(
+                f"  {hashed}: {headers.get('content-encoding', 'identity')}, {headers.get('cache-control')}"
+            )
+
+        count = len(names) - len(missing)
+        self.stdout.write(f"{'Holat':<34}{'so‘rovlar':>10}{'baytlar':>12}")
+        self.stdout.write(f"{'oddiy, birinchi yuklash':<34}{count:>10}{plain_bytes:>12}")
+        # Oddiy saqlashda kesh sarlavhalari yo‘q: har bir skanerlashda fayllar qayta yuklanadi
+        self.stdout.write(f"{'oddiy, qayta yuklash':<34}{count:>10}{plain_bytes:>12}")
+        self.stdout.write(f"{'xeshlangan+siqilgan, birinchi':<34}{count:>10}{new_bytes:>12}")
+        self.stdout.write(f"{'xeshlangan+siqilgan, qayta':<34}{0:>10}{0:>12}")
+        for name in missing:
+            self.stderr.write(f"Topilmadi (collectstatic bajarilganmi?): {name}")
+
+    @staticmethod
+    def _fetch(handler, path, accept_encoding):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path, 'root_path': '',
+            'headers': [(b'accept-encoding', accept_encoding.encode())],
+        }
+        async_to_sync(handler)(scope, receive, send)
+        start = messages[0]
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        headers = {key.decode(): value.decode() for key, value in start['headers']}
+        return start['status'], body, headers
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import cooccurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "OrderItem tarixidan har bir restoran uchun element x element birga kelish matritsasini "
+        "quradi va har bir menyu elementi uchun top-k \"birga buyurtma qilinadigan\" qo‘shnilarni saqlaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=12, help="Necha haftalik tarix ishlatiladi (standart: 12)")
+        parser.add_argument(
+            '--top-k', type=int, default=cooccurrence.TOP_K,
+            help=f"Har bir element uchun qo‘shnilar soni (standart: {cooccurrence.TOP_K})",
+        )
+        parser.add_argument('--restaurant', type=int, action='append', help="Faqat shu restoran ID si (takrorlanadi)")
+
+    def handle(self, *args, **options):
+        if options['weeks'] < 1 or options['top_k'] < 1:
+            raise CommandError("--weeks va --top-k musbat bo‘lishi kerak")
+        results = cooccurrence.rebuild(options['restaurant'], weeks=options['weeks'], k=options['top_k'])
+        for result in results:
+            self.stdout.write(
+                f"  #{result['restaurant']}: {result['lines']} qator, {result['pairs']} juftlik, "
+                f"{result['items']} element, {result['seconds'] * 1000:.0f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} ta restoran uchun tavsiyalar {sum(result['seconds'] for result in results):.2f} s da qurildi"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from app import caching
+
+
+class Command(BaseCommand):
+    help = (
+        "Ikki darajali kesh uchun nomlar fazosi bo‘yicha L1/L2 tushishlari, o‘tkazib "
+        "yuborishlar va umumiy hit ratio ni chiqaradi (barcha jarayonlar yig‘indisi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Chiqargandan keyin hisoblagichlarni nollash")
+
+    def handle(self, *args, **options):
+        report = caching.hit_ratios(reset=options['reset'])
+        self.stdout.write(f"{'Nomlar fazosi':<16}{'L1':>10}{'L2':>10}{'miss':>10}{'hit ratio':>12}")
+        for name, counts in report.items():
+            ratio = '-' if counts['hit_ratio'] is None else f"{counts['hit_ratio']:.1%}"
+            self.stdout.write(
+                f"{name:<16}{counts['local']:>10}{counts['shared']:>10}{counts['miss']:>10}{ratio:>12}"
+            )
+        if options['reset']:
+            self.stdout.write(self.style.SUCCESS("Hisoblagichlar nollandi"))
@@ -0,0 +1,40 @@
+import datetime
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app import reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Kun yakunidagi savdo hisobotlarini (soatlik daromad, top elementlar, to‘lov usullari, "
+        "o‘rtacha chek, bekor qilinganlar) barcha restoranlar uchun hisoblaydi; CSV/HTML fayllar "
+        "jarayonlar hovuzida chiziladi va egasi panelidan yuklab olish uchun saqlanadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Hisobot kuni, YYYY-MM-DD (standart: kecha)")
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help="Fayllarni chizuvchi jarayonlar soni (standart: protsessor yadrolari soni)",
+        )
+        parser.add_argument('--restaurant', type=int, action='append', help="Faqat shu restoran ID si (takrorlanadi)")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers musbat bo‘lishi kerak")
+        if options['date']:
+            try:
+                day = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date YYYY-MM-DD ko‘rinishida bo‘lishi kerak")
+        else:
+            day = timezone.localdate() - datetime.timedelta(days=1)
+        result = reports.generate(day, workers=options['workers'], restaurant_ids=options['restaurant'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{day}: {result['restaurants']} ta hisobot — so‘rovlar {result['query_seconds']:.2f} s, "
+            f"chizish {result['render_seconds']:.2f} s ({options['workers']} jarayon), "
+            f"saqlash {result['store_seconds']:.2f} s"
+        ))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app import estimator
+
+
+class Command(BaseCommand):
+    help = (
+        "Tarixiy holat o‘tishlaridan har bir restoran va menyu elementi uchun tayyorlash "
+        "vaqtini qayta o‘rganadi (tungi ish). --evaluate bilan oflayn aniqlikni o‘lchaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help="Necha kunlik tarix ishlatiladi (standart: 90)")
+        parser.add_argument(
+            '--evaluate',
+            action='store_true',
+            help="Saqlamasdan, eng so‘nggi buyurtmalarda aniqlikni eski hisob bilan solishtiradi",
+        )
+        parser.add_argument(
+            '--holdout',
+            type=float,
+            default=0.2,
+            help="--evaluate uchun sinov ulushi (standart: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timezone.timedelta(days=options['days'])
+        started = time.perf_counter()
+        if options['evaluate']:
+            if not 0 < options['holdout'] < 1:
+                raise CommandError("--holdout 0 va 1 oralig‘ida bo‘lishi kerak")
+            samples = estimator.load_samples(since)
+            report = estimator.evaluate(samples, options['holdout']) if samples else None
+            if report is None:
+                raise CommandError("Baholash uchun yetarli yakunlangan buyurtma yo‘q")
+            self.stdout.write(f"Sinov buyurtmalari: {report['test_orders']}")
+            self.stdout.write(f"O‘rganilgan model: MAE {report['learned_mae']:.2f} daq, p90 {report['learned_p90']:.2f} daq")
+            self.stdout.write(f"Statik preparation_time: MAE {report['static_mae']:.2f} daq, p90 {report['static_p90']:.2f} daq")
+        else:
+            updated = estimator.refit(since)
+            self.stdout.write(self.style.SUCCESS(f"{updated} ta restoran modeli yangilandi"))
+        self.stdout.write(f"Vaqt: {time.perf_counter() - started:.2f} s")
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import forecast
+
+
+class Command(BaseCommand):
+    help = (
+        "OrderItem tarixidan barcha restoranlar uchun talabni prognoz qiladi va "
+        "zaxira to‘ldirish tavsiyalarini qayta hisoblaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=8, help="Necha haftalik tarix ishlatiladi (standart: 8)")
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=7,
+            help="Tugash vaqti qidiriladigan gorizont, kunlarda (standart: 7)",
+        )
+        parser.add_argument(
+            '--cover-days',
+            type=int,
+            default=3,
+            help="Tavsiya etilgan zaxira necha kunga yetishi kerak (standart: 3)",
+        )
+        parser.add_argument(
+            '--safety-factor',
+            type=float,
+            default=1.2,
+            help="Prognozga qo‘shiladigan zaxira koeffitsiyenti (standart: 1.2)",
+        )
+
+    def handle(self, *args, **options):
+        if min(options['weeks'], options['horizon_days'], options['cover_days']) < 1:
+            raise CommandError("--weeks, --horizon-days va --cover-days musbat bo‘lishi kerak")
+        started = time.perf_counter()
+        count = forecast.refresh(
+            weeks=options['weeks'],
+            horizon_days=options['horizon_days'],
+            cover_days=options['cover_days'],
+            safety_factor=options['safety_factor'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} ta zaxira tavsiyasi {time.perf_counter() - started:.2f} s ichida yangilandi"
+        ))
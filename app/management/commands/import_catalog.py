@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.catalog import CatalogImporter, CatalogImportError, KINDS, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Restoran, kategoriya, menyu elementi va stollarni CSV/JSON fayldan ommaviy import qiladi. "
+        "Har bir qatorda 'kind' ustuni bo‘lishi kerak: restaurant, category, menu_item yoki table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV, JSON Lines (.jsonl) yoki JSON (.json) fayl yo‘li")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help="Bitta bulk_create tranzaksiyasidagi yozuvlar soni (standart: 500)",
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size musbat bo‘lishi kerak")
+        importer = CatalogImporter(chunk_size=options['chunk_size'])
+        try:
+            importer.run(read_rows(options['path']))
+        except (CatalogImportError, OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for line_no, error in importer.errors:
+            self.stderr.write(f"{line_no}-qator: {error}")
+        for kind in KINDS:
+            self.stdout.write(f"{kind}: {importer.created[kind]} ta yaratildi")
+        self.stdout.write(self.style.SUCCESS(
+            f"Jami {importer.total_created} ta yozuv {importer.elapsed:.2f} s ichida "
+            f"({importer.rows_per_second:.0f} qator/s), {len(importer.errors)} ta xato"
+        ))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Inventar jurnali xizmati: barcha elementlar uchun qoldiq yozadi, uni "
+        "MenuItem.stock_quantity bilan solishtiradi va eski operatsiyalarni siqadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snapshot', action='store_true', help="Yangi qoldiqlarni yozish va solishtirish")
+        parser.add_argument(
+            '--compact-days',
+            type=int,
+            help="Shu kundan eski operatsiyalarni kunlik yig‘indilarga aylantirish",
+        )
+
+    def handle(self, *args, **options):
+        if not options['snapshot'] and options['compact_days'] is None:
+            raise CommandError("--snapshot yoki --compact-days dan kamida bittasini bering")
+        if options['compact_days'] is not None:
+            if options['compact_days'] < 1:
+                raise CommandError("--compact-days musbat bo‘lishi kerak")
+            started = time.perf_counter()
+            deleted = inventory.compact(days=options['compact_days'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{deleted} ta operatsiya kunlik yig‘indilarga aylantirildi ({time.perf_counter() - started:.2f} s)"
+            ))
+        if options['snapshot']:
+            started = time.perf_counter()
+            count, drift = inventory.take_snapshots()
+            self.stdout.write(self.style.SUCCESS(
+                f"{count} ta qoldiq yozildi ({time.perf_counter() - started:.2f} s)"
+            ))
+            for menu_item_id, (expected, actual) in sorted(drift.items()):
+                self.stderr.write(f"Menyu elementi #{menu_item_id}: jurnal bo‘yicha {expected}, stock_quantity {actual}")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from app import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Outbox ishlovchilari bo‘yicha ko‘rsatkichlar: qayta ishlangan hodisalar, kechikish "
+        "(hodisalar soni va eng eski kutayotgan hodisa yoshi), oxirgi paket tezligi va "
+        "commit bo‘lmagan hodisa (bo‘shliq) oldida kutish vaqti."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'Ishlovchi':<16}{'siljish':>10}{'jami':>10}{'kechikish':>11}{'yoshi, s':>10}{'hodisa/s':>10}{'bo‘shliq, s':>13}"
+        )
+        for row in outbox.metrics():
+            line = (
+                f"{row['handler']:<16}{row['last_event_id']:>10}{row['processed']:>10}{row['lag_events']:>11}"
+                f"{row['lag_seconds']:>10.1f}{row['events_per_second']:>10.0f}{row['gap_seconds']:>13.1f}"
+            )
+            self.stdout.write(self.style.ERROR(f"{line}  (xato)") if row['failing'] else line)
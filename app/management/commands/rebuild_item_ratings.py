@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import item_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Menyu elementlari baholari gistogrammasini (MenuItemRating) faol va arxivlangan "
+        "sharhlardan elementlar bo‘yicha bo‘laklab qayta hisoblaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help="Bitta tranzaksiyadagi menyu elementlari soni (standart: 500)",
+        )
+        parser.add_argument('--restaurant', type=int, action='append', help="Faqat shu restoran ID si (takrorlanadi)")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size 1 dan kichik bo‘lmasligi kerak")
+        started = time.perf_counter()
+        rebuilt = item_ratings.rebuild(options['restaurant'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{rebuilt} ta element baholari {time.perf_counter() - started:.2f} s ichida qayta hisoblandi"
+        ))
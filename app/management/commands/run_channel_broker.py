@@ -0,0 +1,45 @@
+import asyncio
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.ipc_layer import Broker, IPCChannelLayer
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta server uchun kanal brokerini (Unix soket) ishga tushiradi. Sig‘im va muddat "
+        "sozlamalari CHANNEL_LAYERS dagi IPCChannelLayer CONFIG idan olinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', default='default', help="CHANNEL_LAYERS dagi qatlam nomi (standart: default)")
+        parser.add_argument('--socket', help="Soket yo‘li (standart: qatlam CONFIG idagi path)")
+
+    def handle(self, *args, **options):
+        layer_settings = getattr(settings, 'CHANNEL_LAYERS', {}).get(options['layer'])
+        if layer_settings is None:
+            raise CommandError(f"CHANNEL_LAYERS da '{options['layer']}' qatlami yo‘q")
+        if layer_settings['BACKEND'] != 'app.ipc_layer.IPCChannelLayer':
+            raise CommandError(f"'{options['layer']}' qatlami IPCChannelLayer emas: {layer_settings['BACKEND']}")
+        config = IPCChannelLayer(**layer_settings.get('CONFIG', {})).broker_config()
+        if options['socket']:
+            config['path'] = options['socket']
+
+        broker = Broker(**config)
+        ready = lambda: self.stdout.write(self.style.SUCCESS(f"Kanal brokeri ishga tushdi: {config['path']}"))
+
+        async def serve():
+            # SIGTERM/SIGINT da serve() to‘xtaydi va soket fayli o‘chiriladi
+            loop = asyncio.get_running_loop()
+            task = asyncio.current_task()
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, task.cancel)
+            await broker.serve(ready)
+
+        try:
+            asyncio.run(serve())
+        except asyncio.CancelledError:
+            pass
+        self.stdout.write("Kanal brokeri to‘xtatildi")
@@ -0,0 +1,58 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Buyurtma hodisalari outbox releyini ishga tushiradi: hodisalarni id tartibida paket "
+        "bilan o‘qib, ro‘yxatdan o‘tgan ishlovchilarga (bildirishnomalar, sadoqat ballari, "
+        "statistika) uzatadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--handler',
+            action='append',
+            dest='handlers',
+            help="Faqat shu ishlovchi (bir necha marta berilishi mumkin; standart: hammasi)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=outbox.BATCH_SIZE,
+            help=f"Bir paketdagi hodisalar soni (standart: {outbox.BATCH_SIZE})",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help="Yangi hodisa bo‘lmaganda kutish vaqti, soniyalarda (standart: 0.5)",
+        )
+        parser.add_argument('--once', action='store_true', help="Barcha tayyor hodisalar qayta ishlangach to‘xtash")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size musbat bo‘lishi kerak")
+        unknown = set(options['handlers'] or ()) - set(outbox._handlers)
+        if unknown:
+            raise CommandError(f"Noma’lum ishlovchi: {', '.join(sorted(unknown))}")
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        self.stdout.write(f"Outbox releyi ishga tushirildi: {', '.join(options['handlers'] or sorted(outbox._handlers))}")
+        try:
+            processed = outbox.work(
+                stop_event,
+                batch_size=options['batch_size'],
+                poll_interval=options['poll_interval'],
+                once=options['once'],
+                names=options['handlers'],
+            )
+        except KeyboardInterrupt:
+            processed = None
+        if processed is not None:
+            self.stdout.write(f"Qayta ishlangan hodisalar: {processed}")
+        self.stdout.write(self.style.SUCCESS("Outbox releyi to‘xtatildi"))
@@ -0,0 +1,91 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app import jobs
+
+
+def _process_main(batch_size, poll_interval, once):
+    # spawn rejimida bola jarayon Django'ni qaytadan sozlashi kerak
+    django.setup()
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    jobs.work(stop_event, batch_size=batch_size, poll_interval=poll_interval, once=once)
+
+
+class Command(BaseCommand):
+    help = "Bazadagi navbatdan fon vazifalarini oluvchi ishchilarni ishga tushiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Ishchilar soni (standart: 2)")
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default='thread',
+            help="Ishchilar oqim yoki jarayon sifatida ishga tushiriladi (standart: thread)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help="Bir martada olinadigan vazifalar soni (standart: 10)",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help="Navbat bo‘sh bo‘lganda kutish vaqti, soniyalarda (standart: 1.0)",
+        )
+        parser.add_argument('--once', action='store_true', help="Navbat bo‘shagach to‘xtash")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--workers va --batch-size musbat bo‘lishi kerak")
+        work_args = (options['batch_size'], options['poll_interval'], options['once'])
+        self.stdout.write(f"{options['workers']} ta ishchi ({options['mode']}) ishga tushirildi")
+        if options['mode'] == 'process':
+            self._run_processes(options['workers'], work_args)
+        else:
+            self._run_threads(options['workers'], work_args)
+        self.stdout.write(self.style.SUCCESS("Ishchilar to‘xtatildi"))
+
+    def _run_threads(self, count, work_args):
+        stop_event = threading.Event()
+        results = []
+
+        def target():
+            results.append(jobs.work(stop_event, *work_args))
+
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        processed = sum(ok for ok, _failed in results)
+        failed = sum(bad for _ok, bad in results)
+        self.stdout.write(f"Bajarildi: {processed}, muvaffaqiyatsiz: {failed}")
+
+    def _run_processes(self, count, work_args):
+        # Ochiq ulanishlar bola jarayonlarga meros bo‘lib o‘tmasligi kerak
+        connections.close_all()
+        processes = [multiprocessing.Process(target=_process_main, args=work_args) for _ in range(count)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app import carts
+
+
+class Command(BaseCommand):
+    help = (
+        "TTL dan beri o‘zgarmagan savatlarni o‘chiradi va ular band qilgan zaxirani "
+        "menyu elementlariga qaytaradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-minutes', type=int, default=120, help="Savat eskirish vaqti, daqiqa (standart: 120)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Bitta tranzaksiyadagi savatlar (standart: 500)")
+        parser.add_argument('--limit', type=int, help="Bir ishga tushishda ko‘pi bilan shuncha savat")
+
+    def handle(self, *args, **options):
+        if options['ttl_minutes'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--ttl-minutes va --batch-size musbat bo‘lishi kerak")
+        started = time.perf_counter()
+        metrics = carts.sweep_abandoned_carts(
+            ttl=timezone.timedelta(minutes=options['ttl_minutes']),
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{metrics['carts']} ta savat va {metrics['cart_items']} ta savat elementi o‘chirildi, "
+            f"{metrics['menu_items']} ta menyu elementiga {metrics['released_units']} dona qaytarildi "
+            f"({time.perf_counter() - started:.2f} s)"
+        ))
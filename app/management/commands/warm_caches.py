@@ -0,0 +1,38 @@
+import asyncio
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Faol restoranlar uchun menyu hujjatlari, QR kod yozuvlari, baholar va bosh sahifa "
+        "kartochkalarini keshga oldindan yozadi va vaqtini chiqaradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=warmup.CONCURRENCY,
+            help=f"Bir vaqtda isitiladigan restoranlar (standart: {warmup.CONCURRENCY})",
+        )
+        parser.add_argument('--restaurant', type=int, action='append', help="Faqat shu restoran ID si (takrorlanadi)")
+        parser.add_argument('--verbose-timings', action='store_true', help="Har bir restoran vaqtini chiqarish")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency musbat bo‘lishi kerak")
+        results, seconds = asyncio.run(warmup.warm_all(options['concurrency'], options['restaurant']))
+        if options['verbose_timings']:
+            for result in sorted(results, key=lambda result: -result['seconds']):
+                self.stdout.write(
+                    f"  #{result['restaurant']}: {result['tables']} stol, "
+                    f"{result['payloads']} menyu hujjati, {result['seconds'] * 1000:.1f} ms"
+                )
+        timings = [result['seconds'] * 1000 for result in results]
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} ta restoran, {sum(result['tables'] for result in results)} ta stol isitildi: "
+            f"{seconds:.2f} s (restoran bo‘yicha median {statistics.median(timings) if timings else 0:.1f} ms, "
+            f"eng sekin {max(timings, default=0):.1f} ms)"
+        ))
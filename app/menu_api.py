@@ -0,0 +1,198 @@
+"""
+Mijoz tomonida chiziladigan menyu uchun ixcham JSON hujjatlar.
+
+Menyu hujjati restoran kontenti versiyasi (app.versions) bo‘yicha bir marta
+yaratiladi va tanlangan maydonlar hamda siqish turi uchun tayyor baytlar
+sifatida keshda saqlanadi. Elementlar ustunli ko‘rinishda beriladi:
+`fields` ro‘yxati va har bir element uchun shu tartibdagi qiymatlar massivi.
+Jonli zaxira hujjatga kirmaydi: har bir sotuv hujjatni eskirtirmasligi uchun
+u alohida keshlanmaydigan zaxira endpointi (`restaurant_stock`), savat
+endpointi va savat deltasida (`stock_levels`) beriladi.
+
+Qidiruv (narx oralig‘i, saralash, sahifalash) esa keshlanmaydi: u to‘liq
+bazada, MenuItem.current_price ustuni va (restaurant, current_price) indeksi
+ustida bajariladi.
+
+Brotli faqat `brotli` paketi o‘rnatilgan bo‘lsa ishlatiladi.
+"""
+import gzip
+import json
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from . import caching
+from .models import Category, CartItem, MenuItem, Restaurant
+
+try:
+    import brotli
+except ImportError:  # ixtiyoriy bog‘liqlik
+    brotli = None
+
+ITEM_FIELDS = {
+    'id': lambda item: item.id,
+    'name': lambda item: item.name,
+    'description': lambda item: item.description,
+    'price': lambda item: item.effective_price,
+    'base_price': lambda item: item.price,
+    'available': lambda item: item.is_available,
+    'prep_minutes': lambda item: item.preparation_time,
+    'dietary': lambda item: item.dietary_info,
+    'image': lambda item: _first_image_url(item),
+    'rating': lambda item: round(item.ratings.average, 2) if item.ratings else None,
+    'rating_counts': lambda item: [getattr(item.ratings, f'stars_{star}') for star in range(1, 6)] if item.ratings else None,
+}
+DEFAULT_FIELDS = ('id', 'name', 'price', 'available', 'image')
+CART_FIELDS = ('menu_item_id', 'quantity', 'price')
+SEARCH_PAGE_SIZE = 24
+SEARCH_ORDERINGS = {
+    'price': ('current_price', 'id'),
+    '-price': ('-current_price', '-id'),
+    'name': ('name', 'id'),
+}
+
+_GZIP_RE = re.compile(r'\bgzip\b')
+_BR_RE = re.compile(r'\bbr\b')
+
+
+def _first_image_url(item):
+    images = item.images.all()
+    return images[0].image.url if images and images[0].image else None
+
+
+def parse_fields(value):
+    """`?fields=id,name` qiymatini tekshiradi; noma’lum maydon bo‘lsa ValueError."""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in ITEM_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Noma’lum maydon(lar): {', '.join(unknown) or value}")
+    return fields
+
+
+def parse_price(value):
+    """`?min_price=` kabi qiymat; bo‘sh bo‘lsa None, noto‘g‘ri bo‘lsa ValueError."""
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Noto‘g‘ri narx: {value}")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"Noto‘g‘ri narx: {value}")
+    return price
+
+
+def search(restaurant_id, fields, query='', low=None, high=None, sort='price', page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Sotuvdagi elementlar bo‘yicha qidiruv, filtr, saralash va sahifalash bazada.
+
+    Keyingi sahifa borligi COUNT siz, bitta ortiqcha qator olish bilan aniqlanadi.
+    """
+    items = MenuItem.objects.filter(restaurant_id=restaurant_id, is_available=True).price_between(low, high)
+    if query:
+        items = items.filter(name__icontains=query)
+    if 'image' in fields:
+        items = items.prefetch_related('images')
+    if {'rating', 'rating_counts'} & set(fields):
+        items = items.select_related('rating_histogram')
+    offset = (page - 1) * page_size
+    rows = list(items.order_by(*SEARCH_ORDERINGS[sort])[offset:offset + page_size + 1])
+    return {
+        'fields': list(fields),
+        'items': [[ITEM_FIELDS[name](item) for name in fields] for item in rows[:page_size]],
+        'page': page,
+        'next_page': page + 1 if len(rows) > page_size else None,
+    }
+
+
+def negotiate_encoding(accept_encoding):
+    if brotli is not None and _BR_RE.search(accept_encoding):
+        return 'br'
+    if _GZIP_RE.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+def build_document(restaurant_id, version, fields):
+    """Menyu hujjatini lug‘at ko‘rinishida quradi (3 ta so‘rov)."""
+    restaurant = Restaurant.objects.only('id', 'name', 'slug').get(pk=restaurant_id)
+    categories = list(Category.objects.filter(restaurant_id=restaurant_id).values_list('id', 'name'))
+    items = MenuItem.objects.filter(restaurant_id=restaurant_id).select_related(
+        'rating_histogram'
+    ).prefetch_related('images').order_by('name')
+    rows = {category_id: [] for category_id, _name in categories}
+    for item in items:
+        rows.setdefault(item.category_id, []).append([ITEM_FIELDS[name](item) for name in fields])
+    sections = [{'id': pk, 'name': name, 'items': rows[pk]} for pk, name in categories]
+    if rows.get(None):
+        sections.append({'id': None, 'name': "Boshqa", 'items': rows[None]})
+    return {
+        'version': version,
+        'restaurant': {'id': restaurant.id, 'name': restaurant.name, 'slug': restaurant.slug},
+        'fields': list(fields),
+        'categories': sections,
+    }
+
+
+def encode(document, encoding):
+    body = json.dumps(document, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+    if encoding == 'br':
+        return brotli.compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, mtime=0)
+    return body
+
+
+def menu_payload(restaurant_id, version, fields, encoding):
+    """Tayyor (kerak bo‘lsa siqilgan) baytlar; har bir versiya uchun bir marta yaratiladi."""
+    key = f"{version}_{','.join(fields)}_{encoding or 'identity'}"
+    return caching.menus.get_or_set(
+        restaurant_id, key, lambda: encode(build_document(restaurant_id, version, fields), encoding)
+    )
+
+
+def _cart_lines_queryset(cart_id, menu_item_ids):
+    items = CartItem.objects.filter(cart_id=cart_id)
+    if menu_item_ids is not None:
+        items = items.filter(menu_item_id__in=menu_item_ids)
+    return items.values_list('menu_item_id', 'quantity', 'menu_item__current_price').order_by('id')
+
+
+def _cart_total_aggregate():
+    return {'total': Sum(ExpressionWrapper(
+        F('quantity') * F('menu_item__current_price'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    ))}
+
+
+def cart_lines(cart_id, menu_item_ids=None):
+    """Savat qatorlari CART_FIELDS tartibida: [menu_item_id, quantity, price]."""
+    return [list(row) for row in _cart_lines_queryset(cart_id, menu_item_ids)]
+
+
+def stock_levels(menu_item_ids):
+    """{menu_item_id: stock_quantity} — versiyalanmaydigan jonli zaxira."""
+    return dict(MenuItem.objects.filter(pk__in=menu_item_ids).values_list('id', 'stock_quantity'))
+
+
+def restaurant_stock(restaurant_id):
+    """Restoranning sotuvdagi barcha elementlari uchun jonli zaxira (menyu sahifasi to‘ldiradi)."""
+    return dict(
+        MenuItem.objects.filter(restaurant_id=restaurant_id, is_available=True).values_list('id', 'stock_quantity')
+    )
+
+
+def cart_total(cart_id):
+    return CartItem.objects.filter(cart_id=cart_id).aggregate(**_cart_total_aggregate())['total'] or 0
+
+
+async def acart_lines(cart_id, menu_item_ids=None):
+    return [list(row) async for row in _cart_lines_queryset(cart_id, menu_item_ids)]
+
+
+async def acart_total(cart_id):
+    return (await CartItem.objects.filter(cart_id=cart_id).aaggregate(**_cart_total_aggregate()))['total'] or 0
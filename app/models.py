@@ -1,11 +1,17 @@
-from django.db import models
+import uuid
+from itertools import groupby
+
+from django.db import models, connection, transaction
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache
 from django.contrib.auth.models import User
 
+from . import caching, versions
+
 
 class BaseModel(models.Model):
     """Vaqt belgilari bilan abstrakt asosiy model."""
@@ -24,6 +30,15 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class PercentileCont(models.Aggregate):
+    """PostgreSQL `PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY ...)` agregati."""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+
 class Image(models.Model):
     """Rasmlarni izohlar bilan saqlash uchun model."""
     image = models.ImageField(
@@ -125,12 +140,24 @@ class Restaurant(BaseModel):
 
     def _generate_unique_slug(self):
         """Restoran nomiga asoslangan noyob slug yaratadi."""
-        slug = slugify(self.name)
+        # Band sluglar bitta so‘rov bilan olinadi, keyin xotirada tanlanadi
+        taken = set(
+            Restaurant.objects.filter(slug__startswith=slugify(self.name))
+            .exclude(pk=self.pk)
+            .values_list('slug', flat=True)
+        )
+        return self.allocate_slug(self.name, taken)
+
+    @staticmethod
+    def allocate_slug(name, taken):
+        """Band sluglar to‘plamiga qarab noyob slug tanlaydi va uni to‘plamga qo‘shadi."""
+        slug = slugify(name)
         original_slug = slug
         counter = 1
-        while Restaurant.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+        while slug in taken:
             slug = f"{original_slug}-{counter}"
             counter += 1
+        taken.add(slug)
         return slug
 
     def __str__(self):
@@ -139,23 +166,34 @@ class Restaurant(BaseModel):
     @property
     def average_rating(self):
         """Restoran uchun o‘rtacha baho olish yoki hisoblash."""
-        cache_key = f"restaurant_{self.id}_average_rating"
-        avg = cache.get(cache_key)
-        if avg is None:
-            avg = self.orders.aggregate(avg_rating=models.Avg('reviews__rating'))['avg_rating'] or 0.0
-            avg = round(avg, 1)
-            cache.set(cache_key, avg, timeout=3600)  # 1 soat keshlash
+        # Ikki darajali kesh: hisob va saqlash barcha jarayonlar uchun bir marta bajariladi
+        return caching.ratings.get_or_set(self.id, 'average', self._compute_average_rating)
+
+    def _compute_average_rating(self):
+        # Faol va arxivlangan sharhlar birgalikda hisoblanadi
+        hot = Review.objects.filter(order__restaurant=self).aggregate(
+            total=models.Sum('rating'), count=models.Count('id')
+        )
+        archived = self.archived_totals()
+        count = (hot['count'] or 0) + archived.rating_count
+        avg = round(((hot['total'] or 0) + archived.rating_sum) / count, 1) if count else 0.0
+        if float(self.cached_average_rating) != avg:
             self.cached_average_rating = avg
             self.save(update_fields=['cached_average_rating'])
         return avg
 
+    def archived_totals(self):
+        """Arxivlangan buyurtmalar yig‘masini qaytaradi (arxiv bo‘lmasa — nollar)."""
+        return ArchiveRollup.objects.filter(restaurant=self).first() or ArchiveRollup(restaurant=self)
+
     def get_statistics(self):
         """Restoran egasi uchun asosiy statistikani qaytaradi."""
-        total_orders = self.orders.count()
+        archived = self.archived_totals()
+        total_orders = self.orders.count() + archived.order_count
         active_orders = self.orders.filter(status__in=['pending', 'accepted', 'preparing']).count()
-        total_revenue = self.orders.filter(status='served').aggregate(
+        total_revenue = (self.orders.filter(status='served').aggregate(
             total=models.Sum('total_price')
-        )['total'] or 0
+        )['total'] or 0) + archived.served_revenue
         return {
             'jami_buyurtmalar': total_orders,
             'faol_buyurtmalar': active_orders,
@@ -163,6 +201,38 @@ class Restaurant(BaseModel):
             'ortacha_baho': self.average_rating,
         }
 
+    def get_status_timings(self, percentiles=(50, 90, 99), since=None):
+        """
+        Har bir holatda o‘tgan vaqt persentillarini (daqiqalarda) qaytaradi.
+
+        Masalan, 'pending' — qabul qilish kechikishi, 'preparing' — oshxona vaqti.
+        Natija o‘tishlar jurnalidan bitta guruhlangan so‘rov bilan olinadi.
+        """
+        transitions = self.order_status_transitions.exclude(from_status='').filter(duration__isnull=False)
+        if since is not None:
+            transitions = transitions.filter(created_at__gte=since)
+        timings = {}
+        if connection.vendor == 'postgresql':
+            rows = transitions.values('from_status').annotate(
+                count=models.Count('id'),
+                **{f'p{p}': PercentileCont('duration', p / 100) for p in percentiles},
+            )
+            for row in rows:
+                status = row.pop('from_status')
+                timings[status] = {
+                    key: value.total_seconds() / 60 if key != 'count' else value
+                    for key, value in row.items()
+                }
+            return timings
+        # Boshqa bazalarda saralangan qiymatlar bitta so‘rovda olinib, persentil xotirada hisoblanadi
+        rows = transitions.order_by('from_status', 'duration').values_list('from_status', 'duration')
+        for status, group in groupby(rows, key=lambda row: row[0]):
+            minutes = [duration.total_seconds() / 60 for _status, duration in group]
+            timings[status] = {'count': len(minutes)}
+            for p in percentiles:
+                timings[status][f'p{p}'] = minutes[min(len(minutes) - 1, int(len(minutes) * p / 100))]
+        return timings
+
 
 class Table(BaseModel):
     """Restorandagi stol va QR kodni ifodalovchi model."""
@@ -210,10 +280,23 @@ class Table(BaseModel):
 
     def _generate_unique_qr_code(self):
         """Stol uchun noyob QR kod yaratadi."""
-        import uuid
-        qr_code = f"table-{self.restaurant.id}-{self.table_number}-{uuid.uuid4().hex[:8]}"
+        qr_code = self.build_qr_code(self.restaurant_id, self.table_number)
         while Table.objects.filter(qr_code=qr_code).exists():
-            qr_code = f"table-{self.restaurant.id}-{self.table_number}-{uuid.uuid4().hex[:8]}"
+            qr_code = self.build_qr_code(self.restaurant_id, self.table_number)
+        return qr_code
+
+    @staticmethod
+    def build_qr_code(restaurant_id, table_number):
+        """Restoran va stol raqamidan tasodifiy qo‘shimchali QR kod qiymatini tuzadi."""
+        return f"table-{restaurant_id}-{table_number}-{uuid.uuid4().hex[:8]}"
+
+    @classmethod
+    def allocate_qr_code(cls, restaurant_id, table_number, taken):
+        """Band QR kodlar to‘plamiga qarab noyob QR kod tanlaydi va uni to‘plamga qo‘shadi."""
+        qr_code = cls.build_qr_code(restaurant_id, table_number)
+        while qr_code in taken:
+            qr_code = cls.build_qr_code(restaurant_id, table_number)
+        taken.add(qr_code)
         return qr_code
 
 
@@ -256,6 +339,17 @@ class Category(BaseModel):
         return f"{self.name} ({self.restaurant.name})"
 
 
+class MenuItemQuerySet(models.QuerySet):
+    def price_between(self, low=None, high=None):
+        """Haqiqiy narx (current_price) bo‘yicha oraliq; chegaralar ixtiyoriy va ichiga oladi."""
+        queryset = self
+        if low is not None:
+            queryset = queryset.filter(current_price__gte=low)
+        if high is not None:
+            queryset = queryset.filter(current_price__lte=high)
+        return queryset
+
+
 class MenuItem(BaseModel):
     """Restorandagi alohida menyu elementlari uchun model."""
     restaurant = models.ForeignKey(
@@ -297,6 +391,13 @@ class MenuItem(BaseModel):
         verbose_name=_("Chegirmali narx"),
         help_text=_("Agar mavjud bo‘lsa, chegirmali narx")
     )
+    current_price = models.GeneratedField(
+        expression=Coalesce('discount_price', 'price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+        verbose_name=_("Haqiqiy narx"),
+        help_text=_("effective_price ning bazadagi nusxasi: saralash, filtr va agregatlar uchun"),
+    )
     images = models.ManyToManyField(
         Image,
         related_name="menu_items",
@@ -334,9 +435,12 @@ class MenuItem(BaseModel):
             models.Index(fields=['restaurant', 'is_available']),
             models.Index(fields=['category']),
             models.Index(fields=['name', 'is_available']),
-            models.Index(fields=['price', 'discount_price']),
+            # Restoran menyusini narx bo‘yicha saralash va oraliq filtri
+            models.Index(fields=['restaurant', 'current_price']),
         ]
 
+    objects = MenuItemQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.restaurant.name})"
 
@@ -345,14 +449,18 @@ class MenuItem(BaseModel):
         """Chegirmali narx mavjud bo‘lsa, uni qaytaradi, aks holda oddiy narx."""
         return self.discount_price if self.discount_price is not None else self.price
 
-    def reduce_stock(self, quantity):
-        """Zaxira miqdorini kamaytiradi va mavjudlikni yangilaydi."""
-        if self.stock_quantity >= quantity:
-            self.stock_quantity -= quantity
-            self.is_available = self.stock_quantity > 0
-            self.save(update_fields=['stock_quantity', 'is_available'])
-            return True
-        return False
+    @property
+    def ratings(self):
+        """Baholar gistogrammasi (MenuItemRating) yoki hali baho bo‘lmasa None."""
+        try:
+            return self.rating_histogram
+        except ObjectDoesNotExist:
+            return None
+
+    def reduce_stock(self, quantity, kind='reservation', description=''):
+        """Zaxira miqdorini inventar jurnali orqali kamaytiradi va mavjudlikni yangilaydi."""
+        with InventoryLedger() as ledger:
+            return ledger.change(self, -quantity, kind, description or f"{quantity} dona savat uchun band qilindi")
 
 
 class Staff(BaseModel):
@@ -492,14 +600,21 @@ class Cart(BaseModel):
                 name='unique_cart_per_user_restaurant_table'
             )
         ]
+        indexes = [
+            # Tashlab ketilgan savatlarni qidirish uchun (carts.sweep_abandoned_carts)
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user_profile} uchun savat, {self.restaurant.name} (Stol {self.table.table_number if self.table else 'Stol yo‘q'})"
 
     @property
     def total_price(self):
-        """Savatdagi barcha elementlarning umumiy narxini hisoblaydi."""
-        return sum(item.quantity * item.menu_item.effective_price for item in self.items.all())
+        """Savatdagi barcha elementlarning umumiy narxini bitta agregat so‘rov bilan hisoblaydi."""
+        return self.items.aggregate(total=models.Sum(
+            models.F('quantity') * models.F('menu_item__current_price'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ))['total'] or 0
 
 
 class CartItem(BaseModel):
@@ -535,6 +650,14 @@ class CartItem(BaseModel):
         return f"{self.quantity}x {self.menu_item.name} savatda"
 
 
+class InvalidStatusTransition(ValueError):
+    """Buyurtma holatini jadvalda ruxsat etilmagan holatga o‘tkazishga urinilganda."""
+
+
+class StaleOrderError(Exception):
+    """Buyurtma boshqa so‘rov tomonidan allaqachon o‘zgartirilganda (versiya mos kelmaydi)."""
+
+
 class Order(BaseModel):
     """Mijoz buyurtmalari uchun model."""
     STATUS_CHOICES = [
@@ -545,6 +668,15 @@ class Order(BaseModel):
         ('served', _('Yetkazildi')),
         ('cancelled', _('Bekor qilindi')),
     ]
+    # Har bir holatdan ruxsat etilgan keyingi holatlar
+    TRANSITIONS = {
+        'pending': ('accepted', 'cancelled'),
+        'accepted': ('preparing', 'cancelled'),
+        'preparing': ('ready', 'cancelled'),
+        'ready': ('served',),
+        'served': (),
+        'cancelled': (),
+    }
 
     restaurant = models.ForeignKey(
         Restaurant,
@@ -615,6 +747,15 @@ class Order(BaseModel):
         related_name="assigned_orders",
         verbose_name=_("Tayinlangan ofitsiant")
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Versiya"),
+        help_text=_("Har bir holat o‘zgarishida oshiriladi (optimistik bloklash)")
+    )
+    status_changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Holat o‘zgargan vaqt")
+    )
 
     class Meta:
         verbose_name = _("Buyurtma")
@@ -631,11 +772,19 @@ class Order(BaseModel):
         return f"Buyurtma #{self.id} - {self.restaurant.name} (Stol {self.table.table_number if self.table else 'Stol yo‘q'})"
 
     def calculate_estimated_delivery(self):
-        """Tayyorlash vaqtiga asoslangan taxminiy yetkazib berish vaqtini hisoblaydi."""
-        max_preparation_time = self.items.aggregate(
-            max_time=models.Max('menu_item__preparation_time')
-        )['max_time'] or 15
-        self.estimated_delivery_time = self.created_at + timezone.timedelta(minutes=max_preparation_time)
+        """
+        Taxminiy yetkazib berish vaqtini hisoblaydi.
+
+        Tarixiy holat o‘tishlaridan o‘rganilgan koeffitsiyentlar (PrepTimeModel)
+        va oshxonadagi joriy navbat uzunligi hisobga olinadi.
+        """
+        static_times = dict(self.items.values_list('menu_item_id', 'menu_item__preparation_time'))
+        queue_depth = Order.objects.filter(
+            restaurant_id=self.restaurant_id,
+            status__in=['accepted', 'preparing'],
+        ).count()
+        minutes = PrepTimeModel.estimate(self.restaurant_id, static_times, queue_depth)
+        self.estimated_delivery_time = self.created_at + timezone.timedelta(minutes=minutes)
         self.save(update_fields=['estimated_delivery_time'])
 
     def apply_discount(self, discount_percentage):
@@ -645,15 +794,179 @@ class Order(BaseModel):
             self.total_price -= self.discount_amount
             self.save(update_fields=['total_price', 'discount_amount'])
 
-    def update_status(self, new_status, waiter=None):
-        """Buyurtma holatini yangilaydi va agar berilgan bo‘lsa, ofitsiantni tayinlaydi."""
-        if new_status in dict(self.STATUS_CHOICES):
-            self.status = new_status
-            if waiter:
-                self.assigned_waiter = waiter
-            self.save(update_fields=['status', 'assigned_waiter'])
-            # Real vaqtda yangilash uchun (Django Channels orqali)
-            # Bu views.py da qo‘shimcha amalga oshirishni talab qiladi
+    def save(self, *args, **kwargs):
+        """Yangi buyurtma uchun boshlang‘ich holatni o‘tishlar jurnaliga yozadi."""
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            OrderStatusTransition.objects.create(
+                order=self,
+                restaurant_id=self.restaurant_id,
+                to_status=self.status,
+                created_at=self.status_changed_at,
+            )
+
+    def record_event(self, event_type, created_at=None, **payload):
+        """Buyurtma hodisasini outbox ga yozadi; chaqiruvchi o‘zgarish bilan bitta tranzaksiyada chaqiradi."""
+        return OrderEvent.objects.create(
+            order_id=self.pk,
+            restaurant_id=self.restaurant_id,
+            event_type=event_type,
+            payload=payload,
+            created_at=created_at or timezone.now(),
+        )
+
+    def can_transition_to(self, new_status):
+        """Joriy holatdan `new_status` ga o‘tish ruxsat etilganini tekshiradi."""
+        return new_status in self.TRANSITIONS.get(self.status, ())
+
+    def update_status(self, new_status, waiter=None, expected_version=None):
+        """
+        Buyurtma holatini o‘tishlar jadvali bo‘yicha yangilaydi.
+
+        Yangilash `UPDATE ... WHERE version=?` sharti bilan bajariladi: agar
+        buyurtma shu orada boshqa so‘rov tomonidan o‘zgartirilgan bo‘lsa,
+        StaleOrderError ko‘tariladi. Ruxsat etilmagan o‘tish uchun
+        InvalidStatusTransition ko‘tariladi.
+        """
+        if expected_version is not None and expected_version != self.version:
+            raise StaleOrderError(f"Buyurtma #{self.id} versiyasi {self.version}, {expected_version} kutilgan")
+        if not self.can_transition_to(new_status):
+            raise InvalidStatusTransition(f"{self.status} -> {new_status} o‘tishi ruxsat etilmagan")
+        now = timezone.now()
+        changes = {
+            'status': new_status,
+            'version': models.F('version') + 1,
+            'status_changed_at': now,
+            'updated_at': now,
+        }
+        if waiter:
+            changes['assigned_waiter'] = waiter
+        # Holat, o‘tishlar jurnali va outbox hodisasi birga yoziladi
+        with transaction.atomic():
+            updated = Order.objects.filter(pk=self.pk, version=self.version).update(**changes)
+            if not updated:
+                raise StaleOrderError(f"Buyurtma #{self.id} boshqa so‘rov tomonidan o‘zgartirildi")
+            OrderStatusTransition.objects.create(
+                order=self,
+                restaurant_id=self.restaurant_id,
+                from_status=self.status,
+                to_status=new_status,
+                changed_by=waiter,
+                duration=now - self.status_changed_at,
+                created_at=now,
+            )
+            self.record_event(
+                'status_changed',
+                created_at=now,
+                changed_by=waiter.user.username if waiter else '',
+                version=self.version + 1,
+                **{'from': self.status, 'to': new_status},
+            )
+        self.status = new_status
+        self.version += 1
+        self.status_changed_at = now
+        self.updated_at = now
+        if waiter:
+            self.assigned_waiter = waiter
+
+    @classmethod
+    def bulk_update_status(cls, restaurant_id, changes, waiter=None):
+        """
+        Bir nechta buyurtma holatini birga yangilaydi.
+
+        `changes` — (order_id, yangi holat, kutilgan versiya yoki None)
+        ro‘yxati. Har bir maqsad holat uchun bitta `UPDATE ... WHERE (id, version)
+        mos va holatdan o‘tish ruxsat etilgan` bajariladi; o‘tishlar jurnali va
+        outbox hodisalari bulk_create bilan yoziladi. Hodisalar umumiy `batch`
+        kaliti bilan belgilanadi: relay ular uchun guruhga bitta bildirishnoma
+        yuboradi. Natija: {order_id: {'result', 'status', 'version'}}, bu yerda
+        result — updated, invalid, conflict yoki not_found.
+        """
+        current = {
+            row['id']: row for row in cls.objects.filter(
+                restaurant_id=restaurant_id, pk__in=[order_id for order_id, _status, _version in changes]
+            ).values('id', 'status', 'version', 'status_changed_at')
+        }
+        results = {}
+        targets = {}
+        for order_id, new_status, expected_version in changes:
+            row = current.get(order_id)
+            if order_id in results:
+                # Takrorlangan ID: birinchi so‘rov hisoblanadi
+                continue
+            if row is None:
+                results[order_id] = {'result': 'not_found', 'status': None, 'version': None}
+            elif expected_version is not None and expected_version != row['version']:
+                results[order_id] = {'result': 'conflict', 'status': row['status'], 'version': row['version']}
+            elif new_status not in cls.TRANSITIONS.get(row['status'], ()):
+                results[order_id] = {'result': 'invalid', 'status': row['status'], 'version': row['version']}
+            else:
+                results[order_id] = None
+                targets.setdefault(new_status, []).append(row)
+
+        now = timezone.now()
+        batch = uuid.uuid4().hex
+        transitions = []
+        events = []
+        with transaction.atomic():
+            for new_status, rows in targets.items():
+                fields = {
+                    'status': new_status,
+                    'version': models.F('version') + 1,
+                    'status_changed_at': now,
+                    'updated_at': now,
+                }
+                if waiter:
+                    fields['assigned_waiter'] = waiter
+                matches = models.Q()
+                for row in rows:
+                    matches |= models.Q(pk=row['id'], version=row['version'])
+                allowed_from = [status for status, allowed in cls.TRANSITIONS.items() if new_status in allowed]
+                updated = cls.objects.filter(matches, status__in=allowed_from).update(**fields)
+                if updated != len(rows):
+                    # O‘qish va UPDATE orasida boshqa so‘rov o‘zgartirgan qatorlar. Biz yangilaganlar
+                    # tranzaksiya oxirigacha qulflangan va aynan shu `now` vaqt belgisini olgan
+                    after = {
+                        order_id: (status, version, changed_at) for order_id, status, version, changed_at in
+                        cls.objects.filter(pk__in=[row['id'] for row in rows])
+                        .values_list('id', 'status', 'version', 'status_changed_at')
+                    }
+                    stale = [
+                        row for row in rows
+                        if after.get(row['id'], (None, None, None))[1:] != (row['version'] + 1, now)
+                    ]
+                    for row in stale:
+                        status, version, _changed_at = after.get(row['id'], (None, None, None))
+                        results[row['id']] = {'result': 'conflict', 'status': status, 'version': version}
+                    rows = [row for row in rows if row not in stale]
+                for row in rows:
+                    results[row['id']] = {'result': 'updated', 'status': new_status, 'version': row['version'] + 1}
+                    transitions.append(OrderStatusTransition(
+                        order_id=row['id'],
+                        restaurant_id=restaurant_id,
+                        from_status=row['status'],
+                        to_status=new_status,
+                        changed_by=waiter,
+                        duration=now - row['status_changed_at'],
+                        created_at=now,
+                    ))
+                    events.append(OrderEvent(
+                        order_id=row['id'],
+                        restaurant_id=restaurant_id,
+                        event_type='status_changed',
+                        payload={
+                            'from': row['status'],
+                            'to': new_status,
+                            'changed_by': waiter.user.username if waiter else '',
+                            'version': row['version'] + 1,
+                            'batch': batch,
+                        },
+                        created_at=now,
+                    ))
+            OrderStatusTransition.objects.bulk_create(transitions)
+            OrderEvent.objects.bulk_create(events)
+        return results
 
 
 class OrderItem(BaseModel):
@@ -694,6 +1007,165 @@ class OrderItem(BaseModel):
         return f"{self.quantity}x {self.menu_item.name if self.menu_item else 'O‘chirilgan element'} (Buyurtma #{self.order.id})"
 
 
+class OrderStatusTransition(models.Model):
+    """Buyurtma holati o‘tishlarining faqat qo‘shiladigan jurnali."""
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="status_transitions",
+        verbose_name=_("Buyurtma")
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="order_status_transitions",
+        verbose_name=_("Restoran")
+    )
+    from_status = models.CharField(
+        max_length=20,
+        blank=True,
+        choices=Order.STATUS_CHOICES,
+        verbose_name=_("Oldingi holat")
+    )
+    to_status = models.CharField(
+        max_length=20,
+        choices=Order.STATUS_CHOICES,
+        verbose_name=_("Yangi holat")
+    )
+    changed_by = models.ForeignKey(
+        Staff,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="order_status_transitions",
+        verbose_name=_("O‘zgartirgan xodim")
+    )
+    duration = models.DurationField(
+        null=True,
+        blank=True,
+        verbose_name=_("Oldingi holatda o‘tgan vaqt")
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name=_("Vaqt")
+    )
+
+    class Meta:
+        verbose_name = _("Buyurtma holati o‘tishi")
+        verbose_name_plural = _("Buyurtma holati o‘tishlari")
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+            models.Index(fields=['restaurant', 'from_status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Buyurtma #{self.order_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class OrderEvent(models.Model):
+    """
+    Buyurtma hodisalari uchun tranzaksion outbox.
+
+    Order/OrderItem o‘zgarishi bilan bitta tranzaksiyada yoziladi; qo‘shimcha
+    ishlarni (bildirishnomalar, sadoqat ballari, statistika) app.outbox releyi
+    id tartibida, har bir ishlovchi uchun alohida siljish bilan bajaradi.
+    Buyurtma arxivlanganda ham jurnal saqlanishi uchun tashqi kalitlarsiz.
+    """
+    EVENT_CHOICES = [
+        ('placed', _('Buyurtma berildi')),
+        ('status_changed', _('Holat o‘zgardi')),
+    ]
+
+    order_id = models.PositiveBigIntegerField(
+        db_index=True,
+        verbose_name=_("Buyurtma ID")
+    )
+    restaurant_id = models.PositiveBigIntegerField(
+        verbose_name=_("Restoran ID")
+    )
+    event_type = models.CharField(
+        max_length=20,
+        choices=EVENT_CHOICES,
+        verbose_name=_("Hodisa turi")
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Ma’lumotlar")
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Vaqt")
+    )
+
+    class Meta:
+        verbose_name = _("Buyurtma hodisasi")
+        verbose_name_plural = _("Buyurtma hodisalari")
+        ordering = ['id']
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type} (Buyurtma #{self.order_id})"
+
+
+class OutboxOffset(models.Model):
+    """Outbox ishlovchisi qayerga qadar hodisalarni qayta ishlagani va uning ko‘rsatkichlari."""
+    handler = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name=_("Ishlovchi")
+    )
+    last_event_id = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name=_("Oxirgi hodisa ID")
+    )
+    processed = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name=_("Qayta ishlangan hodisalar")
+    )
+    last_batch_size = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Oxirgi paket hajmi")
+    )
+    last_batch_seconds = models.FloatField(
+        default=0,
+        verbose_name=_("Oxirgi paket vaqti, s")
+    )
+    lease_token = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name=_("Ijara tokeni")
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Ijara tugash vaqti")
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_("Oxirgi xato")
+    )
+    gap_since = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Bo‘shliq kuzatilgan vaqt"),
+        help_text=_("Siljishdan keyingi yetishmayotgan hodisa ID birinchi marta ko‘rilgan vaqt")
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Yangilangan vaqt")
+    )
+
+    class Meta:
+        verbose_name = _("Outbox siljishi")
+        verbose_name_plural = _("Outbox siljishlari")
+        ordering = ['handler']
+
+    def __str__(self):
+        return f"{self.handler}: #{self.last_event_id}"
+
+
 class Review(BaseModel):
     """Buyurtmalar uchun mijoz sharhlari modeli."""
     order = models.ForeignKey(
@@ -777,6 +1249,14 @@ class LoyaltyTransaction(BaseModel):
 
 class InventoryTransaction(BaseModel):
     """Menyu elementlari zaxirasini kuzatish uchun model."""
+    KIND_CHOICES = [
+        ('reservation', _('Savatga band qilish')),
+        ('release', _('Savatdan qaytarish')),
+        ('order', _('Buyurtma')),
+        ('restock', _('To‘ldirish')),
+        ('adjustment', _('Tuzatish')),
+    ]
+
     menu_item = models.ForeignKey(
         MenuItem,
         on_delete=models.CASCADE,
@@ -787,6 +1267,12 @@ class InventoryTransaction(BaseModel):
         verbose_name=_("Miqdor"),
         help_text=_("Zaxirani to‘ldirish uchun musbat, sarf qilish uchun manfiy")
     )
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        default='adjustment',
+        verbose_name=_("Turi")
+    )
     description = models.CharField(
         max_length=200,
         verbose_name=_("Tavsif"),
@@ -797,11 +1283,203 @@ class InventoryTransaction(BaseModel):
         verbose_name = _("Inventar operatsiyasi")
         verbose_name_plural = _("Inventar operatsiyalari")
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['menu_item', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.quantity} dona {self.menu_item.name} uchun - {self.description}"
 
 
+class InventoryLedger:
+    """
+    Zaxiraning har qanday o‘zgarishi uchun yagona API.
+
+    `MenuItem.stock_quantity` shartli `F()` yangilanishi bilan o‘zgartiriladi,
+    jurnal yozuvlari esa buferlanib, blokdan chiqishda bitta `bulk_create`
+    bilan qo‘shiladi. Hammasi bitta tranzaksiya ichida bajariladi:
+
+        with InventoryLedger() as ledger:
+            ledger.change(menu_item, 50, 'restock', "50 dona to‘ldirildi")
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.restaurant_ids = set()
+        self._atomic = transaction.atomic()
+
+    def __enter__(self):
+        self._atomic.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            try:
+                self.flush()
+            except BaseException as exc:
+                self._atomic.__exit__(type(exc), exc, exc.__traceback__)
+                raise
+        return self._atomic.__exit__(exc_type, exc_value, tb)
+
+    def change(self, menu_item, quantity, kind, description=''):
+        """
+        Zaxirani `quantity` ga o‘zgartiradi (manfiy — sarf).
+
+        Zaxira yetarli bo‘lmasa hech narsa o‘zgarmaydi va False qaytariladi.
+        """
+        if quantity == 0:
+            return True
+        items = MenuItem.objects.filter(pk=menu_item.pk)
+        now = timezone.now()
+        # Odatiy holat: element sotuvda qoladi, mavjudlik o‘zgarmaydi — kontent versiyasi yangilanmaydi
+        updated = items.filter(is_available=True, stock_quantity__gt=max(-quantity, 0)).update(
+            stock_quantity=models.F('stock_quantity') + quantity,
+            updated_at=now,
+        )
+        if not updated:
+            if quantity < 0:
+                items = items.filter(stock_quantity__gte=-quantity)
+            updated = items.update(
+                stock_quantity=models.F('stock_quantity') + quantity,
+                # UPDATE ichida o‘ng tomon eski qiymatni ko‘radi: eski > -quantity <=> yangi > 0
+                is_available=models.Case(
+                    models.When(stock_quantity__gt=-quantity, then=models.Value(True)),
+                    default=models.Value(False),
+                ),
+                updated_at=now,
+            )
+            if not updated:
+                return False
+            # Mavjudlik o‘zgargan bo‘lishi mumkin: menyu sahifasi va hujjati qayta quriladi
+            self.restaurant_ids.add(menu_item.restaurant_id)
+        menu_item.stock_quantity += quantity
+        menu_item.is_available = menu_item.stock_quantity > 0
+        self.entries.append(InventoryTransaction(
+            menu_item=menu_item,
+            quantity=quantity,
+            kind=kind,
+            description=description[:200],
+        ))
+        return True
+
+    def set_quantity(self, menu_item, quantity, kind='adjustment', description=''):
+        """
+        Zaxirani `quantity` ga tenglashtiradi (admin yoki menyu formasidagi tahrir).
+
+        Joriy qiymat qulf bilan o‘qiladi, farq esa oddiy `change` sifatida jurnalga yoziladi.
+        """
+        current = MenuItem.objects.select_for_update().values_list('stock_quantity', flat=True).get(pk=menu_item.pk)
+        menu_item.stock_quantity = current
+        return self.change(menu_item, quantity - current, kind, description)
+
+    def change_many(self, quantities, kind, description=''):
+        """
+        {menu_item_id: miqdor} bo‘yicha to‘plamli o‘zgarish (masalan, savatdan qaytarish).
+
+        Bir xil miqdorli elementlar bitta UPDATE bilan yangilanadi. Faqat
+        zaxirani oshirish uchun mo‘ljallangan.
+        """
+        by_quantity = {}
+        for menu_item_id, quantity in quantities.items():
+            if quantity > 0:
+                by_quantity.setdefault(quantity, []).append(menu_item_id)
+        now = timezone.now()
+        # Faqat sotuvga qaytadigan elementlar restoranlarining kontent versiyasi yangilanadi
+        self.restaurant_ids.update(
+            MenuItem.objects.filter(pk__in=[pk for ids in by_quantity.values() for pk in ids], is_available=False)
+            .values_list('restaurant_id', flat=True).distinct()
+        )
+        for quantity, ids in by_quantity.items():
+            MenuItem.objects.filter(pk__in=ids).update(
+                stock_quantity=models.F('stock_quantity') + quantity,
+                is_available=True,
+                updated_at=now,
+            )
+            self.entries.extend(
+                InventoryTransaction(menu_item_id=pk, quantity=quantity, kind=kind, description=description[:200])
+                for pk in ids
+            )
+
+    def flush(self):
+        """Buferdagi jurnal yozuvlarini bitta INSERT bilan saqlaydi."""
+        if self.entries:
+            InventoryTransaction.objects.bulk_create(self.entries, batch_size=500)
+            self.entries = []
+        # Jonli zaxira versiyalangan sahifa/hujjatga kirmaydi (u savat deltasida beriladi);
+        # versiya faqat mavjudlik o‘zgargan restoranlar uchun commit dan keyin yangilanadi
+        versions.bump(self.restaurant_ids)
+        self.restaurant_ids = set()
+
+
+class InventorySnapshot(models.Model):
+    """Menyu elementi zaxirasining ma’lum vaqtdagi qoldig‘i."""
+    menu_item = models.ForeignKey(
+        MenuItem,
+        on_delete=models.CASCADE,
+        related_name="inventory_snapshots",
+        verbose_name=_("Menyu elementi")
+    )
+    balance = models.IntegerField(
+        verbose_name=_("Qoldiq")
+    )
+    taken_at = models.DateTimeField(
+        verbose_name=_("Vaqt"),
+        help_text=_("Qoldiq shu vaqtgacha bo‘lgan barcha operatsiyalarni o‘z ichiga oladi")
+    )
+
+    class Meta:
+        verbose_name = _("Inventar qoldig‘i")
+        verbose_name_plural = _("Inventar qoldiqlari")
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['menu_item', 'taken_at']),
+            models.Index(fields=['taken_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item_id}: {self.balance} ({self.taken_at:%Y-%m-%d %H:%M})"
+
+
+class InventoryDailySummary(models.Model):
+    """Siqilgan eski inventar operatsiyalarining kunlik yig‘indisi."""
+    menu_item = models.ForeignKey(
+        MenuItem,
+        on_delete=models.CASCADE,
+        related_name="inventory_daily_summaries",
+        verbose_name=_("Menyu elementi")
+    )
+    day = models.DateField(
+        verbose_name=_("Kun")
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=InventoryTransaction.KIND_CHOICES,
+        verbose_name=_("Turi")
+    )
+    quantity = models.IntegerField(
+        verbose_name=_("Miqdor")
+    )
+    transaction_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Operatsiyalar soni")
+    )
+
+    class Meta:
+        verbose_name = _("Kunlik inventar yig‘indisi")
+        verbose_name_plural = _("Kunlik inventar yig‘indilari")
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['menu_item', 'day', 'kind'],
+                name='unique_inventory_summary_per_day'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item_id} {self.day}: {self.quantity} ({self.kind})"
+
+
 class AdminDashboard(BaseModel):
     """Admin paneli statistikasi uchun model."""
     total_restaurants = models.PositiveIntegerField(
@@ -834,10 +1512,595 @@ class AdminDashboard(BaseModel):
         """Admin paneli statistikasini yangilaydi."""
         self.total_restaurants = Restaurant.objects.count()
         self.total_users = UserProfile.objects.count()
-        self.total_orders = Order.objects.count()
-        self.total_revenue = Order.objects.filter(status='served').aggregate(
+        archived = ArchiveRollup.objects.aggregate(
+            orders=models.Sum('order_count'), revenue=models.Sum('served_revenue')
+        )
+        self.total_orders = Order.objects.count() + (archived['orders'] or 0)
+        self.total_revenue = (Order.objects.filter(status='served').aggregate(
             total=models.Sum('total_price')
-        )['total'] or 0
+        )['total'] or 0) + (archived['revenue'] or 0)
         self.save()
 
-        
\ No newline at end of file
+        
+
+class BackgroundJob(BaseModel):
+    """Keyinga qoldirilgan ishlar uchun bazadagi navbat elementi."""
+    STATUS_CHOICES = [
+        ('queued', _('Navbatda')),
+        ('running', _('Bajarilmoqda')),
+        ('failed', _('Muvaffaqiyatsiz')),
+    ]
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name=_("Vazifa nomi"),
+        help_text=_("app.jobs reyestridagi ro‘yxatdan o‘tgan vazifa nomi")
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Parametrlar")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name=_("Holat")
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Bajarish vaqti"),
+        help_text=_("Vazifa shu vaqtdan keyin olinishi mumkin")
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Urinishlar")
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=5,
+        verbose_name=_("Maksimal urinishlar")
+    )
+    lease_token = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        verbose_name=_("Ijara tokeni"),
+        help_text=_("Vazifani olgan ishchining token qiymati")
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Ijara tugash vaqti")
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name=_("Oxirgi xato")
+    )
+
+    class Meta:
+        verbose_name = _("Fon vazifasi")
+        verbose_name_plural = _("Fon vazifalari")
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+class PrepTimeModel(BaseModel):
+    """Restoran uchun tarixiy ma’lumotlardan o‘rganilgan tayyorlash vaqti koeffitsiyentlari."""
+    restaurant = models.OneToOneField(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="prep_time_model",
+        verbose_name=_("Restoran")
+    )
+    base_minutes = models.FloatField(
+        default=15.0,
+        verbose_name=_("Asosiy vaqt (daqiqa)"),
+        help_text=_("Bo‘sh oshxonada buyurtmaning o‘rtacha tayyorlanish vaqti")
+    )
+    load_minutes = models.FloatField(
+        default=0.0,
+        verbose_name=_("Navbat koeffitsiyenti (daqiqa)"),
+        help_text=_("Navbatdagi har bir buyurtma uchun qo‘shimcha daqiqalar")
+    )
+    item_minutes = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Elementlar vaqti"),
+        help_text=_("Menyu elementi ID -> o‘rganilgan tayyorlash vaqti (daqiqa)")
+    )
+    sample_size = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Namuna hajmi")
+    )
+
+    class Meta:
+        verbose_name = _("Tayyorlash vaqti modeli")
+        verbose_name_plural = _("Tayyorlash vaqti modellari")
+
+    def __str__(self):
+        return f"{self.restaurant} tayyorlash vaqti modeli"
+
+    @classmethod
+    def coefficients(cls, restaurant_id):
+        """Koeffitsiyentlarni keshdan yoki bazadan (bir marta) oladi."""
+        def load():
+            model = cls.objects.filter(restaurant_id=restaurant_id).first()
+            return (
+                (model.base_minutes, model.load_minutes, {int(k): v for k, v in model.item_minutes.items()})
+                if model else False
+            )
+        return caching.prep_times.get_or_set(restaurant_id, 'coefficients', load)
+
+    @classmethod
+    def estimate(cls, restaurant_id, static_times, queue_depth):
+        """
+        Buyurtma tayyorlanish vaqtini daqiqalarda bashorat qiladi.
+
+        `static_times` — {menu_item_id: egasi kiritgan preparation_time}. Model
+        hali o‘qitilmagan bo‘lsa, eng uzun statik vaqt qaytariladi.
+        """
+        fallback = max((t for t in static_times.values() if t), default=15)
+        coefficients = cls.coefficients(restaurant_id)
+        if not coefficients:
+            return fallback
+        base_minutes, load_minutes, item_minutes = coefficients
+        learned = max((item_minutes.get(item_id, base_minutes) for item_id in static_times), default=base_minutes)
+        return max(1.0, learned + load_minutes * queue_depth)
+
+
+class RestockSuggestion(BaseModel):
+    """Talab prognozi asosida oldindan hisoblangan zaxira to‘ldirish tavsiyasi."""
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="restock_suggestions",
+        verbose_name=_("Restoran")
+    )
+    menu_item = models.OneToOneField(
+        MenuItem,
+        on_delete=models.CASCADE,
+        related_name="restock_suggestion",
+        verbose_name=_("Menyu elementi")
+    )
+    daily_demand = models.FloatField(
+        default=0.0,
+        verbose_name=_("Kunlik talab"),
+        help_text=_("Keyingi kunlar uchun prognoz qilingan o‘rtacha kunlik talab")
+    )
+    projected_stockout_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Taxminiy tugash vaqti"),
+        help_text=_("Joriy zaxira prognoz bo‘yicha tugaydigan vaqt")
+    )
+    suggested_quantity = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Tavsiya etilgan miqdor")
+    )
+
+    class Meta:
+        verbose_name = _("Zaxira tavsiyasi")
+        verbose_name_plural = _("Zaxira tavsiyalari")
+        ordering = ['projected_stockout_at']
+        indexes = [
+            models.Index(fields=['restaurant', 'projected_stockout_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item.name}: {self.suggested_quantity} dona to‘ldirish"
+
+
+class ArchivedOrder(models.Model):
+    """Arxivlangan (yakunlangan va eski) buyurtma; asosiy Order jadvalini kichik saqlash uchun."""
+    STATUS_CHOICES = Order.STATUS_CHOICES
+
+    id = models.BigIntegerField(primary_key=True)
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="archived_orders",
+        verbose_name=_("Restoran")
+    )
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_orders",
+        verbose_name=_("Foydalanuvchi profili")
+    )
+    table = models.ForeignKey(
+        Table,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_orders",
+        verbose_name=_("Stol")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        verbose_name=_("Holat")
+    )
+    total_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name=_("Umumiy narx")
+    )
+    discount_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Chegirma summasi")
+    )
+    payment_method = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name=_("To‘lov usuli")
+    )
+    notes = models.TextField(
+        blank=True,
+        verbose_name=_("Eslatmalar")
+    )
+    assigned_waiter = models.ForeignKey(
+        Staff,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="archived_orders",
+        verbose_name=_("Tayinlangan ofitsiant")
+    )
+    created_at = models.DateTimeField(verbose_name=_("Yaratilgan vaqt"))
+    updated_at = models.DateTimeField(verbose_name=_("Yangilangan vaqt"))
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Arxivlangan vaqt")
+    )
+
+    class Meta:
+        verbose_name = _("Arxivlangan buyurtma")
+        verbose_name_plural = _("Arxivlangan buyurtmalar")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_profile', 'created_at']),
+            models.Index(fields=['restaurant', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Arxiv buyurtma #{self.id} - {self.restaurant.name}"
+
+
+class ArchivedOrderItem(models.Model):
+    """Arxivlangan buyurtma elementi."""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name="items",
+        verbose_name=_("Buyurtma")
+    )
+    menu_item = models.ForeignKey(
+        MenuItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="archived_order_items",
+        verbose_name=_("Menyu elementi")
+    )
+    quantity = models.PositiveIntegerField(verbose_name=_("Miqdor"))
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name=_("Narx")
+    )
+    created_at = models.DateTimeField(verbose_name=_("Yaratilgan vaqt"))
+
+    class Meta:
+        verbose_name = _("Arxivlangan buyurtma elementi")
+        verbose_name_plural = _("Arxivlangan buyurtma elementlari")
+
+    def __str__(self):
+        return f"{self.quantity}x {self.menu_item.name if self.menu_item else 'O‘chirilgan element'} (Arxiv #{self.order_id})"
+
+
+class ArchivedReview(models.Model):
+    """Arxivlangan buyurtmaga yozilgan sharh."""
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        related_name="reviews",
+        verbose_name=_("Buyurtma")
+    )
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="archived_reviews",
+        verbose_name=_("Foydalanuvchi profili")
+    )
+    rating = models.IntegerField(verbose_name=_("Baho"))
+    comment = models.TextField(blank=True, verbose_name=_("Izoh"))
+    created_at = models.DateTimeField(verbose_name=_("Yaratilgan vaqt"))
+
+    class Meta:
+        verbose_name = _("Arxivlangan sharh")
+        verbose_name_plural = _("Arxivlangan sharhlar")
+
+    def __str__(self):
+        return f"Arxiv buyurtma #{self.order_id} uchun sharh - {self.rating}/5"
+
+
+class ArchiveRollup(BaseModel):
+    """Restoranning arxivlangan buyurtmalari bo‘yicha yig‘ma ko‘rsatkichlar."""
+    restaurant = models.OneToOneField(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="archive_rollup",
+        verbose_name=_("Restoran")
+    )
+    order_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Buyurtmalar soni")
+    )
+    served_revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Yetkazilgan buyurtmalar daromadi")
+    )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Baholar yig‘indisi")
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Baholar soni")
+    )
+
+    class Meta:
+        verbose_name = _("Arxiv yig‘masi")
+        verbose_name_plural = _("Arxiv yig‘malari")
+
+    def __str__(self):
+        return f"{self.restaurant} arxivi: {self.order_count} ta buyurtma"
+
+
+class DailyReport(BaseModel):
+    """Restoranning kun yakunidagi savdo hisoboti (manage.py daily_reports tomonidan yaratiladi)."""
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="daily_reports",
+        verbose_name=_("Restoran")
+    )
+    day = models.DateField(
+        verbose_name=_("Kun")
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Ko‘rsatkichlar"),
+        help_text=_("Soatlik daromad, top elementlar, to‘lov usullari, o‘rtacha chek, bekor qilinganlar")
+    )
+    csv_file = models.FileField(
+        upload_to="reports/%Y/%m/",
+        blank=True,
+        verbose_name=_("CSV fayl")
+    )
+    html_file = models.FileField(
+        upload_to="reports/%Y/%m/",
+        blank=True,
+        verbose_name=_("HTML fayl")
+    )
+
+    class Meta:
+        verbose_name = _("Kunlik hisobot")
+        verbose_name_plural = _("Kunlik hisobotlar")
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'day'],
+                name='unique_daily_report_per_day'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant} - {self.day}"
+
+
+class MenuItemNeighbors(models.Model):
+    """Element bilan ko‘pincha birga buyurtma qilinadigan top-k elementlar (app.recommendations)."""
+    menu_item = models.OneToOneField(
+        MenuItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="neighbors",
+        verbose_name=_("Menyu elementi")
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="item_neighbors",
+        verbose_name=_("Restoran")
+    )
+    neighbors = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name=_("Qo‘shnilar"),
+        help_text=_("[[menu_item_id, ball], ...] ball kamayishi tartibida")
+    )
+    support = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Buyurtmalar soni"),
+        help_text=_("Element qatnashgan buyurtmalar soni")
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Yangilangan vaqt")
+    )
+
+    class Meta:
+        verbose_name = _("Birga buyurtma qilinadigan elementlar")
+        verbose_name_plural = _("Birga buyurtma qilinadigan elementlar")
+
+    def __str__(self):
+        return f"{self.menu_item_id}: {len(self.neighbors)} ta qo‘shni"
+
+
+class MenuItemRating(models.Model):
+    """
+    Menyu elementi baholari gistogrammasi.
+
+    Sharh yozilganda buyurtmadagi har bir element uchun app.item_ratings
+    tomonidan oshiriladi; o‘qishda Review/Order/OrderItem birlashtirilmaydi.
+    """
+    menu_item = models.OneToOneField(
+        MenuItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_histogram",
+        verbose_name=_("Menyu elementi")
+    )
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="item_ratings",
+        verbose_name=_("Restoran")
+    )
+    stars_1 = models.PositiveIntegerField(default=0, verbose_name=_("1 yulduz"))
+    stars_2 = models.PositiveIntegerField(default=0, verbose_name=_("2 yulduz"))
+    stars_3 = models.PositiveIntegerField(default=0, verbose_name=_("3 yulduz"))
+    stars_4 = models.PositiveIntegerField(default=0, verbose_name=_("4 yulduz"))
+    stars_5 = models.PositiveIntegerField(default=0, verbose_name=_("5 yulduz"))
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Baholar soni")
+    )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Baholar yig‘indisi")
+    )
+    average = models.GeneratedField(
+        expression=models.Case(
+            models.When(rating_count=0, then=models.Value(0.0)),
+            default=Cast('rating_sum', models.FloatField()) / models.F('rating_count'),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+        verbose_name=_("O‘rtacha baho")
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Yangilangan vaqt")
+    )
+
+    HISTOGRAM_FIELDS = ('stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5', 'rating_count', 'rating_sum', 'average')
+
+    class Meta:
+        verbose_name = _("Element baholari")
+        verbose_name_plural = _("Element baholari")
+        indexes = [
+            # Egasi panelida eng past/yuqori baholi elementlar bo‘yicha saralash
+            models.Index(fields=['restaurant', 'average']),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item_id}: {self.rating_count} ta baho"
+
+    @property
+    def histogram(self):
+        """[(yulduz, soni, ulushi %), ...] 5 dan 1 gacha — shablonlar uchun."""
+        total = self.rating_count or 1
+        return [
+            (star, count, round(count * 100 / total))
+            for star, count in ((star, getattr(self, f'stars_{star}')) for star in range(5, 0, -1))
+        ]
+
+
+class Reservation(BaseModel):
+    """Stolni oldindan band qilish (app.reservations orqali yaratiladi)."""
+    STATUS_CHOICES = [
+        ('confirmed', _('Tasdiqlangan')),
+        ('seated', _('O‘tirgan')),
+        ('completed', _('Yakunlangan')),
+        ('cancelled', _('Bekor qilingan')),
+        ('no_show', _('Kelmagan')),
+    ]
+    # Shu holatlardagi bandlar stolni egallaydi
+    BLOCKING_STATUSES = ('confirmed', 'seated')
+
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+        verbose_name=_("Restoran")
+    )
+    table = models.ForeignKey(
+        Table,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+        verbose_name=_("Stol")
+    )
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reservations",
+        verbose_name=_("Foydalanuvchi profili")
+    )
+    guest_name = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name=_("Mehmon ismi")
+    )
+    phone_number = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name=_("Telefon raqami")
+    )
+    party_size = models.PositiveIntegerField(
+        validators=[MinValueValidator(1)],
+        verbose_name=_("Mehmonlar soni")
+    )
+    starts_at = models.DateTimeField(
+        verbose_name=_("Boshlanish vaqti")
+    )
+    ends_at = models.DateTimeField(
+        verbose_name=_("Tugash vaqti")
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='confirmed',
+        verbose_name=_("Holat")
+    )
+    notes = models.TextField(
+        blank=True,
+        verbose_name=_("Izohlar")
+    )
+
+    class Meta:
+        verbose_name = _("Band qilish")
+        verbose_name_plural = _("Band qilishlar")
+        ordering = ['starts_at']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(ends_at__gt=models.F('starts_at')),
+                name='reservation_ends_after_start'
+            )
+        ]
+        indexes = [
+            # Bandlik tekshiruvi: stol bo‘yicha vaqt oralig‘i
+            models.Index(fields=['table', 'starts_at']),
+            # Kunlik bandlar indeksi va egasi ro‘yxati
+            models.Index(fields=['restaurant', 'starts_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.table} — {self.starts_at:%Y-%m-%d %H:%M}, {self.party_size} kishi"
@@ -0,0 +1,263 @@
+"""
+Buyurtma hodisalari (OrderEvent) outbox releyi.
+
+Ishlovchilar `@handler('nom')` bilan ro‘yxatdan o‘tadi va hodisalarni paket
+bilan oladi. Har bir ishlovchining siljishi OutboxOffset da saqlanadi: relay
+id tartibida keyingi paketni o‘qiydi, ishlovchini chaqiradi va siljishni
+faqat muvaffaqiyatdan keyin suradi. Yetkazish kamida bir marta: ishlovchilar
+takrorlanishga chidamli bo‘lishi kerak. Ishlovchi ijarasi jobs.dequeue
+dagidek shartli UPDATE bilan olinadi, shuning uchun bir nechta relay
+jarayoni bitta ishlovchini parallel bajarmaydi.
+
+PostgreSQL da kichikroq id kattaroq id dan keyin commit bo‘lishi mumkin:
+(last_event_id, max] oralig‘ida yetishmayotgan id (bo‘shliq) ko‘rilsa, paket
+shu joyda kesiladi va siljish bo‘shliq oldida ushlab turiladi. Hali commit
+bo‘lmagan hodisa ko‘rinishi bilan o‘qiladi. Bo‘shliq GAP_TIMEOUT_SECONDS dan
+uzoq tursa, u bekor qilingan tranzaksiya deb hisoblanadi (ketma-ketlik id si
+qaytarilmaydi) va ogohlantirish bilan o‘tkazib yuboriladi. `created_at` ga
+tayanilmaydi: u tranzaksiya boshida, commit dan ancha oldin qo‘yilishi mumkin.
+"""
+import asyncio
+import logging
+import threading
+import time
+import traceback
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+from .jobs import enqueue
+from .models import LoyaltyTransaction, Order, OrderEvent, OutboxOffset, UserProfile
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 500)
+GAP_TIMEOUT_SECONDS = getattr(settings, 'OUTBOX_GAP_TIMEOUT_SECONDS', 60)
+LEASE_SECONDS = 60
+
+STATUS_NAMES = dict(Order.STATUS_CHOICES)
+
+_handlers = {}
+
+
+def handler(name):
+    """Funksiyani hodisalar paketini qabul qiluvchi outbox ishlovchisi sifatida ro‘yxatdan o‘tkazadi."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def _claim(name, now, token):
+    OutboxOffset.objects.get_or_create(handler=name)
+    # Boshqa relay ushlab turgan (ijarasi tugamagan) ishlovchi o‘tkazib yuboriladi
+    return OutboxOffset.objects.filter(handler=name).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    ).update(lease_token=token, locked_until=now + timezone.timedelta(seconds=LEASE_SECONDS))
+
+
+def _until_gap(events, last_event_id, skip_first_gap=False):
+    """
+    `events` ning bo‘shliqsiz boshlang‘ich qismi va paket bo‘shliqda kesilganmi.
+    Siljish 0 bo‘lsa (ishlovchi hali ishlamagan) birinchi hodisagacha bo‘shliq hisoblanmaydi.
+    """
+    expected = last_event_id + 1
+    for position, event in enumerate(events):
+        if event.id != expected and (position or last_event_id):
+            if not skip_first_gap:
+                return events[:position], True
+            logger.warning("Outbox: #%s–#%s hodisalar commit bo‘lmadi, o‘tkazib yuborildi", expected, event.id - 1)
+            skip_first_gap = False
+        expected = event.id + 1
+    return events, False
+
+
+def relay_once(name, batch_size=BATCH_SIZE):
+    """Ishlovchi uchun bitta paketni bajaradi; qayta ishlangan hodisalar sonini qaytaradi."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    if not _claim(name, now, token):
+        return 0
+    last_event_id, gap_since = OutboxOffset.objects.values_list('last_event_id', 'gap_since').get(handler=name)
+    events = list(OrderEvent.objects.filter(id__gt=last_event_id).order_by('id')[:batch_size])
+    expired = gap_since is not None and now - gap_since >= timezone.timedelta(seconds=GAP_TIMEOUT_SECONDS)
+    events, held = _until_gap(events, last_event_id, skip_first_gap=expired)
+
+    changes = {'lease_token': '', 'locked_until': None, 'updated_at': timezone.now()}
+    started = time.perf_counter()
+    try:
+        if events:
+            _handlers[name](events)
+    except Exception:
+        changes['last_error'] = traceback.format_exc()
+        logger.warning("Outbox ishlovchisi %s #%s hodisadan boshlab muvaffaqiyatsiz", name, events[0].id)
+        events = []
+    else:
+        # Siljish surilgan bo‘lsa bo‘shliq yangi; aks holda birinchi ko‘rilgan vaqt saqlanadi
+        changes['gap_since'] = (now if events or expired else gap_since or now) if held else None
+        if events:
+            changes.update(
+                last_event_id=events[-1].id,
+                processed=F('processed') + len(events),
+                last_batch_size=len(events),
+                last_batch_seconds=time.perf_counter() - started,
+                last_error='',
+            )
+    OutboxOffset.objects.filter(handler=name, lease_token=token).update(**changes)
+    return len(events)
+
+
+def work(stop_event=None, batch_size=BATCH_SIZE, poll_interval=0.5, once=False, names=None):
+    """Ishlovchilarni navbat bilan bajaradi; hodisa qolmaguncha yoki to‘xtatilguncha."""
+    stop_event = stop_event or threading.Event()
+    names = names or sorted(_handlers)
+    processed = 0
+    try:
+        while not stop_event.is_set():
+            batch = sum(relay_once(name, batch_size) for name in names)
+            processed += batch
+            if batch:
+                continue
+            if once:
+                break
+            stop_event.wait(poll_interval)
+    finally:
+        connection.close()
+    return processed
+
+
+def metrics():
+    """
+    Har bir ishlovchi uchun: qayta ishlangan, kechikish (hodisa va soniya), oxirgi paket
+    tezligi va siljish bo‘shliq oldida qancha kutayotgani.
+    """
+    now = timezone.now()
+    latest = OrderEvent.objects.aggregate(latest=Max('id'))['latest'] or 0
+    offsets = {offset.handler: offset for offset in OutboxOffset.objects.filter(handler__in=_handlers)}
+    rows = []
+    for name in sorted(_handlers):
+        offset = offsets.get(name) or OutboxOffset(handler=name)
+        oldest = OrderEvent.objects.filter(id__gt=offset.last_event_id).values_list('created_at', flat=True).first()
+        rows.append({
+            'handler': name,
+            'last_event_id': offset.last_event_id,
+            'processed': offset.processed,
+            'lag_events': OrderEvent.objects.filter(id__gt=offset.last_event_id).count() if offset.last_event_id < latest else 0,
+            'lag_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+            'events_per_second': (
+                offset.last_batch_size / offset.last_batch_seconds if offset.last_batch_seconds else 0.0
+            ),
+            'gap_seconds': (now - offset.gap_since).total_seconds() if offset.gap_since else 0.0,
+            'failing': bool(offset.last_error),
+        })
+    return rows
+
+
+def prune(keep_days=7):
+    """Barcha ishlovchilar o‘tib bo‘lgan va `keep_days` kundan eski hodisalarni o‘chiradi."""
+    offsets = OutboxOffset.objects.filter(handler__in=_handlers)
+    if offsets.count() < len(_handlers):
+        # Hali bir marta ham ishlamagan ishlovchi bor: hech narsa o‘chirilmaydi
+        return 0
+    floor = offsets.aggregate(floor=Min('last_event_id'))['floor']
+    return OrderEvent.objects.filter(
+        id__lte=floor,
+        created_at__lt=timezone.now() - timezone.timedelta(days=keep_days),
+    ).delete()[0]
+
+
+def _notifications(event):
+    group = f'restaurant_{event.restaurant_id}'
+    if event.event_type == 'placed':
+        message = {'message': f"Yangi buyurtma #{event.order_id} qabul qilindi"}
+        return [(f'{group}_waiters', message), (f'{group}_owner', message)]
+    if event.event_type == 'status_changed':
+        status = STATUS_NAMES.get(event.payload['to'], event.payload['to'])
+        owner_message = f"Buyurtma #{event.order_id} holati: {status}"
+        if event.payload.get('changed_by'):
+            owner_message = (
+                f"Buyurtma #{event.order_id} holati {event.payload['changed_by']} tomonidan yangilandi: {status}"
+            )
+        return [
+            (f'{group}_customers', {'message': f"Buyurtma #{event.order_id} holati: {status}"}),
+            (f'{group}_owner', {'message': owner_message}),
+        ]
+    return []
+
+
+def _batch_notifications(restaurant_id, status, changed_by, order_ids):
+    """Order.bulk_update_status bilan birga o‘zgargan buyurtmalar uchun guruhga bitta xabar."""
+    group = f'restaurant_{restaurant_id}'
+    status = STATUS_NAMES.get(status, status)
+    numbers = ', '.join(f"#{order_id}" for order_id in order_ids)
+    message = f"{len(order_ids)} ta buyurtma holati: {status} ({numbers})"
+    owner_message = f"{len(order_ids)} ta buyurtma holati {changed_by} tomonidan yangilandi: {status} ({numbers})"
+    return [
+        (f'{group}_customers', {'message': message, 'orders': order_ids}),
+        (f'{group}_owner', {'message': owner_message if changed_by else message, 'orders': order_ids}),
+    ]
+
+
+async def _send_all(messages_by_group):
+    channel_layer = get_channel_layer()
+
+    async def send_group(group_name, messages):
+        # Bitta guruh ichida tartib saqlanadi, guruhlar parallel
+        for message in messages:
+            await channel_layer.group_send(group_name, {'type': 'send_notification', 'message': message})
+
+    await asyncio.gather(*(send_group(group, messages) for group, messages in messages_by_group.items()))
+
+
+@handler('notifications')
+def notify(events):
+    """Paketdagi barcha bildirishnomalarni bitta async_to_sync o‘tishida yuboradi."""
+    messages_by_group = {}
+    batches = {}
+    for event in events:
+        batch = event.payload.get('batch') if event.event_type == 'status_changed' else None
+        if batch:
+            # Ommaviy o‘zgarish: har bir guruhga buyurtmalar ro‘yxati bilan bitta xabar
+            key = (batch, event.restaurant_id, event.payload['to'], event.payload.get('changed_by', ''))
+            batches.setdefault(key, []).append(event.order_id)
+            continue
+        for group_name, message in _notifications(event):
+            messages_by_group.setdefault(group_name, []).append(message)
+    for (_batch, restaurant_id, status, changed_by), order_ids in batches.items():
+        for group_name, message in _batch_notifications(restaurant_id, status, changed_by, order_ids):
+            messages_by_group.setdefault(group_name, []).append(message)
+    if messages_by_group:
+        async_to_sync(_send_all)(messages_by_group)
+
+
+@handler('loyalty')
+def award_loyalty(events):
+    """Yangi buyurtmalar uchun sadoqat ballari; allaqachon berilganlari o‘tkazib yuboriladi."""
+    placed = {
+        event.order_id: event.payload['user_profile_id']
+        for event in events
+        if event.event_type == 'placed' and event.payload.get('user_profile_id')
+    }
+    if not placed:
+        return
+    awarded = set(LoyaltyTransaction.objects.filter(
+        order_id__in=placed, transaction_type='earned'
+    ).values_list('order_id', flat=True))
+    orders = Order.objects.in_bulk([order_id for order_id in placed if order_id not in awarded])
+    profiles = UserProfile.objects.in_bulk(set(placed.values()))
+    for order_id, order in orders.items():
+        user_profile = profiles.get(placed[order_id])
+        if user_profile:
+            with transaction.atomic():
+                user_profile.award_loyalty_points(order)
+
+
+@handler('statistics')
+def refresh_statistics(events):
+    # Paketda nechta hodisa bo‘lmasin, statistikani bitta yangilash yetadi
+    enqueue('update_admin_statistics', unique=True)
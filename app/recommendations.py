@@ -0,0 +1,55 @@
+"""
+Savat uchun "ko‘pincha birga buyurtma qilinadi" tavsiyalari.
+
+Qo‘shnilar jadvalini app.cooccurrence fon ishi quradi. Bu yerda restoranning
+qo‘shnilar xaritasi ikki darajali keshdan (caching.recommendations) olinadi
+va savatdagi har bir element qo‘shnilari ballari yig‘iladi: O(k * savat
+hajmi), NumPy talab qilinmaydi.
+"""
+import heapq
+from collections import defaultdict
+
+from . import caching
+from .models import CartItem, MenuItem, MenuItemNeighbors
+
+
+def neighbor_map(restaurant_id):
+    """{menu_item_id: [[qo‘shni_id, ball], ...]} restoran bo‘yicha, keshdan."""
+    return caching.recommendations.get_or_set(restaurant_id, 'neighbors', lambda: dict(
+        MenuItemNeighbors.objects.filter(restaurant_id=restaurant_id).values_list('menu_item_id', 'neighbors')
+    ))
+
+
+def for_items(restaurant_id, item_ids, limit=4):
+    """Savatdagi elementlar qo‘shnilari ballarini yig‘adi; savatda yo‘q eng yaxshi `limit` ta ID. O(k * savat)."""
+    graph = neighbor_map(restaurant_id)
+    in_cart = set(item_ids)
+    scores = defaultdict(float)
+    for item_id in in_cart:
+        for neighbor_id, score in graph.get(item_id, ()):
+            if neighbor_id not in in_cart:
+                scores[neighbor_id] += score
+    return heapq.nlargest(limit, scores, key=scores.get)
+
+
+def for_cart(cart, limit=4):
+    """Savat uchun sotuvdagi tavsiya elementlari (MenuItem), ball tartibida."""
+    item_ids = list(CartItem.objects.filter(cart=cart).values_list('menu_item_id', flat=True))
+    if not item_ids:
+        return []
+    # Ba'zilari sotuvda bo'lmasligi mumkin: nomzodlar ko'proq olinadi
+    candidates = for_items(cart.restaurant_id, item_ids, limit=limit * 2)
+    if not candidates:
+        return []
+    available = MenuItem.objects.filter(
+        id__in=candidates, is_available=True, stock_quantity__gt=0
+    ).only('id', 'name', 'price', 'discount_price').in_bulk()
+    return [available[item_id] for item_id in candidates if item_id in available][:limit]
+
+
+def payload(cart, limit=4):
+    """add_to_cart javobi uchun: [{'id', 'name', 'price'}, ...]."""
+    return [
+        {'id': item.id, 'name': item.name, 'price': item.effective_price}
+        for item in for_cart(cart, limit=limit)
+    ]
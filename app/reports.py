@@ -0,0 +1,219 @@
+"""
+Kun yakunidagi savdo hisobotlari.
+
+Ko‘rsatkichlar barcha restoranlar uchun birdaniga olinadi — har biri bitta
+guruhlangan so‘rov: soatlik daromad, eng ko‘p sotilgan elementlar (oyna
+funksiyasi bilan restoran ichida saralanadi), to‘lov usullari, o‘rtacha chek
+va bekor qilingan buyurtmalar. Bekor qilinmagan barcha buyurtmalar sotuv
+hisoblanadi. CSV va HTML fayllarni chizish jarayonlar hovuziga taqsimlanadi
+(bazaga murojaat qilinmaydi); tayyor fayllar DailyReport da saqlanib, egasi
+panelidan darhol yuklab olinadi.
+"""
+import csv
+import datetime
+import io
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Avg, Count, DecimalField, F, Q, Sum, Window
+from django.db.models.functions import ExtractHour, RowNumber
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DailyReport, Order, OrderItem, Restaurant
+
+TOP_ITEMS = 10
+PAYMENT_LABELS = {key: str(label) for key, label in Order._meta.get_field('payment_method').choices}
+
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def _money(value):
+    return float(round(value or 0, 2))
+
+
+def _empty_report():
+    return {
+        'summary': {
+            'orders': 0, 'revenue': 0.0, 'average_ticket': 0.0, 'discounts': 0.0,
+            'cancelled': 0, 'cancelled_amount': 0.0, 'cancellation_rate': 0.0,
+        },
+        'hourly': [{'hour': hour, 'orders': 0, 'revenue': 0.0} for hour in range(24)],
+        'top_items': [],
+        'payments': [],
+    }
+
+
+def collect(day, restaurant_ids=None):
+    """{restaurant_id: ko‘rsatkichlar}; har bir ko‘rsatkich uchun barcha restoranlarga bitta so‘rov."""
+    start, end = day_bounds(day)
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+    if restaurant_ids is not None:
+        orders = orders.filter(restaurant_id__in=restaurant_ids)
+        items = items.filter(order__restaurant_id__in=restaurant_ids)
+    sales = orders.exclude(status='cancelled')
+    reports = defaultdict(_empty_report)
+
+    hourly = (
+        sales.annotate(hour=ExtractHour('created_at'))
+        .values('restaurant_id', 'hour')
+        .annotate(orders=Count('id'), revenue=Sum('total_price'))
+        .order_by()
+    )
+    for row in hourly:
+        reports[row['restaurant_id']]['hourly'][row['hour']].update(
+            orders=row['orders'], revenue=_money(row['revenue'])
+        )
+
+    top_items = (
+        items.exclude(order__status='cancelled')
+        .values('order__restaurant_id', 'menu_item_id', 'menu_item__name')
+        .annotate(
+            sold=Sum('quantity'),
+            revenue=Sum(F('quantity') * F('price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+        .annotate(rank=Window(RowNumber(), partition_by=F('order__restaurant_id'), order_by=F('sold').desc()))
+        .filter(rank__lte=TOP_ITEMS)
+        .order_by('order__restaurant_id', 'rank')
+    )
+    for row in top_items:
+        reports[row['order__restaurant_id']]['top_items'].append({
+            'menu_item_id': row['menu_item_id'],
+            'name': row['menu_item__name'] or "O‘chirilgan element",
+            'quantity': row['sold'],
+            'revenue': _money(row['revenue']),
+        })
+
+    payments = (
+        sales.values('restaurant_id', 'payment_method')
+        .annotate(orders=Count('id'), revenue=Sum('total_price'))
+        .order_by('restaurant_id', '-revenue')
+    )
+    for row in payments:
+        reports[row['restaurant_id']]['payments'].append({
+            'method': row['payment_method'],
+            'label': PAYMENT_LABELS.get(row['payment_method'], "Ko‘rsatilmagan"),
+            'orders': row['orders'],
+            'revenue': _money(row['revenue']),
+        })
+
+    tickets = sales.values('restaurant_id').annotate(
+        orders=Count('id'), revenue=Sum('total_price'), average=Avg('total_price'), discounts=Sum('discount_amount'),
+    ).order_by()
+    for row in tickets:
+        reports[row['restaurant_id']]['summary'].update(
+            orders=row['orders'],
+            revenue=_money(row['revenue']),
+            average_ticket=_money(row['average']),
+            discounts=_money(row['discounts']),
+        )
+
+    cancellations = orders.filter(status='cancelled').values('restaurant_id').annotate(
+        count=Count('id'), amount=Sum('total_price'),
+    ).order_by()
+    for row in cancellations:
+        summary = reports[row['restaurant_id']]['summary']
+        summary.update(cancelled=row['count'], cancelled_amount=_money(row['amount']))
+        summary['cancellation_rate'] = round(row['count'] / (row['count'] + summary['orders']), 4)
+    return reports
+
+
+def render(restaurant_name, day, data):
+    """Bitta hisobot uchun (csv, html) matnlari; jarayonlar hovuzida bajariladi."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    summary = data['summary']
+    writer.writerow(['bo‘lim', 'nomi', 'soni', 'summa'])
+    writer.writerow(['jami', 'buyurtmalar', summary['orders'], summary['revenue']])
+    writer.writerow(['jami', 'o‘rtacha chek', '', summary['average_ticket']])
+    writer.writerow(['jami', 'chegirmalar', '', summary['discounts']])
+    writer.writerow(['jami', 'bekor qilingan', summary['cancelled'], summary['cancelled_amount']])
+    for row in data['hourly']:
+        writer.writerow(['soat', f"{row['hour']:02d}:00", row['orders'], row['revenue']])
+    for row in data['top_items']:
+        writer.writerow(['element', row['name'], row['quantity'], row['revenue']])
+    for row in data['payments']:
+        writer.writerow(['to‘lov', row['label'], row['orders'], row['revenue']])
+
+    peak = max(row['revenue'] for row in data['hourly']) or 1
+    html = render_to_string('restaurant/reports/daily_report.html', {
+        'restaurant_name': restaurant_name,
+        'day': day,
+        'summary': summary,
+        'hourly': [dict(row, width=round(row['revenue'] / peak * 100)) for row in data['hourly']],
+        'top_items': data['top_items'],
+        'payments': data['payments'],
+    })
+    return buffer.getvalue(), html
+
+
+def _render_job(job):
+    restaurant_id, restaurant_name, day, data = job
+    return (restaurant_id, *render(restaurant_name, day, data))
+
+
+def generate(day, workers=2, restaurant_ids=None):
+    """
+    `day` uchun hisobotlarni hisoblaydi, chizadi va saqlaydi.
+
+    Natija: {'restaurants', 'query_seconds', 'render_seconds', 'store_seconds'}.
+    """
+    started = time.perf_counter()
+    reports = collect(day, restaurant_ids)
+    restaurants = Restaurant.objects.filter(Q(is_active=True) | Q(id__in=list(reports)))
+    if restaurant_ids is not None:
+        restaurants = restaurants.filter(id__in=restaurant_ids)
+    restaurants = dict(restaurants.values_list('id', 'name'))
+    jobs = [(restaurant_id, name, day, reports[restaurant_id]) for restaurant_id, name in restaurants.items()]
+    query_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        # Ochiq ulanishlar bola jarayonlarga meros bo‘lib o‘tmasligi kerak
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            rendered = list(executor.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        rendered = [_render_job(job) for job in jobs]
+    render_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    _store(day, rendered, reports)
+    return {
+        'restaurants': len(jobs),
+        'query_seconds': query_seconds,
+        'render_seconds': render_seconds,
+        'store_seconds': time.perf_counter() - started,
+    }
+
+
+def _store(day, rendered, reports):
+    existing = {
+        report.restaurant_id: report
+        for report in DailyReport.objects.filter(day=day, restaurant_id__in=[row[0] for row in rendered])
+    }
+    to_create, to_update = [], []
+    now = timezone.now()
+    for restaurant_id, csv_text, html_text in rendered:
+        report = existing.get(restaurant_id) or DailyReport(restaurant_id=restaurant_id, day=day)
+        # Qayta yaratishda eski fayllar o‘rniga yangilari yoziladi
+        for field in (report.csv_file, report.html_file):
+            if field:
+                field.delete(save=False)
+        name = f'{restaurant_id}-{day.isoformat()}'
+        report.csv_file.save(f'{name}.csv', ContentFile(csv_text.encode('utf-8-sig')), save=False)
+        report.html_file.save(f'{name}.html', ContentFile(html_text.encode()), save=False)
+        report.data = reports[restaurant_id]
+        report.updated_at = now
+        (to_update if report.pk else to_create).append(report)
+    with transaction.atomic():
+        DailyReport.objects.bulk_create(to_create, batch_size=500)
+        DailyReport.objects.bulk_update(to_update, ['data', 'csv_file', 'html_file', 'updated_at'], batch_size=500)
@@ -0,0 +1,238 @@
+"""
+Stollarni band qilish va bo‘sh stol qidirish.
+
+Har bir restoran va kun uchun bandlik indeksi quriladi va
+`caching.reservations` da saqlanadi:
+
+* stollar sig‘im bo‘yicha saralangan (`capacities` — bisect uchun);
+* har bir stol uchun band oraliqlar birlashtirilib, boshlanish va tugash
+  vaqtlari alohida saralangan massivlarda (epoch soniya) turadi.
+  Oraliqlar kesishmaydi, shuning uchun ikkala massiv ham o‘sib boradi.
+
+[s, e) oralig‘ida stol bo‘shligi: `i = bisect_right(ends, s)`; `i` oxirgi
+element bo‘lsa yoki `starts[i] >= e` bo‘lsa stol bo‘sh — O(log b). Eng mos
+stol: `bisect_left(capacities, party)` dan boshlab yuqoriga qarab birinchi
+bo‘sh stol; qidiruv `RESERVATION_MAX_EXTRA_SEATS` ortiqcha o‘rindiq bilan
+cheklanadi, ya’ni O(log T + k·log b), bu yerda k — mos sig‘imdagi stollar.
+
+Indeks faqat nomzodlarni tanlaydi. Band qilish bazada shartli INSERT
+(`INSERT ... SELECT ... WHERE NOT EXISTS (kesishuvchi band)`) bilan
+bajariladi, stol qatori esa tranzaksiya davomida qulflanadi; shuning uchun
+eskirgan kesh yoki parallel so‘rovlar ikki marta band qilishga olib
+kelmaydi — shart bajarilmasa keyingi nomzod sinab ko‘riladi.
+"""
+import datetime
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching
+from .models import Reservation, Table
+
+# Bitta band qilishning eng uzun davomiyligi; kunlik indeks oynasi shunga tayanadi
+MAX_DURATION = datetime.timedelta(minutes=getattr(settings, 'RESERVATION_MAX_MINUTES', 360))
+# Katta stolni kichik guruhga berishning yuqori chegarasi (ortiqcha o‘rindiqlar)
+MAX_EXTRA_SEATS = getattr(settings, 'RESERVATION_MAX_EXTRA_SEATS', 4)
+DEFAULT_DURATION = datetime.timedelta(minutes=getattr(settings, 'RESERVATION_DEFAULT_MINUTES', 120))
+
+
+class TableUnavailable(Exception):
+    """Berilgan vaqt va mehmonlar soni uchun bo‘sh stol yo‘q."""
+
+
+def _epoch(moment):
+    return int(moment.timestamp())
+
+
+def day_bounds(day):
+    """Joriy vaqt mintaqasidagi kunning [boshi, oxiri) oralig‘i."""
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def _merge(intervals):
+    """Saralangan (start, end) oraliqlarini birlashtirib, starts va ends massivlarini qaytaradi."""
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def build_index(restaurant_id, day):
+    """
+    Kunlik bandlik indeksi (keshlanadigan oddiy tuzilma):
+    {'capacities': [...], 'tables': [(table_id, table_number, capacity), ...],
+    'busy': {table_id: (starts, ends)}}.
+    """
+    start, end = day_bounds(day)
+    tables = list(
+        Table.objects.filter(restaurant_id=restaurant_id)
+        .order_by('capacity', 'id')
+        .values_list('id', 'table_number', 'capacity')
+    )
+    intervals = {}
+    # Kun ichida boshlanadigan band MAX_DURATION dan uzun bo‘lmaydi: oyna shunga yetarli
+    rows = Reservation.objects.filter(
+        restaurant_id=restaurant_id,
+        status__in=Reservation.BLOCKING_STATUSES,
+        starts_at__gte=start - MAX_DURATION,
+        starts_at__lt=end + MAX_DURATION,
+        ends_at__gt=start,
+    ).values_list('table_id', 'starts_at', 'ends_at')
+    for table_id, starts_at, ends_at in rows:
+        intervals.setdefault(table_id, []).append((_epoch(starts_at), _epoch(ends_at)))
+    return {
+        'capacities': [capacity for _id, _number, capacity in tables],
+        'tables': tables,
+        'busy': {table_id: _merge(spans) for table_id, spans in intervals.items()},
+    }
+
+
+def day_index(restaurant_id, day):
+    return caching.reservations.get_or_set(restaurant_id, day.isoformat(), lambda: build_index(restaurant_id, day))
+
+
+def is_free(busy, start, end):
+    """Bo‘sh bo‘lsa True: `busy` — (starts, ends), `start`/`end` — epoch soniya."""
+    if busy is None:
+        return True
+    starts, ends = busy
+    i = bisect_right(ends, start)
+    return i == len(starts) or starts[i] >= end
+
+
+def candidates(index, party_size, starts_at, ends_at, max_extra_seats=MAX_EXTRA_SEATS):
+    """Bo‘sh va sig‘imi yetarli stollar, eng mosidan boshlab: (table_id, table_number, capacity)."""
+    start, end = _epoch(starts_at), _epoch(ends_at)
+    capacities, tables, busy = index['capacities'], index['tables'], index['busy']
+    for position in range(bisect_left(capacities, party_size), len(tables)):
+        table = tables[position]
+        if table[2] > party_size + max_extra_seats:
+            return
+        if is_free(busy.get(table[0]), start, end):
+            yield table
+
+
+def validate_window(starts_at, ends_at):
+    if ends_at <= starts_at:
+        raise ValueError("Tugash vaqti boshlanishidan keyin bo‘lishi kerak")
+    if ends_at - starts_at > MAX_DURATION:
+        raise ValueError(f"Band qilish {int(MAX_DURATION.total_seconds() // 60)} daqiqadan oshmasligi kerak")
+
+
+def find_table(restaurant_id, party_size, starts_at, ends_at):
+    """Eng mos bo‘sh stol yoki None."""
+    validate_window(starts_at, ends_at)
+    index = day_index(restaurant_id, timezone.localdate(starts_at))
+    return next(candidates(index, party_size, starts_at, ends_at), None)
+
+
+def _conditional_insert(reservation):
+    """Stol [starts_at, ends_at) da bo‘sh bo‘lsagina qator qo‘shadi. Qo‘shilgan bo‘lsa True."""
+    meta = Reservation._meta
+    fields = [field for field in meta.concrete_fields if not field.primary_key and not field.generated]
+    values = [field.get_db_prep_save(field.pre_save(reservation, add=True), connection) for field in fields]
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    statuses = Reservation.BLOCKING_STATUSES
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(field.column) for field in fields)}) "
+        f"SELECT {', '.join(['%s'] * len(fields))} "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {qn('table_id')} = %s "
+        f"AND {qn('status')} IN ({', '.join(['%s'] * len(statuses))}) "
+        f"AND {qn('starts_at')} < %s AND {qn('ends_at')} > %s)"
+    )
+    datetime_field = meta.get_field('starts_at')
+    params = [
+        *values,
+        reservation.table_id,
+        *statuses,
+        datetime_field.get_db_prep_save(reservation.ends_at, connection),
+        datetime_field.get_db_prep_save(reservation.starts_at, connection),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount == 1
+
+
+def book(restaurant_id, party_size, starts_at, ends_at, **details):
+    """
+    Eng mos bo‘sh stolni band qiladi va Reservation qaytaradi; bo‘sh stol
+    bo‘lmasa TableUnavailable. `details`: user_profile_id, guest_name,
+    phone_number, notes.
+    """
+    validate_window(starts_at, ends_at)
+    day = timezone.localdate(starts_at)
+    for table_id, _number, _capacity in candidates(day_index(restaurant_id, day), party_size, starts_at, ends_at):
+        reservation = Reservation(
+            restaurant_id=restaurant_id,
+            table_id=table_id,
+            party_size=party_size,
+            starts_at=starts_at,
+            ends_at=ends_at,
+            status='confirmed',
+            **details,
+        )
+        with transaction.atomic():
+            # Stol qatori qulfi bir stolga parallel yozuvlarni ketma-ket qiladi (PostgreSQL READ COMMITTED).
+            # SQLite da yozuvlar baribir ketma-ket; oldindan o‘qish esa qulfni yozuvga ko‘tarishda
+            # "database is locked" ga olib kelardi, shuning uchun faqat shartli INSERT
+            if connection.features.has_select_for_update and not list(
+                Table.objects.select_for_update().filter(pk=table_id).values_list('pk', flat=True)
+            ):
+                continue
+            inserted = _conditional_insert(reservation)
+            caching.reservations.invalidate([restaurant_id])
+        if inserted:
+            return Reservation.objects.get(
+                table_id=table_id, starts_at=starts_at, status='confirmed', ends_at=ends_at,
+            )
+    raise TableUnavailable("Bu vaqtga mos bo‘sh stol topilmadi")
+
+
+def cancel(reservation):
+    """Bandni bekor qiladi; faqat faol (confirmed) bandlar bekor qilinadi. Bekor qilingan bo‘lsa True."""
+    cancelled = Reservation.objects.filter(pk=reservation.pk, status='confirmed').update(
+        status='cancelled', updated_at=timezone.now(),
+    )
+    if cancelled:
+        reservation.status = 'cancelled'
+        caching.reservations.invalidate([reservation.restaurant_id])
+    return bool(cancelled)
+
+
+def upcoming(restaurant_id, day=None):
+    """Kunning faol bandlari (xodimlar paneli uchun)."""
+    start, end = day_bounds(day or timezone.localdate())
+    return Reservation.objects.filter(
+        restaurant_id=restaurant_id,
+        status__in=Reservation.BLOCKING_STATUSES,
+        starts_at__gte=start,
+        starts_at__lt=end,
+    ).select_related('table').order_by('starts_at')
+
+
+def as_dict(reservation):
+    return {
+        'id': reservation.id,
+        'table': reservation.table_id,
+        'party_size': reservation.party_size,
+        'starts_at': reservation.starts_at.isoformat(),
+        'ends_at': reservation.ends_at.isoformat(),
+        'status': reservation.status,
+    }
+
+
+# Admin yoki xodim o‘zgarishlari (holat, vaqt) ham indeksni eskirtiradi
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=Table)
+def reservation_rows_changed(sender, instance, **kwargs):
+    caching.reservations.invalidate([instance.restaurant_id])
@@ -0,0 +1,159 @@
+"""
+Statik fayllar: xeshlangan nomlar, oldindan siqish va ASGI orqali berish.
+
+CompressedManifestStaticFilesStorage `collectstatic` vaqtida fayl nomlariga
+kontent xeshini qo‘shadi va matnli fayllar uchun `.gz` (hamda `brotli`
+paketi o‘rnatilgan bo‘lsa `.br`) variantlarini yozadi.
+
+PrecompressedStaticFiles — ASGI o‘rami: STATIC_URL ostidagi so‘rovlarni
+Django'gacha yetkazmasdan STATIC_ROOT dan beradi, Accept-Encoding bo‘yicha
+siqilgan variantni tanlaydi. Xeshlangan fayllar `immutable` sarlavhasi
+bilan bir yilga keshlanadi.
+"""
+import asyncio
+import gzip
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # ixtiyoriy bog‘liqlik
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot',
+)
+# ManifestStaticFilesStorage nomga 12 belgili xesh qo‘shadi: styles.55e7cbb9ba48.css
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+(?:\.(?:gz|br))?$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60, must-revalidate'
+ENCODINGS = (('br', '.br', re.compile(r'\bbr\b')), ('gzip', '.gz', re.compile(r'\bgzip\b')))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Manifestda yo‘q fayl uchun xatolik o‘rniga xeshsiz nom qaytariladi
+    manifest_strict = False
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                yield from self._compress(name)
+
+    def _compress(self, name):
+        with self.open(name) as handle:
+            data = handle.read()
+        if len(data) < self.min_compress_size:
+            return
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            # Siqish foyda bermasa variant yozilmaydi
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
+
+
+class PrecompressedStaticFiles:
+    """STATIC_ROOT dagi fayllarni beruvchi ASGI o‘rami; boshqa so‘rovlar ichki ilovaga uzatiladi."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, application, root=None, static_url=None):
+        self.application = application
+        self.root = Path(root or settings.STATIC_ROOT).resolve()
+        url_path = urlsplit(static_url or settings.STATIC_URL).path
+        self.prefixes = [url_path]
+        # Proksi FORCE_SCRIPT_NAME ni olib tashlab uzatsa ham fayl topilsin
+        script_name = (settings.FORCE_SCRIPT_NAME or '').rstrip('/')
+        if script_name and url_path.startswith(script_name + '/'):
+            self.prefixes.append(url_path[len(script_name):])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            relative = self.relative_path(scope['path'])
+            if relative is not None:
+                return await self.serve(scope, relative, send)
+        return await self.application(scope, receive, send)
+
+    def relative_path(self, path):
+        for prefix in self.prefixes:
+            if path.startswith(prefix):
+                return path[len(prefix):]
+        return None
+
+    def resolve(self, relative):
+        candidate = (self.root / relative).resolve()
+        if not candidate.is_relative_to(self.root) or not candidate.is_file():
+            return None
+        return candidate
+
+    def select_variant(self, path, accept_encoding):
+        for encoding, suffix, pattern in ENCODINGS:
+            if pattern.search(accept_encoding):
+                variant = path.with_name(path.name + suffix)
+                if variant.is_file():
+                    return encoding, variant
+        return None, path
+
+    async def serve(self, scope, relative, send):
+        request_headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope['headers']}
+        path = await asyncio.to_thread(self.resolve, relative)
+        if path is None:
+            return await self.respond(send, 404, [(b'content-type', b'text/plain; charset=utf-8')], b'Not Found')
+
+        encoding, file_path = await asyncio.to_thread(
+            self.select_variant, path, request_headers.get('accept-encoding', '')
+        )
+        stat = await asyncio.to_thread(file_path.stat)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        headers = [
+            (b'cache-control', (IMMUTABLE if HASHED_NAME_RE.search(path.name) else REVALIDATE).encode()),
+            (b'vary', b'Accept-Encoding'),
+            (b'etag', etag.encode()),
+            (b'last-modified', http_date(stat.st_mtime).encode()),
+        ]
+        if etag in request_headers.get('if-none-match', ''):
+            return await self.respond(send, 304, headers, b'')
+
+        content_type, _ = mimetypes.guess_type(path.name)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        headers += [(b'content-type', content_type.encode()), (b'content-length', str(stat.st_size).encode())]
+        if encoding:
+            headers.append((b'content-encoding', encoding.encode()))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+        if scope['method'] == 'HEAD':
+            return await send({'type': 'http.response.body', 'body': b''})
+
+        handle = await asyncio.to_thread(open, file_path, 'rb')
+        try:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, self.chunk_size)
+                more = len(chunk) == self.chunk_size
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
+        finally:
+            handle.close()
+
+    @staticmethod
+    async def respond(send, status, headers, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
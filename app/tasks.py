@@ -0,0 +1,92 @@
+"""app.jobs navbati orqali bajariladigan fon vazifalari."""
+import logging
+
+from django.utils import timezone
+
+from . import archive, carts, inventory, outbox, reports
+from .jobs import register
+from .models import Order, UserProfile, AdminDashboard, LoyaltyTransaction
+from .views import send_notification
+
+logger = logging.getLogger(__name__)
+
+
+@register('send_notification')
+def notify(group_name, message):
+    send_notification(group_name, message)
+
+
+@register('calculate_estimated_delivery')
+def calculate_estimated_delivery(order_id):
+    order = Order.objects.filter(id=order_id).first()
+    if order:
+        order.calculate_estimated_delivery()
+
+
+@register('award_loyalty_points')
+def award_loyalty_points(order_id, user_profile_id):
+    order = Order.objects.filter(id=order_id).first()
+    user_profile = UserProfile.objects.filter(id=user_profile_id).first()
+    # Qayta urinishda ballar ikki marta berilmasligi uchun
+    already_awarded = LoyaltyTransaction.objects.filter(order_id=order_id, transaction_type='earned').exists()
+    if order and user_profile and not already_awarded:
+        user_profile.award_loyalty_points(order)
+
+
+@register('update_admin_statistics')
+def update_admin_statistics():
+    dashboard = AdminDashboard.objects.first() or AdminDashboard.objects.create()
+    dashboard.update_statistics()
+
+
+@register('fit_prep_times')
+def fit_prep_times(days=90):
+    from .estimator import refit  # NumPy faqat ishchida yuklanadi
+    refit(timezone.now() - timezone.timedelta(days=days))
+
+
+@register('forecast_demand')
+def forecast_demand(weeks=8):
+    from .forecast import refresh
+    refresh(weeks=weeks)
+
+
+@register('inventory_snapshot')
+def inventory_snapshot():
+    inventory.take_snapshots()
+
+
+@register('inventory_compact')
+def inventory_compact(days=30):
+    inventory.compact(days=days)
+
+
+@register('archive_orders')
+def archive_orders(older_than_days=180):
+    archive.archive_orders(older_than_days=older_than_days)
+
+
+@register('sweep_abandoned_carts')
+def sweep_abandoned_carts(ttl_minutes=120):
+    metrics = carts.sweep_abandoned_carts(ttl=timezone.timedelta(minutes=ttl_minutes))
+    logger.info("Tashlab ketilgan savatlar tozalandi: %s", metrics)
+
+
+@register('outbox_prune')
+def outbox_prune(keep_days=7):
+    deleted = outbox.prune(keep_days=keep_days)
+    logger.info("Outbox dan %d ta hodisa o‘chirildi", deleted)
+
+
+@register('daily_reports')
+def daily_reports(day=None, workers=2):
+    day = timezone.datetime.fromisoformat(day).date() if day else timezone.localdate() - timezone.timedelta(days=1)
+    result = reports.generate(day, workers=workers)
+    logger.info("%s uchun %d ta kunlik hisobot yaratildi", day, result['restaurants'])
+
+
+@register('build_recommendations')
+def build_recommendations(weeks=12):
+    from .cooccurrence import rebuild  # NumPy faqat ishchida yuklanadi
+    results = rebuild(weeks=weeks)
+    logger.info("Tavsiyalar qayta qurildi: %d restoran", len(results))
@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import get_script_prefix, reverse
+
+from .. import caching
+from ..models import Category, MenuItem, Order, Restaurant, Staff, Table, UserProfile
+
+# Testlar ishlab chiqish keshini (fayl) ifloslantirmaydi
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+# Manifest saqlagichi collectstatic natijasini talab qiladi; sahifalar uchun oddiy saqlagich
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Birinchi backend (Google OAuth2) force_login bilan ishlamaydi
+LOGIN_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def page_url(name, *args, **kwargs):
+    """Test mijozi uchun yo‘l: FORCE_SCRIPT_NAME prefiksi so‘rovda qayta qo‘shiladi."""
+    return '/' + reverse(name, args=args, kwargs=kwargs).removeprefix(get_script_prefix())
+
+
+def login(client, user):
+    client.force_login(user, backend=LOGIN_BACKEND)
+    return user
+
+
+def admin_login(client):
+    return login(client, User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+
+@override_settings(CACHES=TEST_CACHES, STORAGES=TEST_STORAGES)
+class RestaurantTestCase(TestCase):
+    """Restoran, kategoriya va stol bilan umumiy tayyorlov; har bir test toza keshdan boshlanadi."""
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.owner = User.objects.create_user('owner')
+        self.restaurant = self.make_restaurant('main')
+        self.category = Category.objects.create(restaurant=self.restaurant, name="Taomlar")
+        self.table = Table.objects.create(restaurant=self.restaurant, table_number='1')
+
+    def make_restaurant(self, slug, owner=None):
+        return Restaurant.objects.create(
+            name=f"Restoran {slug}", slug=slug, owner=owner or self.owner, address='-', phone_number='+998901234567',
+        )
+
+    def make_item(self, name, price=10000, stock=10, restaurant=None, category=None, **fields):
+        return MenuItem.objects.create(
+            restaurant=restaurant or self.restaurant, category=category or self.category,
+            name=name, price=price, stock_quantity=stock, **fields,
+        )
+
+    def make_order(self, status='pending', restaurant=None, table=None, **fields):
+        return Order.objects.create(
+            restaurant=restaurant or self.restaurant, table=table or self.table,
+            status=status, total_price=0, **fields,
+        )
+
+    def make_profile(self, username):
+        return UserProfile.objects.create(user=User.objects.create_user(username), phone_number='+998901234567')
+
+    def make_staff(self, username, role='waiter', restaurant=None):
+        return Staff.objects.create(
+            user=User.objects.create_user(username), restaurant=restaurant or self.restaurant, role=role,
+        )
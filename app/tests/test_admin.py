@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..admin_tools import EstimatedCountPaginator, estimated_row_count
+from ..models import Cart, CartItem, Category, InventoryLedger, InventoryTransaction, MenuItem, Order, OrderItem, Table
+from .base import RestaurantTestCase, admin_login, page_url
+
+
+class AdminChangelistQueryTests(RestaurantTestCase):
+    """Ro‘yxat sahifasidagi so‘rovlar soni qatorlar soniga bog‘liq emas (N+1 yo‘q)."""
+
+    def setUp(self):
+        super().setUp()
+        admin_login(self.client)
+        self.counter = 0
+
+    def add_rows(self):
+        """Har bir qator alohida restoran, stol, foydalanuvchi va element bilan: bog‘lanishlar qayta ishlatilmaydi."""
+        self.counter += 1
+        suffix = f'r{self.counter}'
+        restaurant = self.make_restaurant(suffix)
+        category = Category.objects.create(restaurant=restaurant, name=f"Kategoriya {suffix}")
+        table = Table.objects.create(restaurant=restaurant, table_number='1')
+        item = self.make_item(f"Taom {suffix}", restaurant=restaurant, category=category)
+        profile = self.make_profile(f'user-{suffix}')
+        cart = Cart.objects.create(user_profile=profile, restaurant=restaurant, table=table)
+        CartItem.objects.create(cart=cart, menu_item=item, quantity=2)
+        order = self.make_order(restaurant=restaurant, table=table, user_profile=profile)
+        OrderItem.objects.create(order=order, menu_item=item, quantity=1, price=item.price)
+        with InventoryLedger() as ledger:
+            ledger.change(item, -1, 'reservation', "Test")
+
+    def assertConstantQueries(self, model):
+        url = page_url(f'admin:app_{model._meta.model_name}_changelist')
+        self.add_rows()
+        with CaptureQueriesContext(connection) as baseline:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for _ in range(5):
+            self.add_rows()
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), model.objects.count())
+
+    def test_cart_changelist(self):
+        self.assertConstantQueries(Cart)
+
+    def test_order_changelist(self):
+        self.assertConstantQueries(Order)
+
+    def test_order_item_changelist(self):
+        self.assertConstantQueries(OrderItem)
+
+    def test_inventory_transaction_changelist(self):
+        self.assertConstantQueries(InventoryTransaction)
+
+    def test_menu_item_changelist(self):
+        self.assertConstantQueries(MenuItem)
+
+
+class AdminPaginationTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        admin_login(self.client)
+        self.orders = [self.make_order() for _ in range(5)]
+        model_admin = admin.site._registry[Order]
+        patcher = mock.patch.object(model_admin, 'list_per_page', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_keyset_cursor_walks_pages_by_descending_pk(self):
+        url = page_url('admin:app_order_changelist')
+        expected = sorted((order.pk for order in self.orders), reverse=True)
+        seen = []
+        response = self.client.get(url)
+        while True:
+            changelist = response.context['cl']
+            self.assertTrue(changelist.keyset)
+            seen.extend(order.pk for order in changelist.result_list)
+            if changelist.next_cursor is None:
+                break
+            self.assertEqual(changelist.next_cursor, seen[-1])
+            response = self.client.get(url, {'cursor': changelist.next_cursor})
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(page_url('admin:app_order_changelist'), {'cursor': 'abc'})
+        # IncorrectLookupParameters: admin xato parametrni olib tashlab qayta yo‘naltiradi
+        self.assertEqual(response.status_code, 302)
+
+    def test_filtered_count_is_capped(self):
+        paginator = EstimatedCountPaginator(Order.objects.filter(restaurant=self.restaurant), 2)
+        paginator.count_limit = 3
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.count_label, '3+')
+
+    def test_unfiltered_count_uses_table_estimate(self):
+        with mock.patch('app.admin_tools.estimated_row_count', return_value=50000):
+            paginator = EstimatedCountPaginator(Order.objects.all(), 2)
+            self.assertEqual(paginator.count, 50000)
+            self.assertEqual(paginator.count_label, '~50000')
+        # Kichik baho (yoki statistika yo‘q) bo‘lsa aniq son sanaladi
+        with mock.patch('app.admin_tools.estimated_row_count', return_value=None):
+            paginator = EstimatedCountPaginator(Order.objects.all(), 2)
+            self.assertEqual(paginator.count, 5)
+            self.assertEqual(paginator.count_label, '5')
+
+    def test_estimated_row_count_reads_database_statistics(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("sqlite_stat1 faqat SQLite da")
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimated_row_count(Order), 5)
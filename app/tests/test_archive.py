@@ -0,0 +1,84 @@
+import datetime
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .. import archive
+from ..models import ArchivedOrder, ArchivedOrderItem, ArchivedReview, ArchiveRollup, Order, OrderItem, Review
+from .base import RestaurantTestCase
+
+
+class ArchiveTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile = self.make_profile('guest')
+        self.item = self.make_item("Osh", price=20000)
+
+    def order(self, status='served', days_ago=200, rating=None, total=20000):
+        order = self.make_order(status=status, user_profile=self.profile)
+        OrderItem.objects.create(order=order, menu_item=self.item, quantity=1, price=self.item.price)
+        if rating:
+            Review.objects.create(order=order, user_profile=self.profile, rating=rating)
+        Order.objects.filter(pk=order.pk).update(
+            total_price=total, created_at=timezone.now() - datetime.timedelta(days=days_ago),
+        )
+        return order
+
+    def test_moves_only_old_finished_orders(self):
+        served = self.order(rating=4)
+        cancelled = self.order(status='cancelled', total=5000)
+        recent = self.order(days_ago=10)
+        open_order = self.order(status='preparing')
+        self.assertEqual(archive.archive_orders(older_than_days=180, chunk_size=1), 2)
+
+        self.assertEqual(set(Order.objects.values_list('pk', flat=True)), {recent.pk, open_order.pk})
+        self.assertEqual(set(ArchivedOrder.objects.values_list('pk', flat=True)), {served.pk, cancelled.pk})
+        self.assertEqual(ArchivedOrderItem.objects.count(), 2)
+        self.assertEqual(list(ArchivedReview.objects.values_list('order_id', 'rating')), [(served.pk, 4)])
+        rollup = ArchiveRollup.objects.get(restaurant=self.restaurant)
+        self.assertEqual(
+            (rollup.order_count, rollup.served_revenue, rollup.rating_sum, rollup.rating_count),
+            (2, Decimal('20000'), 4, 1),
+        )
+
+    def test_statistics_include_archived_orders(self):
+        self.order(rating=5)
+        self.order(days_ago=1, rating=2)
+        before = self.restaurant.get_statistics()
+        archive.archive_orders()
+        # Arxivlash jami baholarni o‘zgartirmaydi, shuning uchun keshni ham bekor qilmaydi
+        self.assertEqual(self.restaurant._compute_average_rating(), 3.5)
+        after = self.restaurant.get_statistics()
+        self.assertEqual(
+            (after['jami_buyurtmalar'], after['jami_daromad']), (before['jami_buyurtmalar'], before['jami_daromad']),
+        )
+
+    def test_rollups_accumulate_across_runs(self):
+        self.order(rating=5)
+        archive.archive_orders()
+        self.order(rating=1)
+        archive.archive_orders()
+        rollup = ArchiveRollup.objects.get(restaurant=self.restaurant)
+        self.assertEqual((rollup.order_count, rollup.rating_sum, rollup.rating_count), (2, 6, 2))
+
+    def test_limit(self):
+        for _ in range(3):
+            self.order()
+        self.assertEqual(archive.archive_orders(chunk_size=2, limit=1), 1)
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+
+    def test_order_status_changed_before_the_chunk(self):
+        order = self.order()
+        # Ro‘yxat olingandan keyin buyurtma qayta ochilgan: u ko‘chirilmaydi
+        Order.objects.filter(pk=order.pk).update(status='preparing')
+        self.assertEqual(archive.archive_chunk([order.pk]), 0)
+        self.assertTrue(Order.objects.filter(pk=order.pk).exists())
+
+    def test_history_merges_hot_and_archived(self):
+        old = self.order()
+        archive.archive_orders()
+        new = self.order(days_ago=1)
+        history = archive.order_history(self.profile)
+        self.assertEqual([(type(order), order.pk) for order in history], [(Order, new.pk), (ArchivedOrder, old.pk)])
+        self.assertEqual(history[1].items.get().menu_item, self.item)
@@ -0,0 +1,92 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError
+
+from ..async_views import _add_item
+from ..models import CartItem, InventoryTransaction, MenuItem, Order, OrderEvent
+from .base import RestaurantTestCase, login, page_url
+
+
+class CustomerHotPathTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile = self.make_profile('guest')
+        login(self.client, self.profile.user)
+        self.item = self.make_item("Osh", price=20000, stock=5)
+
+    def add(self, quantity, item=None):
+        return self.client.post(
+            page_url('restaurant:add_to_cart', self.table.qr_code),
+            {'menu_item_id': (item or self.item).pk, 'quantity': quantity},
+        )
+
+    def test_menu_page_renders(self):
+        response = self.client.get(page_url('restaurant:table_menu', self.table.qr_code))
+        self.assertContains(response, "Osh")
+
+    def test_add_to_cart_reserves_stock(self):
+        response = self.add(2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['quantity'], 2)
+        response = self.add(1)
+        data = response.json()
+        self.assertEqual((data['quantity'], data['delta']['stock'][str(self.item.pk)]), (3, 2))
+        self.assertEqual(CartItem.objects.get().quantity, 3)
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).stock_quantity, 2)
+
+    def test_insufficient_stock(self):
+        self.assertEqual(self.add(6).status_code, 400)
+        self.assertFalse(CartItem.objects.exists())
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).stock_quantity, 5)
+
+    def test_failed_cart_write_returns_reserved_stock(self):
+        original = type(CartItem.objects).get_or_create
+
+        def failing_get_or_create(manager, *args, **kwargs):
+            if manager.model is CartItem:
+                raise IntegrityError("parallel get_or_create")
+            return original(manager, *args, **kwargs)
+
+        with mock.patch.object(type(CartItem.objects), 'get_or_create', failing_get_or_create):
+            with self.assertRaises(IntegrityError):
+                _add_item(self.profile.user, self.profile.pk, self.table, self.item, 2)
+        self.assertEqual(MenuItem.objects.get(pk=self.item.pk).stock_quantity, 5)
+        self.assertFalse(InventoryTransaction.objects.exists())
+
+    def test_concurrent_adds_do_not_lose_quantity(self):
+        self.add(1)
+        original = type(CartItem.objects).get_or_create
+
+        def racing_get_or_create(manager, *args, **kwargs):
+            found = original(manager, *args, **kwargs)
+            if manager.model is CartItem:
+                # Boshqa so‘rov o‘qishdan keyin xuddi shu elementni qo‘shadi
+                CartItem.objects.filter(pk=found[0].pk).update(quantity=found[0].quantity + 2)
+            return found
+
+        with mock.patch.object(type(CartItem.objects), 'get_or_create', racing_get_or_create):
+            _cart, cart_item, _suggestions = _add_item(self.profile.user, self.profile.pk, self.table, self.item, 1)
+        self.assertEqual(cart_item.quantity, 4)
+        self.assertEqual(CartItem.objects.get().quantity, 4)
+
+    def test_place_order(self):
+        soup = self.make_item("Sho‘rva", price=15000, stock=5)
+        self.add(2)
+        self.add(1, soup)
+        response = self.client.post(page_url('restaurant:place_order', self.table.qr_code))
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(pk=response.json()['order_id'])
+        self.assertEqual(order.total_price, Decimal('55000'))
+        self.assertEqual(
+            sorted(order.items.values_list('menu_item__name', 'quantity', 'price')),
+            [("Osh", 2, Decimal('20000')), ("Sho‘rva", 1, Decimal('15000'))],
+        )
+        self.assertFalse(CartItem.objects.exists())
+        event = OrderEvent.objects.get(order_id=order.pk, event_type='placed')
+        self.assertEqual(event.payload['user_profile_id'], self.profile.pk)
+        # Savat bo‘sh: ikkinchi buyurtma berilmaydi
+        response = self.client.post(page_url('restaurant:place_order', self.table.qr_code))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
@@ -0,0 +1,140 @@
+import json
+from unittest import mock
+
+from django.test import Client
+
+from ..models import Order, OrderEvent, OrderStatusTransition
+from ..views import BULK_STATUS_MAX_ORDERS
+from .base import RestaurantTestCase, login, page_url
+
+
+class BulkUpdateStatusTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.waiter = self.make_staff('waiter')
+
+    def test_partial_stale_versions(self):
+        fresh, stale, served = self.make_order(), self.make_order(), self.make_order(status='served')
+        Order.objects.get(pk=stale.pk).update_status('accepted')
+        other = self.make_order(restaurant=self.make_restaurant('other'))
+
+        results = Order.bulk_update_status(self.restaurant.id, [
+            (fresh.pk, 'accepted', 0),
+            (stale.pk, 'accepted', 0),
+            (served.pk, 'accepted', None),
+            (other.pk, 'accepted', None),
+            (fresh.pk, 'cancelled', 0),
+        ], waiter=self.waiter)
+
+        self.assertEqual(results[fresh.pk], {'result': 'updated', 'status': 'accepted', 'version': 1})
+        self.assertEqual(results[stale.pk], {'result': 'conflict', 'status': 'accepted', 'version': 1})
+        self.assertEqual(results[served.pk]['result'], 'invalid')
+        self.assertEqual(results[other.pk]['result'], 'not_found')
+        self.assertEqual(Order.objects.get(pk=fresh.pk).assigned_waiter_id, self.waiter.pk)
+        self.assertEqual(Order.objects.get(pk=other.pk).status, 'pending')
+        # Faqat yangilangan buyurtma uchun jurnal va ommaviy hodisa yoziladi
+        events = OrderEvent.objects.filter(event_type='status_changed', payload__batch__isnull=False)
+        self.assertEqual(list(events.values_list('order_id', flat=True)), [fresh.pk])
+        self.assertEqual(events.get().payload['changed_by'], 'waiter')
+        self.assertTrue(OrderStatusTransition.objects.filter(order=fresh, to_status='accepted').exists())
+
+    def test_rows_changed_after_read_are_conflicts(self):
+        order = self.make_order()
+        queryset_class = type(Order.objects.all())
+        original_update = queryset_class.update
+
+        def update(queryset, **fields):
+            # O‘qish va UPDATE orasida boshqa so‘rov buyurtmani o‘zgartiradi
+            if fields.get('status') == 'accepted':
+                Order.objects.filter(pk=order.pk).update(status='cancelled', version=5)
+            return original_update(queryset, **fields)
+
+        with mock.patch.object(queryset_class, 'update', update):
+            results = Order.bulk_update_status(self.restaurant.id, [(order.pk, 'accepted', 0)])
+        self.assertEqual(results[order.pk], {'result': 'conflict', 'status': 'cancelled', 'version': 5})
+        self.assertFalse(OrderEvent.objects.filter(event_type='status_changed').exists())
+
+
+class BulkUpdateStatusViewTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.waiter = self.make_staff('waiter')
+        self.client = Client(enforce_csrf_checks=True)
+        login(self.client, self.waiter.user)
+        self.url = page_url('restaurant:bulk_update_order_status', slug=self.restaurant.slug)
+
+    def csrf_token(self):
+        # Ofitsiant paneli tokenni formada beradi va cookie ni o‘rnatadi
+        response = self.client.get(page_url('restaurant:waiter_dashboard', slug=self.restaurant.slug))
+        self.assertContains(response, 'id="bulk-status-form"')
+        return self.client.cookies['csrftoken'].value
+
+    def post(self, body, token=None):
+        return self.client.post(
+            self.url, json.dumps(body), content_type='application/json',
+            headers={'X-CSRFToken': token or self.csrf_token()},
+        )
+
+    def test_requires_csrf_token(self):
+        order = self.make_order()
+        response = self.client.post(
+            self.url, json.dumps({'status': 'accepted', 'orders': [{'id': order.pk}]}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'pending')
+
+    def test_updates_orders(self):
+        orders = [self.make_order() for _ in range(3)]
+        response = self.post({'status': 'accepted', 'orders': [{'id': order.pk, 'version': 0} for order in orders]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(set(Order.objects.values_list('status', flat=True)), {'accepted'})
+
+    def test_order_cap(self):
+        token = self.csrf_token()
+        too_many = [{'id': order_id} for order_id in range(1, BULK_STATUS_MAX_ORDERS + 2)]
+        self.assertEqual(self.post({'status': 'accepted', 'orders': too_many}, token).status_code, 400)
+        self.assertEqual(self.post({'status': 'accepted', 'orders': []}, token).status_code, 400)
+        # Chegaradagi son qabul qilinadi (mavjud bo‘lmagan ID lar not_found)
+        response = self.post({'status': 'accepted', 'orders': too_many[:BULK_STATUS_MAX_ORDERS]}, token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), BULK_STATUS_MAX_ORDERS)
+
+    def test_stale_rows_return_409(self):
+        fresh, stale = self.make_order(), self.make_order()
+        Order.objects.get(pk=stale.pk).update_status('accepted')
+        response = self.post({'status': 'accepted', 'orders': [
+            {'id': fresh.pk, 'version': 0}, {'id': stale.pk, 'version': 0},
+        ]})
+        self.assertEqual(response.status_code, 409)
+        data = response.json()
+        self.assertEqual((data['updated'], data['conflicts']), (1, 1))
+        results = {result['id']: result for result in data['results']}
+        self.assertEqual(results[stale.pk], {'id': stale.pk, 'result': 'conflict', 'status': 'accepted', 'version': 1})
+        self.assertEqual(Order.objects.get(pk=fresh.pk).status, 'accepted')
+
+    def test_disallowed_transitions_are_rejected(self):
+        pending, served = self.make_order(), self.make_order(status='served')
+        token = self.csrf_token()
+        response = self.post({'status': 'served', 'orders': [{'id': pending.pk}, {'id': served.pk, 'status': 'pending'}]}, token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['result'] for result in response.json()['results']], ['invalid', 'invalid'])
+        self.assertEqual(response.json()['updated'], 0)
+        # Noma’lum holat umuman qabul qilinmaydi
+        response = self.post({'status': 'eaten', 'orders': [{'id': pending.pk}]}, token)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            list(Order.objects.order_by('pk').values_list('status', 'version')), [('pending', 0), ('served', 0)],
+        )
+
+    def test_other_restaurants_waiter_gets_404(self):
+        other = self.make_restaurant('other')
+        order = self.make_order(restaurant=other)
+        response = self.client.post(
+            page_url('restaurant:bulk_update_order_status', slug=other.slug),
+            json.dumps({'status': 'accepted', 'orders': [{'id': order.pk}]}), content_type='application/json',
+            headers={'X-CSRFToken': self.csrf_token()},
+        )
+        self.assertEqual(response.status_code, 404)
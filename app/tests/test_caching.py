@@ -0,0 +1,98 @@
+import asyncio
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from .. import caching
+from ..models import Review
+from .base import RestaurantTestCase
+
+IPC_LAYERS = {'default': {'BACKEND': 'app.ipc_layer.IPCChannelLayer', 'CONFIG': {'path': '/tmp/test.sock'}}}
+IN_MEMORY_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class NamespaceTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.namespace = caching.Namespace('test', timeout=60)
+        self.compute = mock.Mock(side_effect=lambda: self.compute.call_count)
+
+    def get(self, scope=1):
+        return self.namespace.get_or_set(scope, 'value', self.compute)
+
+    def test_local_then_shared_then_compute(self):
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(self.get(), 1)
+        # Boshqa jarayon: L1 bo‘sh, qiymat L2 dan olinadi
+        caching.local_cache.clear()
+        self.assertEqual(self.get(), 1)
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertEqual(self.namespace._counts, {'miss': 1, 'local': 1, 'shared': 1})
+
+    def test_invalidate_after_commit_only_touches_scope(self):
+        self.get(1), self.get(2)
+        with mock.patch.object(caching, '_broadcast') as broadcast:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.namespace.invalidate([1, 1])
+            # Commit dan oldin eski qiymat qoladi
+            self.assertEqual(self.get(1), 1)
+            for callback in callbacks:
+                callback()
+        broadcast.assert_called_once_with({'type': 'cache.invalidate', 'namespace': 'test', 'scopes': [1]})
+        self.assertEqual(self.get(1), 3)
+        self.assertEqual(self.get(2), 2)
+
+    def test_message_drops_other_process_generation(self):
+        self.get()
+        # Boshqa jarayon L2 dagi avlodni yangiladi; bu jarayon L1 dagi avlodni hali ishlatadi
+        cache.set(self.namespace.generation_key(1), 1, timeout=None)
+        self.assertEqual(self.get(), 1)
+        with mock.patch.dict(caching.NAMESPACES, {'test': self.namespace}):
+            caching.handle_message({'type': 'cache.invalidate', 'namespace': 'test', 'scopes': [1]})
+        self.assertEqual(self.get(), 2)
+
+    def test_review_save_invalidates_ratings(self):
+        order = self.make_order()
+        calls = []
+        before = caching.ratings.generation(self.restaurant.pk)
+        with mock.patch.object(caching, '_broadcast', calls.append):
+            with self.captureOnCommitCallbacks(execute=True):
+                Review.objects.create(order=order, rating=5)
+        self.assertNotEqual(caching.ratings.generation(self.restaurant.pk), before)
+        self.assertEqual(calls[0]['scopes'], [self.restaurant.pk])
+
+
+class LocalCacheTests(SimpleTestCase):
+
+    def test_lru_and_expiry(self):
+        local = caching.LocalCache(max_entries=2, timeout=30)
+        local.set('a', 1)
+        local.set('b', 2)
+        local.get('a')
+        local.set('c', 3)
+        self.assertIs(local.get('b'), caching._MISSING)
+        self.assertEqual((local.get('a'), local.get('c')), (1, 3))
+        with mock.patch.object(caching.time, 'monotonic', return_value=caching.time.monotonic() + 31):
+            self.assertIs(local.get('a'), caching._MISSING)
+
+
+class ProcessLocalLayerTests(SimpleTestCase):
+
+    @override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYERS)
+    def test_in_memory_layer_shortens_l1(self):
+        self.assertTrue(caching.broadcast_is_process_local())
+        self.assertEqual(caching.local_timeout(), caching.LOCAL_TIMEOUT_WITHOUT_BROADCAST)
+        with self.assertLogs('app.caching', 'WARNING') as logs:
+            asyncio.run(caching.listen())
+        self.assertIn("CHANNEL_SOCKET", logs.output[0])
+
+    @override_settings(CHANNEL_LAYERS=IPC_LAYERS)
+    def test_cross_process_layer_keeps_l1(self):
+        self.assertFalse(caching.broadcast_is_process_local())
+        self.assertEqual(caching.local_timeout(), caching.LOCAL_TIMEOUT)
+
+    @override_settings(CHANNEL_LAYERS={})
+    def test_no_layer_is_process_local(self):
+        self.assertTrue(caching.broadcast_is_process_local())
@@ -0,0 +1,50 @@
+import datetime
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .. import carts, inventory
+from ..models import Cart, CartItem, InventoryTransaction, MenuItem, Table
+from .base import RestaurantTestCase
+
+
+class CartSweeperTests(RestaurantTestCase):
+
+    def add_cart(self, username, items, age):
+        profile = self.make_profile(username)
+        table = Table.objects.create(restaurant=self.restaurant, table_number=username)
+        cart = Cart.objects.create(user_profile=profile, restaurant=self.restaurant, table=table)
+        for item, quantity in items:
+            self.assertTrue(item.reduce_stock(quantity))
+            CartItem.objects.create(cart=cart, menu_item=item, quantity=quantity)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - age)
+        return cart
+
+    def test_abandoned_carts_release_stock(self):
+        soup, bread = self.make_item("Sho‘rva", stock=10), self.make_item("Non", stock=5)
+        old = [
+            self.add_cart('old-1', [(soup, 2), (bread, 5)], datetime.timedelta(hours=3)),
+            self.add_cart('old-2', [(soup, 3)], datetime.timedelta(hours=5)),
+        ]
+        fresh = self.add_cart('fresh', [(soup, 1)], datetime.timedelta(minutes=5))
+        self.assertFalse(MenuItem.objects.get(pk=bread.pk).is_available)
+
+        metrics = carts.sweep_abandoned_carts(ttl=datetime.timedelta(hours=2), batch_size=1)
+
+        self.assertEqual(metrics, {'carts': 2, 'cart_items': 3, 'menu_items': 2, 'released_units': 10})
+        self.assertFalse(Cart.objects.filter(pk__in=[cart.pk for cart in old]).exists())
+        self.assertEqual(CartItem.objects.get().cart_id, fresh.pk)
+        soup.refresh_from_db()
+        bread.refresh_from_db()
+        self.assertEqual((soup.stock_quantity, bread.stock_quantity, bread.is_available), (9, 5, True))
+        released = InventoryTransaction.objects.filter(kind='release').values('menu_item_id').annotate(units=Sum('quantity'))
+        self.assertEqual({row['menu_item_id']: row['units'] for row in released}, {soup.pk: 5, bread.pk: 5})
+        self.assertEqual(inventory.take_snapshots()[1], {})
+
+    def test_limit_stops_the_sweep(self):
+        soup = self.make_item("Sho‘rva", stock=10)
+        for n in range(3):
+            self.add_cart(f'old-{n}', [(soup, 1)], datetime.timedelta(hours=3))
+        metrics = carts.sweep_abandoned_carts(ttl=datetime.timedelta(hours=2), batch_size=2, limit=2)
+        self.assertEqual(metrics['carts'], 2)
+        self.assertEqual(Cart.objects.count(), 1)
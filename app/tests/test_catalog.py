@@ -0,0 +1,113 @@
+import io
+import json
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..catalog import CatalogImporter, CatalogImportError
+from ..models import MenuItem, Restaurant, Table
+from .base import RestaurantTestCase
+
+
+def restaurant_rows(key, name, tables=0):
+    rows = [
+        {'kind': 'restaurant', 'key': key, 'name': name, 'owner': 'owner', 'address': "Toshkent",
+         'phone_number': '+998901234567'},
+        {'kind': 'category', 'restaurant': key, 'name': "Ichimliklar"},
+        {'kind': 'menu_item', 'restaurant': key, 'category': "Ichimliklar", 'name': "Choy", 'price': '3000',
+         'stock_quantity': '20'},
+    ]
+    rows += [{'kind': 'table', 'restaurant': key, 'table_number': str(n)} for n in range(1, tables + 1)]
+    return rows
+
+
+class CatalogImporterTests(RestaurantTestCase):
+
+    def test_imports_across_chunks(self):
+        rows = restaurant_rows('a', "Restoran main", tables=3) + restaurant_rows('b', "Restoran main")
+        importer = CatalogImporter(chunk_size=2)
+        created = importer.run(rows)
+        self.assertEqual(importer.errors, [])
+        self.assertEqual(created, {'restaurant': 2, 'category': 2, 'menu_item': 2, 'table': 3})
+        # Nomdan olingan slug mavjud va import ichidagi sluglar bilan to‘qnashmaydi
+        self.assertEqual(
+            sorted(Restaurant.objects.values_list('slug', flat=True)), ['main', 'restoran-main', 'restoran-main-1'],
+        )
+        tea = MenuItem.objects.get(restaurant__slug='restoran-main')
+        self.assertEqual((tea.category.name, tea.price, tea.is_available), ("Ichimliklar", Decimal('3000'), True))
+        qr_codes = list(Table.objects.values_list('qr_code', flat=True))
+        self.assertEqual(len(set(qr_codes)), 4)
+        self.assertTrue(all(qr_codes))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        importer = CatalogImporter()
+        importer.run([
+            {'kind': 'menu', 'name': "?"},
+            {'kind': 'category', 'restaurant': 'main', 'name': "Taomlar"},
+            {'kind': 'menu_item', 'restaurant': 'main', 'name': "Osh", 'price': 'arzon'},
+            {'kind': 'table', 'restaurant': 'main', 'table_number': '1'},
+            {'kind': 'table', 'restaurant': 'missing', 'table_number': '2'},
+            {'kind': 'table', 'restaurant': 'main', 'table_number': '2', 'qr_code': self.table.qr_code},
+            {'kind': 'table', 'restaurant': 'main', 'table_number': '3'},
+        ])
+        self.assertEqual([line for line, _error in importer.errors], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(importer.total_created, 1)
+        self.assertEqual(sorted(self.restaurant.tables.values_list('table_number', flat=True)), ['1', '3'])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def queries(tables):
+            Table.objects.exclude(pk=self.table.pk).delete()
+            with CaptureQueriesContext(connection) as context:
+                CatalogImporter().run(
+                    {'kind': 'table', 'restaurant': 'main', 'table_number': f't{n}'} for n in range(tables)
+                )
+            return len(context)
+
+        self.assertEqual(queries(5), queries(50))
+
+    def test_lost_race_fails_the_chunk(self):
+        importer = CatalogImporter()
+        # Importer band QR kodlarni o‘qigandan keyin boshqa jarayon xuddi shu kodni oladi
+        Table.objects.create(restaurant=self.restaurant, table_number='9', qr_code='taken')
+        with self.assertRaises(CatalogImportError) as caught:
+            importer.run([{'kind': 'table', 'restaurant': 'main', 'table_number': '2', 'qr_code': 'taken'}])
+        self.assertIn("1-qatordagi", str(caught.exception))
+
+
+class ImportCatalogCommandTests(RestaurantTestCase):
+
+    def import_file(self, rows, suffix='.jsonl'):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, encoding='utf-8') as fh:
+            fh.write('\n'.join(json.dumps(row) for row in rows))
+            fh.flush()
+            call_command('import_catalog', fh.name, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imports_file(self):
+        rows = restaurant_rows('a', "Yangi", tables=2) + [{'kind': 'table', 'restaurant': 'x'}]
+        stdout, stderr = self.import_file(rows)
+        self.assertIn("table: 2 ta yaratildi", stdout)
+        self.assertIn("6-qator", stderr)
+        self.assertTrue(Restaurant.objects.filter(slug='yangi').exists())
+
+    def test_failed_chunk_is_a_command_error(self):
+        Table.objects.filter(pk=self.table.pk).update(qr_code='taken')
+        original_init = CatalogImporter.__init__
+
+        def racing_init(importer, *args, **kwargs):
+            # Boshqa jarayon kodni importer band kodlarni o‘qigandan keyin egallagandek
+            original_init(importer, *args, **kwargs)
+            importer.taken_qr_codes.discard('taken')
+
+        with mock.patch.object(CatalogImporter, '__init__', racing_init):
+            with self.assertRaisesMessage(CommandError, "oldingi bo‘laklar saqlangan"):
+                self.import_file([{'kind': 'table', 'restaurant': 'main', 'table_number': '2', 'qr_code': 'taken'}])
+
+    def test_unsupported_file(self):
+        with self.assertRaises(CommandError):
+            self.import_file([], suffix='.xml')
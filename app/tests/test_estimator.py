@@ -0,0 +1,95 @@
+import datetime
+
+import numpy as np
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from .. import estimator
+from ..models import OrderItem, OrderStatusTransition, PrepTimeModel
+from .base import RestaurantTestCase
+
+
+class QueueDepthTests(SimpleTestCase):
+
+    def test_depth_counts_orders_in_the_same_kitchen(self):
+        depth = estimator._queue_depth(
+            np.array([1, 1, 1, 2]),
+            np.array([0.0, 5.0, 20.0, 6.0]),
+            np.array([10.0, 15.0, np.inf, 7.0]),
+        )
+        self.assertEqual(depth.tolist(), [0, 1, 0, 0])
+
+
+class FitTests(SimpleTestCase):
+
+    def test_recovers_base_and_load(self):
+        depth = np.arange(20, dtype=np.float64) % 5
+        samples = {
+            'order_ids': np.arange(20),
+            'restaurant_ids': np.ones(20, dtype=np.int64),
+            'kitchen_minutes': 10 + 2 * depth,
+            'queue_depth': depth,
+            'accepted_at': np.arange(20, dtype=np.float64),
+            'item_order_idx': np.arange(20),
+            'item_ids': np.full(20, 7),
+            'item_static_minutes': np.full(20, 5.0),
+        }
+        base, load, items, sample_size = estimator.fit(samples)[1]
+        self.assertAlmostEqual(base, 10)
+        self.assertAlmostEqual(load, 2)
+        self.assertEqual((items, sample_size), ({7: 10.0}, 20))
+        report = estimator.evaluate(samples, holdout=0.2)
+        self.assertEqual(report['test_orders'], 4)
+        self.assertAlmostEqual(report['learned_mae'], 0)
+        self.assertGreater(report['static_mae'], 5)
+
+
+class LearnedEstimateTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item("Osh", preparation_time=5)
+        self.start = timezone.now() - datetime.timedelta(hours=2)
+
+    def history(self, accepted, ended=None, end_status='ready'):
+        # Boshlang‘ich 'pending' o‘tishi namunalarga kirmaydi
+        order = self.make_order()
+        OrderItem.objects.create(order=order, menu_item=self.item, quantity=1, price=self.item.price)
+        for status, minutes in (('accepted', accepted), (end_status, ended)):
+            if minutes is not None:
+                OrderStatusTransition.objects.create(
+                    order=order, restaurant=self.restaurant, to_status=status,
+                    created_at=self.start + datetime.timedelta(minutes=minutes),
+                )
+        return order
+
+    def test_samples_follow_the_kitchen_queue(self):
+        self.history(0, 3, end_status='cancelled')
+        self.history(1)
+        # Yakunlanmagan juda eski buyurtma navbatni band qilmaydi
+        self.history(-600)
+        done = self.history(5, 25)
+        samples = estimator.load_samples()
+        self.assertEqual(samples['order_ids'].tolist(), [done.pk])
+        self.assertEqual(samples['queue_depth'].tolist(), [1])
+        self.assertEqual(samples['kitchen_minutes'].tolist(), [20])
+        self.assertEqual(samples['item_ids'].tolist(), [self.item.pk])
+
+    def test_refit_replaces_the_static_estimate(self):
+        for n in range(estimator.MIN_SAMPLES - 1):
+            self.history(n * 30, n * 30 + 20)
+        self.assertEqual(estimator.refit(), 0)
+        self.assertEqual(PrepTimeModel.estimate(self.restaurant.pk, {self.item.pk: 5}, 0), 5)
+
+        self.history(600, 620)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(estimator.refit(), 1)
+        model = PrepTimeModel.objects.get(restaurant=self.restaurant)
+        self.assertEqual((model.base_minutes, model.sample_size), (20, estimator.MIN_SAMPLES))
+        self.assertAlmostEqual(PrepTimeModel.estimate(self.restaurant.pk, {self.item.pk: 5}, 0), 20, places=1)
+
+        order = self.make_order(status='accepted')
+        OrderItem.objects.create(order=order, menu_item=self.item, quantity=1, price=self.item.price)
+        order.calculate_estimated_delivery()
+        minutes = (order.estimated_delivery_time - order.created_at).total_seconds() / 60
+        self.assertAlmostEqual(minutes, 20, places=1)
@@ -0,0 +1,76 @@
+import datetime
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .. import forecast
+from ..models import Order, OrderItem, RestockSuggestion
+from .base import RestaurantTestCase
+
+# Dushanba, 10:00 (TIME_ZONE = UTC)
+MONDAY_10 = datetime.datetime(2026, 10, 19, 10, tzinfo=datetime.timezone.utc)
+
+
+class ProjectTests(SimpleTestCase):
+
+    def test_stockout_and_suggestion(self):
+        # Birinchi element soatiga 1 dona sotiladi, ikkinchisi sotilmaydi
+        matrix = np.stack([np.ones((7, 24)), np.zeros((7, 24))])
+        daily, stockout, suggested = forecast.project(
+            matrix, np.array([5.0, 3.0]), MONDAY_10, horizon_hours=48, cover_hours=72, safety_factor=1.2,
+        )
+        self.assertEqual(daily.tolist(), [24, 0])
+        self.assertEqual(stockout[0], 5)
+        self.assertTrue(np.isnan(stockout[1]))
+        self.assertEqual(suggested.tolist(), [82, 0])
+
+    def test_empty_stock_is_out_now(self):
+        _daily, stockout, _suggested = forecast.project(np.zeros((1, 7, 24)), np.array([0.0]), MONDAY_10, 24, 24, 1)
+        self.assertEqual(stockout.tolist(), [0])
+
+    def test_demand_is_taken_from_the_coming_hours(self):
+        matrix = np.zeros((1, 7, 24))
+        # Seshanba 01:00 dagi talab dushanba 10:00 dan 16-soatda keladi
+        matrix[0, 1, 1] = 10
+        _daily, stockout, _suggested = forecast.project(matrix, np.array([10.0]), MONDAY_10, 24, 24, 1)
+        self.assertEqual(stockout.tolist(), [16])
+
+
+class RefreshTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.soup = self.make_item("Sho‘rva", stock=3)
+        self.bread = self.make_item("Non", stock=50)
+        self.unsold = self.make_item("Manti")
+
+    def sell(self, item, quantity, weeks_ago, status='served'):
+        order = self.make_order(status=status)
+        OrderItem.objects.create(order=order, menu_item=item, quantity=quantity, price=item.price)
+        Order.objects.filter(pk=order.pk).update(created_at=MONDAY_10 - datetime.timedelta(weeks=weeks_ago))
+
+    def test_demand_matrix(self):
+        self.sell(self.soup, 4, weeks_ago=1)
+        self.sell(self.soup, 2, weeks_ago=2)
+        self.sell(self.soup, 9, weeks_ago=1, status='cancelled')
+        # Oyna tashqarisidagi sotuv hisoblanmaydi
+        self.sell(self.soup, 7, weeks_ago=5)
+        item_ids = np.array(sorted([self.soup.pk, self.bread.pk]))
+        matrix = forecast.demand_matrix(item_ids, weeks=2, now=MONDAY_10)
+        self.assertEqual(matrix.shape, (2, 7, 24))
+        self.assertEqual(matrix[0, 0, 10], 3)
+        self.assertEqual(matrix.sum(), 3)
+
+    def test_refresh_replaces_suggestions(self):
+        self.sell(self.soup, 6, weeks_ago=1)
+        self.sell(self.bread, 1, weeks_ago=1)
+        RestockSuggestion.objects.create(restaurant=self.restaurant, menu_item=self.unsold, daily_demand=1)
+        self.assertEqual(forecast.refresh(weeks=1, cover_days=7, safety_factor=1, now=MONDAY_10), 2)
+        suggestions = {s.menu_item_id: s for s in RestockSuggestion.objects.all()}
+        self.assertEqual(set(suggestions), {self.soup.pk, self.bread.pk})
+        soup = suggestions[self.soup.pk]
+        # Haftalik 6 dona dushanba 10:00 da: zaxira 3 shu soatning o‘zida tugaydi
+        self.assertEqual((soup.daily_demand, soup.suggested_quantity), (round(6 / 7, 2), 3))
+        self.assertEqual(soup.projected_stockout_at, MONDAY_10 + datetime.timedelta(hours=1))
+        bread = suggestions[self.bread.pk]
+        self.assertEqual((bread.suggested_quantity, bread.projected_stockout_at), (0, None))
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import Http404
+
+from .. import identity
+from ..models import Restaurant, Staff, UserProfile
+from .base import RestaurantTestCase, login, page_url
+
+
+class IdentityTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = self.make_restaurant('other', owner=User.objects.create_user('other-owner'))
+        self.session = {}
+
+    def request(self, user=None):
+        return SimpleNamespace(user=user or self.owner, session=self.session)
+
+    def test_one_query_for_profile_ownership_and_roles(self):
+        first = UserProfile.objects.create(user=self.owner)
+        UserProfile.objects.create(user=self.owner)
+        Staff.objects.create(user=self.owner, restaurant=self.other, role='waiter')
+        with self.assertNumQueries(1):
+            found = identity.query(self.owner.pk)
+        self.assertEqual(found.profile_id, first.pk)
+        self.assertEqual(found.owned('main'), self.restaurant.pk)
+        self.assertIsNone(found.owned('other'))
+        self.assertEqual(found.staff('other', 'waiter')[0], self.other.pk)
+        self.assertIsNone(found.staff('other', 'chef'))
+        self.assertIsNone(found.staff('main', 'waiter'))
+
+    def test_session_reused_until_version_changes(self):
+        identity.load(self.request())
+        with self.assertNumQueries(0):
+            self.assertEqual(identity.load(self.request()).owned('main'), self.restaurant.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Staff.objects.create(user=self.owner, restaurant=self.other, role='waiter')
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(identity.load(self.request()).staff('other', 'waiter'))
+        self.assertIs(identity.load(self.request(AnonymousUser())), identity.ANONYMOUS)
+
+    def test_memoized_per_request(self):
+        request = self.request()
+        self.assertIs(identity.get(request), identity.get(request))
+
+    def test_restaurant_signal_ignores_unrelated_updates(self):
+        identity.load(self.request())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = "Yangi nom"
+            self.restaurant.save(update_fields=['name'])
+        with self.assertNumQueries(0):
+            identity.load(self.request())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.slug = 'renamed'
+            self.restaurant.save(update_fields=['slug'])
+        self.assertEqual(identity.load(self.request()).owned('renamed'), self.restaurant.pk)
+
+    def test_owned_restaurant_rechecks_owner(self):
+        request = self.request()
+        self.assertEqual(identity.owned_restaurant(request, 'main'), self.restaurant)
+        with self.assertRaises(Http404):
+            identity.owned_restaurant(request, 'other')
+        # Signalsiz egalik o‘zgarishi: sessiya eskirgan, lekin qatordagi owner qayta tekshiriladi
+        Restaurant.objects.filter(pk=self.restaurant.pk).update(owner=self.other.owner)
+        with self.assertRaises(Http404):
+            identity.owned_restaurant(self.request(), 'main')
+
+    def test_staff_member_rechecks_row(self):
+        waiter = self.make_staff('waiter')
+        restaurant, staff = identity.staff_member(self.request(waiter.user), 'main', 'waiter')
+        self.assertEqual((restaurant, staff), (self.restaurant, waiter))
+        with self.assertRaises(Http404):
+            identity.staff_member(self.request(waiter.user), 'main', 'chef')
+        Staff.objects.filter(pk=waiter.pk).update(role='chef')
+        with self.assertRaises(Http404):
+            identity.staff_member(self.request(waiter.user), 'main', 'waiter')
+
+
+class IdentityViewTests(RestaurantTestCase):
+
+    def test_panels_follow_role_changes(self):
+        waiter = self.make_staff('waiter')
+        url = page_url('restaurant:waiter_dashboard', slug='main')
+        login(self.client, waiter.user)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(page_url('restaurant:owner_dashboard', slug='main')).status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            waiter.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
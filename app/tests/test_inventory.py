@@ -0,0 +1,35 @@
+from .. import inventory
+from ..models import InventoryLedger, InventoryTransaction, MenuItem
+from .base import RestaurantTestCase
+
+
+class InventoryLedgerTests(RestaurantTestCase):
+
+    def test_ledger_changes_reconcile_and_direct_updates_drift(self):
+        item = self.make_item("Osh", stock=10)
+        self.assertEqual(inventory.take_snapshots()[1], {})
+
+        self.assertTrue(item.reduce_stock(3))
+        with InventoryLedger() as ledger:
+            self.assertFalse(ledger.change(item, -100, 'order'))
+            ledger.change(item, 5, 'restock', "To‘ldirildi")
+        self.assertEqual(MenuItem.objects.get(pk=item.pk).stock_quantity, 12)
+        self.assertEqual(inventory.take_snapshots()[1], {})
+
+        # Jurnaldan tashqari o‘zgarish solishtirishda nomuvofiqlik sifatida chiqadi
+        MenuItem.objects.filter(pk=item.pk).update(stock_quantity=20)
+        self.assertEqual(inventory.take_snapshots()[1], {item.pk: (12, 20)})
+
+    def test_set_quantity_records_the_difference(self):
+        item = self.make_item("Somsa", stock=4)
+        self.assertEqual(inventory.take_snapshots()[1], {})
+        with InventoryLedger() as ledger:
+            ledger.set_quantity(item, 9, 'adjustment', "Tahrir")
+        self.assertEqual(list(InventoryTransaction.objects.values_list('quantity', 'kind')), [(5, 'adjustment')])
+        self.assertEqual(inventory.take_snapshots()[1], {})
+
+    def test_stock_running_out_makes_item_unavailable(self):
+        item = self.make_item("Lag‘mon", stock=2)
+        self.assertTrue(item.reduce_stock(2))
+        self.assertFalse(MenuItem.objects.get(pk=item.pk).is_available)
+        self.assertFalse(item.reduce_stock(1))
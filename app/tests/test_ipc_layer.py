@@ -0,0 +1,155 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+from channels.exceptions import ChannelFull
+from django.test import SimpleTestCase
+
+from ..ipc_layer import Broker, IPCChannelLayer, encode_frame, read_frame
+
+
+class FrameTests(SimpleTestCase):
+
+    def test_round_trip_keeps_bytes(self):
+        payload = {'id': 1, 'args': ['chat', {'type': 'x', 'bytes': b'\x00\xff', 'text': "salom"}]}
+
+        async def decode():
+            reader = asyncio.StreamReader()
+            reader.feed_data(encode_frame(payload))
+            reader.feed_eof()
+            return await read_frame(reader), await read_frame(reader)
+
+        self.assertEqual(asyncio.run(decode()), (payload, None))
+
+
+class IPCChannelLayerTests(SimpleTestCase):
+    """Broker alohida oqimning hodisalar tsiklida, mijozlar har bir testda yangi tsiklda ishlaydi."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'channels.sock')
+        self.broker = Broker(self.path, capacity=2)
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.run_broker, args=(ready,), daemon=True)
+        thread.start()
+        self.assertTrue(ready.wait(5))
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.stop_broker)
+
+    def run_broker(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.create_task(self.broker.serve(ready.set))
+        try:
+            self.loop.run_until_complete(self.server)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def stop_broker(self):
+        self.loop.call_soon_threadsafe(self.server.cancel)
+
+    def layer(self, **config):
+        return IPCChannelLayer(path=self.path, **config)
+
+    def run_clients(self, coroutine_function, *layers):
+        async def main():
+            try:
+                return await coroutine_function()
+            finally:
+                for layer in layers:
+                    await layer.close()
+
+        return asyncio.run(main())
+
+    def test_processes_share_channels_and_groups(self):
+        first, second = self.layer(), self.layer()
+
+        async def exchange():
+            a, b = await first.new_channel(), await second.new_channel()
+            await first.group_add('orders', a)
+            await second.group_add('orders', b)
+            await second.group_send('orders', {'type': 'order.update', 'raw': b'\x01'})
+            received = [await first.receive(a), await second.receive(b)]
+            await first.send(b, {'type': 'direct'})
+            received.append(await second.receive(b))
+            return received
+
+        self.assertEqual(self.run_clients(exchange, first, second), [
+            {'type': 'order.update', 'raw': b'\x01'},
+            {'type': 'order.update', 'raw': b'\x01'},
+            {'type': 'direct'},
+        ])
+
+    def test_connection_per_event_loop(self):
+        layer = self.layer()
+
+        async def roundtrip():
+            channel = await layer.new_channel()
+            await layer.send(channel, {'type': 'ping'})
+            return await layer.receive(channel)
+
+        # async_to_sync kabi: har chaqiruv yangi tsiklda
+        self.assertEqual(asyncio.run(roundtrip()), {'type': 'ping'})
+        self.assertEqual(asyncio.run(roundtrip()), {'type': 'ping'})
+        self.assertEqual(len(layer._connections), 1)
+
+    def test_capacity_is_enforced_by_the_broker(self):
+        layer = self.layer()
+
+        async def overfill():
+            channel = await layer.new_channel()
+            await layer.send(channel, {'type': 'a'})
+            await layer.send(channel, {'type': 'b'})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {'type': 'c'})
+
+        self.run_clients(overfill, layer)
+
+    def test_cancelled_receive_does_not_lose_the_message(self):
+        layer = self.layer()
+
+        async def cancel_then_receive():
+            channel = await layer.new_channel()
+            waiting = asyncio.ensure_future(layer.receive(channel))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            await layer.send(channel, {'type': 'late'})
+            return await asyncio.wait_for(layer.receive(channel), timeout=5)
+
+        self.assertEqual(self.run_clients(cancel_then_receive, layer), {'type': 'late'})
+
+    def test_invalid_names_are_rejected_locally(self):
+        layer = self.layer()
+
+        async def send_bad():
+            with self.assertRaises(TypeError):
+                await layer.send('bad name!', {'type': 'x'})
+            with self.assertRaises(AssertionError):
+                await layer.group_send('orders', 'not a dict')
+
+        self.run_clients(send_bad, layer)
+
+
+class BrokerSocketTests(SimpleTestCase):
+
+    def test_stale_socket_file_is_replaced(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'channels.sock')
+            # Oldingi jarayondan qolgan fayl
+            open(path, 'w').close()
+
+            async def serve_briefly():
+                ready = asyncio.Event()
+                task = asyncio.ensure_future(Broker(path).serve(ready.set))
+                await ready.wait()
+                mode = os.stat(path).st_mode & 0o777
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return mode
+
+            self.assertEqual(asyncio.run(serve_briefly()), 0o600)
+            self.assertFalse(os.path.exists(path))
@@ -0,0 +1,58 @@
+from .. import archive, item_ratings
+from ..models import MenuItemRating, OrderItem, Review
+from .base import RestaurantTestCase
+
+
+class ItemRatingTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.soup, self.bread = self.make_item("Sho‘rva"), self.make_item("Non")
+        self.order = self.reviewed_order(self.soup, self.soup, self.bread)
+
+    def reviewed_order(self, *items, status='served'):
+        order = self.make_order(status=status)
+        OrderItem.objects.bulk_create([OrderItem(order=order, menu_item=item, quantity=1, price=item.price) for item in items])
+        return order
+
+    def histogram(self, item):
+        rating = MenuItemRating.objects.get(menu_item=item)
+        return rating.rating_count, rating.rating_sum, [getattr(rating, item_ratings.star_field(s)) for s in item_ratings.STARS]
+
+    def test_review_counts_once_per_item(self):
+        Review.objects.create(order=self.order, rating=4)
+        self.assertEqual(self.histogram(self.soup), (1, 4, [0, 0, 0, 1, 0]))
+        self.assertEqual(self.histogram(self.bread), (1, 4, [0, 0, 0, 1, 0]))
+
+    def test_edit_moves_the_star(self):
+        review = Review.objects.create(order=self.order, rating=4)
+        review.rating = 2
+        review.save()
+        self.assertEqual(self.histogram(self.soup), (1, 2, [0, 1, 0, 0, 0]))
+
+    def test_delete_removes_the_rating(self):
+        Review.objects.create(order=self.order, rating=5)
+        review = Review.objects.create(order=self.order, rating=3)
+        review.delete()
+        self.assertEqual(self.histogram(self.soup), (1, 5, [0, 0, 0, 0, 1]))
+
+    def test_order_delete_removes_its_rating(self):
+        # Kaskadda elementlar sharhdan oldin o‘chadi
+        Review.objects.create(order=self.order, rating=5)
+        self.order.delete()
+        self.assertEqual(self.histogram(self.soup), (0, 0, [0, 0, 0, 0, 0]))
+
+    def test_archived_review_stays(self):
+        Review.objects.create(order=self.order, rating=5)
+        self.assertEqual(archive.archive_chunk([self.order.pk]), 1)
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual(self.histogram(self.soup), (1, 5, [0, 0, 0, 0, 1]))
+
+    def test_rebuild_matches_incremental(self):
+        Review.objects.create(order=self.order, rating=5)
+        Review.objects.create(order=self.reviewed_order(self.soup), rating=1)
+        archive.archive_chunk([self.order.pk])
+        incremental = self.histogram(self.soup), self.histogram(self.bread)
+        MenuItemRating.objects.all().delete()
+        self.assertEqual(item_ratings.rebuild(chunk_size=1), 2)
+        self.assertEqual((self.histogram(self.soup), self.histogram(self.bread)), incremental)
@@ -0,0 +1,82 @@
+import datetime
+from unittest import mock
+
+from django.utils import timezone
+
+from .. import jobs
+from ..models import BackgroundJob
+from .base import RestaurantTestCase
+
+
+class JobQueueTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.failing = mock.Mock(side_effect=RuntimeError("yiqildi"))
+        patcher = mock.patch.dict(jobs._registry, {
+            'record': lambda **payload: self.calls.append(payload),
+            'fail': self.failing,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue(self):
+        first = jobs.enqueue('record', unique=True, order_id=1)
+        self.assertEqual(jobs.enqueue('record', unique=True, order_id=1).pk, first.pk)
+        jobs.enqueue('record', order_id=1)
+        self.assertEqual(BackgroundJob.objects.count(), 2)
+        with self.assertRaises(KeyError):
+            jobs.enqueue('missing')
+
+    def test_dequeue_leases_each_job_once(self):
+        jobs.enqueue_many([('record', {'n': n}) for n in range(3)])
+        jobs.enqueue('record', delay=datetime.timedelta(minutes=5), n=3)
+        leased = jobs.dequeue(batch_size=2)
+        self.assertEqual([job.payload['n'] for job in leased], [0, 1])
+        self.assertEqual(len({job.lease_token for job in leased}), 1)
+        self.assertEqual([job.payload['n'] for job in jobs.dequeue()], [2])
+        # Kechiktirilgan vazifa vaqti kelmaguncha olinmaydi
+        self.assertEqual(jobs.dequeue(), [])
+
+    def test_expired_lease_is_taken_over(self):
+        jobs.enqueue('fail')
+        crashed = jobs.dequeue()
+        BackgroundJob.objects.update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        taken_over = jobs.dequeue()
+        self.assertEqual([job.pk for job in taken_over], [crashed[0].pk])
+        # Ijarasi tugagan eski ishchi natijasi yangi ijarani buzmaydi
+        with self.assertLogs('app.jobs', 'WARNING'):
+            jobs.run_batch(crashed)
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.lease_token), ('running', 0, taken_over[0].lease_token))
+
+    def test_run_batch(self):
+        jobs.enqueue('record', n=1)
+        jobs.enqueue('fail', max_attempts=2)
+        with self.assertLogs('app.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_batch(jobs.dequeue()), (1, 1))
+        self.assertEqual(self.calls, [{'n': 1}])
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_until), ('queued', 1, None))
+        self.assertIn("yiqildi", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + datetime.timedelta(seconds=jobs.BACKOFF_BASE_SECONDS - 1))
+
+        BackgroundJob.objects.update(run_at=timezone.now())
+        with self.assertLogs('app.jobs', 'WARNING'):
+            jobs.run_batch(jobs.dequeue())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(jobs.dequeue(), [])
+
+    def test_backoff_is_capped(self):
+        self.assertEqual(jobs._backoff(1), datetime.timedelta(seconds=jobs.BACKOFF_BASE_SECONDS))
+        self.assertEqual(jobs._backoff(30), datetime.timedelta(seconds=jobs.BACKOFF_MAX_SECONDS))
+
+    def test_work_drains_the_queue(self):
+        jobs.enqueue_many([('record', {'n': n}) for n in range(5)])
+        # Test tranzaksiyasi ichida ulanish yopilmaydi
+        with mock.patch.object(jobs.connection, 'close'):
+            self.assertEqual(jobs.work(batch_size=2, once=True), (5, 0))
+        self.assertEqual([call['n'] for call in self.calls], list(range(5)))
+        self.assertFalse(BackgroundJob.objects.exists())
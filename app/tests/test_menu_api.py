@@ -0,0 +1,106 @@
+import gzip
+import json
+from decimal import Decimal
+
+from .. import item_ratings
+from ..models import Cart, CartItem, MenuItem, OrderItem, Review
+from .base import RestaurantTestCase, login, page_url
+
+
+class MenuDocumentTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.soup = self.make_item("Sho‘rva", price=15000, stock=7)
+        self.tea = self.make_item("Choy", price=3000)
+        # Kategoriyasiz element "Boshqa" bo‘limiga tushadi
+        MenuItem.objects.filter(pk=self.tea.pk).update(category=None)
+        self.url = page_url('restaurant:api_table_menu', self.table.qr_code)
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_document_layout(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        document = json.loads(response.content)
+        self.assertEqual(document['fields'], ['id', 'name', 'price', 'available', 'image'])
+        self.assertEqual(document['restaurant']['slug'], 'main')
+        self.assertEqual(
+            [(section['name'], section['items']) for section in document['categories']],
+            [("Taomlar", [[self.soup.pk, "Sho‘rva", '15000.00', True, None]]),
+             ("Boshqa", [[self.tea.pk, "Choy", '3000.00', True, None]])],
+        )
+        # Jonli zaxira hujjatda yo‘q
+        self.assertNotIn(b'stock', response.content)
+
+    def test_selected_fields_and_ratings(self):
+        order = self.make_order()
+        OrderItem.objects.create(order=order, menu_item=self.soup, quantity=1, price=self.soup.price)
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(order=order, rating=4)
+        response = self.client.get(self.url, {'fields': 'name,rating,rating_counts'})
+        items = json.loads(response.content)['categories'][0]['items']
+        self.assertEqual(items, [["Sho‘rva", 4.0, [0, 0, 0, 1, 0]]])
+        self.assertEqual(self.client.get(self.url, {'fields': 'name,stock'}).status_code, 400)
+
+    def test_gzip_and_conditional_get(self):
+        plain = self.get()
+        compressed = self.get(**{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertEqual(self.get(**{'If-None-Match': plain['ETag']}).status_code, 304)
+
+    def test_cached_document_needs_no_queries(self):
+        self.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get().status_code, 200)
+
+    def test_menu_edit_builds_a_new_document(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup.price = 16000
+            self.soup.save()
+        response = self.get(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('16000.00', response.content.decode())
+
+    def test_unknown_table(self):
+        self.assertEqual(self.client.get(page_url('restaurant:api_table_menu', 'missing')).status_code, 404)
+
+    def test_histogram_rebuild_shows_in_document(self):
+        order = self.make_order()
+        OrderItem.objects.create(order=order, menu_item=self.tea, quantity=1, price=self.tea.price)
+        Review.objects.bulk_create([Review(order=order, rating=5)])
+        with self.captureOnCommitCallbacks(execute=True):
+            item_ratings.rebuild()
+        response = self.client.get(self.url, {'fields': 'id,rating'})
+        self.assertEqual(json.loads(response.content)['categories'][1]['items'], [[self.tea.pk, 5.0]])
+
+
+class CartEndpointTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = page_url('restaurant:api_table_cart', self.table.qr_code)
+
+    def test_anonymous(self):
+        self.assertEqual(
+            self.client.get(self.url).json(),
+            {'fields': ['menu_item_id', 'quantity', 'price'], 'items': [], 'total': 0, 'stock': {},
+             'login_required': True},
+        )
+
+    def test_cart_lines_with_live_stock(self):
+        profile = self.make_profile('guest')
+        login(self.client, profile.user)
+        soup = self.make_item("Sho‘rva", price=15000, stock=7)
+        cart = Cart.objects.create(user_profile=profile, restaurant=self.restaurant, table=self.table)
+        CartItem.objects.create(cart=cart, menu_item=soup, quantity=2)
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['items'], [[soup.pk, 2, '15000.00']])
+        self.assertEqual(Decimal(data['total']), Decimal('30000'))
+        self.assertEqual(data['stock'], {str(soup.pk): 7})
+        self.assertFalse(data['login_required'])
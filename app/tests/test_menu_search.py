@@ -0,0 +1,93 @@
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .. import menu_api
+from ..models import Cart, CartItem, MenuItem
+from .base import RestaurantTestCase, page_url
+
+
+class CurrentPriceTests(RestaurantTestCase):
+
+    def test_column_follows_discount(self):
+        item = self.make_item("Osh", price=30000)
+        item.refresh_from_db()
+        self.assertEqual(item.current_price, Decimal('30000'))
+        item.discount_price = Decimal('25000')
+        item.save()
+        item.refresh_from_db()
+        self.assertEqual(item.current_price, item.effective_price)
+        self.assertEqual(item.current_price, Decimal('25000'))
+
+    def test_price_between_is_inclusive_and_uses_discount(self):
+        cheap = self.make_item("Choy", price=3000)
+        discounted = self.make_item("Osh", price=30000, discount_price=Decimal('20000'))
+        self.make_item("Kabob", price=45000)
+        found = MenuItem.objects.price_between(Decimal('3000'), Decimal('20000'))
+        self.assertEqual(set(found.values_list('pk', flat=True)), {cheap.pk, discounted.pk})
+        self.assertEqual(MenuItem.objects.price_between().count(), 3)
+        self.assertEqual(MenuItem.objects.price_between(low=Decimal('20001')).count(), 1)
+
+    def test_cart_total_uses_discounted_price(self):
+        cart = Cart.objects.create(user_profile=self.make_profile('guest'), restaurant=self.restaurant, table=self.table)
+        CartItem.objects.create(cart=cart, menu_item=self.make_item("Choy", price=3000), quantity=2)
+        CartItem.objects.create(
+            cart=cart, menu_item=self.make_item("Osh", price=30000, discount_price=Decimal('25000')), quantity=1,
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.total_price, Decimal('31000'))
+
+
+class MenuSearchViewTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tea = self.make_item("Choy", price=3000)
+        self.plov = self.make_item("Osh", price=30000, discount_price=Decimal('20000'))
+        self.kebab = self.make_item("Kabob", price=20000)
+        self.make_item("Manti", price=25000, is_available=False)
+        self.url = page_url('restaurant:api_table_menu_search', self.table.qr_code)
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        return response.status_code, json.loads(response.content)
+
+    def ids(self, **params):
+        status, data = self.search(fields='id', **params)
+        self.assertEqual(status, 200)
+        return [row[0] for row in data['items']]
+
+    def test_sorting_and_filters(self):
+        # Teng narxlarda id bo‘yicha barqaror tartib; sotuvda bo‘lmagan element chiqmaydi
+        self.assertEqual(self.ids(), [self.tea.pk, self.plov.pk, self.kebab.pk])
+        self.assertEqual(self.ids(sort='-price'), [self.kebab.pk, self.plov.pk, self.tea.pk])
+        self.assertEqual(self.ids(sort='name'), [self.tea.pk, self.kebab.pk, self.plov.pk])
+        self.assertEqual(self.ids(min_price='4000', max_price='20000'), [self.plov.pk, self.kebab.pk])
+        self.assertEqual(self.ids(q='os'), [self.plov.pk])
+        _status, data = self.search(fields='name,price,base_price', q='osh')
+        self.assertEqual(data['items'], [["Osh", '20000.00', '30000.00']])
+
+    def test_pages_without_count(self):
+        MenuItem.objects.bulk_create([
+            MenuItem(restaurant=self.restaurant, name=f"Salat {n:02}", price=1000 + n, stock_quantity=1)
+            for n in range(menu_api.SEARCH_PAGE_SIZE)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            _status, first = self.search(fields='id')
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+        self.assertEqual((len(first['items']), first['page'], first['next_page']), (menu_api.SEARCH_PAGE_SIZE, 1, 2))
+        _status, second = self.search(fields='id', page=2)
+        self.assertEqual((len(second['items']), second['next_page']), (3, None))
+        self.assertFalse({row[0] for row in first['items']} & {row[0] for row in second['items']})
+
+    def test_bad_input(self):
+        for params in ({'sort': 'rating'}, {'min_price': 'arzon'}, {'max_price': '-1'}, {'max_price': 'NaN'},
+                       {'page': '0'}, {'page': 'x'}, {'fields': 'id,secret'}):
+            with self.subTest(params=params):
+                status, data = self.search(**params)
+                self.assertEqual(status, 400)
+                self.assertIn('error', data)
+        response = self.client.get(page_url('restaurant:api_table_menu_search', 'missing'))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from ..catalog import CatalogImportError, MenuSync
+from ..models import MenuItem
+from .base import RestaurantTestCase
+
+
+class MenuSyncTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.soup = self.make_item("Sho‘rva", price=15000)
+        self.bread = self.make_item("Non", price=3000)
+
+    def test_diff_and_apply(self):
+        sync = MenuSync(self.restaurant)
+        sync.diff([
+            {'id': str(self.soup.pk), 'price': '17000', 'category': "Issiq taomlar"},
+            {'name': "Non", 'price': '3000'},
+            {'name': "Choy", 'price': '2000', 'category': "Ichimliklar", 'stock_quantity': '40'},
+        ])
+        summary = sync.summary()
+        self.assertEqual(summary['errors'], [])
+        self.assertEqual(summary['unchanged'], 1)
+        self.assertEqual(summary['update'][0]['changes']['price'], ['15000.00', '17000'])
+        self.assertEqual([row['name'] for row in summary['create']], ["Choy"])
+        self.assertEqual(summary['delete'], [])
+        self.assertEqual(sorted(summary['new_categories']), ["Ichimliklar", "Issiq taomlar"])
+
+        sync.apply()
+        self.soup.refresh_from_db()
+        self.assertEqual((self.soup.price, self.soup.category.name), (Decimal('17000'), "Issiq taomlar"))
+        tea = MenuItem.objects.get(restaurant=self.restaurant, name="Choy")
+        self.assertEqual((tea.stock_quantity, tea.is_available, tea.category.name), (40, True, "Ichimliklar"))
+        self.assertTrue(MenuItem.objects.filter(pk=self.bread.pk).exists())
+
+    def test_delete_missing_is_opt_in(self):
+        rows = [{'name': "Sho‘rva", 'price': '15000'}]
+        sync = MenuSync(self.restaurant)
+        sync.diff(rows)
+        self.assertFalse(sync.has_changes)
+
+        sync = MenuSync(self.restaurant, delete_missing=True)
+        sync.diff(rows)
+        self.assertEqual(sync.summary()['delete'], [{'id': self.bread.pk, 'name': "Non"}])
+        sync.apply()
+        self.assertEqual(list(self.restaurant.menu_items.values_list('name', flat=True)), ["Sho‘rva"])
+
+    def test_empty_sheet_never_deletes(self):
+        sync = MenuSync(self.restaurant, delete_missing=True)
+        sync.diff([])
+        self.assertTrue(sync.errors)
+        with self.assertRaises(CatalogImportError):
+            sync.apply()
+        self.assertEqual(self.restaurant.menu_items.count(), 2)
+
+    def test_errors_block_the_whole_sheet(self):
+        sync = MenuSync(self.restaurant)
+        sync.diff([
+            {'name': "Manti", 'price': '12000'},
+            {'name': "Kabob"},
+            {'id': '999999', 'price': '1'},
+        ])
+        self.assertEqual([line for line, _error in sync.errors], [2, 3])
+        with self.assertRaises(CatalogImportError):
+            sync.apply()
+        self.assertFalse(MenuItem.objects.filter(name="Manti").exists())
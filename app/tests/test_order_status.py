@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.contrib.messages import get_messages
+
+from ..models import InvalidStatusTransition, Order, OrderEvent, OrderStatusTransition, StaleOrderError
+from .base import RestaurantTestCase, admin_login, page_url
+
+
+class OrderStatusTests(RestaurantTestCase):
+
+    def test_transition_table(self):
+        order = self.make_order()
+        for status in ('accepted', 'preparing', 'ready', 'served'):
+            order.update_status(status)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), ('served', 4))
+        self.assertEqual(
+            list(OrderStatusTransition.objects.filter(order=order).order_by('id').values_list('from_status', 'to_status')),
+            [('', 'pending'), ('pending', 'accepted'), ('accepted', 'preparing'), ('preparing', 'ready'), ('ready', 'served')],
+        )
+        self.assertEqual(OrderEvent.objects.filter(order_id=order.pk, event_type='status_changed').count(), 4)
+
+    def test_invalid_transition_changes_nothing(self):
+        order = self.make_order()
+        with self.assertRaises(InvalidStatusTransition):
+            order.update_status('served')
+        order.update_status('cancelled')
+        with self.assertRaises(InvalidStatusTransition):
+            order.update_status('accepted')
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), ('cancelled', 1))
+
+    def test_expected_version_mismatch(self):
+        order = self.make_order()
+        with self.assertRaises(StaleOrderError):
+            order.update_status('accepted', expected_version=3)
+        self.assertEqual(Order.objects.get(pk=order.pk).version, 0)
+
+    def test_stale_instance(self):
+        order = self.make_order()
+        Order.objects.get(pk=order.pk).update_status('accepted')
+        with self.assertRaises(StaleOrderError):
+            order.update_status('cancelled')
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.version), ('accepted', 1))
+
+
+class OrderAdminStatusTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        admin_login(self.client)
+        self.order = self.make_order()
+        self.url = page_url('admin:app_order_change', self.order.pk)
+
+    def open_form(self):
+        """Tahrirlash sahifasini ochadi va shu paytdagi qiymatlar bilan POST ma’lumotini qaytaradi."""
+        form = self.client.get(self.url).context['adminform'].form
+        return {
+            'restaurant': self.restaurant.pk,
+            'user_profile': '',
+            'table': self.table.pk,
+            'status': form['status'].value(),
+            'total_price': '0',
+            'discount_amount': '0',
+            'payment_method': '',
+            'notes': '',
+            'estimated_delivery_time_0': '',
+            'estimated_delivery_time_1': '',
+            'assigned_waiter': '',
+            'expected_version': form['expected_version'].value(),
+            '_save': "Saqlash",
+        }
+
+    def test_status_change_goes_through_update_status(self):
+        data = self.open_form()
+        data.update(status='accepted', notes="Tez")
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.version, order.notes), ('accepted', 1, "Tez"))
+        self.assertTrue(OrderStatusTransition.objects.filter(order=order, to_status='accepted').exists())
+        self.assertTrue(OrderEvent.objects.filter(order_id=order.pk, event_type='status_changed').exists())
+
+    def test_disallowed_transition_is_a_form_error(self):
+        data = self.open_form()
+        data['status'] = 'served'
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('status', response.context['adminform'].form.errors)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'pending')
+
+    def test_concurrent_status_change_is_not_rolled_back(self):
+        data = self.open_form()
+        # Forma ochiq turganda ofitsiant buyurtmani keyingi holatga o‘tkazadi
+        Order.objects.get(pk=self.order.pk).update_status('accepted')
+        data['notes'] = "Admin izohi"
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("shu orada o'zgartirildi", ' '.join(response.context['adminform'].form.non_field_errors()))
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.version, order.notes), ('accepted', 1, ''))
+
+    def test_concurrent_change_after_validation_reports_error(self):
+        data = self.open_form()
+        data['status'] = 'cancelled'
+        original = Order.update_status
+
+        def racing_update_status(order, *args, **kwargs):
+            # Forma tekshiruvidan keyin, UPDATE dan oldin boshqa so‘rov ulguradi
+            Order.objects.filter(pk=order.pk).update(status='accepted', version=order.version + 1)
+            return original(order, *args, **kwargs)
+
+        with mock.patch.object(Order, 'update_status', racing_update_status):
+            response = self.client.post(self.url, data, follow=True)
+        self.assertIn("O'zgarishlar saqlanmadi", [str(message) for message in get_messages(response.wsgi_request)][0])
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.version), ('accepted', 1))
+
+    def test_other_fields_do_not_write_back_status(self):
+        data = self.open_form()
+        data['notes'] = "Deraza yonida"
+        self.assertEqual(self.client.post(self.url, data).status_code, 302)
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual((order.status, order.version, order.notes), ('pending', 0, "Deraza yonida"))
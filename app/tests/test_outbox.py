@@ -0,0 +1,156 @@
+import datetime
+from unittest import mock
+
+from django.utils import timezone
+
+from .. import outbox
+from ..models import LoyaltyTransaction, Order, OrderEvent, OutboxOffset
+from .base import RestaurantTestCase
+
+
+class RelayTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.order = self.make_order()
+        self.seen = []
+        patcher = mock.patch.dict(outbox._handlers, {'test': lambda events: self.seen.extend(e.id for e in events)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def event(self, event_id=None, **payload):
+        return OrderEvent.objects.create(
+            id=event_id, order_id=self.order.pk, restaurant_id=self.restaurant.pk,
+            event_type='status_changed', payload={'to': 'accepted', **payload},
+        ).id
+
+    def offset(self):
+        return OutboxOffset.objects.get(handler='test')
+
+    def test_processes_in_id_order_and_advances(self):
+        ids = [self.event() for _ in range(5)]
+        self.assertEqual(outbox.relay_once('test', batch_size=3), 3)
+        self.assertEqual(outbox.relay_once('test', batch_size=3), 2)
+        self.assertEqual(outbox.relay_once('test', batch_size=3), 0)
+        self.assertEqual(self.seen, ids)
+        offset = self.offset()
+        self.assertEqual((offset.last_event_id, offset.processed, offset.last_batch_size), (ids[-1], 5, 2))
+
+    def test_holds_offset_at_an_uncommitted_id(self):
+        first = self.event()
+        # first + 1 hali commit bo‘lmagan tranzaksiyaga tegishli: keyingi id ko‘rinadi, u emas
+        later = self.event(first + 2)
+        self.assertEqual(outbox.relay_once('test'), 1)
+        self.assertEqual(self.seen, [first])
+        offset = self.offset()
+        self.assertEqual(offset.last_event_id, first)
+        self.assertIsNotNone(offset.gap_since)
+        # Kutish davomida bo‘shliq birinchi ko‘rilgan vaqti o‘zgarmaydi
+        self.assertEqual(outbox.relay_once('test'), 0)
+        self.assertEqual(self.offset().gap_since, offset.gap_since)
+
+        late = self.event(first + 1)
+        self.assertEqual(outbox.relay_once('test'), 2)
+        self.assertEqual(self.seen, [first, late, later])
+        self.assertIsNone(self.offset().gap_since)
+
+    def test_slow_commit_is_not_skipped_by_created_at(self):
+        first = self.event()
+        # Tranzaksiya boshida (ancha oldin) vaqt belgisi qo‘yilgan, lekin hali commit bo‘lmagan hodisa
+        self.event(first + 2)
+        stamped_early = OrderEvent(
+            id=first + 1, order_id=self.order.pk, restaurant_id=self.restaurant.pk,
+            event_type='placed', created_at=timezone.now() - datetime.timedelta(minutes=5),
+        )
+        outbox.relay_once('test')
+        self.assertEqual(self.offset().last_event_id, first)
+        stamped_early.save()
+        outbox.relay_once('test')
+        self.assertEqual(self.seen, [first, first + 1, first + 2])
+
+    def test_expired_gap_is_skipped(self):
+        first = self.event()
+        later = self.event(first + 2)
+        outbox.relay_once('test')
+        OutboxOffset.objects.filter(handler='test').update(
+            gap_since=timezone.now() - datetime.timedelta(seconds=outbox.GAP_TIMEOUT_SECONDS + 1),
+        )
+        with self.assertLogs('app.outbox', 'WARNING'):
+            self.assertEqual(outbox.relay_once('test'), 1)
+        self.assertEqual(self.seen, [first, later])
+        offset = self.offset()
+        self.assertEqual((offset.last_event_id, offset.gap_since), (later, None))
+
+    def test_first_run_does_not_wait_for_pruned_ids(self):
+        self.event(1000)
+        self.event(1001)
+        self.assertEqual(outbox.relay_once('test'), 2)
+        self.assertIsNone(self.offset().gap_since)
+
+    def test_failing_handler_keeps_offset(self):
+        ids = [self.event() for _ in range(2)]
+        with mock.patch.dict(outbox._handlers, {'test': mock.Mock(side_effect=RuntimeError("yiqildi"))}):
+            with self.assertLogs('app.outbox', 'WARNING'):
+                self.assertEqual(outbox.relay_once('test'), 0)
+        offset = self.offset()
+        self.assertEqual(offset.last_event_id, 0)
+        self.assertIn("yiqildi", offset.last_error)
+        self.assertEqual(outbox.relay_once('test'), 2)
+        self.assertEqual(self.seen, ids)
+        self.assertEqual(self.offset().last_error, '')
+
+    def test_leased_handler_is_skipped(self):
+        self.event()
+        OutboxOffset.objects.create(handler='test', locked_until=timezone.now() + datetime.timedelta(seconds=30))
+        self.assertEqual(outbox.relay_once('test'), 0)
+        OutboxOffset.objects.filter(handler='test').update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(outbox.relay_once('test'), 1)
+
+    def test_prune_keeps_unprocessed_events(self):
+        old = timezone.now() - datetime.timedelta(days=30)
+        ids = [self.event() for _ in range(3)]
+        OrderEvent.objects.update(created_at=old)
+        for name in outbox._handlers:
+            OutboxOffset.objects.create(handler=name, last_event_id=ids[1])
+        OutboxOffset.objects.filter(handler='test').update(last_event_id=ids[0])
+        self.assertEqual(outbox.prune(keep_days=7), 1)
+        self.assertEqual(list(OrderEvent.objects.values_list('id', flat=True)), ids[1:])
+
+
+class HandlerTests(RestaurantTestCase):
+
+    def test_bulk_changes_become_one_message_per_group(self):
+        orders = [self.make_order() for _ in range(3)]
+        events = [
+            OrderEvent(order_id=order.pk, restaurant_id=self.restaurant.pk, event_type='status_changed',
+                       payload={'from': 'pending', 'to': 'accepted', 'changed_by': 'ali', 'batch': 'b1'})
+            for order in orders
+        ]
+        events.append(OrderEvent(order_id=orders[0].pk, restaurant_id=self.restaurant.pk, event_type='placed', payload={}))
+        sent = {}
+
+        async def send_all(messages_by_group):
+            sent.update(messages_by_group)
+
+        with mock.patch.object(outbox, '_send_all', send_all):
+            outbox.notify(events)
+        group = f'restaurant_{self.restaurant.pk}'
+        self.assertEqual(sent[f'{group}_customers'][0]['orders'], [order.pk for order in orders])
+        self.assertEqual(len(sent[f'{group}_owner']), 2)
+        self.assertIn("ali tomonidan", sent[f'{group}_owner'][-1]['message'])
+        self.assertEqual(len(sent[f'{group}_waiters']), 1)
+
+    def test_loyalty_is_awarded_once(self):
+        profile = self.make_profile('guest')
+        order = Order.objects.create(
+            restaurant=self.restaurant, table=self.table, user_profile=profile, total_price=25000,
+        )
+        event = OrderEvent.objects.create(
+            order_id=order.pk, restaurant_id=self.restaurant.pk, event_type='placed',
+            payload={'user_profile_id': profile.pk},
+        )
+        outbox.award_loyalty([event])
+        outbox.award_loyalty([event])
+        self.assertEqual(LoyaltyTransaction.objects.get().points, 2500)
+        profile.refresh_from_db()
+        self.assertEqual(profile.loyalty_points, 2500)
@@ -0,0 +1,112 @@
+import itertools
+from collections import Counter
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .. import cooccurrence, recommendations
+from ..models import Cart, CartItem, MenuItem, MenuItemNeighbors, OrderItem
+from .base import RestaurantTestCase
+
+
+def brute_force(lines, max_basket=cooccurrence.MAX_BASKET):
+    baskets = {}
+    for order_id, item_id in lines.tolist():
+        baskets.setdefault(order_id, []).append(item_id)
+    pairs = Counter()
+    for items in baskets.values():
+        if 1 < len(items) <= max_basket:
+            pairs.update(itertools.permutations(items, 2))
+    return pairs
+
+
+class CooccurrenceTests(SimpleTestCase):
+
+    def matrix(self, lines, **kwargs):
+        item_ids, rows, cols, counts, support = cooccurrence.cooccurrence(lines, **kwargs)
+        pairs = {(int(item_ids[r]), int(item_ids[c])): int(n) for r, c, n in zip(rows, cols, counts)}
+        return pairs, dict(zip(item_ids.tolist(), support.tolist()))
+
+    def test_small_example(self):
+        lines = np.array([[1, 10], [1, 20], [2, 10], [2, 20], [2, 30], [3, 30]])
+        pairs, support = self.matrix(lines)
+        self.assertEqual(pairs, {
+            (10, 20): 2, (20, 10): 2, (10, 30): 1, (30, 10): 1, (20, 30): 1, (30, 20): 1,
+        })
+        self.assertEqual(support, {10: 2, 20: 2, 30: 2})
+
+    def test_matches_brute_force_in_chunks(self):
+        rng = np.random.default_rng(7)
+        lines = np.array(sorted({
+            (order_id, int(item_id)) for order_id in range(300) for item_id in rng.choice(40, rng.integers(1, 8))
+        }))
+        expected = brute_force(lines, max_basket=6)
+        pairs, _support = self.matrix(lines, max_basket=6)
+        self.assertEqual(pairs, dict(expected))
+        with mock.patch.object(cooccurrence, 'PAIRS_PER_CHUNK', 50):
+            self.assertEqual(self.matrix(lines, max_basket=6)[0], dict(expected))
+
+    def test_empty_history(self):
+        pairs, support = self.matrix(np.zeros((0, 2), dtype=np.int64))
+        self.assertEqual((pairs, support), ({}, {}))
+
+    def test_top_neighbors_use_cosine_score(self):
+        # 10 hamma buyurtmada: mashhurligi tufayli 20 uchun 30 dan past turadi
+        lines = np.array([[o, 10] for o in range(6)] + [[0, 20], [1, 20], [0, 30], [1, 30]])
+        lines = lines[np.lexsort((lines[:, 1], lines[:, 0]))]
+        neighbors = cooccurrence.top_neighbors(*cooccurrence.cooccurrence(lines), k=1)
+        self.assertEqual(neighbors[20], [[30, 1.0]])
+        self.assertEqual(neighbors[10], [[20, round(2 / np.sqrt(12), 4)]])
+        # Faqat 0-buyurtma to‘liq: bir marta birga kelgan juftliklar (MIN_COUNT = 2) tashlanadi
+        self.assertEqual(cooccurrence.top_neighbors(*cooccurrence.cooccurrence(lines[:4])), {})
+
+
+class RecommendationTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.plov, self.salad, self.tea, self.cake = (
+            self.make_item(name) for name in ("Osh", "Salat", "Choy", "Tort")
+        )
+
+    def basket(self, *items, status='served'):
+        order = self.make_order(status=status)
+        OrderItem.objects.bulk_create([OrderItem(order=order, menu_item=item, quantity=1, price=1) for item in items])
+
+    def cart(self, *items):
+        profile = self.make_profile(f'guest-{Cart.objects.count()}')
+        cart = Cart.objects.create(user_profile=profile, restaurant=self.restaurant, table=self.table)
+        CartItem.objects.bulk_create([CartItem(cart=cart, menu_item=item, quantity=1) for item in items])
+        return cart
+
+    def test_rebuild_and_recommend(self):
+        for _ in range(3):
+            self.basket(self.plov, self.salad, self.tea)
+        for _ in range(3):
+            self.basket(self.plov, self.cake, status='cancelled')
+        with self.captureOnCommitCallbacks(execute=True):
+            results = cooccurrence.rebuild([self.restaurant.pk])
+        self.assertEqual((results[0]['lines'], results[0]['items']), (9, 3))
+        self.assertEqual(MenuItemNeighbors.objects.get(menu_item=self.plov).support, 3)
+
+        cart = self.cart(self.plov)
+        self.assertEqual({item.pk for item in recommendations.for_cart(cart)}, {self.salad.pk, self.tea.pk})
+        # Savatdagi va sotuvda bo‘lmagan elementlar tavsiya qilinmaydi
+        MenuItem.objects.filter(pk=self.tea.pk).update(stock_quantity=0)
+        self.assertEqual(
+            [entry['id'] for entry in recommendations.payload(self.cart(self.plov, self.salad))], [],
+        )
+        self.assertEqual(recommendations.for_cart(self.cart()), [])
+
+    def test_rebuild_invalidates_cached_neighbors(self):
+        for _ in range(2):
+            self.basket(self.plov, self.salad)
+        with self.captureOnCommitCallbacks(execute=True):
+            cooccurrence.rebuild([self.restaurant.pk])
+        self.assertEqual(recommendations.for_items(self.restaurant.pk, [self.plov.pk]), [self.salad.pk])
+        for _ in range(4):
+            self.basket(self.plov, self.tea)
+        with self.captureOnCommitCallbacks(execute=True):
+            cooccurrence.rebuild([self.restaurant.pk])
+        self.assertEqual(recommendations.for_items(self.restaurant.pk, [self.plov.pk])[0], self.tea.pk)
@@ -0,0 +1,105 @@
+import csv
+import datetime
+import io
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .. import reports
+from ..models import DailyReport, Order, OrderItem
+from .base import RestaurantTestCase, login, page_url
+
+DAY = datetime.date(2026, 10, 18)
+
+
+class DailyReportTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.other = self.make_restaurant('other')
+        self.soup, self.bread = self.make_item("Sho‘rva", price=15000), self.make_item("Non", price=3000)
+
+    def sell(self, hour, total, items=(), status='served', payment='cash', restaurant=None, discount=0):
+        order = self.make_order(status=status, restaurant=restaurant, payment_method=payment)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=item, quantity=quantity, price=item.price) for item, quantity in items
+        ])
+        created_at = timezone.make_aware(datetime.datetime.combine(DAY, datetime.time(hour)))
+        Order.objects.filter(pk=order.pk).update(created_at=created_at, total_price=total, discount_amount=discount)
+        return order
+
+    def test_collect(self):
+        self.sell(9, 33000, [(self.soup, 2), (self.bread, 1)], discount=1000)
+        self.sell(9, 9000, [(self.bread, 3)], payment='card')
+        self.sell(13, 15000, [(self.soup, 1)], status='cancelled')
+        self.sell(12, 3000, [(self.bread, 1)], restaurant=self.other)
+        # Boshqa kundagi buyurtma
+        Order.objects.filter(pk=self.sell(10, 50000).pk).update(created_at=timezone.now())
+
+        data = reports.collect(DAY)
+        report = data[self.restaurant.pk]
+        self.assertEqual(report['summary'], {
+            'orders': 2, 'revenue': 42000.0, 'average_ticket': 21000.0, 'discounts': 1000.0,
+            'cancelled': 1, 'cancelled_amount': 15000.0, 'cancellation_rate': round(1 / 3, 4),
+        })
+        self.assertEqual(report['hourly'][9], {'hour': 9, 'orders': 2, 'revenue': 42000.0})
+        self.assertEqual(report['hourly'][13]['orders'], 0)
+        self.assertEqual(
+            [(row['name'], row['quantity'], row['revenue']) for row in report['top_items']],
+            [("Non", 4, 12000.0), ("Sho‘rva", 2, 30000.0)],
+        )
+        self.assertEqual([(row['method'], row['orders']) for row in report['payments']], [('cash', 1), ('card', 1)])
+        self.assertEqual(data[self.other.pk]['summary']['revenue'], 3000.0)
+        self.assertEqual(set(reports.collect(DAY, [self.other.pk])), {self.other.pk})
+
+    def test_generate_stores_and_replaces_files(self):
+        self.sell(9, 30000, [(self.soup, 2)])
+        result = reports.generate(DAY, workers=1)
+        self.assertEqual(result['restaurants'], 2)
+        report = DailyReport.objects.get(restaurant=self.restaurant, day=DAY)
+        rows = list(csv.reader(io.StringIO(report.csv_file.read().decode('utf-8-sig'))))
+        self.assertIn(['jami', 'buyurtmalar', '1', '30000.0'], rows)
+        self.assertIn(['element', "Sho‘rva", '2', '30000.0'], rows)
+        self.assertIn("Sho‘rva", report.html_file.read().decode())
+
+        self.sell(10, 3000, [(self.bread, 1)])
+        reports.generate(DAY, workers=1)
+        report = DailyReport.objects.get(restaurant=self.restaurant, day=DAY)
+        self.assertEqual(report.data['summary']['orders'], 2)
+        self.assertIn(b'buyurtmalar,2,', report.csv_file.read())
+        # Eski fayllar o‘chiriladi: har bir hisobotda bitta CSV va bitta HTML
+        self.assertEqual(DailyReport.objects.count(), 2)
+        self.assertEqual(len([path for path in Path(self.media_root).rglob('*') if path.is_file()]), 4)
+
+    def test_process_pool_renders_the_same_files(self):
+        self.sell(9, 30000, [(self.soup, 2)])
+        reports.generate(DAY, workers=1)
+        expected = {r.restaurant_id: r.html_file.read() for r in DailyReport.objects.all()}
+        # Test tranzaksiyasi ulanishi yopilmasligi kerak
+        with mock.patch.object(reports, 'connections'):
+            reports.generate(DAY, workers=2)
+        self.assertEqual({r.restaurant_id: r.html_file.read() for r in DailyReport.objects.all()}, expected)
+
+    def test_owner_downloads_the_report(self):
+        self.sell(9, 30000, [(self.soup, 2)])
+        reports.generate(DAY, workers=1)
+        url = page_url('restaurant:download_daily_report', slug='main', day=DAY.isoformat(), fmt='csv')
+        login(self.client, self.owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="main-2026-10-18.csv"', response['Content-Disposition'])
+        self.assertEqual(
+            self.client.get(page_url('restaurant:download_daily_report', slug='main', day='2026-13-01', fmt='csv'))
+            .status_code, 404,
+        )
+        login(self.client, self.make_staff('waiter').user)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,117 @@
+import datetime
+
+from django.test import Client
+from django.utils import timezone
+
+from .. import reservations
+from ..models import Reservation, Table
+from .base import RestaurantTestCase, login, page_url
+
+
+class ReservationTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.starts_at = timezone.now().replace(hour=18, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        self.ends_at = self.starts_at + datetime.timedelta(hours=2)
+
+    def book(self, starts_at=None, ends_at=None, party_size=2):
+        return reservations.book(
+            self.restaurant.id, party_size, starts_at or self.starts_at, ends_at or self.ends_at, guest_name="Mehmon",
+        )
+
+    def test_overlapping_booking_is_refused(self):
+        first = self.book()
+        self.assertEqual(first.table_id, self.table.pk)
+        with self.assertRaises(reservations.TableUnavailable):
+            self.book(self.starts_at + datetime.timedelta(hours=1), self.ends_at + datetime.timedelta(hours=1))
+        # Yarim ochiq oraliq: oldingi band tugagan paytdan boshlash mumkin
+        after = self.book(self.ends_at, self.ends_at + datetime.timedelta(hours=1))
+        self.assertEqual(after.table_id, self.table.pk)
+
+    def test_conditional_insert_holds_with_a_stale_index(self):
+        # Indeks keshlanadi; on_commit bekor qilishi test tranzaksiyasida ishlamaydi, ya’ni indeks eskiradi
+        reservations.find_table(self.restaurant.id, 2, self.starts_at, self.ends_at)
+        self.book()
+        with self.assertRaises(reservations.TableUnavailable):
+            self.book()
+        self.assertEqual(Reservation.objects.filter(table=self.table).count(), 1)
+
+    def test_best_fit_and_cancellation(self):
+        large = Table.objects.create(restaurant=self.restaurant, table_number='2', capacity=6)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.book()
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.book()
+        self.assertEqual((first.table_id, second.table_id), (self.table.pk, large.pk))
+        with self.assertRaises(reservations.TableUnavailable):
+            self.book(party_size=8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(reservations.cancel(first))
+        self.assertEqual(reservations.find_table(self.restaurant.id, 2, self.starts_at, self.ends_at)[0], self.table.pk)
+
+    def test_merge_and_is_free(self):
+        starts, ends = reservations._merge([(10, 20), (15, 30), (40, 50)])
+        self.assertEqual((starts, ends), ([10, 40], [30, 50]))
+        self.assertTrue(reservations.is_free((starts, ends), 30, 40))
+        self.assertFalse(reservations.is_free((starts, ends), 29, 35))
+        self.assertTrue(reservations.is_free(None, 0, 100))
+
+
+class ReservationViewTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile = self.make_profile('guest')
+        self.client = Client(enforce_csrf_checks=True)
+        login(self.client, self.profile.user)
+        self.starts_at = timezone.localtime().replace(hour=18, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        self.form = {'party_size': 2, 'starts_at': self.starts_at.strftime('%Y-%m-%d %H:%M'), 'duration': 90}
+
+    def availability(self):
+        return self.client.get(page_url('restaurant:api_reservation_availability', slug=self.restaurant.slug), self.form)
+
+    def csrf_token(self):
+        # Mavjudlik so‘rovi csrftoken cookie sini o‘rnatadi
+        self.availability()
+        return self.client.cookies['csrftoken'].value
+
+    def reserve(self, token=None):
+        headers = {'X-CSRFToken': token} if token else {}
+        return self.client.post(
+            page_url('restaurant:api_reserve_table', slug=self.restaurant.slug), self.form, headers=headers,
+        )
+
+    def cancel(self, reservation_id, token=None):
+        headers = {'X-CSRFToken': token} if token else {}
+        return self.client.post(page_url('restaurant:api_cancel_reservation', reservation_id), headers=headers)
+
+    def test_booking_requires_csrf_token(self):
+        self.assertEqual(self.reserve().status_code, 403)
+        self.assertFalse(Reservation.objects.exists())
+
+        self.assertEqual(self.availability().json()['table']['id'], self.table.pk)
+        token = self.client.cookies['csrftoken'].value
+        response = self.reserve(token)
+        self.assertEqual(response.status_code, 201)
+        reservation = Reservation.objects.get()
+        self.assertEqual((reservation.user_profile_id, reservation.table_id), (self.profile.pk, self.table.pk))
+        self.assertEqual(reservation.ends_at - reservation.starts_at, datetime.timedelta(minutes=90))
+        # Ikkinchi band o‘sha vaqtga mos stol topmaydi
+        self.assertEqual(self.reserve(token).status_code, 409)
+
+    def test_cancel_requires_csrf_token(self):
+        token = self.csrf_token()
+        reservation_id = self.reserve(token).json()['reservation']['id']
+        self.assertEqual(self.cancel(reservation_id).status_code, 403)
+        self.assertEqual(Reservation.objects.get().status, 'confirmed')
+
+        response = self.cancel(reservation_id, token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Reservation.objects.get().status, 'cancelled')
+        self.assertEqual(self.cancel(reservation_id, token).status_code, 409)
+
+    def test_cannot_cancel_someone_elses_reservation(self):
+        other = reservations.book(self.restaurant.id, 2, self.starts_at, self.starts_at + datetime.timedelta(hours=1))
+        self.assertEqual(self.cancel(other.pk, self.csrf_token()).status_code, 404)
+        self.assertEqual(Reservation.objects.get().status, 'confirmed')
@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from ..staticfiles import CompressedManifestStaticFilesStorage, PrecompressedStaticFiles
+
+SCRIPT = 'console.log("salom");\n' * 40
+
+
+class CompressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        target = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(target.cleanup)
+        self.source = Path(source.name)
+        self.target = Path(target.name)
+        (self.source / 'js').mkdir()
+        (self.source / 'js' / 'app.js').write_text(SCRIPT)
+        (self.source / 'js' / 'tiny.js').write_text('1;')
+        (self.source / 'logo.png').write_bytes(b'\x89PNG' * 200)
+
+    def collect(self):
+        source = FileSystemStorage(location=self.source)
+        storage = CompressedManifestStaticFilesStorage(location=self.target, base_url='/static/')
+        paths = {}
+        for name in ('js/app.js', 'js/tiny.js', 'logo.png'):
+            with source.open(name) as handle:
+                storage.save(name, handle)
+            paths[name] = (source, name)
+        list(storage.post_process(paths))
+        return storage
+
+    def test_hashed_files_get_compressed_variants(self):
+        storage = self.collect()
+        hashed = storage.stored_name('js/app.js')
+        self.assertRegex(hashed, r'^js/app\.[0-9a-f]{12}\.js$')
+        self.assertEqual(gzip.decompress((self.target / f'{hashed}.gz').read_bytes()).decode(), SCRIPT)
+        # Kichik va siqilmaydigan fayllar uchun variant yozilmaydi
+        self.assertFalse((self.target / f"{storage.stored_name('js/tiny.js')}.gz").exists())
+        self.assertFalse(list(self.target.glob('logo*.gz')))
+        manifest = json.loads((self.target / 'staticfiles.json').read_text())
+        self.assertEqual(manifest['paths']['js/app.js'], hashed)
+
+
+class PrecompressedStaticFilesTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name)
+        (self.root / 'app.55e7cbb9ba48.js').write_text(SCRIPT)
+        (self.root / 'app.55e7cbb9ba48.js.gz').write_bytes(gzip.compress(SCRIPT.encode()))
+        (self.root / 'robots.txt').write_text('User-agent: *\n')
+        self.inner_calls = []
+
+        async def inner(scope, receive, send):
+            self.inner_calls.append(scope['path'])
+
+        self.app = PrecompressedStaticFiles(inner, root=self.root, static_url='/restarant/static/')
+
+    def request(self, path, method='GET', **headers):
+        scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'headers': [(key.lower().replace('_', '-').encode(), value.encode()) for key, value in headers.items()],
+        }
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.app(scope, None, send))
+        if not messages:
+            return None, {}, b''
+        start = messages[0]
+        return (
+            start['status'],
+            {key.decode(): value.decode() for key, value in start['headers']},
+            b''.join(message.get('body', b'') for message in messages[1:]),
+        )
+
+    def test_serves_the_gzip_variant(self):
+        status, headers, body = self.request('/restarant/static/app.55e7cbb9ba48.js', accept_encoding='br, gzip')
+        self.assertEqual((status, headers['content-encoding']), (200, 'gzip'))
+        self.assertEqual(gzip.decompress(body).decode(), SCRIPT)
+        self.assertEqual(headers['cache-control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(headers['vary'], 'Accept-Encoding')
+        self.assertTrue(headers['content-type'].startswith('text/javascript'))
+
+        status, headers, body = self.request('/restarant/static/app.55e7cbb9ba48.js')
+        self.assertNotIn('content-encoding', headers)
+        self.assertEqual(body.decode(), SCRIPT)
+
+    def test_unhashed_files_revalidate(self):
+        status, headers, _body = self.request('/restarant/static/robots.txt')
+        self.assertEqual(status, 200)
+        self.assertIn('must-revalidate', headers['cache-control'])
+        status, _headers, body = self.request('/restarant/static/robots.txt', if_none_match=headers['etag'])
+        self.assertEqual((status, body), (304, b''))
+
+    def test_head_and_stripped_script_prefix(self):
+        status, headers, body = self.request('/static/robots.txt', method='HEAD')
+        self.assertEqual((status, body), (200, b''))
+        self.assertEqual(headers['content-length'], '14')
+
+    def test_missing_and_outside_files(self):
+        self.assertEqual(self.request('/restarant/static/missing.css')[0], 404)
+        self.assertEqual(self.request('/restarant/static/../../etc/passwd')[0], 404)
+
+    def test_other_requests_reach_the_application(self):
+        self.assertEqual(self.request('/restarant/menu/')[0], None)
+        self.request('/restarant/static/robots.txt', method='POST')
+        self.assertEqual(self.inner_calls, ['/restarant/menu/', '/restarant/static/robots.txt'])
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+
+from .. import versions
+from ..models import InventoryLedger, MenuItem
+from .base import RestaurantTestCase, page_url
+
+
+class ConditionalMenuTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item("Osh", stock=5)
+        self.url = page_url('restaurant:table_menu', self.table.qr_code)
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_menu_is_not_modified(self):
+        etag = self.etag()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_menu_edit_changes_etag(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.get(pk=self.item.pk).save()
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_only_availability_flips_change_etag(self):
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            with InventoryLedger() as ledger:
+                ledger.change(self.item, -2, 'order')
+        # Sotuvda qolgan element zaxirasi sahifani eskirtirmaydi
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            with InventoryLedger() as ledger:
+                ledger.change(self.item, -3, 'order')
+        self.assertFalse(MenuItem.objects.get(pk=self.item.pk).is_available)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_live_stock_is_loaded_separately(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, f'class="live-stock" data-item-id="{self.item.pk}"')
+        self.assertContains(response, page_url('restaurant:api_table_stock', self.table.qr_code))
+        sold_out = self.make_item("Somsa", stock=0, is_available=False)
+
+        response = self.client.get(page_url('restaurant:api_table_stock', self.table.qr_code))
+        self.assertEqual(response.json(), {'stock': {str(self.item.pk): 5}})
+        self.assertNotIn(str(sold_out.pk), response.json()['stock'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        with InventoryLedger() as ledger:
+            ledger.change(self.item, -1, 'order')
+        response = self.client.get(page_url('restaurant:api_table_stock', self.table.qr_code))
+        self.assertEqual(response.json()['stock'][str(self.item.pk)], 4)
+
+    def test_unknown_table(self):
+        self.assertEqual(self.client.get(page_url('restaurant:api_table_stock', 'missing')).status_code, 404)
+
+
+class TableLookupTests(RestaurantTestCase):
+
+    def test_qr_change_drops_the_old_key(self):
+        old_qr = self.table.qr_code
+        self.assertEqual(versions.table_lookup(old_qr), (self.table.pk, self.restaurant.pk))
+        self.table.qr_code = 'new-code'
+        self.table.save()
+        self.assertIsNone(cache.get(versions.table_key(old_qr)))
+        self.assertIsNone(versions.table_lookup(old_qr))
+        self.assertEqual(versions.table_lookup('new-code'), (self.table.pk, self.restaurant.pk))
+
+    def test_moving_a_table_bumps_both_restaurants(self):
+        other = self.make_restaurant('other')
+        before = versions.restaurant_version(self.restaurant.pk), versions.restaurant_version(other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.table.restaurant = other
+            self.table.save()
+        after = versions.restaurant_version(self.restaurant.pk), versions.restaurant_version(other.pk)
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+        self.assertEqual(versions.table_lookup(self.table.qr_code), (self.table.pk, other.pk))
+
+
+class HomePageTests(RestaurantTestCase):
+
+    def test_restaurant_change_invalidates_home(self):
+        url = page_url('restaurant:home')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.restaurant.name = "Yangi nom"
+            self.restaurant.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Yangi nom")
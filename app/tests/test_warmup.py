@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import versions, warmup
+from .base import RestaurantTestCase, page_url
+
+
+class WarmRestaurantTests(RestaurantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_item("Osh")
+        # Isitish oqimlar hovuzida ishlaydi va ulanishlarni yopadi; test tranzaksiyasi ochiq qolishi kerak
+        patcher = mock.patch.object(warmup, 'connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_requests_hit_warm_caches(self):
+        result = warmup.warm_restaurant(self.restaurant.pk)
+        self.assertEqual((result['restaurant'], result['tables']), (self.restaurant.pk, 1))
+        self.assertEqual(result['payloads'], len(warmup.menu_encodings()))
+        self.assertEqual(cache.get(versions.table_key(self.table.qr_code)), (self.table.pk, self.restaurant.pk))
+        with self.assertNumQueries(0):
+            response = self.client.get(page_url('restaurant:api_table_menu', self.table.qr_code),
+                                       headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class WarmAllTests(SimpleTestCase):
+
+    def test_concurrency_limit_and_failures(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def warm_restaurant(restaurant_id):
+            with lock:
+                running.append(restaurant_id)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(restaurant_id)
+            if restaurant_id == 3:
+                raise RuntimeError("yiqildi")
+            return {'restaurant': restaurant_id, 'tables': 1, 'payloads': 2, 'seconds': 0.0}
+
+        with mock.patch.object(warmup, 'warm_restaurant', warm_restaurant), \
+                mock.patch.object(versions, 'list_version'), \
+                self.assertLogs('app.warmup', 'ERROR'):
+            results, _seconds = asyncio.run(warmup.warm_all(concurrency=2, restaurant_ids=[1, 2, 3, 4, 5]))
+        self.assertEqual([result['restaurant'] for result in results], [1, 2, 4, 5])
+        self.assertLessEqual(max(peak), 2)
+
+
+class WarmupOnStartupTests(SimpleTestCase):
+
+    def run_app(self, scope, messages=()):
+        calls = []
+        pending = list(messages)
+
+        async def inner(scope, receive, send):
+            calls.append(scope['type'])
+            if scope['type'] == 'lifespan':
+                calls.append((await receive())['type'])
+
+        async def receive():
+            return pending.pop(0)
+
+        async def main():
+            app = warmup.WarmupOnStartup(inner)
+            await app(scope, receive, None)
+            await asyncio.sleep(0)
+            return app
+
+        with mock.patch.object(warmup, 'ON_STARTUP', True), \
+                mock.patch.object(warmup, 'warm_all', mock.AsyncMock(return_value=([], 0.0))) as warm_all:
+            self.app = asyncio.run(main())
+        return calls, warm_all
+
+    def test_lifespan_startup_waits_for_warmup(self):
+        calls, warm_all = self.run_app({'type': 'lifespan'}, [{'type': 'lifespan.startup'}])
+        self.assertEqual(calls, ['lifespan', 'lifespan.startup'])
+        warm_all.assert_awaited_once()
+        self.assertTrue(self.app.started)
+
+    def test_without_lifespan_first_request_starts_it(self):
+        calls, warm_all = self.run_app({'type': 'http'})
+        self.assertEqual(calls, ['http'])
+        warm_all.assert_awaited_once()
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'restaurant'
 
@@ -10,19 +10,33 @@ urlpatterns = [
     path('restaurant/<slug:slug>/owner/', views.owner_dashboard, name='owner_dashboard'),
     path('restaurant/<slug:slug>/menu/', views.manage_menu, name='manage_menu'),
     path('restaurant/<slug:slug>/menu/delete/<int:item_id>/', views.delete_menu_item, name='delete_menu_item'),
+    path('restaurant/<slug:slug>/menu/bulk/', views.bulk_menu, name='bulk_menu'),
     path('restaurant/<slug:slug>/staff/', views.manage_staff, name='manage_staff'),
     path('restaurant/<slug:slug>/tables/', views.manage_tables, name='manage_tables'),
+    path(
+        'restaurant/<slug:slug>/reports/<str:day>.<str:fmt>',
+        views.download_daily_report,
+        name='download_daily_report',
+    ),
 
     # Waiter Panel
     path('restaurant/<slug:slug>/waiter/', views.waiter_dashboard, name='waiter_dashboard'),
     path('restaurant/<slug:slug>/order/<int:order_id>/update-status/', views.update_order_status, name='update_order_status'),
+    path('restaurant/<slug:slug>/orders/update-status/', views.bulk_update_order_status, name='bulk_update_order_status'),
     path('restaurant/<slug:slug>/stock/<int:item_id>/update/', views.update_stock, name='update_stock'),
 
-    # Customer Panel
-    path('table/<str:qr_code>/', views.table_menu, name='table_menu'),
-    path('table/<str:qr_code>/add-to-cart/', views.add_to_cart, name='add_to_cart'),
-    path('table/<str:qr_code>/place-order/', views.place_order, name='place_order'),
+    # Customer Panel (asosiy yo'l async: app.async_views)
+    path('table/<str:qr_code>/', async_views.table_menu, name='table_menu'),
+    path('table/<str:qr_code>/add-to-cart/', async_views.add_to_cart, name='add_to_cart'),
+    path('table/<str:qr_code>/place-order/', async_views.place_order, name='place_order'),
     path('order-history/', views.order_history, name='order_history'),
+    path('api/table/<str:qr_code>/menu', views.api_table_menu, name='api_table_menu'),
+    path('api/table/<str:qr_code>/menu/search', views.api_table_menu_search, name='api_table_menu_search'),
+    path('api/table/<str:qr_code>/stock', views.api_table_stock, name='api_table_stock'),
+    path('api/table/<str:qr_code>/cart', views.api_table_cart, name='api_table_cart'),
+    path('api/restaurant/<slug:slug>/availability', views.api_reservation_availability, name='api_reservation_availability'),
+    path('api/restaurant/<slug:slug>/reservations', views.api_reserve_table, name='api_reserve_table'),
+    path('api/reservations/<int:reservation_id>/cancel', views.api_cancel_reservation, name='api_cancel_reservation'),
 
     # Admin Panel
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
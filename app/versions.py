@@ -0,0 +1,247 @@
+"""
+Restoran kontenti versiyalari va shartli GET (ETag / Last-Modified).
+
+Har bir restoran uchun keshda versiya saqlanadi — oxirgi o‘zgarish vaqti
+(nanosoniyalarda). Restoran, kategoriya, menyu elementi, stol yoki rasm
+o‘zgarganda (signallar, InventoryLedger va katalog importi orqali)
+versiya tranzaksiya commit qilingandan keyin yangilanadi. Bosh sahifadagi
+restoranlar ro‘yxati uchun alohida umumiy versiya bor.
+
+Kesh tozalansa versiya hozirgi vaqt bilan qayta yaratiladi: bu faqat
+bitta ortiqcha to‘liq javobga olib keladi, eskirgan sahifaga emas.
+"""
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import caching
+
+LIST_KEY = 'content_version_restaurants'
+# Shu qadar soniya proksi/brauzer mehmon sahifasini qayta so‘ramasdan beradi
+MAX_AGE = getattr(settings, 'CONTENT_CACHE_MAX_AGE', 10)
+
+
+def restaurant_key(restaurant_id):
+    return f'content_version_restaurant_{restaurant_id}'
+
+
+def cart_key(user_id, table_id):
+    return f'content_version_cart_{user_id}_{table_id}'
+
+
+def table_key(qr_code):
+    return f'table_qr_{qr_code}'
+
+
+def identity_key(user_id):
+    return f'content_version_identity_{user_id}'
+
+
+def _get(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # add: parallel so‘rovlar bir xil versiyani oladi
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _set_on_commit(keys):
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.set_many(dict.fromkeys(keys, time.time_ns()), timeout=None))
+
+
+def restaurant_version(restaurant_id):
+    return _get(restaurant_key(restaurant_id))
+
+
+def list_version():
+    return _get(LIST_KEY)
+
+
+def cart_version(user_id, table_id):
+    return _get(cart_key(user_id, table_id))
+
+
+def identity_version(user_id):
+    return _get(identity_key(user_id))
+
+
+def card_version(restaurant_id):
+    """Bosh sahifadagi restoran kartochkasi fragmenti kaliti: kontent versiyasi va baho avlodi."""
+    return f'{restaurant_version(restaurant_id)}-{caching.ratings.generation(restaurant_id)}'
+
+
+def bump(restaurant_ids, restaurant_list=False):
+    """Berilgan restoranlar (va kerak bo‘lsa ro‘yxat) versiyasini commit dan keyin yangilaydi."""
+    keys = [restaurant_key(pk) for pk in set(restaurant_ids)]
+    if restaurant_list:
+        keys.append(LIST_KEY)
+    _set_on_commit(keys)
+
+
+def bump_carts(pairs):
+    """(user_id, table_id) juftliklari uchun savat versiyalarini commit dan keyin yangilaydi."""
+    _set_on_commit(cart_key(user_id, table_id) for user_id, table_id in set(pairs))
+
+
+def bump_identities(user_ids):
+    """Foydalanuvchilar identifikatsiyasi (app.identity) versiyasini commit dan keyin yangilaydi."""
+    _set_on_commit(identity_key(user_id) for user_id in set(user_ids) if user_id is not None)
+
+
+def table_lookup(qr_code):
+    """QR kod bo‘yicha (table_id, restaurant_id); kesh orqali, topilmasa None."""
+    key = table_key(qr_code)
+    found = cache.get(key)
+    if found is None:
+        from .models import Table
+        found = Table.objects.filter(qr_code=qr_code).values_list('id', 'restaurant_id').first()
+        if found is None:
+            return None
+        cache.set(key, found, timeout=None)
+    return tuple(found)
+
+
+def conditional_page(versions_func):
+    """
+    Shartli GET dekoratori.
+
+    `versions_func(request, *args, **kwargs)` sahifani belgilovchi versiyalar
+    ro‘yxatini (yoki None — shartli javob berilmaydi) qaytaradi. Mos ETag
+    kelsa 304 ORM va shablonlarsiz qaytariladi. Mehmonlar uchun javob umumiy
+    keshlarda MAX_AGE soniya saqlanishi mumkin, tizimga kirganlar uchun esa
+    faqat brauzerda, har safar ETag bilan tekshirilib.
+    """
+    def versions(request, *args, **kwargs):
+        if not hasattr(request, '_content_versions'):
+            # Ko‘rsatilmagan flash xabarlar bo‘lsa sahifa to‘liq chiziladi
+            pending = len(messages.get_messages(request))
+            request._content_versions = None if pending else versions_func(request, *args, **kwargs)
+        return request._content_versions
+
+    def etag_func(request, *args, **kwargs):
+        current = versions(request, *args, **kwargs)
+        if current is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else 'anon'
+        return '-'.join(str(v) for v in [*current, user])
+
+    def last_modified_func(request, *args, **kwargs):
+        current = versions(request, *args, **kwargs)
+        if current is None:
+            return None
+        return datetime.fromtimestamp(max(current) // 1_000_000_000, tz=timezone.utc)
+
+    def prepare(request, *args, **kwargs):
+        versions(request, *args, **kwargs)
+        # Dangasa request.user shu oqimda yuklanadi
+        return request.user.is_authenticated
+
+    def finish(request, response, *args, **kwargs):
+        if response.status_code not in (200, 304) or versions(request, *args, **kwargs) is None:
+            return response
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=MAX_AGE, stale_while_revalidate=MAX_AGE * 3)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # Sessiya, foydalanuvchi va versiyalar bitta oqim o‘tishida yuklanadi;
+                # condition() va finish() ularni hodisalar tsiklida so‘rovsiz o‘qiydi
+                await sync_to_async(prepare)(request, *args, **kwargs)
+                return finish(request, await conditional_view(request, *args, **kwargs), *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return finish(request, conditional_view(request, *args, **kwargs), *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _restaurant_ids_of_image(image):
+    from .models import MenuItem
+    ids = set(image.restaurants.values_list('id', flat=True))
+    ids.update(MenuItem.objects.filter(images=image).values_list('restaurant_id', flat=True))
+    return ids
+
+
+@receiver([post_save, post_delete], sender='app.Restaurant')
+def restaurant_changed(sender, instance, update_fields=None, **kwargs):
+    # O‘rtacha baho faqat bosh sahifada ko‘rsatiladi
+    only_rating = update_fields is not None and set(update_fields) == {'cached_average_rating'}
+    bump([] if only_rating else [instance.pk], restaurant_list=True)
+
+
+@receiver([post_save, post_delete], sender='app.Category')
+@receiver([post_save, post_delete], sender='app.MenuItem')
+def menu_changed(sender, instance, **kwargs):
+    bump([instance.restaurant_id])
+
+
+@receiver(pre_save, sender='app.Table')
+def table_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # QR kod yoki restoran o‘zgarsa eski QR kalit va eski restoran sahifasi ham eskiradi
+    instance._previous_lookup = None
+    if instance.pk is None or raw:
+        return
+    if update_fields is not None and not {'qr_code', 'restaurant', 'restaurant_id'} & set(update_fields):
+        return
+    instance._previous_lookup = sender.objects.filter(pk=instance.pk).values_list('qr_code', 'restaurant_id').first()
+
+
+@receiver([post_save, post_delete], sender='app.Table')
+def table_changed(sender, instance, **kwargs):
+    keys, restaurant_ids = {table_key(instance.qr_code)}, {instance.restaurant_id}
+    previous = getattr(instance, '_previous_lookup', None)
+    if previous is not None:
+        keys.add(table_key(previous[0]))
+        restaurant_ids.add(previous[1])
+    cache.delete_many(list(keys))
+    # Bosh sahifa restoranning birinchi stoliga havola beradi
+    bump(restaurant_ids, restaurant_list=True)
+
+
+# pre_delete: o‘chirishdan keyin rasm bog‘lanishlari allaqachon yo‘q
+@receiver([post_save, pre_delete], sender='app.Image')
+def image_changed(sender, instance, **kwargs):
+    bump(_restaurant_ids_of_image(instance), restaurant_list=True)
+
+
+@receiver(m2m_changed, sender='app.Restaurant_images')
+def restaurant_images_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        ids = (_restaurant_ids_of_image(instance) | set(pk_set or ())) if reverse else [instance.pk]
+        bump(ids, restaurant_list=True)
+
+
+@receiver(m2m_changed, sender='app.MenuItem_images')
+def menu_item_images_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        if reverse:
+            from .models import MenuItem
+            ids = set(MenuItem.objects.filter(pk__in=pk_set or ()).values_list('restaurant_id', flat=True))
+            ids |= _restaurant_ids_of_image(instance)
+        else:
+            ids = [instance.restaurant_id]
+        bump(ids)
@@ -1,18 +1,26 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseBadRequest
-from django.views.decorators.http import require_POST
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.views.decorators.http import require_GET, require_POST
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from django.core.cache import cache
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.db import transaction
 from django.db.models import Prefetch
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import Restaurant, Table, MenuItem, Order, OrderItem, Cart, CartItem, Staff, UserProfile, AdminDashboard
-from .forms import MenuItemForm, OrderStatusForm, TableForm, StaffForm, RegistrationForm
+from .models import Restaurant, Table, MenuItem, Order, OrderItem, Cart, CartItem, UserProfile, AdminDashboard
+from .models import InvalidStatusTransition, StaleOrderError, InventoryLedger, DailyReport, MenuItemRating, Reservation
+from .forms import MenuItemForm, OrderStatusForm, TableForm, StaffForm, RegistrationForm, ReservationForm
+from . import archive, catalog, identity, menu_api, recommendations, reservations, versions
+from .jobs import enqueue
 from django.contrib.auth.models import User
 from django.contrib.auth import login
+import csv
+import datetime
 import json
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
@@ -30,10 +38,28 @@ def send_notification(group_name, message):
         }
     )
 
+def _home_versions(request):
+    return [versions.list_version()]
+
+
+def _table_menu_versions(request, qr_code):
+    found = versions.table_lookup(qr_code)
+    if found is None:
+        return None
+    table_id, restaurant_id = found
+    current = [versions.restaurant_version(restaurant_id)]
+    if request.user.is_authenticated:
+        current.append(versions.cart_version(request.user.pk, table_id))
+    return current
+
 # Home View
+@versions.conditional_page(_home_versions)
 def home(request):
     """Display the homepage with a list of active restaurants."""
-    restaurants = Restaurant.objects.filter(is_active=True).select_related('owner').prefetch_related('images')
+    restaurants = list(Restaurant.objects.filter(is_active=True).select_related('owner').prefetch_related('images'))
+    for restaurant in restaurants:
+        # Kartochka fragmenti keshi kaliti (restaurant_card.html)
+        restaurant.card_version = versions.card_version(restaurant.id)
     return render(request, 'restaurant/home.html', {'restaurants': restaurants})
 
 
@@ -67,30 +93,75 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 # Owner Panel Views
+ITEM_RATING_ORDERINGS = {
+    'worst': ('average', '-rating_count'),
+    'best': ('-average', '-rating_count'),
+    'count': ('-rating_count', 'average'),
+}
+
 @login_required
 def owner_dashboard(request, slug):
     """Restaurant owner dashboard with statistics, recent orders, and staff."""
-    restaurant = get_object_or_404(Restaurant, slug=slug, owner=request.user)
+    restaurant = identity.owned_restaurant(request, slug)
     statistics = restaurant.get_statistics()
+    status_timings = restaurant.get_status_timings(since=timezone.now() - timezone.timedelta(days=30))
     orders = restaurant.orders.select_related('table', 'user_profile', 'assigned_waiter').order_by('-created_at')[:10]
     staff = restaurant.staff.select_related('user').all()
+    # forecast_demand ishi tomonidan oldindan hisoblangan tavsiyalar
+    restock_suggestions = restaurant.restock_suggestions.filter(
+        suggested_quantity__gt=0
+    ).select_related('menu_item')[:10]
+    # manage.py daily_reports tomonidan oldindan tayyorlangan hisobotlar
+    daily_reports = restaurant.daily_reports.only('day', 'data', 'csv_file', 'html_file')[:7]
+    # Elementlar baholari gistogrammasi sharhlar yozilganda yig'iladi (app.item_ratings)
+    ratings_sort = request.GET.get('ratings', 'worst')
+    if ratings_sort not in ITEM_RATING_ORDERINGS:
+        ratings_sort = 'worst'
+    item_ratings = restaurant.item_ratings.filter(rating_count__gt=0).select_related('menu_item').only(
+        'menu_item__name', *MenuItemRating.HISTOGRAM_FIELDS,
+    ).order_by(*ITEM_RATING_ORDERINGS[ratings_sort])[:15]
     return render(request, 'restaurant/owner_dashboard.html', {
         'restaurant': restaurant,
         'statistics': statistics,
+        'status_timings': status_timings,
         'orders': orders,
         'staff': staff,
+        'restock_suggestions': restock_suggestions,
+        'daily_reports': daily_reports,
+        'item_ratings': item_ratings,
+        'ratings_sort': ratings_sort,
     })
 
+@login_required
+def download_daily_report(request, slug, day, fmt):
+    """Serve a stored end-of-day report file to the restaurant owner."""
+    restaurant = identity.owned_restaurant(request, slug)
+    if fmt not in ('csv', 'html'):
+        raise Http404("Noma'lum format")
+    try:
+        day = datetime.date.fromisoformat(day)
+    except ValueError:
+        raise Http404("Noto'g'ri sana")
+    report = get_object_or_404(DailyReport, restaurant=restaurant, day=day)
+    report_file = report.csv_file if fmt == 'csv' else report.html_file
+    if not report_file:
+        raise Http404("Hisobot fayli topilmadi")
+    return FileResponse(
+        report_file.open('rb'),
+        as_attachment=fmt == 'csv',
+        filename=f"{restaurant.slug}-{day.isoformat()}.{fmt}",
+    )
+
 @login_required
 def manage_menu(request, slug):
     """Manage menu items for a restaurant (add/edit/delete)."""
-    restaurant = get_object_or_404(Restaurant, slug=slug, owner=request.user)
+    restaurant = identity.owned_restaurant(request, slug)
     if request.method == 'POST':
         form = MenuItemForm(request.POST, request.FILES, restaurant=restaurant)
         if form.is_valid():
-            menu_item = form.save(commit=False)
-            menu_item.restaurant = restaurant
-            menu_item.save()
+            # Rasmlar form.save da qo'shiladi: element avval saqlangan bo'lishi kerak
+            form.instance.restaurant = restaurant
+            menu_item = form.save()
             messages.success(request, "Menyu elementi qo'shildi!")
             send_notification(
                 f'restaurant_{restaurant.id}_waiters',
@@ -106,10 +177,68 @@ def manage_menu(request, slug):
         'form': form,
     })
 
+# Ommaviy menyu tahriridagi qatorlar chegarasi
+MENU_SYNC_MAX_ROWS = 5000
+
+@login_required
+def bulk_menu(request, slug):
+    """
+    Spreadsheet-style menu editing. GET exports the current menu as CSV; POST takes the
+    edited CSV/JSON (upload `file` or request body), diffs it against the current rows and
+    applies it in one transaction. `?dry_run=1` only returns the diff. Items absent from
+    the sheet are deleted only with `delete_missing=1`; the POST needs a CSRF token.
+    """
+    restaurant = identity.owned_restaurant(request, slug)
+    if request.method == 'GET':
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{restaurant.slug}-menu.csv"'
+        writer = csv.DictWriter(response, fieldnames=catalog.MENU_EXPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(catalog.export_menu(restaurant))
+        return response
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['GET', 'POST'])
+
+    upload = request.FILES.get('file')
+    try:
+        if upload:
+            fmt = 'json' if upload.name.lower().endswith('.json') else 'csv'
+            text = upload.read().decode('utf-8-sig')
+        else:
+            fmt = 'json' if request.content_type == 'application/json' else 'csv'
+            text = request.body.decode('utf-8-sig')
+        rows = catalog.parse_rows(text, fmt)
+    except (UnicodeDecodeError, catalog.CatalogImportError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if not rows:
+        # Bo'sh jadval butun menyuni o'chirish ma'nosida qabul qilinmaydi
+        return JsonResponse({'error': "Jadval bo'sh"}, status=400)
+    if len(rows) > MENU_SYNC_MAX_ROWS:
+        return JsonResponse({'error': f"Qatorlar soni {MENU_SYNC_MAX_ROWS} dan oshmasligi kerak"}, status=400)
+
+    flags = {**request.GET.dict(), **request.POST.dict()}
+    sync = catalog.MenuSync(
+        restaurant, delete_missing=flags.get('delete_missing', '').lower() in catalog.TRUE_VALUES,
+    ).diff(rows)
+    dry_run = flags.get('dry_run', '').lower() in catalog.TRUE_VALUES
+    if dry_run or sync.errors:
+        return JsonResponse(dict(sync.summary(), applied=False), status=400 if sync.errors else 200)
+    summary = sync.apply()
+    if sync.has_changes:
+        # Har bir element uchun emas, butun tahrir uchun bitta bildirishnoma
+        send_notification(
+            f'restaurant_{restaurant.id}_waiters',
+            {'message': (
+                f"Menyu yangilandi: {len(summary['create'])} ta qo'shildi, "
+                f"{len(summary['update'])} ta o'zgardi, {len(summary['delete'])} ta o'chirildi."
+            )}
+        )
+    return JsonResponse(dict(summary, applied=True))
+
 @login_required
 def delete_menu_item(request, slug, item_id):
     """Delete a menu item."""
-    restaurant = get_object_or_404(Restaurant, slug=slug, owner=request.user)
+    restaurant = identity.owned_restaurant(request, slug)
     menu_item = get_object_or_404(MenuItem, id=item_id, restaurant=restaurant)
     menu_item.delete()
     messages.success(request, "Menyu elementi o'chirildi!")
@@ -122,7 +251,7 @@ def delete_menu_item(request, slug, item_id):
 @login_required
 def manage_staff(request, slug):
     """Manage restaurant staff (add/edit/delete)."""
-    restaurant = get_object_or_404(Restaurant, slug=slug, owner=request.user)
+    restaurant = identity.owned_restaurant(request, slug)
     if request.method == 'POST':
         form = StaffForm(request.POST)
         if form.is_valid():
@@ -143,7 +272,7 @@ def manage_staff(request, slug):
 @login_required
 def manage_tables(request, slug):
     """Manage restaurant tables (add/edit/delete)."""
-    restaurant = get_object_or_404(Restaurant, slug=slug, owner=request.user)
+    restaurant = identity.owned_restaurant(request, slug)
     if request.method == 'POST':
         form = TableForm(request.POST)
         if form.is_valid():
@@ -165,8 +294,7 @@ def manage_tables(request, slug):
 @login_required
 def waiter_dashboard(request, slug):
     """Waiter dashboard to view and manage orders and inventory."""
-    restaurant = get_object_or_404(Restaurant, slug=slug)
-    staff = get_object_or_404(Staff, user=request.user, restaurant=restaurant, role='waiter')
+    restaurant, staff = identity.staff_member(request, slug, 'waiter')
     orders = restaurant.orders.filter(
         status__in=['pending', 'accepted', 'preparing']
     ).select_related('table', 'user_profile', 'assigned_waiter').prefetch_related('items__menu_item')
@@ -175,7 +303,9 @@ def waiter_dashboard(request, slug):
         'restaurant': restaurant,
         'orders': orders,
         'menu_items': menu_items,
+        'reservations': reservations.upcoming(restaurant.id),
         'staff': staff,
+        'status_choices': Order.STATUS_CHOICES,
     })
 
 @login_required
@@ -183,42 +313,94 @@ def waiter_dashboard(request, slug):
 @csrf_exempt
 def update_order_status(request, slug, order_id):
     """Update the status of an order and notify relevant parties."""
-    restaurant = get_object_or_404(Restaurant, slug=slug)
-    staff = get_object_or_404(Staff, user=request.user, restaurant=restaurant, role='waiter')
+    restaurant, staff = identity.staff_member(request, slug, 'waiter')
     order = get_object_or_404(Order, id=order_id, restaurant=restaurant)
-    form = OrderStatusForm(request.POST, instance=order)
+    # instance berilmaydi: ModelForm tekshiruvda order.status ni oldindan o'zgartirib qo'yadi
+    form = OrderStatusForm(request.POST)
     if form.is_valid():
-        order.update_status(form.cleaned_data['status'], waiter=staff)
-        send_notification(
-            f'restaurant_{restaurant.id}_customers',
-            {'message': f"Buyurtma #{order.id} holati: {order.get_status_display()}"}
-        )
-        send_notification(
-            f'restaurant_{restaurant.id}_owner',
-            {'message': f"Buyurtma #{order.id} holati {staff.user.username} tomonidan yangilandi: {order.get_status_display()}"}
-        )
-        return JsonResponse({'status': 'success', 'new_status': order.get_status_display()})
+        expected_version = request.POST.get('version')
+        try:
+            order.update_status(
+                form.cleaned_data['status'],
+                waiter=staff,
+                expected_version=int(expected_version) if expected_version else None,
+            )
+        except InvalidStatusTransition as exc:
+            return HttpResponseBadRequest(str(exc))
+        except StaleOrderError:
+            order.refresh_from_db(fields=['status', 'version'])
+            return JsonResponse({
+                'status': 'conflict',
+                'current_status': order.status,
+                'version': order.version,
+            }, status=409)
+        except ValueError:
+            return HttpResponseBadRequest("Noto'g'ri versiya")
+        # Mijoz va egasiga bildirishnomalar outbox releyi orqali yuboriladi (app.outbox)
+        return JsonResponse({'status': 'success', 'new_status': order.get_status_display(), 'version': order.version})
     return HttpResponseBadRequest(json.dumps(form.errors))
 
+# Bitta ommaviy so'rovdagi buyurtmalar chegarasi (UPDATE shartidagi (id, version) juftlari)
+BULK_STATUS_MAX_ORDERS = 200
+
+@login_required
+@require_POST
+def bulk_update_order_status(request, slug):
+    """
+    Transition many orders at once. JSON body:
+    {"status": "served", "orders": [{"id": 1, "version": 3}, {"id": 2, "status": "ready"}]}.
+    Returns a per-order result so the client can reconcile its table, with
+    status 409 if any order was stale. CSRF-protected: the dashboard sends the token in the X-CSRFToken header.
+    """
+    restaurant, staff = identity.staff_member(request, slug, 'waiter')
+    try:
+        body = json.loads(request.body)
+        default_status = body.get('status')
+        changes = []
+        for entry in body['orders']:
+            version = entry.get('version')
+            changes.append((
+                int(entry['id']),
+                entry.get('status', default_status),
+                int(version) if version is not None else None,
+            ))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return HttpResponseBadRequest("Noto'g'ri so'rov: {'orders': [{'id', 'status', 'version'}]} kutilgan")
+    if not changes or len(changes) > BULK_STATUS_MAX_ORDERS:
+        return HttpResponseBadRequest(f"Buyurtmalar soni 1 dan {BULK_STATUS_MAX_ORDERS} gacha bo'lishi kerak")
+    known = {status for status, _label in Order.STATUS_CHOICES}
+    unknown = sorted({str(status) for _id, status, _version in changes if status not in known})
+    if unknown:
+        return HttpResponseBadRequest(f"Noma'lum holat: {', '.join(unknown)}")
+    # Bildirishnomalar outbox releyi orqali har bir guruhga bitta xabar bo'lib yuboriladi (app.outbox)
+    results = Order.bulk_update_status(restaurant.id, changes, waiter=staff)
+    outcomes = [result['result'] for result in results.values()]
+    # Eskirgan versiyali qator bo'lsa 409 (update_order_status kabi); qolganlari baribir yangilangan
+    return JsonResponse({
+        'updated': outcomes.count('updated'),
+        'conflicts': outcomes.count('conflict'),
+        'results': [dict(result, id=order_id) for order_id, result in results.items()],
+    }, status=409 if 'conflict' in outcomes else 200)
+
 @login_required
 @require_POST
 @csrf_exempt
 def update_stock(request, slug, item_id):
     """Update menu item stock and log the transaction."""
-    restaurant = get_object_or_404(Restaurant, slug=slug)
-    staff = get_object_or_404(Staff, user=request.user, restaurant=restaurant, role='waiter')
+    restaurant, staff = identity.staff_member(request, slug, 'waiter')
     menu_item = get_object_or_404(MenuItem, id=item_id, restaurant=restaurant)
     try:
         quantity = int(request.POST.get('quantity', 0))
         if quantity != 0:
-            menu_item.stock_quantity += quantity
-            menu_item.is_available = menu_item.stock_quantity > 0
-            menu_item.save()
-            InventoryTransaction.objects.create(
-                menu_item=menu_item,
-                quantity=quantity,
-                description=f"Xodim {request.user.username} tomonidan zaxira yangilandi"
-            )
+            with InventoryLedger() as ledger:
+                changed = ledger.change(
+                    menu_item,
+                    quantity,
+                    'restock' if quantity > 0 else 'adjustment',
+                    f"Xodim {request.user.username} tomonidan zaxira yangilandi"
+                )
+            if not changed:
+                return HttpResponseBadRequest("Zaxira yetarli emas")
             send_notification(
                 f'restaurant_{restaurant.id}_owner',
                 {'message': f"{menu_item.name} zaxirasi {quantity} dona o'zgardi."}
@@ -229,125 +411,158 @@ def update_stock(request, slug, item_id):
         return HttpResponseBadRequest("Noto'g'ri miqdor kiritildi")
 
 # Customer Panel Views
-def table_menu(request, qr_code):
+# Menyu elementlari baholar gistogrammasi bilan (1:1) bitta so'rovda olinadi
+MENU_PREFETCH = (
+    Prefetch('menu_items', queryset=MenuItem.objects.select_related('rating_histogram')),
+    'menu_items__images',
+)
+
+# Customer API
+@require_GET
+def api_table_menu(request, qr_code):
+    """Compact, pre-serialised menu document, cached per menu version and encoding."""
+    found = versions.table_lookup(qr_code)
+    if found is None:
+        return JsonResponse({'error': "Stol topilmadi"}, status=404)
+    _table_id, restaurant_id = found
+    try:
+        fields = menu_api.parse_fields(request.GET.get('fields'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    encoding = menu_api.negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+    version = versions.restaurant_version(restaurant_id)
+    # If-None-Match vergul bilan ajratiladi: ETag ichida vergul bo'lmasligi kerak
+    etag = quote_etag(f"{version}-{'.'.join(fields)}-{encoding or 'identity'}")
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            menu_api.menu_payload(restaurant_id, version, fields, encoding),
+            content_type='application/json; charset=utf-8',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(version // 1_000_000_000)
+    patch_cache_control(response, public=True, max_age=versions.MAX_AGE, stale_while_revalidate=versions.MAX_AGE * 3)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+@require_GET
+def api_table_menu_search(request, qr_code):
+    """Price-range filtering, sorting and pagination of available items, done in the database."""
+    found = versions.table_lookup(qr_code)
+    if found is None:
+        return JsonResponse({'error': "Stol topilmadi"}, status=404)
+    _table_id, restaurant_id = found
+    sort = request.GET.get('sort', 'price')
+    if sort not in menu_api.SEARCH_ORDERINGS:
+        return JsonResponse({'error': f"Noma'lum saralash: {sort}"}, status=400)
+    try:
+        fields = menu_api.parse_fields(request.GET.get('fields'))
+        low = menu_api.parse_price(request.GET.get('min_price'))
+        high = menu_api.parse_price(request.GET.get('max_price'))
+        page = int(request.GET.get('page', 1))
+        if page < 1:
+            raise ValueError("Sahifa raqami 1 dan kichik bo'lmasligi kerak")
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(menu_api.search(
+        restaurant_id, fields, query=request.GET.get('q', '').strip(), low=low, high=high, sort=sort, page=page,
+    ))
+
+@require_GET
+def api_table_stock(request, qr_code):
+    """Live stock of the items on sale; kept out of the versioned menu so sales do not invalidate it."""
+    found = versions.table_lookup(qr_code)
+    if found is None:
+        return JsonResponse({'error': "Stol topilmadi"}, status=404)
+    _table_id, restaurant_id = found
+    response = JsonResponse({'stock': menu_api.restaurant_stock(restaurant_id)})
+    add_never_cache_headers(response)
+    return response
+
+@require_GET
+def api_table_cart(request, qr_code):
+    """Current cart lines for the light client; the menu document itself is user-independent."""
     table = get_object_or_404(Table, qr_code=qr_code)
-    restaurant = table.restaurant
-    categories = restaurant.categories.prefetch_related('menu_items__images').all()
-    
     cart = None
-
     if request.user.is_authenticated:
-        user_profile = UserProfile.objects.filter(user=request.user).first()
-        if user_profile:
-            cart, _ = Cart.objects.get_or_create(
-                user_profile=user_profile,
-                restaurant=restaurant,
-                table=table
-            )
-    print(qr_code)
-    return render(request, 'restaurant/customer_menu.html', {
-        'restaurant': restaurant,
-        'table': table,
-        'categories': categories,
-        'cart': cart,
-        'qr_code': qr_code,
+        cart = Cart.objects.filter(
+            user_profile__user=request.user, restaurant_id=table.restaurant_id, table=table
+        ).only('id').first()
+    lines = menu_api.cart_lines(cart.id) if cart else []
+    return JsonResponse({
+        'fields': menu_api.CART_FIELDS,
+        'items': lines,
+        'total': menu_api.cart_total(cart.id) if cart else 0,
+        # Zaxira versiyalangan menyu hujjatida yo‘q: savatdagi elementlar uchun jonli qiymat
+        'stock': menu_api.stock_levels([line[0] for line in lines]) if lines else {},
+        'login_required': not request.user.is_authenticated,
+    })
+
+def _restaurant_id(slug):
+    return Restaurant.objects.filter(slug=slug, is_active=True).values_list('id', flat=True).first()
+
+@require_GET
+@ensure_csrf_cookie
+def api_reservation_availability(request, slug):
+    """
+    Best-fit free table for ?party_size=&starts_at=&duration= (minutes), from the per-day index.
+    Also sets the csrftoken cookie: booking and cancelling are POSTs that must echo it in X-CSRFToken.
+    """
+    restaurant_id = _restaurant_id(slug)
+    if restaurant_id is None:
+        return JsonResponse({'error': "Restoran topilmadi"}, status=404)
+    form = ReservationForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
+    table = reservations.find_table(restaurant_id, data['party_size'], data['starts_at'], data['ends_at'])
+    return JsonResponse({
+        'available': table is not None,
+        'table': dict(zip(('id', 'number', 'capacity'), table)) if table else None,
+        'starts_at': data['starts_at'].isoformat(),
+        'ends_at': data['ends_at'].isoformat(),
     })
 
+@login_required
 @require_POST
-@csrf_exempt
-def add_to_cart(request, qr_code):
-    """Add items to the cart."""
-    table = get_object_or_404(Table, qr_code=qr_code)
-    restaurant = table.restaurant
-    menu_item_id = request.POST.get('menu_item_id')
+def api_reserve_table(request, slug):
+    """Book the best-fit free table; the insert is conditional, so concurrent bookings cannot overlap."""
+    restaurant_id = _restaurant_id(slug)
+    if restaurant_id is None:
+        return JsonResponse({'error': "Restoran topilmadi"}, status=404)
+    form = ReservationForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    data = form.cleaned_data
     try:
-        quantity = int(request.POST.get('quantity', 1))
-        if quantity < 1:
-            return HttpResponseBadRequest("Miqdor 1 dan kam bo'lmasligi kerak")
-        menu_item = get_object_or_404(MenuItem, id=menu_item_id, restaurant=restaurant, is_available=True)
-        
-        user_profile = None
-        if request.user.is_authenticated:
-            user_profile = get_object_or_404(UserProfile, user=request.user)
-        
-        cart, created = Cart.objects.get_or_create(
-            user_profile=user_profile,
-            restaurant=restaurant,
-            table=table
+        reservation = reservations.book(
+            restaurant_id, data['party_size'], data['starts_at'], data['ends_at'],
+            user_profile_id=request.identity.profile_id,
+            guest_name=data['guest_name'] or request.user.get_full_name() or request.user.username,
+            phone_number=data['phone_number'],
+            notes=data['notes'],
         )
-        
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            menu_item=menu_item,
-            defaults={'quantity': quantity}
-        )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-        
-        if menu_item.reduce_stock(quantity):
-            send_notification(
-                f'restaurant_{restaurant.id}_waiters',
-                {'message': f"Yangi savat elementi: {menu_item.name} ({quantity} dona)"}
-            )
-            return JsonResponse({
-                'status': 'success',
-                'cart_total': cart.total_price,
-                'item_name': menu_item.name,
-                'quantity': cart_item.quantity
-            })
-        return HttpResponseBadRequest("Zaxira yetarli emas")
-    except ValueError:
-        return HttpResponseBadRequest("Noto'g'ri miqdor kiritildi")
+    except reservations.TableUnavailable as exc:
+        return JsonResponse({'error': str(exc)}, status=409)
+    return JsonResponse({'status': 'success', 'reservation': reservations.as_dict(reservation)}, status=201)
 
+@login_required
 @require_POST
-@csrf_exempt
-def place_order(request, qr_code):
-    """Place an order from the cart."""
-    table = get_object_or_404(Table, qr_code=qr_code)
-    restaurant = table.restaurant
-    user_profile = get_object_or_404(UserProfile, user=request.user) if request.user.is_authenticated else None
-    cart = get_object_or_404(Cart, restaurant=restaurant, table=table, user_profile=user_profile)
-    
-    if not cart.items.exists():
-        return HttpResponseBadRequest("Savat bo'sh")
-    
-    order = Order.objects.create(
-        restaurant=restaurant,
-        user_profile=user_profile,
-        table=table,
-        total_price=cart.total_price,
-        status='pending'
-    )
-    
-    for item in cart.items.all():
-        OrderItem.objects.create(
-            order=order,
-            menu_item=item.menu_item,
-            quantity=item.quantity,
-            price=item.menu_item.effective_price
-        )
-    
-    order.calculate_estimated_delivery()
-    if user_profile:
-        user_profile.award_loyalty_points(order)
-    
-    cart.items.all().delete()
-    send_notification(
-        f'restaurant_{restaurant.id}_waiters',
-        {'message': f"Yangi buyurtma #{order.id} qabul qilindi"}
-    )
-    send_notification(
-        f'restaurant_{restaurant.id}_owner',
-        {'message': f"Yangi buyurtma #{order.id} qabul qilindi"}
-    )
-    return JsonResponse({'status': 'success', 'order_id': order.id})
+def api_cancel_reservation(request, reservation_id):
+    """Cancel one of the customer's own confirmed reservations."""
+    reservation = get_object_or_404(Reservation, id=reservation_id, user_profile_id=request.identity.profile_id)
+    if not reservations.cancel(reservation):
+        return JsonResponse({'error': "Faqat tasdiqlangan bandni bekor qilish mumkin"}, status=409)
+    return JsonResponse({'status': 'success', 'reservation': reservations.as_dict(reservation)})
 
 @login_required
 def order_history(request):
     """Display the order history for a customer."""
     user_profile = get_object_or_404(UserProfile, user=request.user)
-    orders = user_profile.orders.select_related('restaurant', 'table', 'assigned_waiter').prefetch_related('items__menu_item').order_by('-created_at')
+    orders = archive.order_history(user_profile)
     return render(request, 'restaurant/order_history.html', {'orders': orders})
 
 # Admin Panel Views
@@ -360,7 +575,8 @@ def admin_dashboard(request):
     
     dashboard = AdminDashboard.objects.first()
     if dashboard:
-        dashboard.update_statistics()
+        # Oxirgi hisoblangan statistika ko'rsatiladi, yangilash fon ishchisida
+        enqueue('update_admin_statistics', unique=True)
     else:
         dashboard = AdminDashboard.objects.create()
         dashboard.update_statistics()
@@ -0,0 +1,123 @@
+"""
+Jarayon ishga tushganda keshlarni oldindan to‘ldirish.
+
+Har bir faol restoran uchun: kontent versiyasi, stollarning QR kod
+yozuvlari (versions.table_lookup), menyu API hujjatlari (standart
+maydonlar, har bir siqish turi), o‘rtacha baho va bosh sahifa kartochkasi
+fragmenti. Restoranlar bir vaqtda, ko‘pi bilan `concurrency` ta oqimda
+isitiladi.
+
+WarmupOnStartup ASGI o‘rami buni lifespan startup da (uvicorn) yoki
+lifespan bo‘lmasa (daphne) birinchi so‘rov kelganda fon vazifasi sifatida
+bir marta bajaradi.
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.loader import render_to_string
+
+from . import menu_api, versions
+from .models import Restaurant, Table
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = getattr(settings, 'CACHE_WARMUP_CONCURRENCY', 4)
+ON_STARTUP = getattr(settings, 'CACHE_WARMUP_ON_STARTUP', True)
+
+
+def menu_encodings():
+    return [None, 'gzip'] + (['br'] if menu_api.brotli is not None else [])
+
+
+def warm_restaurant(restaurant_id):
+    """Bitta restoran keshlarini to‘ldiradi; {'restaurant', 'tables', 'payloads', 'seconds'} qaytaradi."""
+    started = time.perf_counter()
+    try:
+        restaurant = Restaurant.objects.prefetch_related('images').get(pk=restaurant_id)
+        tables = Table.objects.filter(restaurant_id=restaurant_id).exclude(qr_code='').values_list('qr_code', 'id')
+        cache.set_many(
+            {versions.table_key(qr_code): (table_id, restaurant_id) for qr_code, table_id in tables}, timeout=None
+        )
+        version = versions.restaurant_version(restaurant_id)
+        encodings = menu_encodings()
+        for encoding in encodings:
+            menu_api.menu_payload(restaurant_id, version, menu_api.DEFAULT_FIELDS, encoding)
+        # Kartochka baho va birinchi stolni ham hisoblab fragment keshiga yozadi
+        restaurant.card_version = versions.card_version(restaurant_id)
+        render_to_string('restaurant/includes/restaurant_card.html', {'restaurant': restaurant})
+        return {
+            'restaurant': restaurant_id,
+            'tables': len(tables),
+            'payloads': len(encodings),
+            'seconds': time.perf_counter() - started,
+        }
+    finally:
+        # Oqimlar hovuzidagi ulanishlar ochiq qolmasin
+        connections.close_all()
+
+
+async def warm_all(concurrency=CONCURRENCY, restaurant_ids=None):
+    """Faol restoranlarni parallel isitadi; natijalar ro‘yxati va umumiy vaqtni qaytaradi."""
+    started = time.perf_counter()
+    if restaurant_ids is None:
+        restaurant_ids = await sync_to_async(
+            lambda: list(Restaurant.objects.filter(is_active=True).values_list('id', flat=True))
+        )()
+    await sync_to_async(versions.list_version)()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(restaurant_id):
+        async with semaphore:
+            try:
+                return await sync_to_async(warm_restaurant, thread_sensitive=False)(restaurant_id)
+            except Exception:
+                logger.exception("Restoran %s keshini isitib bo‘lmadi", restaurant_id)
+                return None
+
+    results = await asyncio.gather(*(warm(restaurant_id) for restaurant_id in restaurant_ids))
+    return [result for result in results if result], time.perf_counter() - started
+
+
+class WarmupOnStartup:
+    """ASGI o‘rami: jarayonda bir marta keshlarni isitadi."""
+
+    def __init__(self, application, concurrency=CONCURRENCY):
+        self.application = application
+        self.concurrency = concurrency
+        self.started = not ON_STARTUP
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.application(scope, self.receive_after_warmup(receive), send)
+        if not self.started:
+            # Lifespan yo‘q: isitish so‘rovni kutdirmasdan fonda bajariladi
+            self.started = True
+            asyncio.ensure_future(self.warm())
+        return await self.application(scope, receive, send)
+
+    def receive_after_warmup(self, receive):
+        async def wrapped():
+            message = await receive()
+            if message['type'] == 'lifespan.startup' and not self.started:
+                # startup.complete faqat isitishdan keyin yuboriladi: jarayon trafikni issiq keshlar bilan oladi
+                self.started = True
+                await self.warm()
+            return message
+        return wrapped
+
+    async def warm(self):
+        try:
+            results, seconds = await warm_all(self.concurrency)
+        except Exception:
+            logger.exception("Keshlarni isitish muvaffaqiyatsiz")
+            return
+        logger.info(
+            "Keshlar isitildi: %d restoran, %d stol, %.2f s (eng sekin restoran %.2f s)",
+            len(results), sum(result['tables'] for result in results), seconds,
+            max((result['seconds'] for result in results), default=0),
+        )
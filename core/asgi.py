@@ -1,16 +1,25 @@
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Ilova modullari (modellar, sozlamalar) import qilinishidan oldin Django sozlanadi
+django_asgi_app = get_asgi_application()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import app.routing
+from app.caching import InvalidationListener
+from app.staticfiles import PrecompressedStaticFiles
+from app.warmup import WarmupOnStartup
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
-
-application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+# InvalidationListener har bir jarayonda L1 keshni kanal qatlami xabarlari bilan tozalaydi;
+# WarmupOnStartup jarayon ishga tushganda faol restoranlar keshlarini isitadi
+application = WarmupOnStartup(InvalidationListener(ProtocolTypeRouter({
+    # Statik fayllar Django'ga yetmasdan STATIC_ROOT dan beriladi
+    "http": PrecompressedStaticFiles(django_asgi_app),
     "websocket": AuthMiddlewareStack(
         URLRouter(
             app.routing.websocket_urlpatterns
         )
     ),
-})
\ No newline at end of file
+})))
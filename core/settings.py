@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +53,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.identity.IdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'social_django.middleware.SocialAuthExceptionMiddleware',
@@ -141,17 +143,77 @@ LANGUAGES = [
     ('ru', 'Русский'),
     ('en', 'English'),
 ]
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            'hosts': [('127.0.0.1', 6379)],
+# Standart kanal qatlami jarayon ichida (InMemory). CHANNEL_SOCKET berilsa bitta serverdagi barcha
+# jarayonlar Unix soketdagi brokerdan foydalanadi (avval manage.py run_channel_broker ishga tushiriladi);
+# bir nechta server uchun CHANNEL_REDIS_HOST berilsa Redis ishlatiladi (channels_redis kerak).
+# Bir nechta ASGI jarayoni ishlasa ulardan biri majburiy: InMemory da WebSocket xabarlari va kesh
+# bekor qilish boshqa jarayonlarga yetmaydi (app.caching L1 muddatini qisqartiradi va ogohlantiradi)
+if os.getenv('CHANNEL_REDIS_HOST'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [(os.getenv('CHANNEL_REDIS_HOST'), int(os.getenv('CHANNEL_REDIS_PORT', 6379)))],
+            },
+        },
+    }
+elif os.getenv('CHANNEL_SOCKET'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'app.ipc_layer.IPCChannelLayer',
+            'CONFIG': {
+                'path': os.getenv('CHANNEL_SOCKET'),
+                'expiry': 60,
+                'group_expiry': 86400,
+                'capacity': 100,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
         },
+    }
+# Umumiy (L2) kesh barcha ASGI jarayonlari uchun bitta; ishlab chiqarishda Redis ham bo‘lishi mumkin:
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        # Kesh fayllari loyiha daraxtidan tashqarida; DJANGO_CACHE_DIR bilan o‘zgartiriladi
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'restarant-cache')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
     },
 }
+# Jarayon ichidagi L1 (app.caching): yozuvlar soni va maksimal yashash vaqti (soniya);
+# jarayonlararo kanal qatlami bo‘lmasa (InMemory) L1 yozuvlari LOCAL_TIMEOUT_WITHOUT_BROADCAST yashaydi
+TWO_TIER_CACHE = {
+    'LOCAL_MAX_ENTRIES': 2048,
+    'LOCAL_TIMEOUT': 30,
+    'LOCAL_TIMEOUT_WITHOUT_BROADCAST': 1,
+}
+# Jarayon ishga tushganda faol restoranlar keshlarini isitish (app.warmup, manage.py warm_caches)
+CACHE_WARMUP_ON_STARTUP = True
+CACHE_WARMUP_CONCURRENCY = 4
+# Buyurtma hodisalari outbox releyi (manage.py run_outbox_relay)
+OUTBOX_BATCH_SIZE = 500
+# Commit bo‘lmagan (yetishmayotgan) hodisa id si oldida siljish shuncha soniya kutadi
+OUTBOX_GAP_TIMEOUT_SECONDS = 60
+# Mehmonlar uchun menyu va bosh sahifani proksi/brauzer shuncha soniya keshlaydi (app.versions)
+CONTENT_CACHE_MAX_AGE = 10
+# Stol band qilish (app.reservations): eng uzun va standart davomiylik (daqiqa), katta stolga ortiqcha o‘rindiqlar
+RESERVATION_MAX_MINUTES = 360
+RESERVATION_DEFAULT_MINUTES = 120
+RESERVATION_MAX_EXTRA_SEATS = 4
+
 STATIC_URL = '/restarant/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']  # ← DIQQAT: STATICFILES_DIR emas, STATICFILES_DIRS bo'lishi kerak
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic: xeshlangan nomlar va .gz/.br variantlari; ASGI da app.staticfiles.PrecompressedStaticFiles beradi
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'app.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 MEDIA_URL = '/restarant/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
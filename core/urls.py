@@ -2,7 +2,6 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import include
 from django.contrib.auth.views import LoginView, LogoutView
-from app.views import home,table_menu
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views